@@ -1,21 +1,45 @@
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import FileResponse
-import os
+from typing import Literal, Optional
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import Response
+from subsystems.assets.store import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    etag_matches,
+    get_asset_store,
+)
+from subsystems.assets.images import get_image_store
 
-router = APIRouter()
+# How long a request waits for an image that is still being written by the image store
+PENDING_WRITE_TIMEOUT = 10.0
 
-IMAGE_BASE_DIR = os.path.abspath("images")
+router = APIRouter()
 
 
 @router.get("/image")
-def get_image(path: str = Query(..., description="Relative image path like 'scenarios/foo.png'")):
-    # Previene path traversal
-    if ".." in path or path.startswith("/") or "\\" in path:
-        raise HTTPException(status_code=400, detail="Invalid path")
+def get_image(path: str = Query(..., description="Relative image path like 'scenarios/foo.png'"),
+              w: Optional[int] = Query(None, description="Max width of a downscaled variant (256, 512 or 1024)"),
+              format: Literal["png", "webp"] = Query("png", description="Image format"),
+              v: Optional[str] = Query(None, description="Content version (the ETag); makes the response cacheable forever"),
+              if_none_match: Optional[str] = Header(default=None)):
+    store = get_asset_store()
+    try:
+        asset = store.get(path, width=w, fmt=format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        if not get_image_store().wait(path, timeout=PENDING_WRITE_TIMEOUT):
+            raise HTTPException(status_code=404, detail="Image not found")
+        asset = store.get(path, width=w, fmt=format)
 
-    full_path = os.path.join(IMAGE_BASE_DIR, path)
+    # A variant still being rendered falls back to the original: that one must not be cached as the variant
+    served_as_requested = asset.is_variant or (w is None and format == "png")
+    immutable = served_as_requested and v is not None and v == asset.etag.split("-", 1)[0]
+    headers = {
+        "ETag": f'"{asset.etag}"',
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+    }
 
-    if not os.path.exists(full_path):
-        raise HTTPException(status_code=404, detail="Image not found")
+    if etag_matches(if_none_match, asset.etag):
+        return Response(status_code=304, headers=headers)
 
-    return FileResponse(full_path, media_type="image/png")
+    return Response(content=store.read(asset), media_type=asset.media_type, headers=headers)
@@ -1,50 +1,94 @@
-from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket
 from api.services import generator
 from api.services.generation_status import get_status
 from api.services.actions import move_player, trigger_character_activation_condition
 from api.schemas.status import GenerationStatusModel
 from api.services import game_state
-from api.schemas.requests import GenerationRequest, ActionRequest, ActionType, ChoiceRequest
+from api.schemas.requests import GenerationRequest, ActionRequest, ActionType, ActionPayload, ChoiceRequest
 from api.schemas.responses import ActionResponse, FollowUpAction, FollowUpActionType
 from fastapi.responses import StreamingResponse
 from api.services.narrative_streamer import generate_narrative_stream
+from api.services.event_streams import open_event_stream, require_new_run
+from api.services.state_channel import StateChannel, DEFAULT_MAX_IN_FLIGHT
+from api.services.encoding import ResponseEncoding, negotiate_encoding
+from api.services.sessions import resolve_session, session_scope, stream_in_session, create_session, delete_session
+from core_game.game_state.sessions import SessionContext, use_session
 router = APIRouter()
 
+# Every route works on the session named by the X-Session-Id header (the default session if absent).
+# State payloads are JSON or msgpack, optionally compressed, depending on the Accept and
+# Accept-Encoding headers (see api/services/encoding.py).
+
+@router.post("/sessions")
+def open_session():
+    return create_session()
+
+@router.delete("/sessions/{session_id}")
+def close_session(session_id: str):
+    return delete_session(session_id)
+
 @router.post("/generate", response_model=GenerationStatusModel)
-def launch_generation(payload: GenerationRequest):
+def launch_generation(payload: GenerationRequest, session: SessionContext = Depends(resolve_session)):
     user_prompt = payload.user_prompt
-    if get_status().status == "running":
-        raise HTTPException(status_code=400, detail="A generation is already in progress")
-    return generator.start_generation(user_prompt)
+    with session_scope(session):
+        if get_status().status == "running":
+            raise HTTPException(status_code=400, detail="A generation is already in progress")
+        return generator.start_generation(user_prompt)
 
 @router.get("/generate/status", response_model=GenerationStatusModel)
-def generation_status():
-    return generator.get_generation_status()
+def generation_status(session: SessionContext = Depends(resolve_session)):
+    # No lock: polling must not wait for other requests of the session.
+    with use_session(session):
+        return generator.get_generation_status()
 
 @router.get("/state/full")
-def get_full_state():
-    status = get_status().status
-
-    if status == "running":
-        raise HTTPException(status_code=409, detail="Game state is still being generated")
-    if status == "error":
-        raise HTTPException(status_code=500, detail="Generation failed. No valid game state available")
-    
-    return game_state.get_full_game_state()
+def get_full_state(session: SessionContext = Depends(resolve_session),
+                   encoding: ResponseEncoding = Depends(negotiate_encoding)):
+    with session_scope(session):
+        status = get_status().status
+
+        if status == "running":
+            raise HTTPException(status_code=409, detail="Game state is still being generated")
+        if status == "error":
+            raise HTTPException(status_code=500, detail="Generation failed. No valid game state available")
+        
+        return encoding.response(game_state.get_full_game_state_encoded(encoding))
 
 @router.get("/state/changes")
-def get_incremental_changes(from_checkpoint: str = Query(..., description="ID of the checkpoint to diff from")):
-    status = get_status().status
-
-    if status == "running":
-        raise HTTPException(status_code=409, detail="Game state is still being generated")
-    if status == "error":
-        raise HTTPException(status_code=500, detail="Generation failed. No valid game state available")
-    
-    return game_state.get_incremental_changes(from_checkpoint)
+def get_incremental_changes(from_checkpoint: str = Query(..., description="ID of the checkpoint to diff from"),
+                            session: SessionContext = Depends(resolve_session),
+                            encoding: ResponseEncoding = Depends(negotiate_encoding)):
+    """
+    Changes since `from_checkpoint`. Answers 410 when the checkpoint was evicted from the
+    checkpoint store: the client must resync with /state/full.
+    """
+    with session_scope(session):
+        status = get_status().status
+
+        if status == "running":
+            raise HTTPException(status_code=409, detail="Game state is still being generated")
+        if status == "error":
+            raise HTTPException(status_code=500, detail="Generation failed. No valid game state available")
+        
+        return encoding.encode_response(game_state.get_incremental_changes(from_checkpoint))
+
+@router.websocket("/state/ws")
+async def state_channel(websocket: WebSocket,
+                        from_checkpoint: Optional[str] = Query(None, description="Checkpoint the client already has; full state if absent"),
+                        max_in_flight: int = Query(DEFAULT_MAX_IN_FLIGHT, ge=1, le=64),
+                        session: SessionContext = Depends(resolve_session)):
+    """
+    Pushes state changesets and generation status updates as they happen (msgpack binary
+    messages). The client acknowledges them with {"ack": seq}; see api.services.state_channel.
+    """
+    await websocket.accept()
+    with use_session(session):
+        await StateChannel(session, websocket, from_checkpoint, max_in_flight).run()
 
 @router.post("/action", response_model=ActionResponse)
-def perform_game_action(action_request: ActionRequest):
+def perform_game_action(action_request: ActionRequest, session: SessionContext = Depends(resolve_session),
+                        encoding: ResponseEncoding = Depends(negotiate_encoding)):
     """
     Unified endpoint to process any player action.
     Returns state changes and the next action for the client to perform.
@@ -57,8 +101,14 @@ def perform_game_action(action_request: ActionRequest):
     # that generates the incremental changeset. For example:
     # changeset = game_state.get_incremental_changes_from_action(from_checkpoint_id, action_request)
     
-    print(f"Action '{action_type.value}' received from checkpoint '{from_checkpoint_id}'")
+    print(f"Action '{action_type.value}' received from checkpoint '{from_checkpoint_id}' (session '{session.session_id}')")
+
+    with session_scope(session):
+        response = _dispatch_action(action_type, payload, from_checkpoint_id)
+    return encoding.encode_response(response.model_dump())
 
+
+def _dispatch_action(action_type: ActionType, payload: ActionPayload, from_checkpoint_id: str) -> ActionResponse:
     # Example logic for different actions
     if action_type == ActionType.MOVE_PLAYER:
         if not payload.new_scenario_id:
@@ -85,16 +135,27 @@ def perform_game_action(action_request: ActionRequest):
 
 
 @router.get("/event/stream/{event_id}", tags=["Game Events"])
-async def stream_narrative_event(event_id: str):
+async def stream_narrative_event(event_id: str, session: SessionContext = Depends(resolve_session),
+                                 last_event_id: Optional[str] = Header(default=None)):
     """
     Initiates a streaming connection (Server-Sent Events) for a narrative event.
     Sends dialogue/action fragments in real-time.
+    Generation keeps running if the client disconnects: reconnecting with the Last-Event-ID
+    header replays the messages it missed and continues the stream.
     """
-    # Delegates all logic to the generator we created in the service.
-    return StreamingResponse(generate_narrative_stream(event_id), media_type="text/event-stream")
+    try:
+        after_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Last-Event-ID must be an integer")
+
+    stream = open_event_stream(session, event_id, after_id, lambda: generate_narrative_stream(event_id))
+    return StreamingResponse(
+        stream_in_session(session, stream),
+        media_type="text/event-stream",
+    )
 
 @router.post("/event/{event_id}/choice", tags=["Game Events"])
-def post_player_choice(event_id: str, payload: ChoiceRequest):
+def post_player_choice(event_id: str, payload: ChoiceRequest, session: SessionContext = Depends(resolve_session)):
     """
     Almacena la elección del jugador para el evento (PlayerNPCConversationEvent).
     Luego el cliente debe volver a llamar a GET /event/stream/{event_id} 
@@ -103,15 +164,18 @@ def post_player_choice(event_id: str, payload: ChoiceRequest):
     from simulated.singleton import SimulatedGameStateSingleton
     from core_game.game_event.domain import PlayerNPCConversationEvent
 
-    state = SimulatedGameStateSingleton.get_instance()
-    event = state.events.get_state().get_current_running_event()
-
-    if not event:
-        raise HTTPException(404, "No hay ningún evento en curso.")
-    if event.id != event_id:
-        raise HTTPException(400, f"El evento activo ('{event.id}') no coincide con '{event_id}'.")
-    if not isinstance(event, PlayerNPCConversationEvent):
-        raise HTTPException(422, "Este evento no admite elecciones de jugador.")
-
-    event.set_player_choice(payload.choice_label)
-    return {"status": "choice accepted"}
\ No newline at end of file
+    with session_scope(session):
+        state = SimulatedGameStateSingleton.get_instance()
+        event = state.events.get_state().get_current_running_event()
+
+        if not event:
+            raise HTTPException(404, "No hay ningún evento en curso.")
+        if event.id != event_id:
+            raise HTTPException(400, f"El evento activo ('{event.id}') no coincide con '{event_id}'.")
+        if not isinstance(event, PlayerNPCConversationEvent):
+            raise HTTPException(422, "Este evento no admite elecciones de jugador.")
+
+        state.events.get_state().set_player_choice(event_id, payload.choice_label)
+        # The stream request that follows must generate the rest, not replay the previous run
+        require_new_run(session, event_id)
+        return {"status": "choice accepted"}
\ No newline at end of file
@@ -2,35 +2,39 @@ from typing import Dict, Any
 from api.schemas.responses import ActionResponse, FollowUpAction, FollowUpActionType, StartNarrativeStreamPayload
 from simulated.singleton import SimulatedGameStateSingleton
 from simulated.game_state import SimulatedGameState
-from api.services.game_state import get_incremental_changes
+from api.services.game_state import get_incremental_changes, require_checkpoint
 from core_game.game_event.domain import BaseGameEvent, NPCConversationEvent, PlayerNPCConversationEvent, NarratorInterventionEvent
 from typing import Optional
-from core_game.game_event.activation_conditions.domain import CharacterInteractionOption
+from fastapi import HTTPException
 
 def check_and_start_event_triggers(game_state: SimulatedGameState) -> Optional[BaseGameEvent]:
-    available_events = game_state.events.get_state().get_events_by_status("AVAILABLE")
+    events = game_state.events.get_state()
+    player = game_state.read_only_characters.get_player()
+    player_scenario_id = player.present_in_scenario if player else None
 
     last_event: Optional[BaseGameEvent] = None
 
-    for event in available_events:
-        for condition in event.activation_conditions:                    
-            if condition.is_met(game_state):
-                last_event=event
-                game_state.events.get_state().start_event(event.id, condition.id)
-                break
+    # Only the conditions that could fire in the current state are evaluated.
+    for event, condition in events.get_trigger_candidates(player_scenario_id):
+        if event.status != "AVAILABLE":
+            continue  # already started through another of its conditions
+        if condition.is_met(game_state):
+            events.start_event(event.id, condition.id)
+            last_event = events.find_event(event.id)
     return last_event
 
 def _try_start_character_activation_condition_event(game_state: SimulatedGameState, activation_condition_id: str) -> Optional[BaseGameEvent]:
-    available_events = game_state.events.get_state().get_events_by_status("AVAILABLE")
-    for event in available_events:
-        for condition in event.activation_conditions:
-            if isinstance(condition, CharacterInteractionOption):
-                if condition.id == activation_condition_id:
-                    game_state.events.get_state().start_event(event.id, condition.id)
-                    return event
-    return None
+    events = game_state.events.get_state()
+    found = events.find_available_interaction_option(activation_condition_id)
+    if not found:
+        return None
+    event, condition = found
+    events.start_event(event.id, condition.id)
+    return events.find_event(event.id)
 
 def move_player(scenario_id: str, from_checkpoint_id: str) -> ActionResponse:
+    # Before moving: with an expired checkpoint the move couldn't be sent back to the client (410)
+    require_checkpoint(from_checkpoint_id)
     try:
         game_state = SimulatedGameStateSingleton.get_instance()
         player = game_state.read_only_characters.get_player()
@@ -63,7 +67,8 @@ def move_player(scenario_id: str, from_checkpoint_id: str) -> ActionResponse:
         changeset = get_incremental_changes(from_checkpoint_id)
         return ActionResponse(changeset=changeset, follow_up_action=follow_up)
 
-
+    except HTTPException:
+        raise
     except Exception as e:
         return ActionResponse(
             changeset={},
@@ -72,6 +77,7 @@ def move_player(scenario_id: str, from_checkpoint_id: str) -> ActionResponse:
         )
 
 def trigger_character_activation_condition(activation_condition_id: str, from_checkpoint_id: str) -> ActionResponse:
+    require_checkpoint(from_checkpoint_id)  # before starting any event, see move_player
     try:
 
         game_state = SimulatedGameStateSingleton.get_instance()
@@ -121,7 +127,8 @@ def trigger_character_activation_condition(activation_condition_id: str, from_ch
         changeset = get_incremental_changes(from_checkpoint_id)
         return ActionResponse(changeset=changeset, follow_up_action=follow_up)
 
-
+    except HTTPException:
+        raise
     except Exception as e:
         return ActionResponse(
             changeset={},
@@ -0,0 +1,147 @@
+"""
+Encoding of state payloads (changesets, full states, action responses) negotiated per request.
+
+Media type, from the Accept header:
+    application/json (default)  orjson, same layout as before
+    application/msgpack         MessagePack (also accepted as application/x-msgpack and
+                                application/vnd.msgpack)
+
+Content encoding, from Accept-Encoding: zstd is preferred over gzip, and small bodies are
+sent uncompressed.
+
+The layout is the same in both formats: the `changes` tree of the changeset detectors.
+MessagePack maps are written with their keys sorted, so every object of a given kind has its
+fields in the same order and a client can decode it with a hand-written reader (no
+reflection). The X-Changeset-Format header versions this layout.
+"""
+from __future__ import annotations
+
+import gzip
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import orjson
+import ormsgpack
+import zstandard
+from fastapi import Header
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+MEDIA_JSON = "application/json"
+MEDIA_MSGPACK = "application/msgpack"
+_MSGPACK_ALIASES = {MEDIA_MSGPACK, "application/x-msgpack", "application/vnd.msgpack"}
+
+CHANGESET_FORMAT_VERSION = "1"
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 5
+
+_zstd = threading.local()
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError(f"Type is not serializable: {type(obj).__name__}")
+
+
+def encode_json(payload: Any) -> bytes:
+    return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def encode_msgpack(payload: Any) -> bytes:
+    # Sorted keys (incompatible with non-string keys, which changesets don't have)
+    return ormsgpack.packb(payload, default=_default, option=ormsgpack.OPT_SORT_KEYS | ormsgpack.OPT_SERIALIZE_PYDANTIC)
+
+
+ENCODERS: Dict[str, Callable[[Any], bytes]] = {MEDIA_JSON: encode_json, MEDIA_MSGPACK: encode_msgpack}
+
+
+def _parse_header(value: Optional[str]) -> List[Tuple[str, float]]:
+    """The (token, q) pairs of an Accept-like header."""
+    items = []
+    for part in (value or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, val = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(val)
+                except ValueError:
+                    q = 0.0
+        items.append((token, q))
+    return items
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """MEDIA_MSGPACK when the client accepts it and doesn't rank JSON higher, MEDIA_JSON otherwise."""
+    msgpack_q = json_q = 0.0
+    for token, q in _parse_header(accept):
+        if token in _MSGPACK_ALIASES:
+            msgpack_q = max(msgpack_q, q)
+        elif token == MEDIA_JSON:
+            json_q = max(json_q, q)
+    return MEDIA_MSGPACK if msgpack_q > 0 and msgpack_q >= json_q else MEDIA_JSON
+
+
+def negotiate_content_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """"zstd", "gzip" or None (identity)."""
+    accepted = {token: q for token, q in _parse_header(accept_encoding)}
+    for encoding in ("zstd", "gzip"):
+        if accepted.get(encoding, 0.0) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "zstd":
+        compressor = getattr(_zstd, "compressor", None)
+        if compressor is None:
+            compressor = _zstd.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        return compressor.compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+class ResponseEncoding:
+    """The media type and content encoding negotiated for one request."""
+
+    def __init__(self, media_type: str = MEDIA_JSON, content_encoding: Optional[str] = None):
+        self.media_type = media_type
+        self.content_encoding = content_encoding
+
+    def encode(self, payload: Any) -> bytes:
+        return ENCODERS[self.media_type](payload)
+
+    def response(self, body: bytes, status_code: int = 200) -> Response:
+        """Builds the response for a body already encoded with `encode` (or spliced from encoded parts)."""
+        headers = {"Vary": "Accept, Accept-Encoding", "X-Changeset-Format": CHANGESET_FORMAT_VERSION}
+        if self.content_encoding and len(body) >= MIN_COMPRESS_BYTES:
+            body = compress(body, self.content_encoding)
+            headers["Content-Encoding"] = self.content_encoding
+        return Response(content=body, status_code=status_code, media_type=self.media_type, headers=headers)
+
+    def encode_response(self, payload: Any, status_code: int = 200) -> Response:
+        return self.response(self.encode(payload), status_code)
+
+    def envelope(self, checkpoint_id: str, encoded_changes: bytes) -> bytes:
+        """{"checkpoint_id", "changes"} around changes already encoded in this media type."""
+        if self.media_type == MEDIA_MSGPACK:
+            # Map of 2 entries, keys sorted like the rest of the layout
+            return (b"\x82" + ormsgpack.packb("changes") + encoded_changes
+                    + ormsgpack.packb("checkpoint_id") + ormsgpack.packb(checkpoint_id))
+        return b'{"checkpoint_id":' + orjson.dumps(checkpoint_id) + b',"changes":' + encoded_changes + b"}"
+
+
+def negotiate_encoding(accept: Optional[str] = Header(default=None),
+                       accept_encoding: Optional[str] = Header(default=None)) -> ResponseEncoding:
+    """Route dependency returning the encoding negotiated from the Accept and Accept-Encoding headers."""
+    return ResponseEncoding(negotiate_media_type(accept), negotiate_content_encoding(accept_encoding))
@@ -0,0 +1,149 @@
+"""
+Resumable SSE streams for narrative events.
+
+The messages a narrative event produces are appended to a per-event log with increasing ids
+(sent as the SSE `id:` field). Generation runs in a task detached from the request, so a
+client that loses the connection doesn't stop it: reconnecting with the `Last-Event-ID`
+header replays what it missed and keeps following the run, instead of generating the
+conversation again.
+
+A request for an event whose run is still in progress attaches to it. Otherwise a new run is
+started, unless Last-Event-ID says the client hasn't received everything the last run sent,
+in which case only the missing messages are replayed. After a player choice (see
+require_new_run) the next request always starts a new run, whatever its Last-Event-ID.
+"""
+from __future__ import annotations
+
+import asyncio
+import weakref
+from collections import OrderedDict
+from typing import AsyncGenerator, Callable, List, Optional, Tuple
+
+from core_game.game_state.sessions import SessionContext, use_session
+
+# Logs kept per session; the oldest finished ones are dropped first
+MAX_EVENT_LOGS_PER_SESSION = 8
+
+
+class EventStreamLog:
+    """Append-only log of the SSE messages of one narrative event, over all its runs."""
+
+    def __init__(self, event_id: str):
+        self.event_id = event_id
+        self._entries: List[Tuple[int, str]] = []
+        self._run_start = 1
+        self._task: Optional[asyncio.Task] = None
+        self._producing = False
+        self._changed = asyncio.Event()
+        # Set when something (a player choice) means the next request must continue the event
+        self.new_run_required = False
+
+    @property
+    def last_id(self) -> int:
+        return self._entries[-1][0] if self._entries else 0
+
+    @property
+    def run_start_id(self) -> int:
+        """Id of the first message of the last run."""
+        return self._run_start
+
+    @property
+    def running(self) -> bool:
+        return self._producing
+
+    def append(self, message: str) -> int:
+        message_id = self.last_id + 1
+        self._entries.append((message_id, message))
+        self._notify()
+        return message_id
+
+    def start_run(self, session: SessionContext, stream_factory: Callable[[], AsyncGenerator[str, None]]) -> int:
+        """Starts generating a new run in a detached task. Returns the id its first message will get."""
+        if self.running:
+            raise ValueError(f"Event '{self.event_id}' is already streaming")
+        self._run_start = self.last_id + 1
+        self._producing = True
+        self.new_run_required = False
+        self._task = asyncio.create_task(self._produce(session, stream_factory))
+        return self._run_start
+
+    async def _produce(self, session: SessionContext, stream_factory: Callable[[], AsyncGenerator[str, None]]) -> None:
+        from api.services.sessions import run_holding_lock
+
+        with use_session(session):
+            try:
+                # The run changes the state (messages, event status, triggers) next to the requests of the session
+                async for message in run_holding_lock(session, stream_factory()):
+                    session.touch()
+                    self.append(message)
+            except Exception as e:
+                print(f"[EventStream] Run of event '{self.event_id}' failed: {e}")
+            finally:
+                self._producing = False
+                self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self, after_id: int) -> AsyncGenerator[str, None]:
+        """
+        Yields the messages with id greater than `after_id` as SSE events, waiting for new ones
+        while the run is in progress. Ends once the run is finished and everything was sent.
+        """
+        position = self._index_after(after_id)
+        while True:
+            while position < len(self._entries):
+                message_id, message = self._entries[position]
+                position += 1
+                yield f"id: {message_id}\n{message}"
+            if not self.running:
+                return
+            await self._changed.wait()
+
+    def _index_after(self, after_id: int) -> int:
+        # Ids are consecutive from 1
+        return min(max(after_id, 0), len(self._entries))
+
+
+_logs: "weakref.WeakKeyDictionary[SessionContext, OrderedDict[str, EventStreamLog]]" = weakref.WeakKeyDictionary()
+
+
+def get_event_log(session: SessionContext, event_id: str) -> EventStreamLog:
+    """The log of the event in the session, created if needed."""
+    logs = _logs.setdefault(session, OrderedDict())
+    log = logs.get(event_id)
+    if log is None:
+        log = logs[event_id] = EventStreamLog(event_id)
+        for old_id, old_log in list(logs.items()):
+            if len(logs) <= MAX_EVENT_LOGS_PER_SESSION:
+                break
+            if not old_log.running and old_id != event_id:
+                del logs[old_id]
+    logs.move_to_end(event_id)
+    return log
+
+
+def require_new_run(session: SessionContext, event_id: str) -> None:
+    """Makes the next request of the event start a new run instead of replaying the last one."""
+    log = _logs.get(session, {}).get(event_id)
+    if log is not None:
+        log.new_run_required = True
+
+
+def open_event_stream(session: SessionContext, event_id: str, last_event_id: Optional[int],
+                      stream_factory: Callable[[], AsyncGenerator[str, None]]) -> AsyncGenerator[str, None]:
+    """
+    The SSE stream for a request of `event_id`: attaches to the run in progress, replays what
+    the client missed after `last_event_id`, or starts a new run with `stream_factory`.
+    """
+    log = get_event_log(session, event_id)
+    if log.running:
+        after_id = last_event_id if last_event_id is not None else log.run_start_id - 1
+        print(f"[EventStream] Attaching to the run of event '{event_id}' after id {after_id}.")
+        return log.follow(after_id)
+    if last_event_id is not None and last_event_id < log.last_id and not log.new_run_required:
+        print(f"[EventStream] Replaying event '{event_id}' after id {last_event_id}.")
+        return log.follow(last_event_id)
+    first_id = log.start_run(session, stream_factory)
+    return log.follow(first_id - 1)
@@ -1,6 +1,7 @@
 from core_game.game_state.singleton import GameStateSingleton
 from simulated.singleton import SimulatedGameStateSingleton
 from versioning.deltas.checkpoints.changeset import ChangesetCheckpoint
+from versioning.deltas.store import CheckpointExpiredError
 from versioning.deltas.detectors.changeset.root import ChangesetDetector
 from versioning.deltas.detectors.changeset.characters.collection import CharactersDetector
 from versioning.deltas.detectors.changeset.characters.entity import CharacterDetector
@@ -10,36 +11,43 @@ from core_game.map.schemas import GameMapModel
 from core_game.character.schemas import CharactersModel
 from core_game.game_event.schemas import GameEventsManagerModel
 from fastapi import HTTPException
+from api.services.encoding import ResponseEncoding
 
-def get_full_game_state():
+def get_full_game_state_encoded(encoding: ResponseEncoding) -> bytes:
+    """
+    The full state as {"checkpoint_id", "changes"} in the negotiated media type. The changes are
+    built once per version of the state and encoded once per media type, see
+    StateCheckpointManager.get_full_state.
+    """
     cp_manager = SimulatedGameStateSingleton.get_checkpoint_manager()
+    checkpoint_id, snapshot = cp_manager.get_full_state()
+    return encoding.envelope(checkpoint_id, snapshot.encoded_changes(encoding.media_type, encoding.encode))
 
-    empty_cp = cp_manager.create_empty_checkpoint(ChangesetCheckpoint)
 
-    changeset = cp_manager.generate_changeset(from_id=empty_cp)
-
-    current_cp_id = cp_manager.create_checkpoint(
-        ChangesetCheckpoint,
-    )
-
-    cp_manager.delete_checkpoint(empty_cp)
-
-    return {
-        "checkpoint_id": current_cp_id,
-        "changes": changeset.get("changes") if changeset else {}
-    }
-
-
-def get_incremental_changes(from_checkpoint_id: str):
+def require_checkpoint(from_checkpoint_id: str) -> None:
+    """
+    Raises 410 if the checkpoint expired and 404 if it doesn't exist. Actions call it before
+    changing the state, so a client with a stale checkpoint resyncs before acting.
+    """
     cp_manager = SimulatedGameStateSingleton.get_checkpoint_manager()
-    
     try:
-        from_cp=cp_manager.get_checkpoint(from_checkpoint_id)
+        cp_manager.get_checkpoint(from_checkpoint_id)
+    except CheckpointExpiredError:
+        # Evicted from the checkpoint store: the client must get /state/full again
+        raise HTTPException(
+            status_code=410,
+            detail=f"Checkpoint '{from_checkpoint_id}' expired, resync with /state/full"
+        )
     except RuntimeError:
         raise HTTPException(
             status_code=404,
             detail=f"Checkpoint '{from_checkpoint_id}' not found"
         )
+
+
+def get_incremental_changes(from_checkpoint_id: str):
+    cp_manager = SimulatedGameStateSingleton.get_checkpoint_manager()
+    require_checkpoint(from_checkpoint_id)
     
     try:
         changeset = cp_manager.generate_changeset(from_id=from_checkpoint_id)
@@ -49,7 +57,7 @@ def get_incremental_changes(from_checkpoint_id: str):
             detail=f"Failed to generate changeset: {str(e)}"
         )
     
-    new_checkpoint_id = cp_manager.create_checkpoint(ChangesetCheckpoint)
+    new_checkpoint_id = cp_manager.create_checkpoint(ChangesetCheckpoint, based_on=from_checkpoint_id)
 
     cp_manager.delete_checkpoint(from_checkpoint_id)
 
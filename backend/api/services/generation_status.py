@@ -1,32 +1,37 @@
 from typing import Literal
 from api.schemas.status import GenerationStatusModel
+from core_game.game_state.sessions import current_session
 
-# Dict for internal state
-_current_status: dict = {
-    "status": "idle",
-    "progress": 0.0,
-    "message": "Waiting to start generation...",
-    "detail": "You can poll /generate/status to track progress"
-}
+# The status lives in the session bound to the current context, so every session
+# tracks its own generation. Changes are announced to the session's change listeners
+# (the state channel pushes them to the client).
 
 def update_global_progress(global_progress: float, message: str = ""):
-    _current_status["progress"] = global_progress
-    _current_status["message"] = message
+    status = current_session().generation_status
+    status["progress"] = global_progress
+    status["message"] = message
+    current_session().notify_changed("status")
 
 def set_done():
-    _current_status["status"] = "done"
-    _current_status["progress"] = 1.0
-    _current_status["message"] = "Generation completed"
+    status = current_session().generation_status
+    status["status"] = "done"
+    status["progress"] = 1.0
+    status["message"] = "Generation completed"
+    current_session().notify_changed("status")
 
 def set_error(message: str):
-    _current_status["status"] = "error"
-    _current_status["progress"] = 0.0
-    _current_status["message"] = message
+    status = current_session().generation_status
+    status["status"] = "error"
+    status["progress"] = 0.0
+    status["message"] = message
+    current_session().notify_changed("status")
 
 def reset():
-    _current_status["status"] = "running"
-    _current_status["progress"] = 0.0
-    _current_status["message"] = "Starting generation..."
+    status = current_session().generation_status
+    status["status"] = "running"
+    status["progress"] = 0.0
+    status["message"] = "Starting generation..."
+    current_session().notify_changed("status")
 
 def get_status() -> GenerationStatusModel:
-    return GenerationStatusModel(**_current_status)
+    return GenerationStatusModel(**current_session().generation_status)
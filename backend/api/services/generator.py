@@ -1,4 +1,5 @@
 from threading import Thread
+from contextvars import copy_context
 from api.services.generation_status import (
     update_global_progress,
     set_done,
@@ -11,6 +12,7 @@ from subsystems.generation.schemas.graph_state import GenerationGraphState
 from core_game.game_state.singleton import GameStateSingleton
 from subsystems.generation.refinement_loop.pipelines import map_then_characters_pipeline, fast_test_pipeline, slow_test_pipeline, fast_test_events_pipeline
 from utils.progress_tracker import ProgressTracker
+from subsystems.assets.images import collect_unreferenced_images
 from api.schemas.status import GenerationStatusModel
 
 def start_generation(prompt: str) -> GenerationStatusModel:
@@ -37,8 +39,16 @@ def start_generation(prompt: str) -> GenerationStatusModel:
         except Exception as e:
             print(str(e))
             set_error(str(e))
+            return
 
-    Thread(target=_run).start()
+        # Images replaced during the generation (or by other sessions) that nobody references anymore
+        try:
+            collect_unreferenced_images()
+        except Exception as e:
+            print(f"Image garbage collection failed: {e}")
+
+    # The thread keeps the session bound by the caller, so the generation fills that session.
+    Thread(target=copy_context().run, args=(_run,)).start()
     status = GenerationStatusModel(
         status="started",
         progress=0.0,
@@ -1,3 +1,4 @@
+import asyncio
 import json
 from typing import AsyncGenerator
 
@@ -51,9 +52,11 @@ async def generate_narrative_stream(event_id: str) -> AsyncGenerator[str, None]:
         print(f"[STREAM] Event.run completed.")
 
         # --- 3. Handle Stream Completion ---
-        final_status = event.status
+        # The live event: writes after a commit clone it, `event` may be an outdated copy
+        final_status = event.live(game_state).status
         print(f"[STREAM] Final event status: {final_status}")
 
+        # Runs holding the session lock (see api.services.sessions.run_holding_lock)
         check_and_start_event_triggers(game_state)
         new_current_event = game_state.events.get_state().get_current_running_event()
 
@@ -79,6 +82,12 @@ async def generate_narrative_stream(event_id: str) -> AsyncGenerator[str, None]:
             final_message = {"type": "event_failed", "event_id": event_id}
             yield f"data: {json.dumps(final_message)}\n\n"
 
+    except asyncio.CancelledError:
+        # The stream runs detached from the SSE client (see api.services.event_streams), so this
+        # only happens on shutdown; the event stays RUNNING and can be streamed again.
+        print(f"[STREAM] Stream of event '{event_id}' cancelled.")
+        raise
+
     except Exception as e:
         print(f"[STREAM] FATAL ERROR in event '{event_id}': {e}")
         error_message = {"type": "error", "content": f"A critical error occurred during the event: {e}"}
@@ -0,0 +1,137 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Any, AsyncGenerator, Awaitable, Generator, Iterator, Optional, TypeVar
+from fastapi import Header, HTTPException
+from core_game.game_state.sessions import (
+    DEFAULT_SESSION_ID,
+    SessionContext,
+    get_session_registry,
+    use_session,
+)
+from persistence.autosave import resume_saved_session
+from simulated.singleton import notify_state_changes
+
+
+def resolve_session(x_session_id: Optional[str] = Header(default=None)) -> SessionContext:
+    """
+    Route dependency returning the session named by the X-Session-Id header.
+    Requests without the header use the default session. Sessions evicted earlier are
+    resumed from their save file when autosave is enabled.
+    """
+    registry = get_session_registry()
+    registry.evict_idle()
+    try:
+        return registry.get_session(x_session_id or DEFAULT_SESSION_ID)
+    except KeyError as e:
+        not_found = e
+    try:
+        session = resume_saved_session(registry, x_session_id or DEFAULT_SESSION_ID)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if session is None:
+        raise HTTPException(status_code=404, detail=str(not_found))
+    return session
+
+
+@contextmanager
+def session_scope(session: SessionContext) -> Iterator[SessionContext]:
+    """
+    Binds the session for the duration of a request and holds its lock. On exit, notifies "state"
+    if the request changed it, transaction or not (moves, started events...).
+    """
+    with session.lock, use_session(session):
+        session.touch()
+        try:
+            yield session
+        finally:
+            notify_state_changes(session)
+
+
+async def stream_in_session(session: SessionContext, stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+    """
+    Runs a streaming generator with the session bound to it. The stream must not change the
+    state: the narrative event streams only read their log, the run writing it is in run_holding_lock.
+    """
+    with use_session(session):
+        async for chunk in stream:
+            session.touch()
+            yield chunk
+
+
+T = TypeVar("T")
+
+
+class _HoldingLockWhileRunning:
+    """
+    Awaits a coroutine holding the session lock only while its code runs: the lock is released
+    every time the coroutine suspends (waiting for the LLM...) and awaited again before it
+    resumes. The state changes made between awaits are then serialized with the requests of the
+    session, but the requests don't wait for the whole stream.
+    """
+
+    def __init__(self, session: SessionContext, coroutine: Awaitable[T]):
+        self._session = session
+        self._lock = session.lock
+        self._coroutine: Any = coroutine.__await__()
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        value: Any = None
+        error: Optional[BaseException] = None
+        while True:
+            try:
+                yield from self._lock.acquire_async().__await__()
+            except asyncio.CancelledError as e:
+                # Delivered to the coroutine once the lock is taken
+                value, error = None, e
+                continue
+            try:
+                step = self._coroutine.throw(error) if error is not None else self._coroutine.send(value)
+            except StopIteration as stop:
+                notify_state_changes(self._session)
+                return stop.value
+            except BaseException:
+                notify_state_changes(self._session)
+                raise
+            finally:
+                self._lock.release()
+            try:
+                value, error = (yield step), None
+            except BaseException as e:  # cancellation included, delivered to the coroutine
+                value, error = None, e
+
+
+async def run_holding_lock(session: SessionContext, stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+    """
+    Runs an async generator that changes the session state (narrative streams run detached
+    from any request) holding the session lock while its code runs, and notifies "state" after
+    every chunk that changed it. See _HoldingLockWhileRunning.
+    """
+    try:
+        while True:
+            try:
+                chunk = await _HoldingLockWhileRunning(session, stream.__anext__())
+            except StopAsyncIteration:
+                return
+            yield chunk
+    finally:
+        await _HoldingLockWhileRunning(session, stream.aclose())
+
+
+def create_session() -> dict:
+    try:
+        session = get_session_registry().create_session()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"session_id": session.session_id}
+
+
+def delete_session(session_id: str) -> dict:
+    if session_id == DEFAULT_SESSION_ID:
+        raise HTTPException(status_code=400, detail="The default session cannot be deleted")
+    try:
+        get_session_registry().delete_session(session_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "deleted"}
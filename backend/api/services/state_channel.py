@@ -0,0 +1,207 @@
+"""
+Push channel of state changes, instead of polling /state/changes and /generate/status.
+
+The server sends msgpack binary messages, each with an increasing `seq`:
+
+    {"type": "changes", "seq": n, "checkpoint_id": ..., "full": bool, "changes": {...}}
+    {"type": "status", "seq": n, "status": {...GenerationStatusModel...}}
+
+The first "changes" message is a full state, unless the client connected with the
+`from_checkpoint` it already has. Every later one is the diff against the previous one, so the
+client applies them in order and can go back to /state/changes with the last checkpoint_id.
+When the checkpoint a diff would start from was evicted from the checkpoint store, a full
+state is sent instead: messages with "full" set replace the client state instead of patching it.
+
+The client acknowledges with {"ack": seq} (msgpack or JSON text), which acknowledges every
+message up to seq. At most `max_in_flight` messages are sent without acknowledgement; while the
+client is behind, the commits in between are folded into a single diff and only the latest
+status is kept, so a slow client gets fewer, bigger messages instead of a growing queue.
+Changes are not pushed while a generation runs (like /state/changes answers 409).
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+import ormsgpack
+from fastapi import WebSocket, WebSocketDisconnect
+
+from core_game.game_state.sessions import SessionContext, use_session
+from simulated.singleton import SimulatedGameStateSingleton
+from versioning.deltas.checkpoints.changeset import ChangesetCheckpoint
+
+DEFAULT_MAX_IN_FLIGHT = 4
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    return ormsgpack.packb(message, option=ormsgpack.OPT_SERIALIZE_PYDANTIC | ormsgpack.OPT_NON_STR_KEYS)
+
+
+def decode_ack(data: bytes | str) -> int:
+    """The seq acknowledged by a client message. Raises ValueError if it isn't an ack."""
+    try:
+        message = orjson.loads(data) if isinstance(data, str) else ormsgpack.unpackb(data)
+    except (orjson.JSONDecodeError, ormsgpack.MsgpackDecodeError) as e:
+        raise ValueError(f"Malformed message: {e}")
+    if not isinstance(message, dict) or not isinstance(message.get("ack"), int):
+        raise ValueError("Expected {\"ack\": <seq>}")
+    return message["ack"]
+
+
+class StateChannel:
+    """Pushes the changes of a session through one WebSocket connection. See the module docstring."""
+
+    def __init__(self, session: SessionContext, websocket: WebSocket, from_checkpoint: Optional[str] = None,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.session = session
+        self.websocket = websocket
+        self.max_in_flight = max_in_flight
+
+        self._seq = 0
+        # (seq, checkpoint_id or None for status messages) sent and not acknowledged yet
+        self._in_flight: List[Tuple[int, Optional[str]]] = []
+        # Checkpoint the next diff starts from, and the last one the client acknowledged
+        self._checkpoint_id: Optional[str] = from_checkpoint
+        self._acked_checkpoint_id: Optional[str] = from_checkpoint
+        self._state_dirty = True
+        self._status_dirty = True
+        self._closed = False
+        self._wake = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # --- Connection ---
+
+    async def run(self) -> None:
+        """Serves the connection until the client disconnects."""
+        self._loop = asyncio.get_running_loop()
+        self.session.add_change_listener(self._on_change)
+        receiver = asyncio.create_task(self._receive_acks())
+        try:
+            while not self._closed:
+                await self._send_pending()
+                await self._wake.wait()
+                self._wake.clear()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self.session.remove_change_listener(self._on_change)
+            receiver.cancel()
+            # The acknowledged checkpoint and the unacknowledged ones are kept, so the client
+            # can resume from whichever it applied last (with /state/changes or a new channel).
+            print(f"[StateChannel] Session '{self.session.session_id}' disconnected at seq {self._seq}.")
+
+    def _on_change(self, kind: str) -> None:
+        # Runs in the thread that committed or updated the status
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._mark_dirty, kind)
+        except RuntimeError:
+            pass  # loop already closing
+
+    def _mark_dirty(self, kind: str) -> None:
+        if kind == "state":
+            self._state_dirty = True
+        elif kind == "status":
+            self._status_dirty = True
+        self._wake.set()
+
+    async def _receive_acks(self) -> None:
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                data = message.get("bytes")
+                if data is None:
+                    data = message.get("text", "")
+                try:
+                    seq = decode_ack(data)
+                except ValueError as e:
+                    print(f"[StateChannel] Ignoring message from session '{self.session.session_id}': {e}")
+                    continue
+                stale = self._acknowledge(seq)
+                if stale:
+                    await asyncio.to_thread(self._delete_checkpoints, stale)
+        finally:
+            self._closed = True
+            self._wake.set()
+
+    def _acknowledge(self, seq: int) -> List[str]:
+        """Marks the messages up to seq as received. Returns the checkpoints no longer needed."""
+        self.session.touch()
+        acked = [entry for entry in self._in_flight if entry[0] <= seq]
+        if not acked:
+            return []
+        self._in_flight = [entry for entry in self._in_flight if entry[0] > seq]
+        self._wake.set()
+        acked_checkpoints = [checkpoint_id for _, checkpoint_id in acked if checkpoint_id is not None]
+        if not acked_checkpoints:
+            return []
+        # Everything before the newest acknowledged checkpoint is no longer needed
+        stale = [self._acked_checkpoint_id] + acked_checkpoints[:-1]
+        self._acked_checkpoint_id = acked_checkpoints[-1]
+        return [checkpoint_id for checkpoint_id in stale if checkpoint_id]
+
+    # --- Sending ---
+
+    async def _send_pending(self) -> None:
+        if self._status_dirty and len(self._in_flight) < self.max_in_flight:
+            self._status_dirty = False
+            await self._send({"type": "status", "status": dict(self.session.generation_status)}, None)
+
+        generating = self.session.generation_status["status"] == "running"
+        if self._state_dirty and not generating and len(self._in_flight) < self.max_in_flight:
+            self._state_dirty = False
+            result = await asyncio.to_thread(self._next_changeset)
+            if result is not None:
+                checkpoint_id, full, changes = result
+                await self._send({"type": "changes", "checkpoint_id": checkpoint_id, "full": full, "changes": changes},
+                                 checkpoint_id)
+
+    async def _send(self, message: Dict[str, Any], checkpoint_id: Optional[str]) -> None:
+        self._seq += 1
+        message["seq"] = self._seq
+        self._in_flight.append((self._seq, checkpoint_id))
+        await self.websocket.send_bytes(encode_message(message))
+
+    def _next_changeset(self) -> Optional[Tuple[str, bool, Dict[str, Any]]]:
+        """
+        The new checkpoint, whether it is a full state, and the changes since the last checkpoint
+        sent, or None when nothing changed. Runs in a worker thread, holding the session lock so no action commits meanwhile.
+        """
+        with self.session.lock, use_session(self.session):
+            manager = SimulatedGameStateSingleton.get_checkpoint_manager()
+            if self._checkpoint_id is not None:
+                try:
+                    manager.get_checkpoint(self._checkpoint_id)
+                except RuntimeError as e:
+                    print(f"[StateChannel] {e}, sending the full state.")
+                    self._checkpoint_id = None
+
+            full = self._checkpoint_id is None
+            if full:
+                new_id, snapshot = manager.get_full_state()
+                changes = snapshot.changes
+            else:
+                changeset = manager.generate_changeset(from_id=self._checkpoint_id)
+                if not changeset:
+                    return None
+                changes = changeset.get("changes", {})
+                new_id = manager.create_checkpoint(ChangesetCheckpoint, based_on=self._checkpoint_id)
+
+        self._checkpoint_id = new_id
+        return new_id, full, changes
+
+    def _delete_checkpoints(self, checkpoint_ids: List[str]) -> None:
+        with self.session.lock, use_session(self.session):
+            manager = SimulatedGameStateSingleton.get_checkpoint_manager()
+            for checkpoint_id in checkpoint_ids:
+                try:
+                    manager.delete_checkpoint(checkpoint_id)
+                except RuntimeError:
+                    pass
@@ -0,0 +1,6 @@
+"""
+Performance benchmarks of the domain and versioning layers on large generated worlds.
+Run `python -m benchmarks --help` from the backend directory.
+"""
+from benchmarks.world import WORLD_SIZES, WorldSpec, build_world, world_session
+from benchmarks.runner import run_suite
@@ -0,0 +1,72 @@
+"""
+Command line entry point, run from the backend directory:
+
+    python -m benchmarks                        # small world, every case
+    python -m benchmarks --size large -k changeset
+    python -m benchmarks --save-baseline        # store this run as the baseline of its size
+"""
+import argparse
+import os
+import sys
+
+# The agent tools import their chat models: make sure nothing can reach the API
+os.environ.setdefault("LLM_REPLAY_MODE", "replay")
+
+from benchmarks.cases import CASES
+from benchmarks.runner import (
+    DEFAULT_THRESHOLD,
+    append_history,
+    compare,
+    format_comparisons,
+    load_baseline,
+    run_suite,
+    save_baseline,
+)
+from benchmarks.world import WORLD_SIZES
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Times the domain and versioning hot paths.")
+    parser.add_argument("--size", choices=sorted(WORLD_SIZES), default="small", help="Size of the generated world.")
+    parser.add_argument("-k", "--filter", action="append", default=[], help="Only cases whose name contains this text.")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed repetitions per case.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Slowdown ratio reported as a regression.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline of its size.")
+    parser.add_argument("--no-history", action="store_true", help="Don't append this run to results/history.jsonl.")
+    parser.add_argument("--list", action="store_true", help="List the cases and exit.")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, factory in sorted(CASES.items()):
+            print(f"{name:<34} {(factory.__doc__ or '').strip()}")
+        return 0
+
+    names = [name for name in sorted(CASES) if not args.filter or any(f in name for f in args.filter)]
+    if not names:
+        print("No benchmark matches the filter.")
+        return 1
+
+    print(f"Building the '{args.size}' world...")
+    result = run_suite(args.size, names, repeat=args.repeat)
+    print(f"(world built in {result.build_seconds:.2f}s)")
+
+    if not args.no_history:
+        append_history(result)
+
+    exit_code = 0
+    if any(case.status == "error" for case in result.cases.values()):
+        exit_code = 1
+    baseline = load_baseline(args.size)
+    if baseline is not None:
+        comparisons = compare(result, baseline, args.threshold)
+        print(f"\nAgainst the baseline of {baseline.timestamp} (commit {baseline.commit}):")
+        print(format_comparisons(comparisons))
+        if any(c.regression for c in comparisons):
+            exit_code = 1
+    if args.save_baseline:
+        print(f"\nBaseline saved to {save_baseline(result)}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
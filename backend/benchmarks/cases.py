@@ -0,0 +1,295 @@
+"""
+The benchmarked hot paths.
+
+Each case is registered with `@benchmark(name)`. It is called once, inside a session holding
+a fresh copy of the generated world, and returns the function run on every repetition; that
+function gets a Timer and only what runs inside `with timer:` is measured, so per-repetition
+setup (opening a transaction, creating a checkpoint...) is not counted.
+Modules are imported inside the cases, so one that cannot be imported only skips its cases.
+"""
+from __future__ import annotations
+
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core_game.game_state.schemas import GameStateModel
+
+
+class Timer:
+    """Collects the duration of every `with timer:` block."""
+
+    def __init__(self) -> None:
+        self.samples: List[float] = []
+        self._started: Optional[float] = None
+
+    def __enter__(self) -> "Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        assert self._started is not None
+        self.samples.append(time.perf_counter() - self._started)
+        self._started = None
+
+
+Repetition = Callable[[Timer], None]
+CaseFactory = Callable[[GameStateModel], Repetition]
+
+CASES: Dict[str, CaseFactory] = {}
+
+
+def benchmark(name: str) -> Callable[[CaseFactory], CaseFactory]:
+    def _register(factory: CaseFactory) -> CaseFactory:
+        if name in CASES:
+            raise ValueError(f"Benchmark '{name}' is already registered")
+        CASES[name] = factory
+        return factory
+    return _register
+
+
+def _tool_kwargs() -> Dict[str, str]:
+    # The injected arguments langgraph would pass to a tool
+    return {"messages_field_to_update": "messages", "logs_field_to_update": "logs", "tool_call_id": "benchmark"}
+
+
+# --- Versioning: simulation layers ---
+
+@benchmark("layers.begin_modify_rollback")
+def layers_begin_modify_rollback(world: GameStateModel) -> Repetition:
+    """A transaction touching one scenario and one character, then discarded (copy-on-write cost)."""
+    from simulated.singleton import SimulatedGameStateSingleton
+
+    state = SimulatedGameStateSingleton.get_instance()
+    scenario_ids = list(world.game_map.scenarios)
+    character_ids = list(world.characters.registry)
+    rng = random.Random(1)
+
+    def run(timer: Timer) -> None:
+        with timer:
+            SimulatedGameStateSingleton.begin_transaction()
+            state.map.modify_scenario(rng.choice(scenario_ids), new_name="Benchmark")
+            state.characters.modify_character_identity(rng.choice(character_ids), new_full_name="Benchmark")
+            SimulatedGameStateSingleton.rollback()
+    return run
+
+
+@benchmark("layers.nested_commit")
+def layers_nested_commit(world: GameStateModel) -> Repetition:
+    """Two nested transactions modifying 20 scenarios, both committed down to the base state."""
+    from simulated.singleton import SimulatedGameStateSingleton
+
+    state = SimulatedGameStateSingleton.get_instance()
+    scenario_ids = list(world.game_map.scenarios)
+    rng = random.Random(2)
+
+    def run(timer: Timer) -> None:
+        with timer:
+            SimulatedGameStateSingleton.begin_transaction()
+            for scenario_id in rng.sample(scenario_ids, min(10, len(scenario_ids))):
+                state.map.modify_scenario(scenario_id, new_summary_description="Outer")
+            SimulatedGameStateSingleton.begin_transaction()
+            for scenario_id in rng.sample(scenario_ids, min(10, len(scenario_ids))):
+                state.map.modify_scenario(scenario_id, new_summary_description="Inner")
+            SimulatedGameStateSingleton.commit()
+            SimulatedGameStateSingleton.commit()
+    return run
+
+
+# --- Versioning: changesets ---
+
+@benchmark("changeset.full_state")
+def changeset_full_state(world: GameStateModel) -> Repetition:
+    """Changeset from an empty checkpoint to the live state (what a client gets on first sync)."""
+    from simulated.singleton import SimulatedGameStateSingleton
+    from versioning.deltas.checkpoints.changeset import ChangesetCheckpoint
+
+    manager = SimulatedGameStateSingleton.get_checkpoint_manager()
+    empty_id = manager.create_empty_checkpoint(ChangesetCheckpoint)
+
+    def run(timer: Timer) -> None:
+        with timer:
+            manager.generate_changeset(empty_id)
+    return run
+
+
+@benchmark("changeset.incremental")
+def changeset_incremental(world: GameStateModel) -> Repetition:
+    """Changeset against the live state after modifying 20 scenarios and 20 characters."""
+    from simulated.singleton import SimulatedGameStateSingleton
+    from versioning.deltas.checkpoints.changeset import ChangesetCheckpoint
+
+    state = SimulatedGameStateSingleton.get_instance()
+    manager = SimulatedGameStateSingleton.get_checkpoint_manager()
+    scenario_ids = list(world.game_map.scenarios)
+    character_ids = list(world.characters.registry)
+    rng = random.Random(3)
+
+    def run(timer: Timer) -> None:
+        checkpoint_id = manager.create_checkpoint(ChangesetCheckpoint)
+        SimulatedGameStateSingleton.begin_transaction()
+        for scenario_id in rng.sample(scenario_ids, min(20, len(scenario_ids))):
+            state.map.modify_scenario(scenario_id, new_name=f"Changed {rng.random()}")
+        for character_id in rng.sample(character_ids, min(20, len(character_ids))):
+            state.characters.modify_character_identity(character_id, new_alias=f"Alias {rng.random()}")
+        SimulatedGameStateSingleton.commit()
+        with timer:
+            manager.generate_changeset(checkpoint_id)
+        manager.delete_checkpoint(checkpoint_id)
+    return run
+
+
+# --- Map clusters ---
+
+def _cluster_bridge(state) -> Optional[Tuple[str, str, str]]:
+    """A scenario of the main cluster and one of another cluster that can be linked, with the direction."""
+    from core_game.map.constants import OppositeDirections
+
+    read_map = state.read_only_map
+    main = read_map.get_main_cluster()
+    outside = read_map.get_outside_clusters()
+    if not main or not outside:
+        return None
+    for direction, opposite in OppositeDirections.items():
+        origin = next((sid for sid in sorted(main) if read_map.find_scenario(sid).connections[direction] is None), None)
+        target = next((sid for sid in sorted(outside[0]) if read_map.find_scenario(sid).connections[opposite] is None), None)
+        if origin and target:
+            return origin, direction, target
+    return None
+
+
+@benchmark("map.cluster_merge_split")
+def map_cluster_merge_split(world: GameStateModel) -> Repetition:
+    """Connects the main cluster with another one and removes the link again (cluster merge and split)."""
+    from simulated.singleton import SimulatedGameStateSingleton
+
+    state = SimulatedGameStateSingleton.get_instance()
+    bridge = _cluster_bridge(state)
+    if bridge is None:
+        raise RuntimeError("The generated map has a single cluster, lower connection_probability")
+    origin, direction, target = bridge
+
+    def run(timer: Timer) -> None:
+        with timer:
+            state.map.create_bidirectional_connection(origin, direction, target, "path")  # type: ignore[arg-type]
+            state.read_only_map.get_cluster_summary(list_all_scenarios=False)
+            state.map.delete_bidirectional_connection(origin, direction)  # type: ignore[arg-type]
+            state.read_only_map.get_cluster_summary(list_all_scenarios=False)
+    return run
+
+
+# --- Events ---
+
+@benchmark("events.check_triggers")
+def events_check_triggers(world: GameStateModel) -> Repetition:
+    """check_and_start_event_triggers after the player enters a scenario with area entry events."""
+    from api.services.actions import check_and_start_event_triggers
+    from simulated.singleton import SimulatedGameStateSingleton
+
+    state = SimulatedGameStateSingleton.get_instance()
+    player_id = world.characters.player_character_id
+    assert player_id is not None
+    area_scenarios = sorted({
+        condition.scenario_id  # type: ignore[attr-defined]
+        for event in world.game_events.all_events.values() if event.status == "AVAILABLE"
+        for condition in event.activation_conditions if condition.type == "area_entry"
+    })
+    rng = random.Random(4)
+
+    def run(timer: Timer) -> None:
+        SimulatedGameStateSingleton.begin_transaction()
+        if area_scenarios:
+            state.place_character(player_id, rng.choice(area_scenarios))
+        with timer:
+            check_and_start_event_triggers(state)
+        SimulatedGameStateSingleton.rollback()
+    return run
+
+
+# --- Dialog ---
+
+@benchmark("dialog.formatted_context")
+def dialog_formatted_context(world: GameStateModel) -> Repetition:
+    """get_formatted_context for the conversation events with the most participants and messages."""
+    from simulated.singleton import SimulatedGameStateSingleton
+    from subsystems.game_events.dialog_engine.prompts.context import get_formatted_context
+
+    state = SimulatedGameStateSingleton.get_instance()
+    conversations = sorted(
+        (e for e in world.game_events.all_events.values() if hasattr(e, "npc_ids")),
+        key=lambda e: (len(e.npc_ids), len(e.messages), e.id),  # type: ignore[attr-defined]
+        reverse=True,
+    )[:20]
+    if not conversations:
+        raise RuntimeError("The generated world has no conversation events")
+    inputs = []
+    for event in conversations:
+        characters = {state.read_only_characters.get_character(cid) for cid in event.npc_ids}  # type: ignore[attr-defined]
+        characters.discard(None)
+        first = next(iter(characters))
+        scenario = state.read_only_map.find_scenario(first.present_in_scenario) if first.present_in_scenario else None
+        relations = [
+            {"source_id": source_id, "target_id": target_id, "type": type_name, "intensity": rel.intensity}
+            for source_id in event.npc_ids  # type: ignore[attr-defined]
+            for target_id, by_type in world.relationships.matrix.get(source_id, {}).items()
+            for type_name, rel in by_type.items()
+        ]
+        inputs.append((event, scenario, characters, relations))
+    goal = world.narrative_state.main_goal.description if world.narrative_state.main_goal else ""
+    refined_prompt = world.session.refined_prompt
+
+    def run(timer: Timer) -> None:
+        with timer:
+            for event, scenario, characters, relations in inputs:
+                get_formatted_context(event.title, event.description, None, scenario, characters,
+                                      relations, goal, refined_prompt, event.messages)
+    return run
+
+
+# --- Agent query tools ---
+
+@benchmark("tools.map_queries")
+def tools_map_queries(world: GameStateModel) -> Repetition:
+    """The map agent's query tools: details, neighbours at distance 3, cluster listing and search."""
+    from subsystems.agents.map_handler.tools.map_tools import (
+        find_scenarios_by_attribute,
+        get_neighbors_at_distance,
+        get_scenario_details,
+        list_scenarios_summary_per_cluster,
+    )
+
+    scenario_ids = list(world.game_map.scenarios)
+    rng = random.Random(5)
+    kwargs = _tool_kwargs()
+
+    def run(timer: Timer) -> None:
+        scenario_id = rng.choice(scenario_ids)
+        with timer:
+            get_scenario_details.func(scenario_id=scenario_id, **kwargs)  # type: ignore[attr-defined]
+            get_neighbors_at_distance.func(start_scenario_id=scenario_id, max_distance=3, **kwargs)  # type: ignore[attr-defined]
+            list_scenarios_summary_per_cluster.func(list_all_scenarios_in_each_cluster=True, **kwargs)  # type: ignore[attr-defined]
+            find_scenarios_by_attribute.func(attribute_to_filter="name_contains", value_to_match="tavern", **kwargs)  # type: ignore[attr-defined]
+    return run
+
+
+@benchmark("tools.character_queries")
+def tools_character_queries(world: GameStateModel) -> Repetition:
+    """The character agent's query tools: details, filtered listing and listing by scenario."""
+    from subsystems.agents.character_handler.tools.character_tools import (
+        get_character_details,
+        list_characters,
+        list_characters_by_scenario,
+    )
+
+    character_ids = list(world.characters.registry)
+    rng = random.Random(6)
+    kwargs = _tool_kwargs()
+
+    def run(timer: Timer) -> None:
+        character_id = rng.choice(character_ids)
+        with timer:
+            get_character_details.func(character_id=character_id, **kwargs)  # type: ignore[attr-defined]
+            list_characters.func(attribute_to_filter="profession", value_to_match="guard", max_results=50,
+                                 list_identity=True, list_narrative=True, **kwargs)  # type: ignore[attr-defined]
+            list_characters_by_scenario.func(**kwargs)  # type: ignore[attr-defined]
+    return run
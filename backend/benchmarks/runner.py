@@ -0,0 +1,185 @@
+"""
+Runs the benchmark cases and compares them with a stored baseline.
+
+Every run is appended to benchmarks/results/history.jsonl (with the git commit), so the trend
+of each case can be followed over time. A baseline is a previous run saved with
+`--save-baseline` to benchmarks/baselines/<size>.json; a case is reported as a regression
+when its median is more than `threshold` times the baseline median (and slower by more than
+NOISE_FLOOR_SECONDS, so tiny cases don't flap).
+"""
+from __future__ import annotations
+
+import io
+import os
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import orjson
+from pydantic import BaseModel, Field
+
+from core_game.game_state.schemas import GameStateModel
+from benchmarks.cases import CASES, Timer
+from benchmarks.world import WORLD_SIZES, WorldSpec, build_world, world_session
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINES_DIR = os.path.join(BENCHMARKS_DIR, "baselines")
+HISTORY_PATH = os.path.join(BENCHMARKS_DIR, "results", "history.jsonl")
+
+DEFAULT_THRESHOLD = 1.25
+NOISE_FLOOR_SECONDS = 0.0005
+
+
+class CaseResult(BaseModel):
+    name: str
+    status: str = Field("ok", description="'ok', 'skipped' (could not be imported) or 'error'.")
+    detail: Optional[str] = None
+    samples: int = 0
+    min_seconds: float = 0.0
+    median_seconds: float = 0.0
+    mean_seconds: float = 0.0
+    stdev_seconds: float = 0.0
+
+
+class SuiteResult(BaseModel):
+    timestamp: str
+    commit: Optional[str] = None
+    python: str
+    machine: str
+    size: str
+    world: WorldSpec
+    build_seconds: float
+    cases: Dict[str, CaseResult]
+
+
+class Comparison(BaseModel):
+    name: str
+    baseline_median_seconds: float
+    median_seconds: float
+    ratio: float
+    regression: bool
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_case(name: str, world: GameStateModel, repeat: int, warmup: int = 1) -> CaseResult:
+    """Runs one case on a fresh copy of `world`. The tools' debug prints are silenced."""
+    factory = CASES[name]
+    model = world.model_copy(deep=True)
+    timer = Timer()
+    try:
+        with world_session(model, session_id=f"benchmark-{name}"), redirect_stdout(io.StringIO()):
+            try:
+                repetition = factory(model)
+            except (ImportError, SyntaxError) as e:
+                return CaseResult(name=name, status="skipped", detail=f"{type(e).__name__}: {e}")
+            for _ in range(warmup):
+                repetition(Timer())
+            for _ in range(repeat):
+                repetition(timer)
+    except Exception as e:
+        return CaseResult(name=name, status="error", detail=f"{type(e).__name__}: {e}")
+
+    samples = timer.samples
+    return CaseResult(
+        name=name,
+        samples=len(samples),
+        min_seconds=min(samples),
+        median_seconds=statistics.median(samples),
+        mean_seconds=statistics.fmean(samples),
+        stdev_seconds=statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    )
+
+
+def run_suite(size: str = "small", names: Optional[List[str]] = None, repeat: int = 20,
+              spec: Optional[WorldSpec] = None) -> SuiteResult:
+    """Builds the world once and runs the selected cases (all by default) on copies of it."""
+    spec = spec or WORLD_SIZES[size]
+    started = time.perf_counter()
+    world = build_world(spec)
+    build_seconds = time.perf_counter() - started
+
+    cases: Dict[str, CaseResult] = {}
+    for name in names or sorted(CASES):
+        cases[name] = run_case(name, world, repeat)
+        print(_format_result(cases[name]))
+
+    return SuiteResult(
+        timestamp=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        commit=_git_commit(),
+        python=platform.python_version(),
+        machine=f"{platform.system()} {platform.machine()}",
+        size=size,
+        world=spec,
+        build_seconds=build_seconds,
+        cases=cases,
+    )
+
+
+def compare(result: SuiteResult, baseline: SuiteResult, threshold: float = DEFAULT_THRESHOLD) -> List[Comparison]:
+    comparisons = []
+    for name, case in result.cases.items():
+        base = baseline.cases.get(name)
+        if case.status != "ok" or base is None or base.status != "ok" or base.median_seconds <= 0:
+            continue
+        ratio = case.median_seconds / base.median_seconds
+        comparisons.append(Comparison(
+            name=name,
+            baseline_median_seconds=base.median_seconds,
+            median_seconds=case.median_seconds,
+            ratio=ratio,
+            regression=ratio > threshold and case.median_seconds - base.median_seconds > NOISE_FLOOR_SECONDS,
+        ))
+    return comparisons
+
+
+def baseline_path(size: str) -> str:
+    return os.path.join(BASELINES_DIR, f"{size}.json")
+
+
+def load_baseline(size: str) -> Optional[SuiteResult]:
+    try:
+        with open(baseline_path(size), "rb") as f:
+            return SuiteResult.model_validate(orjson.loads(f.read()))
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(result: SuiteResult) -> str:
+    os.makedirs(BASELINES_DIR, exist_ok=True)
+    path = baseline_path(result.size)
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(result.model_dump(mode="json"), option=orjson.OPT_INDENT_2))
+    return path
+
+
+def append_history(result: SuiteResult, path: str = HISTORY_PATH) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "ab") as f:
+        f.write(orjson.dumps(result.model_dump(mode="json")) + b"\n")
+
+
+def _format_result(case: CaseResult) -> str:
+    if case.status != "ok":
+        return f"{case.name:<34} {case.status.upper()}: {case.detail}"
+    return (f"{case.name:<34} median {case.median_seconds * 1000:9.3f} ms   "
+            f"min {case.min_seconds * 1000:9.3f} ms   ±{case.stdev_seconds * 1000:.3f}   (n={case.samples})")
+
+
+def format_comparisons(comparisons: List[Comparison]) -> str:
+    lines = []
+    for c in comparisons:
+        flag = "REGRESSION" if c.regression else ("faster" if c.ratio < 1 else "")
+        lines.append(f"{c.name:<34} {c.baseline_median_seconds * 1000:9.3f} -> {c.median_seconds * 1000:9.3f} ms  x{c.ratio:.2f} {flag}")
+    return "\n".join(lines)
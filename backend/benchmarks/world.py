@@ -0,0 +1,310 @@
+"""
+Procedural worlds for the benchmarks.
+
+Builds complete GameStateModel instances of any size without calling an LLM: a grid map with
+some missing links (so there are several clusters), NPCs spread over it, a relationship
+matrix and events with every kind of activation condition. The same spec and seed always
+give the same world.
+"""
+from __future__ import annotations
+
+import random
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from pydantic import BaseModel, Field
+
+from core_game.character.schemas import (
+    CharactersModel,
+    DynamicStateModel,
+    IdentityModel,
+    KnowledgeModel,
+    NarrativePurposeModel,
+    NarrativeWeightModel,
+    NonPlayerCharacterModel,
+    PhysicalAttributesModel,
+    PlayerCharacterModel,
+    PsychologicalAttributesModel,
+)
+from core_game.game_event.activation_conditions.schemas import (
+    ActivationConditionModel,
+    AreaEntryConditionModel,
+    CharacterInteractionOptionModel,
+    EventCompletionConditionModel,
+)
+from core_game.game_event.schemas import (
+    CharacterDialogueMessage,
+    GameEventModel,
+    GameEventsManagerModel,
+    NarratorInterventionEventModel,
+    NPCConversationEventModel,
+    PlayerNPCConversationEventModel,
+)
+from core_game.game_session.schemas import GameSessionModel
+from core_game.game_state.domain import GameState
+from core_game.game_state.schemas import GameStateModel
+from core_game.game_state.sessions import SessionContext, get_session_registry, use_session
+from core_game.map.schemas import ConnectionModel, GameMapModel, ScenarioModel
+from core_game.narrative.schemas import GoalModel, NarrativeStateModel
+from core_game.relationship.schemas import CharacterRelationshipModel, RelationshipTypeModel, RelationshipsModel
+from core_game.time.schemas import GameTimeModel
+
+ZONES = ["Old Town", "Harbor", "Forest", "Mines", "Castle", "Swamp", "Desert", "Academy"]
+SCENARIO_TYPES = ["tavern", "street", "forest path", "cave", "shop", "temple", "house", "square"]
+PROFESSIONS = ["blacksmith", "merchant", "guard", "scholar", "farmer", "thief", "priest", "sailor"]
+RELATIONSHIP_TYPES = ["trust", "fear", "love", "rivalry", "respect"]
+WORDS = [
+    "ancient", "quiet", "crowded", "misty", "golden", "ruined", "hidden", "bright", "cold",
+    "narrow", "vast", "smoky", "sacred", "forgotten", "busy", "damp", "warm", "broken",
+]
+
+
+class WorldSpec(BaseModel):
+    """How big the generated world is."""
+    scenarios: int = Field(2000, ge=1)
+    characters: int = Field(1000, ge=0, description="NPCs, the player is added on top.")
+    relationships_per_character: int = Field(4, ge=0)
+    events: int = Field(1500, ge=0)
+    completed_event_ratio: float = Field(0.3, ge=0, le=1)
+    connection_probability: float = Field(0.8, ge=0, le=1, description="Chance each grid link exists.")
+    seed: int = 0
+
+
+WORLD_SIZES: Dict[str, WorldSpec] = {
+    "small": WorldSpec(scenarios=200, characters=100, events=150),
+    "medium": WorldSpec(scenarios=1000, characters=500, events=700),
+    "large": WorldSpec(),
+}
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _build_map(spec: WorldSpec, rng: random.Random) -> GameMapModel:
+    width = max(1, int(spec.scenarios ** 0.5))
+    scenarios: Dict[str, ScenarioModel] = {}
+    ids: List[str] = []
+    for i in range(spec.scenarios):
+        scenario_id = f"scenario_{i + 1:03d}"
+        ids.append(scenario_id)
+        scenarios[scenario_id] = ScenarioModel(
+            id=scenario_id,
+            name=f"{_text(rng, 2).title()} {rng.choice(SCENARIO_TYPES).title()} {i + 1}",
+            visual_description=_text(rng, 40),
+            narrative_context=_text(rng, 25),
+            summary_description=_text(rng, 12),
+            indoor_or_outdoor=rng.choice(["indoor", "outdoor"]),
+            type=rng.choice(SCENARIO_TYPES),
+            zone=ZONES[i * len(ZONES) // spec.scenarios],
+        )
+
+    connections: Dict[str, ConnectionModel] = {}
+
+    def _connect(a: str, b: str, direction_from_a: str, opposite: str) -> None:
+        connection_id = f"connection_{len(connections) + 1:03d}"
+        connections[connection_id] = ConnectionModel(
+            id=connection_id,
+            scenario_a_id=a,
+            scenario_b_id=b,
+            direction_from_a=direction_from_a,  # type: ignore[arg-type]
+            connection_type=rng.choice(["path", "door", "stairs", "bridge"]),
+            travel_description=_text(rng, 8),
+        )
+        scenarios[a].connections[direction_from_a] = connection_id  # type: ignore[index]
+        scenarios[b].connections[opposite] = connection_id  # type: ignore[index]
+
+    for i, scenario_id in enumerate(ids):
+        east = i + 1
+        south = i + width
+        if east < len(ids) and east % width != 0 and rng.random() < spec.connection_probability:
+            _connect(scenario_id, ids[east], "east", "west")
+        if south < len(ids) and rng.random() < spec.connection_probability:
+            _connect(scenario_id, ids[south], "south", "north")
+
+    return GameMapModel(scenarios=scenarios, connections=connections)
+
+
+def _identity(rng: random.Random, index: int) -> IdentityModel:
+    return IdentityModel(
+        full_name=f"{_text(rng, 1).title()} {rng.choice(PROFESSIONS).title()} {index}",
+        age=rng.randint(16, 90),
+        gender=rng.choice(["male", "female", "non-binary"]),
+        profession=rng.choice(PROFESSIONS),
+        species=rng.choice(["human", "elf", "dwarf"]),
+        alignment=rng.choice(["good", "neutral", "evil"]),
+    )
+
+
+def _physical(rng: random.Random) -> PhysicalAttributesModel:
+    return PhysicalAttributesModel(
+        appearance=_text(rng, 20),
+        visual_prompt=_text(rng, 15),
+        distinctive_features=[_text(rng, 3) for _ in range(2)],
+        clothing_style=_text(rng, 4),
+        characteristic_items=[_text(rng, 2) for _ in range(2)],
+    )
+
+
+def _psychological(rng: random.Random) -> PsychologicalAttributesModel:
+    return PsychologicalAttributesModel(
+        personality_summary=_text(rng, 20),
+        personality_tags=[rng.choice(WORDS) for _ in range(3)],
+        motivations=[_text(rng, 5) for _ in range(2)],
+        values=[rng.choice(WORDS) for _ in range(2)],
+        backstory=_text(rng, 60),
+        quirks=[_text(rng, 4)],
+    )
+
+
+def _build_characters(spec: WorldSpec, rng: random.Random, scenario_ids: List[str],
+                      game_map: GameMapModel) -> CharactersModel:
+    registry = {}
+    player = PlayerCharacterModel(
+        id="character_001",
+        identity=_identity(rng, 0),
+        physical=_physical(rng),
+        psychological=_psychological(rng),
+        knowledge=KnowledgeModel(background_knowledge=[_text(rng, 10)]),
+    )
+    registry[player.id] = player
+    for i in range(spec.characters):
+        npc = NonPlayerCharacterModel(
+            id=f"character_{i + 2:03d}",
+            identity=_identity(rng, i + 1),
+            physical=_physical(rng),
+            psychological=_psychological(rng),
+            knowledge=KnowledgeModel(background_knowledge=[_text(rng, 10) for _ in range(3)]),
+            dynamic_state=DynamicStateModel(current_emotion=rng.choice(WORDS), immediate_goal=_text(rng, 6)),
+            narrative=NarrativeWeightModel(
+                narrative_role=rng.choice(["secondary", "extra", "ally", "antagonist"]),
+                current_narrative_importance=rng.choice(["important", "secondary", "minor"]),
+                narrative_purposes=[NarrativePurposeModel(mission=_text(rng, 8))],
+            ),
+        )
+        registry[npc.id] = npc
+
+    for character in registry.values():
+        scenario_id = rng.choice(scenario_ids)
+        character.present_in_scenario = scenario_id
+        game_map.scenarios[scenario_id].present_character_ids.add(character.id)
+
+    return CharactersModel(registry=registry, player_character_id=player.id)
+
+
+def _build_relationships(spec: WorldSpec, rng: random.Random, character_ids: List[str]) -> RelationshipsModel:
+    types = {name: RelationshipTypeModel(name=name, explanation=_text(rng, 6)) for name in RELATIONSHIP_TYPES}
+    matrix: Dict[str, Dict[str, Dict[str, CharacterRelationshipModel]]] = {}
+    if len(character_ids) < 2:
+        return RelationshipsModel(relationship_types=types, matrix=matrix)
+    for source_id in character_ids:
+        for _ in range(spec.relationships_per_character):
+            target_id = rng.choice(character_ids)
+            if target_id == source_id:
+                continue
+            type_name = rng.choice(RELATIONSHIP_TYPES)
+            matrix.setdefault(source_id, {}).setdefault(target_id, {})[type_name] = CharacterRelationshipModel(
+                type=types[type_name], intensity=rng.randint(0, 10)
+            )
+    return RelationshipsModel(relationship_types=types, matrix=matrix)
+
+
+def _build_events(spec: WorldSpec, rng: random.Random, scenario_ids: List[str],
+                  npc_ids: List[str]) -> GameEventsManagerModel:
+    all_events: Dict[str, GameEventModel] = {}
+    condition_count = 0
+
+    def _condition_id() -> str:
+        nonlocal condition_count
+        condition_count += 1
+        return f"condition_{condition_count:03d}"
+
+    completed = int(spec.events * spec.completed_event_ratio)
+    for i in range(spec.events):
+        event_id = f"event_{i + 1:03d}"
+        conditions: List[ActivationConditionModel] = []
+        kind = rng.random()
+        if kind < 0.5 or not npc_ids:
+            conditions.append(AreaEntryConditionModel(id=_condition_id(), scenario_id=rng.choice(scenario_ids)))
+        elif kind < 0.8 and i > 0:
+            source = f"event_{rng.randint(1, i):03d}"
+            conditions.append(EventCompletionConditionModel(id=_condition_id(), source_event_id=source))
+        else:
+            conditions.append(CharacterInteractionOptionModel(
+                id=_condition_id(), character_id=rng.choice(npc_ids), menu_label=_text(rng, 5)
+            ))
+
+        common = dict(
+            id=event_id,
+            title=_text(rng, 8),
+            description=_text(rng, 50),
+            status="COMPLETED" if i < completed else "AVAILABLE",
+            activation_conditions=conditions,
+            source_beat_id=None,
+        )
+        participants = rng.sample(npc_ids, k=min(len(npc_ids), rng.randint(1, 3))) if npc_ids else []
+        messages = [
+            CharacterDialogueMessage(actor_id=rng.choice(participants), content=_text(rng, 15))
+            for _ in range(rng.randint(0, 6))
+        ] if participants else []
+        if participants and rng.random() < 0.45:
+            all_events[event_id] = NPCConversationEventModel(npc_ids=participants, messages=messages, **common)
+        elif participants and rng.random() < 0.8:
+            all_events[event_id] = PlayerNPCConversationEventModel(npc_ids=participants, messages=messages, **common)
+        else:
+            all_events[event_id] = NarratorInterventionEventModel(**common)
+
+    return GameEventsManagerModel(all_events=all_events)
+
+
+def build_world(spec: Optional[WorldSpec] = None) -> GameStateModel:
+    """Builds a complete world following `spec` (the "large" size by default)."""
+    spec = spec or WORLD_SIZES["large"]
+    rng = random.Random(spec.seed)
+    game_map = _build_map(spec, rng)
+    scenario_ids = list(game_map.scenarios)
+    characters = _build_characters(spec, rng, scenario_ids, game_map)
+    character_ids = list(characters.registry)
+    npc_ids = [cid for cid in character_ids if cid != characters.player_character_id]
+    return GameStateModel(
+        session=GameSessionModel(
+            session_id="benchmark",
+            user_prompt=_text(rng, 20),
+            refined_prompt=_text(rng, 80),
+            narrative_time=GameTimeModel(),
+        ),
+        game_map=game_map,
+        characters=characters,
+        relationships=_build_relationships(spec, rng, character_ids),
+        narrative_state=NarrativeStateModel(main_goal=GoalModel(description=_text(rng, 15))),
+        game_events=_build_events(spec, rng, scenario_ids, npc_ids),
+    )
+
+
+def _id_counters(model: GameStateModel) -> Dict[str, int]:
+    conditions = sum(len(e.activation_conditions) for e in model.game_events.all_events.values())
+    return {
+        "scenario": len(model.game_map.scenarios),
+        "connection": len(model.game_map.connections),
+        "character": len(model.characters.registry),
+        "event": len(model.game_events.all_events),
+        "condition": conditions,
+    }
+
+
+@contextmanager
+def world_session(model: GameStateModel, session_id: str = "benchmark") -> Iterator[SessionContext]:
+    """
+    Registers a session holding a GameState built from `model` and binds it to the current
+    context, so the singletons (and the tools using them) work on the generated world.
+    The session is removed afterwards.
+    """
+    registry = get_session_registry()
+    session = registry.create_session(session_id)
+    try:
+        session.game_state = GameState(model)
+        session.restore_id_counters(_id_counters(model))
+        with use_session(session):
+            yield session
+    finally:
+        registry.delete_session(session_id)
@@ -0,0 +1,132 @@
+"""Per-entity change tracking shared by the domain collections."""
+from __future__ import annotations
+
+import itertools
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import xxhash
+from pydantic import BaseModel
+
+_revision_counter = itertools.count(1)
+_timeline_counter = itertools.count(1)
+_last_revision = 0
+# Hands out revisions and publishes the last one as a single step
+_revision_lock = threading.Lock()
+
+
+def current_revision() -> int:
+    """Returns the last revision handed out to any change log."""
+    return _last_revision
+
+
+class ChangeLog:
+    """
+    Records, for every entity id of a collection, the global revision of its last change.
+    Entries are kept ordered by revision, so the ids changed since a revision are found
+    without visiting untouched entities. Deleted ids keep their entry so removals are reported too.
+
+    Every log belongs to a timeline. Forks start a new one, so changes made in a fork that is
+    later discarded can never be mistaken for history of the state it was forked from.
+    """
+
+    def __init__(self) -> None:
+        self._last_change: Dict[str, int] = {}
+        self._timeline: int = next(_timeline_counter)
+
+    @property
+    def timeline(self) -> int:
+        return self._timeline
+
+    def touch(self, entity_id: str) -> None:
+        """Marks an entity as changed at a new revision."""
+        global _last_revision
+        with _revision_lock:
+            revision = next(_revision_counter)
+            _last_revision = revision
+        self._last_change.pop(entity_id, None)
+        self._last_change[entity_id] = revision
+
+    @property
+    def last_revision(self) -> int:
+        """Revision of the last change recorded in this log (0 if none)."""
+        return next(reversed(self._last_change.values()), 0)
+
+    def changed_since(self, revision: int) -> Set[str]:
+        """Returns the ids of the entities changed after the given revision."""
+        changed: Set[str] = set()
+        for entity_id, changed_at in reversed(self._last_change.items()):
+            if changed_at <= revision:
+                break
+            changed.add(entity_id)
+        return changed
+
+    def revisions_since(self, revision: int) -> List[Tuple[str, int]]:
+        """Returns the (entity id, revision) pairs changed after the given revision, oldest first."""
+        changes: List[Tuple[str, int]] = []
+        for entity_id, changed_at in reversed(self._last_change.items()):
+            if changed_at <= revision:
+                break
+            changes.append((entity_id, changed_at))
+        changes.reverse()
+        return changes
+
+    def fork(self) -> ChangeLog:
+        """Returns a copy of the log on a new timeline."""
+        forked = ChangeLog()
+        forked._last_change = dict(self._last_change)
+        return forked
+
+    def adopt_timeline(self, previous: ChangeLog) -> None:
+        """
+        Continues the timeline of the log this one replaces. Only valid when this log was forked
+        (directly or through other forks) from the latest state of `previous`.
+        """
+        self._timeline = previous._timeline
+
+
+class ContentHashedModel(BaseModel):
+    """
+    Base of the entity models (scenarios, connections, characters, events) that caches a hash of
+    their content, so detectors can skip unchanged entities with one integer comparison.
+
+    The hash is kept outside the pydantic fields and private attributes: it doesn't change
+    equality or dumps. Deep copies keep it. Assigning a field invalidates it; changes made in
+    place inside a field (appending a message, editing a nested model) must call
+    invalidate_content_hash, as the domain collections do when they hand out an entity to be
+    modified (the same places where the change logs are touched) and the domain wrappers do in
+    their in place mutators (add_message...).
+    """
+    __slots__ = ("_content_hash",)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        object.__setattr__(self, "_content_hash", None)
+
+    def content_hash(self) -> int:
+        cached: Optional[int] = getattr(self, "_content_hash", None)
+        if cached is None:
+            cached = xxhash.xxh3_64_intdigest(self.model_dump_json())
+            object.__setattr__(self, "_content_hash", cached)
+        return cached
+
+    def invalidate_content_hash(self) -> None:
+        object.__setattr__(self, "_content_hash", None)
+
+    def __deepcopy__(self, memo: Optional[Dict[int, Any]] = None):
+        copied = super().__deepcopy__(memo)
+        object.__setattr__(copied, "_content_hash", getattr(self, "_content_hash", None))
+        return copied
+
+
+def same_content(old: BaseModel, new: BaseModel) -> bool:
+    """
+    Whether two entity models have the same content, like comparing their dumps. Equal hashes
+    answer right away; only models whose hashes differ (changed ones, in practice) are dumped.
+    """
+    if old is new:
+        return True
+    if isinstance(old, ContentHashedModel) and isinstance(new, ContentHashedModel):
+        if old.content_hash() == new.content_hash():
+            return True
+    return old.model_dump() == new.model_dump()
@@ -1,6 +1,8 @@
-from typing import Dict, cast, Optional, Tuple, Literal
+import itertools
+from typing import Dict, List, Set, cast, Optional, Tuple, Literal
 
 from .schemas import *
+from core_game.change_tracking import ChangeLog
 
 class BaseCharacter:
     def __init__(self, data: CharacterBaseModel):
@@ -84,12 +86,60 @@ class NPCCharacter(BaseCharacter):
         return self._data
 
 
+FilterableAttribute = Literal["narrative_role", "current_narrative_importance", "species", "profession", "gender", "alias", "name_contains"]
+FILTERABLE_ATTRIBUTES: Tuple[FilterableAttribute, ...] = (
+    "narrative_role", "current_narrative_importance", "species", "profession", "gender", "alias", "name_contains"
+)
+
+
+def _filterable_value(char: BaseCharacter, attribute: FilterableAttribute) -> str:
+    """Returns the lowercased value a character is filtered by for an attribute."""
+    value = ""
+    if attribute == "narrative_role":
+        if isinstance(char, NPCCharacter):
+            value = char.narrative.narrative_role
+    elif attribute == "current_narrative_importance":
+        if isinstance(char, NPCCharacter):
+            value = char.narrative.current_narrative_importance
+    elif attribute == "species":
+        value = char.identity.species
+    elif attribute == "profession":
+        value = char.identity.profession
+    elif attribute == "gender":
+        value = char.identity.gender
+    elif attribute == "alias":
+        value = char.identity.alias or ""
+    elif attribute == "name_contains":
+        value = char.identity.full_name
+    return str(value).lower()
+
+
+# Positions of characters in registry order, increasing across all instances (see Characters._order)
+_registry_positions = itertools.count()
+
+
 class Characters:
     """Domain wrapper around characters."""
 
     def __init__(self, model: Optional[CharactersModel] = None) -> None:
         self._registry: Dict[str, BaseCharacter]
         self._player_id: Optional[str]
+        # Ids of characters still shared with the registry this one was forked from.
+        self._shared_ids: Set[str] = set()
+        self._changes = ChangeLog()
+        # scenario id -> ids of the characters present in it
+        self._present_at: Dict[str, Set[str]] = {}
+        # attribute -> lowercased value -> ids of the characters with that value
+        self._attribute_index: Dict[str, Dict[str, Set[str]]] = {attr: {} for attr in FILTERABLE_ATTRIBUTES}
+        # Index entries this instance may write in place. A fork shares the indexes of the instance
+        # it was forked from and copies an entry the first time it writes it. None: owns them all.
+        self._owned_presence: Optional[Set[str]] = None
+        self._owned_attributes: Optional[Set[str]] = None
+        self._owned_attribute_values: Optional[Set[Tuple[str, str]]] = None
+        # character id -> position in the registry, so indexed queries keep the registry order.
+        # Shared with forks until one of them adds a character.
+        self._order: Dict[str, int] = {}
+        self._owns_order = True
 
         if model:
             self._populate_from_model(model)
@@ -99,14 +149,123 @@ class Characters:
 
     def _populate_from_model(self, model: CharactersModel) -> None:
         self._registry = {}
+        self._present_at = {}
+        self._attribute_index = {attr: {} for attr in FILTERABLE_ATTRIBUTES}
         for char_id, char_model in model.registry.items():
             if char_model.type == "player":
                 self._registry[char_id] = PlayerCharacter(cast(PlayerCharacterModel, char_model))
             else:
                 self._registry[char_id] = NPCCharacter(cast(NonPlayerCharacterModel, char_model))
+            self._order[char_id] = next(_registry_positions)
+            self._index_presence(self._registry[char_id])
+            self._index_attributes(self._registry[char_id])
 
         self._player_id = model.player_character_id
 
+    def _writable_presence(self, scenario_id: str) -> Set[str]:
+        """The ids present at a scenario ready to be modified, copied first if still shared."""
+        present = self._present_at.get(scenario_id)
+        if self._owned_presence is not None and scenario_id not in self._owned_presence:
+            present = set(present) if present is not None else set()
+            self._present_at[scenario_id] = present
+            self._owned_presence.add(scenario_id)
+        elif present is None:
+            present = self._present_at[scenario_id] = set()
+        return present
+
+    def _writable_attribute_ids(self, attribute: str, value: str) -> Set[str]:
+        """The ids with an attribute value ready to be modified, copied first if still shared."""
+        by_value = self._attribute_index[attribute]
+        if self._owned_attributes is not None and attribute not in self._owned_attributes:
+            by_value = self._attribute_index[attribute] = dict(by_value)
+            self._owned_attributes.add(attribute)
+        ids = by_value.get(value)
+        if self._owned_attribute_values is not None and (attribute, value) not in self._owned_attribute_values:
+            ids = set(ids) if ids is not None else set()
+            by_value[value] = ids
+            self._owned_attribute_values.add((attribute, value))
+        elif ids is None:
+            ids = by_value[value] = set()
+        return ids
+
+    def _index_presence(self, char: BaseCharacter) -> None:
+        if char.present_in_scenario:
+            self._writable_presence(char.present_in_scenario).add(char.id)
+
+    def _unindex_presence(self, char: BaseCharacter) -> None:
+        if char.present_in_scenario and char.present_in_scenario in self._present_at:
+            present = self._writable_presence(char.present_in_scenario)
+            present.discard(char.id)
+            if not present:
+                del self._present_at[char.present_in_scenario]
+
+    def _index_attributes(self, char: BaseCharacter) -> None:
+        for attribute in FILTERABLE_ATTRIBUTES:
+            self._writable_attribute_ids(attribute, _filterable_value(char, attribute)).add(char.id)
+
+    def _unindex_attributes(self, char: BaseCharacter) -> None:
+        for attribute in FILTERABLE_ATTRIBUTES:
+            value = _filterable_value(char, attribute)
+            if value in self._attribute_index[attribute]:
+                ids = self._writable_attribute_ids(attribute, value)
+                ids.discard(char.id)
+                if not ids:
+                    del self._attribute_index[attribute][value]
+
+    def _append_to_order(self, character_id: str) -> None:
+        """Gives a character added to the registry the last position."""
+        if not self._owns_order:
+            self._order = dict(self._order)
+            self._owns_order = True
+        self._order[character_id] = next(_registry_positions)
+
+    def _in_registry_order(self, ids: Set[str]) -> List[str]:
+        return sorted(ids, key=self._order.__getitem__)
+
+
+    def fork(self) -> "Characters":
+        """
+        Return a structurally shared copy. Only the registry index is copied, characters
+        are shared with this instance until the fork writes them.
+        This instance must not be modified while the fork is alive.
+        """
+        forked = Characters()
+        forked._registry = dict(self._registry)
+        forked._player_id = self._player_id
+        forked._shared_ids = set(self._registry)
+        forked._changes = self._changes.fork()
+        # Indexes are shared too and copied entry by entry when the fork writes them
+        forked._present_at = dict(self._present_at)
+        forked._attribute_index = dict(self._attribute_index)
+        forked._owned_presence = set()
+        forked._owned_attributes = set()
+        forked._owned_attribute_values = set()
+        forked._order = self._order
+        forked._owns_order = False
+        return forked
+
+    def adopt_change_history(self, previous: "Characters") -> None:
+        """Continue the change history of the registry this fork replaces on commit."""
+        self._changes.adopt_timeline(previous._changes)
+
+    def get_change_log(self) -> ChangeLog:
+        return self._changes
+
+    def _writable_character(self, character_id: str) -> Optional[BaseCharacter]:
+        """Return the character ready to be modified, cloning it first if it is still shared."""
+        char = self._registry.get(character_id)
+        if not char:
+            return None
+        if character_id in self._shared_ids:
+            if isinstance(char, PlayerCharacter):
+                char = PlayerCharacter(char.get_model().model_copy(deep=True))
+            else:
+                char = NPCCharacter(cast(NonPlayerCharacterModel, char.get_model().model_copy(deep=True)))
+            self._registry[character_id] = char
+            self._shared_ids.discard(character_id)
+        self._changes.touch(character_id)
+        char.get_model().invalidate_content_hash()
+        return char
 
     def to_model(self) -> CharactersModel:
         """Return the underlying data as a CharactersModel."""
@@ -131,15 +290,31 @@ class Characters:
 
     def add_npc(self, npc:NPCCharacter) -> NPCCharacter:
         """Create a new NPC and return it."""
+        replaced = self._registry.get(npc.id)
+        if replaced:
+            self._unindex_presence(replaced)
+            self._unindex_attributes(replaced)
+        else:
+            self._append_to_order(npc.id)
         self._registry[npc.id] = npc
+        self._shared_ids.discard(npc.id)
+        self._changes.touch(npc.id)
+        self._index_presence(npc)
+        self._index_attributes(npc)
         return npc
 
     def add_player(self, player: PlayerCharacter) -> PlayerCharacter:
         """Adds the player to de character components. it does not check anything"""
         if self.has_player():
             raise ValueError("A player character already exists.")
-            
+
+        if player.id not in self._registry:
+            self._append_to_order(player.id)
         self._registry[player.id] = player
+        self._shared_ids.discard(player.id)
+        self._changes.touch(player.id)
+        self._index_presence(player)
+        self._index_attributes(player)
         self._player_id = player.id # La clave es guardar el ID
         return player
 
@@ -170,10 +345,11 @@ class Characters:
         new_species: Optional[str] = None,
         new_alignment: Optional[str] = None,
     ) -> bool:
-        char = self.find_character(character_id)
+        char = self._writable_character(character_id)
         if not char:
             return False
 
+        self._unindex_attributes(char)
         if new_full_name is not None:
             char.identity.full_name = new_full_name
         if new_alias is not None:
@@ -188,6 +364,7 @@ class Characters:
             char.identity.species = new_species
         if new_alignment is not None:
             char.identity.alignment = new_alignment
+        self._index_attributes(char)
         return True
 
     def modify_character_physical(
@@ -201,7 +378,7 @@ class Characters:
         new_characteristic_items: Optional[List[str]] = None,
         append_characteristic_items: bool = False,
     ) -> bool:
-        char = self.find_character(character_id)
+        char = self._writable_character(character_id)
         if not char:
             return False
         if new_appearance is not None:
@@ -239,7 +416,7 @@ class Characters:
         new_quirks: Optional[List[str]] = None,
         append_quirks: bool = False,
     ) -> bool:
-        char = self.find_character(character_id)
+        char = self._writable_character(character_id)
         if not char:
             return False
         p = char.psychological
@@ -284,7 +461,7 @@ class Characters:
         new_acquired_knowledge: Optional[List[str]] = None,
         append_acquired_knowledge: bool = False,
     ) -> bool:
-        char = self.find_character(character_id)
+        char = self._writable_character(character_id)
         if not char:
             return False
         k = char.knowledge
@@ -306,7 +483,7 @@ class Characters:
         new_current_emotion: Optional[str] = None,
         new_immediate_goal: Optional[str] = None,
     ) -> bool:
-        char = self.find_character(character_id)
+        char = self._writable_character(character_id)
         if not char or not isinstance(char, NPCCharacter):
             return False
         if new_current_emotion is not None:
@@ -323,9 +500,10 @@ class Characters:
         new_narrative_purposes: Optional[List[NarrativePurposeModel]] = None,
         append_narrative_purposes: bool = False,
     ) -> bool:
-        char = self.find_character(character_id)
+        char = self._writable_character(character_id)
         if not char or not isinstance(char, NPCCharacter):
             return False
+        self._unindex_attributes(char)
         n = char.narrative
         if new_narrative_role is not None:
             n.narrative_role = new_narrative_role
@@ -336,6 +514,7 @@ class Characters:
                 n.narrative_purposes.extend(new_narrative_purposes)
             else:
                 n.narrative_purposes = new_narrative_purposes
+        self._index_attributes(char)
         return True
 
     def characters_count(self) -> int:
@@ -345,79 +524,68 @@ class Characters:
         """Delete an NPC from the registry."""
         if character_id == (self.player.id if self.player else None):
             return None
-        return self._registry.pop(character_id, None)
+        char = self._registry.pop(character_id, None)
+        if char:
+            self._shared_ids.discard(character_id)
+            self._changes.touch(character_id)
+            self._unindex_presence(char)
+            self._unindex_attributes(char)
+        return char
 
     def place_character(self, character: BaseCharacter, new_scenario_id: str) -> Optional[BaseCharacter]:
-        char = self.find_character(character.id)
+        char = self._writable_character(character.id)
         if char:
+            self._unindex_presence(char)
             char.present_in_scenario = new_scenario_id
+            self._index_presence(char)
         return char
 
     def remove_character_from_scenario(self, character_id: str) -> Tuple[Optional[str], Optional[BaseCharacter]]:
         """Removes character from scenario and returns its scenario id"""
-        char = self.find_character(character_id)
+        char = self._writable_character(character_id)
         if not char or isinstance(char, PlayerCharacter):
             return None, None
         scenario_id = char.present_in_scenario
+        self._unindex_presence(char)
         char.present_in_scenario = None
         return scenario_id, char
     
     def filter_characters(
         self, 
-        attribute_to_filter: Optional[Literal[ "narrative_role","current_narrative_importance", "species","profession","gender","alias","name_contains"]] = None, 
+        attribute_to_filter: Optional[FilterableAttribute] = None, 
         value_to_match: Optional[str] = None
     ) -> Dict[str, BaseCharacter]:
-        
-        result: Dict[str, BaseCharacter] = {}
-        match_val = (value_to_match or "").lower()
-
-        for char_id, char in self._registry.items():
-            if attribute_to_filter is None or value_to_match is None:
-                result[char_id] = char
-                continue
-
-            value = ""
-
-            if attribute_to_filter == "narrative_role":
-                if isinstance(char, NPCCharacter):
-                    value = char.narrative.narrative_role
-            elif attribute_to_filter == "current_narrative_importance":
-                if isinstance(char, NPCCharacter):
-                    value = char.narrative.current_narrative_importance
-            elif attribute_to_filter == "species":
-                value = char.identity.species
-            elif attribute_to_filter == "profession":
-                value = char.identity.profession
-            elif attribute_to_filter == "gender":
-                value = char.identity.gender
-            elif attribute_to_filter == "alias":
-                value = char.identity.alias or ""
-            elif attribute_to_filter == "name_contains":
-                value = char.identity.full_name
-
-            if match_val in str(value).lower():
-                result[char_id] = char
-
-        return result
+        """
+        Returns the characters whose attribute value contains `value_to_match` (case insensitive).
+        Only the distinct indexed values are scanned, not every character.
+        """
+        if attribute_to_filter is None or value_to_match is None:
+            return dict(self._registry)
+
+        match_val = value_to_match.lower()
+        matched: Set[str] = set()
+        for value, ids in self._attribute_index[attribute_to_filter].items():
+            if match_val in value:
+                matched |= ids
+
+        return {char_id: self._registry[char_id] for char_id in self._in_registry_order(matched)}
     
     def group_by_scenario(self) -> Dict[str,List[BaseCharacter]]:
+        # Visits every character anyway, so the registry order is kept without the index
         groups: Dict[str, List[BaseCharacter]] = {}
         for char in self._registry.values():
-            scenario = char.present_in_scenario or "OUT_OF_ANY_SCENARIO"
-            groups.setdefault(scenario, []).append(
-                char
-            )
+            groups.setdefault(char.present_in_scenario or "OUT_OF_ANY_SCENARIO", []).append(char)
         return groups
     
     def get_characters_at_scenario(self, scenario_id: str) -> List[BaseCharacter]:
-        matches = []
-        for char in self._registry.values():
-            if char.present_in_scenario == scenario_id:
-                matches.append(char)
-        return matches
+        return [self._registry[cid] for cid in self._in_registry_order(self._present_at.get(scenario_id, set()))]
+
+    def get_character_ids_at_scenario(self, scenario_id: str) -> Set[str]:
+        """Returns the ids of the characters present at a scenario. Do not modify the returned set."""
+        return self._present_at.get(scenario_id, set())
     
     def attach_new_image(self, character_id: str, image_path: str, image_generation_prompt: str) -> bool:
-        character = self.find_character(character_id)
+        character = self._writable_character(character_id)
         if character:
             character.image_path = image_path
             character.image_generation_prompt = image_generation_prompt
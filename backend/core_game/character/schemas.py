@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from core_game.change_tracking import ContentHashedModel
 from typing import Dict, List, Optional
 from core_game.relationship.schemas import RelationshipTypeModel as RelationshipType
 from core_game.character.constants import (
@@ -8,20 +9,16 @@ from core_game.character.constants import (
     NarrativeImportance,
 )
 from core_game.character.field_descriptions import *
+from core_game.game_state.sessions import current_session
 
-# Internal counter used for sequential character ids
-_character_id_counter = 0
-
+# Character ids are sequential within each game session
 
 def generate_character_id() -> str:
     """Return a sequential id of the form 'character_001'."""
-    global _character_id_counter
-    _character_id_counter += 1
-    return f"character_{_character_id_counter:03d}"
+    return f"character_{current_session().next_id('character'):03d}"
 
 def rollback_character_id():
-    global _character_id_counter
-    _character_id_counter -= 1
+    current_session().rollback_id('character')
 
 class IdentityModel(BaseModel):
     """Core identity traits of the character."""
@@ -85,7 +82,7 @@ class DynamicStateModel(BaseModel):
 
 
 
-class CharacterBaseModel(BaseModel):
+class CharacterBaseModel(ContentHashedModel):
     """The base model that all character types inherit from."""
     id: str = Field(default_factory=generate_character_id, description="Unique identifier for the character.")
     type: CharacterType = Field(default="player", description="Type of character.")
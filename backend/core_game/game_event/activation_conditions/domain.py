@@ -54,7 +54,7 @@ class AreaEntryCondition(ActivationCondition):
         player = game_state.read_only_characters.get_player()
         if not player:
             return False
-        return player.id == self._model.scenario_id
+        return player.present_in_scenario == self._model.scenario_id
 
 
 class EventCompletionCondition(ActivationCondition):
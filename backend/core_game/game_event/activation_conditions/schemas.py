@@ -1,19 +1,15 @@
 from pydantic import BaseModel, Field
 from typing import Literal, Union
-
-_condition_id_counter = 0
+from core_game.game_state.sessions import current_session
 
 
 def generate_condition_id() -> str:
     """Return a sequential id of the form 'condition_001'."""
-    global _condition_id_counter
-    _condition_id_counter += 1
-    return f"condition_{_condition_id_counter:03d}"
+    return f"condition_{current_session().next_id('condition'):03d}"
 
 
 def rollback_condition_id() -> None:
-    global _condition_id_counter
-    _condition_id_counter -= 1
+    current_session().rollback_id('condition')
 
 class ActivationConditionModel(BaseModel):
     """Base class for all activation condition models."""
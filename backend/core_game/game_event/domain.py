@@ -12,7 +12,7 @@ from .schemas import (
     GameEventModel,
     GameEventsManagerModel,
 )
-from typing import Optional, Dict, List, Set, TYPE_CHECKING
+from typing import Any, Callable, Optional, Dict, List, Set, Tuple, Iterable, TypeVar, TYPE_CHECKING
 from collections import defaultdict
 from .constants import EVENT_STATUSES, EVENT_STATUS_LITERAL
 from core_game.game_event.activation_conditions.domain import (
@@ -21,18 +21,28 @@ from core_game.game_event.activation_conditions.domain import (
     WRAPPER_MAP as CONDITION_WRAPPER_MAP
 )
 from core_game.game_event.schemas import RunningEventInfo
-from core_game.game_event.activation_conditions.schemas import ActivationConditionModel, CharacterInteractionOptionModel
+from core_game.change_tracking import ChangeLog
+from core_game.game_event.activation_conditions.schemas import (
+    ActivationConditionModel,
+    AreaEntryConditionModel,
+    CharacterInteractionOptionModel,
+    EventCompletionConditionModel,
+    ImmediateActivationModel,
+)
 
 
 from core_game.character.domain import PlayerCharacter, BaseCharacter
 from core_game.character.schemas import CharacterBaseModel, IdentityModel, PhysicalAttributesModel, PsychologicalAttributesModel, KnowledgeModel
 
 import json
+import weakref
 from typing import AsyncGenerator
 
 if TYPE_CHECKING:
     from simulated.game_state import SimulatedGameState
 
+E = TypeVar("E", bound="BaseGameEvent")
+
 
 class BaseGameEvent:
     """Common functionality for domain event wrappers.
@@ -42,7 +52,7 @@ class BaseGameEvent:
         self._data = model
         self._activation_conditions: List[ActivationCondition] = [] # Initialize here
         self._build_condition_wrappers()
-        self.triggered_by: Optional[ActivationCondition]
+        self.triggered_by: Optional[ActivationCondition] = None
 
     def _build_condition_wrappers(self):
         """Instantiates domain objects for the activation conditions."""
@@ -97,6 +107,27 @@ class BaseGameEvent:
         """Return the underlying Pydantic model."""
         return self._data
 
+    def _clone(self) -> "BaseGameEvent":
+        """
+        Copy to be modified by a fork (see GameEventsManager._writable_event): the model deep
+        copied and the state that only lives on the domain object carried over.
+        """
+        clone = type(self)(model=self._data.model_copy(deep=True))  # type: ignore[call-arg]
+        if self.triggered_by is not None:
+            clone.triggered_by = next((c for c in clone.activation_conditions if c.id == self.triggered_by.id), None)
+        return clone
+
+    def live(self: E, game_state: 'SimulatedGameState') -> E:
+        """
+        The object holding this event in the state now. Writes clone shared events, so after a
+        commit the object a stream started with may not be the live one anymore.
+        """
+        return game_state.read_only_events.get_state().find_event(self.id) or self  # type: ignore[return-value]
+
+    def message_recorder(self, game_state: 'SimulatedGameState') -> Callable[[ConversationMessage], None]:
+        """Adds messages to this event through the events manager of the state (see GameEventsManager.add_message)."""
+        return lambda message: game_state.events.get_state().add_message(self.id, message)
+
 class NPCConversationEvent(BaseGameEvent):
     """Domain logic for an NPC-only conversation."""
 
@@ -105,7 +136,9 @@ class NPCConversationEvent(BaseGameEvent):
         self._data = model
 
     def add_message(self, message: ConversationMessage) -> None:
+        """Low level append, use GameEventsManager.add_message so the change is tracked."""
         self._data.messages.append(message)
+        self._data.invalidate_content_hash()
     
     @property
     def npc_ids(self) -> List[str]:
@@ -129,7 +162,8 @@ class NPCConversationEvent(BaseGameEvent):
         # --- Bucle de Conversación Principal ---
         # Este bucle continúa mientras haya alguien que hablar.
         while True:
-            speaker = decide_next_npc_speaker(self, self.triggered_by, game_state)
+            event = self.live(game_state)
+            speaker = await decide_next_npc_speaker(event, event.triggered_by, game_state)
 
             if not speaker:
                 print(f"[Event: {self.id}] Conversation concluded naturally.")
@@ -144,13 +178,14 @@ class NPCConversationEvent(BaseGameEvent):
                 
                 raw_llm_stream = generate_npc_message_stream(
                     speaker=speaker,
-                    event=self,
+                    event=event,
                     game_state=game_state
                 )
 
                 try:
                     # Intenta parsear y streamear el turno completo.
-                    async for message_json in parse_and_stream_messages(raw_llm_stream, speaker, self):
+                    async for message_json in parse_and_stream_messages(raw_llm_stream, speaker, event,
+                                                                        add_message=self.message_recorder(game_state)):
                         yield message_json
                     
                     # Si el bucle 'async for' termina sin lanzar una excepción, el turno fue exitoso.
@@ -192,8 +227,20 @@ class PlayerNPCConversationEvent(BaseGameEvent):
         self._data = model
         self._pending_choice: Optional[str] = None
 
+    def _clone(self) -> "PlayerNPCConversationEvent":
+        clone = super()._clone()
+        assert isinstance(clone, PlayerNPCConversationEvent)
+        clone._pending_choice = self._pending_choice
+        return clone
+
+    @property
+    def pending_choice(self) -> Optional[str]:
+        return self._pending_choice
+
     def add_message(self, message: ConversationMessage) -> None:
+        """Low level append, use GameEventsManager.add_message so the change is tracked."""
         self._data.messages.append(message)
+        self._data.invalidate_content_hash()
     
     @property
     def npc_ids(self) -> List[str]:
@@ -204,7 +251,7 @@ class PlayerNPCConversationEvent(BaseGameEvent):
         return self._data.messages
     
     def set_player_choice(self, choice_label: str) -> None:
-        """Llamar desde el endpoint /choice para continuar la conversación."""
+        """Low level, use GameEventsManager.set_player_choice (llamado desde el endpoint /choice)."""
         self._pending_choice = choice_label
     
     async def run(self, game_state: 'SimulatedGameState') -> AsyncGenerator[str, None]:
@@ -213,9 +260,8 @@ class PlayerNPCConversationEvent(BaseGameEvent):
         - Si hay elección pendiente, procesa esa elección.
         - En otro caso, ejecuta el bucle normal de conversación.
         """
-        if self._pending_choice is not None:
-            choice = self._pending_choice
-            self._pending_choice = None
+        choice = game_state.events.get_state().take_player_choice(self.id)
+        if choice is not None:
             # Procesamos la elección y la stream devolviendo sus mensajes
             async for msg in self._process_choice_stream(game_state, choice):
                 yield msg
@@ -234,7 +280,8 @@ class PlayerNPCConversationEvent(BaseGameEvent):
         conversation_ended = False
 
         while True:
-            speaker = decide_next_player_npc_speaker(self, self.triggered_by, game_state)
+            event = self.live(game_state)
+            speaker = await decide_next_player_npc_speaker(event, event.triggered_by, game_state)
             if not speaker:
                 conversation_ended = True
                 break
@@ -242,12 +289,12 @@ class PlayerNPCConversationEvent(BaseGameEvent):
             is_player = isinstance(speaker, PlayerCharacter)
             for attempt in range(MAX_RETRIES_PER_TURN):
                 if is_player:
-                    raw = generate_player_message_stream(speaker=speaker, event=self, game_state=game_state)
+                    raw = generate_player_message_stream(speaker=speaker, event=event, game_state=game_state)
                 else:
-                    raw = generate_npc_message_stream(speaker=speaker, event=self, game_state=game_state)
+                    raw = generate_npc_message_stream(speaker=speaker, event=event, game_state=game_state)
 
                 try:
-                    async for chunk in parse_and_stream_messages(raw, speaker, self):
+                    async for chunk in parse_and_stream_messages(raw, speaker, event, add_message=self.message_recorder(game_state)):
                         yield chunk
                     break  # turno completado
                 except InvalidTagError as e:
@@ -279,14 +326,16 @@ class PlayerNPCConversationEvent(BaseGameEvent):
         
         MAX_RETRIES = 3
         for attempt in range(MAX_RETRIES):
+            event = self.live(game_state)
             raw = generate_choice_driven_message_stream(
                 player_choice=choice_label,
                 speaker=player,
-                event=self,
+                event=event,
                 game_state=game_state
             )
             try:
-                async for chunk in parse_and_stream_messages(raw, game_state.read_only_characters.get_player(), self):
+                async for chunk in parse_and_stream_messages(raw, game_state.read_only_characters.get_player(), event,
+                                                             add_message=self.message_recorder(game_state)):
                     yield chunk
                 break
             except InvalidTagError:
@@ -304,7 +353,9 @@ class NarratorInterventionEvent(BaseGameEvent):
         self._data = model
 
     def add_message(self, message: ConversationMessage) -> None:
+        """Low level append, use GameEventsManager.add_message so the change is tracked."""
         self._data.messages.append(message)
+        self._data.invalidate_content_hash()
 
     @property
     def messages(self) -> List[ConversationMessage]:
@@ -358,13 +409,15 @@ class NarratorInterventionEvent(BaseGameEvent):
         for attempt in range(MAX_RETRIES):
             print(f"[Event: {self.id}] Attempt {attempt + 1}/{MAX_RETRIES} for narrator...")
             
+            event = self.live(game_state)
             raw_llm_stream = generate_narrator_message_stream(
-                event=self,
+                event=event,
                 game_state=game_state
             )
 
             try:
-                async for message_json in parse_and_stream_messages(raw_llm_stream, narrator_speaker, self):
+                async for message_json in parse_and_stream_messages(raw_llm_stream, narrator_speaker, event,
+                                                                    add_message=self.message_recorder(game_state)):
                     yield message_json
                 
                 turn_successful = True
@@ -385,7 +438,10 @@ class NarratorInterventionEvent(BaseGameEvent):
 
 
 class CutsceneFrame:
-    """Domain wrapper around :class:`CutsceneFrameModel`."""
+    """
+    Domain wrapper around :class:`CutsceneFrameModel`. Frames are part of the content of their
+    CutsceneEvent: invalidate its content hash after changing one.
+    """
 
     def __init__(self, model: CutsceneFrameModel):
         self._data: CutsceneFrameModel = model
@@ -406,6 +462,7 @@ class CutsceneEvent(BaseGameEvent):
 
     def add_frame(self, frame: CutsceneFrameModel) -> None:
         self._data.frames.append(frame)
+        self._data.invalidate_content_hash()
 
 
 WRAPPER_MAP: Dict[str, type[BaseGameEvent]] = {
@@ -426,6 +483,19 @@ class GameEventsManager:
         self._events_by_beat_id: Dict[str, Set[str]] = defaultdict(set)
         self._beatless_event_ids: Set[str] = set()
         self._interaction_options_by_character: Dict[str, Set[str]] = defaultdict(set)
+        # Reverse trigger indexes, condition id -> event id, keyed by what can make the condition fire.
+        self._area_entry_triggers: Dict[str, Dict[str, str]] = defaultdict(dict)
+        self._completion_triggers: Dict[str, Dict[str, str]] = defaultdict(dict)
+        self._immediate_triggers: Dict[str, str] = {}
+        self._interaction_option_events: Dict[str, str] = {}
+        # Ids of events still shared with the manager this one was forked from.
+        self._shared_event_ids: Set[str] = set()
+        # Index entries, (index name, key), already copied from the manager this one was forked
+        # from, and flat indexes still shared with it. None / empty while this manager owns them all.
+        self._owned_index_entries: Optional[Set[Tuple[str, str]]] = None
+        self._shared_indexes: Set[str] = set()
+        self._forks: "weakref.WeakSet[GameEventsManager]" = weakref.WeakSet()
+        self._changes = ChangeLog()
         
         if model:
             self._populate_and_reindex(model)
@@ -442,6 +512,10 @@ class GameEventsManager:
         self._events_by_beat_id = defaultdict(set)
         self._beatless_event_ids = set()
         self._interaction_options_by_character = defaultdict(set)
+        self._area_entry_triggers = defaultdict(dict)
+        self._completion_triggers = defaultdict(dict)
+        self._immediate_triggers = {}
+        self._interaction_option_events = {}
         self._all_events = {}
 
         for event_id, event_model in model.all_events.items():
@@ -458,11 +532,167 @@ class GameEventsManager:
             else:
                 self._beatless_event_ids.add(event_id)
 
-            for condition in domain_event.activation_conditions:
-                if isinstance(condition, CharacterInteractionOption):
-                    self._interaction_options_by_character[condition.character_id].add(event_id)
+            self._index_conditions(event_id, event_model.activation_conditions)
+
+    def _writable_entry(self, index_name: str, key: str, empty: Callable[[], Any]) -> Any:
+        """The entry `key` of a keyed index ready to be modified, copied first if still shared."""
+        index = getattr(self, index_name)
+        entry = index.get(key)
+        if self._owned_index_entries is not None and (index_name, key) not in self._owned_index_entries:
+            entry = entry.copy() if entry is not None else empty()
+            index[key] = entry
+            self._owned_index_entries.add((index_name, key))
+        elif entry is None:
+            entry = index[key] = empty()
+        return entry
+
+    def _writable_index(self, index_name: str) -> Any:
+        """A flat index ready to be modified, copied first if still shared."""
+        if index_name in self._shared_indexes:
+            setattr(self, index_name, getattr(self, index_name).copy())
+            self._shared_indexes.discard(index_name)
+        return getattr(self, index_name)
+
+    def _discard_trigger(self, index_name: str, key: str, condition_id: str) -> None:
+        index = getattr(self, index_name)
+        if condition_id in index.get(key, ()):
+            conditions = self._writable_entry(index_name, key, dict)
+            del conditions[condition_id]
+            if not conditions:
+                del index[key]
+
+    def _discard_from_entry(self, index_name: str, key: str, event_id: str) -> None:
+        index = getattr(self, index_name)
+        if event_id in index.get(key, ()):
+            ids = self._writable_entry(index_name, key, set)
+            ids.discard(event_id)
+            if not ids:
+                del index[key]
+
+    def _index_conditions(self, event_id: str, conditions: Iterable[ActivationConditionModel]) -> None:
+        """Adds the activation conditions of an event to the trigger indexes."""
+        for condition in conditions:
+            if isinstance(condition, AreaEntryConditionModel):
+                self._writable_entry("_area_entry_triggers", condition.scenario_id, dict)[condition.id] = event_id
+            elif isinstance(condition, EventCompletionConditionModel):
+                self._writable_entry("_completion_triggers", condition.source_event_id, dict)[condition.id] = event_id
+            elif isinstance(condition, ImmediateActivationModel):
+                self._writable_index("_immediate_triggers")[condition.id] = event_id
+            elif isinstance(condition, CharacterInteractionOptionModel):
+                self._writable_entry("_interaction_options_by_character", condition.character_id, set).add(event_id)
+                self._writable_index("_interaction_option_events")[condition.id] = event_id
+
+    def _unindex_conditions(self, event_id: str, conditions: Iterable[ActivationConditionModel],
+                            remaining: Iterable[ActivationConditionModel] = ()) -> None:
+        """
+        Removes activation conditions of an event from the trigger indexes.
+        `remaining` are the conditions the event keeps, so characters it still offers options for stay indexed.
+        """
+        still_offered = {c.character_id for c in remaining if isinstance(c, CharacterInteractionOptionModel)}
+        for condition in conditions:
+            if isinstance(condition, AreaEntryConditionModel):
+                self._discard_trigger("_area_entry_triggers", condition.scenario_id, condition.id)
+            elif isinstance(condition, EventCompletionConditionModel):
+                self._discard_trigger("_completion_triggers", condition.source_event_id, condition.id)
+            elif isinstance(condition, ImmediateActivationModel):
+                if condition.id in self._immediate_triggers:
+                    del self._writable_index("_immediate_triggers")[condition.id]
+            elif isinstance(condition, CharacterInteractionOptionModel):
+                if condition.id in self._interaction_option_events:
+                    del self._writable_index("_interaction_option_events")[condition.id]
+                if condition.character_id in still_offered:
+                    continue
+                self._discard_from_entry("_interaction_options_by_character", condition.character_id, event_id)
+
+    def fork(self) -> "GameEventsManager":
+        """
+        Returns a structurally shared copy of the manager. Event objects and index entries
+        are shared with this manager until the fork writes them.
+        This manager must not be modified while the fork is alive.
+        """
+        forked = GameEventsManager()
+        forked._all_events = dict(self._all_events)
+        forked._running_event_stack = self._running_event_stack.copy()
+        # Keyed indexes are copied one level deep, their entries when the fork writes them
+        forked._status_indexes = dict(self._status_indexes)
+        forked._events_by_beat_id = defaultdict(set, self._events_by_beat_id)
+        forked._interaction_options_by_character = defaultdict(set, self._interaction_options_by_character)
+        forked._area_entry_triggers = defaultdict(dict, self._area_entry_triggers)
+        forked._completion_triggers = defaultdict(dict, self._completion_triggers)
+        forked._owned_index_entries = set()
+        forked._beatless_event_ids = self._beatless_event_ids
+        forked._immediate_triggers = self._immediate_triggers
+        forked._interaction_option_events = self._interaction_option_events
+        forked._shared_indexes = {"_beatless_event_ids", "_immediate_triggers", "_interaction_option_events"}
+        forked._shared_event_ids = set(self._all_events)
+        forked._changes = self._changes.fork()
+        self._forks.add(forked)
+        return forked
+
+    def adopt_change_history(self, previous: "GameEventsManager") -> None:
+        """Continues the change history of the manager this fork replaces on commit."""
+        self._changes.adopt_timeline(previous._changes)
+
+    def take_over_events(self, previous: "GameEventsManager") -> None:
+        """
+        Called when this fork replaces `previous` on commit and `previous` is dropped. Unless
+        another fork of it is still alive, the events and index entries shared with it belong to
+        this manager now, so writes stop copying them (and leaving the objects held by running
+        streams outdated).
+        """
+        if any(fork is not self for fork in previous._forks):
+            return
+        self._shared_event_ids &= previous._shared_event_ids
+        self._shared_indexes &= previous._shared_indexes
+        if previous._owned_index_entries is None:
+            self._owned_index_entries = None
+        elif self._owned_index_entries is not None:
+            self._owned_index_entries |= previous._owned_index_entries
+
+    def get_change_log(self) -> ChangeLog:
+        return self._changes
+
+    def _writable_event(self, event_id: str) -> BaseGameEvent:
+        """Returns the event ready to be modified, cloning it first if it is still shared."""
+        event = self._all_events[event_id]
+        if event_id in self._shared_event_ids:
+            event = event._clone()
+            self._all_events[event_id] = event
+            self._shared_event_ids.discard(event_id)
+        self._changes.touch(event_id)
+        event.get_model().invalidate_content_hash()
+        return event
+
+    def add_message(self, event_id: str, message: ConversationMessage) -> BaseGameEvent:
+        """Appends a message to a conversation or narrator event. Raises KeyError or TypeError."""
+        if event_id not in self._all_events:
+            raise KeyError(f"Event with ID '{event_id}' not found.")
+        if not hasattr(self._all_events[event_id], "add_message"):
+            raise TypeError(f"Event '{event_id}' doesn't hold messages.")
+        event = self._writable_event(event_id)
+        event.add_message(message)  # type: ignore[attr-defined]
+        return event
 
+    def set_player_choice(self, event_id: str, choice_label: str) -> BaseGameEvent:
+        """Stores the player choice a PlayerNPCConversationEvent continues with. Raises KeyError or TypeError."""
+        if event_id not in self._all_events:
+            raise KeyError(f"Event with ID '{event_id}' not found.")
+        if not isinstance(self._all_events[event_id], PlayerNPCConversationEvent):
+            raise TypeError(f"Event '{event_id}' doesn't accept player choices.")
+        event = self._writable_event(event_id)
+        event.set_player_choice(choice_label)  # type: ignore[attr-defined]
+        return event
 
+    def take_player_choice(self, event_id: str) -> Optional[str]:
+        """Returns and clears the pending player choice of a PlayerNPCConversationEvent, if any."""
+        event = self._all_events.get(event_id)
+        if not isinstance(event, PlayerNPCConversationEvent) or event.pending_choice is None:
+            return None
+        event = self._writable_event(event_id)
+        assert isinstance(event, PlayerNPCConversationEvent)
+        choice = event.pending_choice
+        event._pending_choice = None
+        return choice
 
     def to_model(self) -> GameEventsManagerModel:
         return GameEventsManagerModel(
@@ -483,9 +713,10 @@ class GameEventsManager:
             return
 
         self.set_event_status(event_id, "RUNNING")
+        event = self._writable_event(event_id)
         activating_condition = None
         for cond in event.activation_conditions:
-            if activating_condition_id == cond:
+            if activating_condition_id == cond.id:
                 activating_condition = cond
                 break
 
@@ -532,6 +763,10 @@ class GameEventsManager:
         
         return self._all_events.get(current_info.event_id)
 
+    def get_running_event_stack(self) -> List[RunningEventInfo]:
+        """Returns the running event stack, bottom first."""
+        return self._running_event_stack
+
     def is_any_event_running(self) -> bool:
         """Returns True if the running event stack is not empty."""
         return len(self._running_event_stack) > 0
@@ -553,10 +788,11 @@ class GameEventsManager:
                 return 
 
             if old_status in self._status_indexes:
-                self._status_indexes[old_status].discard(event_id)
+                self._writable_entry("_status_indexes", old_status, set).discard(event_id)
 
-            self._status_indexes[new_status].add(event_id)
+            self._writable_entry("_status_indexes", new_status, set).add(event_id)
 
+            event = self._writable_event(event_id)
             event.get_model().status = new_status
             print(f"Event '{event_id}' status changed from '{old_status}' to '{new_status}'.")
 
@@ -581,6 +817,53 @@ class GameEventsManager:
         Returns the event associated with event id or None if it doesnt exist
         """
         return self._all_events.get(event_id)
+
+    def _available_condition(self, event_id: str, condition_id: str) -> Optional[Tuple[BaseGameEvent, ActivationCondition]]:
+        event = self._all_events.get(event_id)
+        if not event or event.status != "AVAILABLE":
+            return None
+        condition = next((c for c in event.activation_conditions if c.id == condition_id), None)
+        if condition is None:
+            return None
+        return event, condition
+
+    def get_trigger_candidates(self, player_scenario_id: Optional[str]) -> List[Tuple[BaseGameEvent, ActivationCondition]]:
+        """
+        Returns the conditions of AVAILABLE events that could fire right now, found through the
+        trigger indexes: immediate activations, area entries of the player's scenario and
+        completions of already COMPLETED events. Callers still decide with `is_met`.
+        """
+        triggers: List[Tuple[str, str]] = list(self._immediate_triggers.items())
+        if player_scenario_id is not None:
+            triggers.extend(self._area_entry_triggers.get(player_scenario_id, {}).items())
+
+        completed = self._status_indexes["COMPLETED"]
+        if len(completed) < len(self._completion_triggers):
+            sources = [eid for eid in completed if eid in self._completion_triggers]
+        else:
+            sources = [eid for eid in self._completion_triggers if eid in completed]
+        for source_event_id in sources:
+            triggers.extend(self._completion_triggers[source_event_id].items())
+
+        candidates: List[Tuple[BaseGameEvent, ActivationCondition]] = []
+        for condition_id, event_id in triggers:
+            found = self._available_condition(event_id, condition_id)
+            if found:
+                candidates.append(found)
+        return candidates
+
+    def find_available_interaction_option(self, condition_id: str) -> Optional[Tuple[BaseGameEvent, CharacterInteractionOption]]:
+        """
+        Returns the AVAILABLE event offering the character interaction option with the given
+        condition id, together with the option, or None if no such option can be selected.
+        """
+        event_id = self._interaction_option_events.get(condition_id)
+        if event_id is None:
+            return None
+        found = self._available_condition(event_id, condition_id)
+        if not found or not isinstance(found[1], CharacterInteractionOption):
+            return None
+        return found[0], found[1]
     
     def add_and_index_event(self, event_model: GameEventModel) -> BaseGameEvent:
         """
@@ -594,17 +877,17 @@ class GameEventsManager:
 
         domain_event = wrapper_class(model=event_model)
         self._all_events[event_model.id] = domain_event
+        self._shared_event_ids.discard(event_model.id)
+        self._changes.touch(event_model.id)
 
-        self._status_indexes[domain_event.status].add(domain_event.id)
+        self._writable_entry("_status_indexes", domain_event.status, set).add(domain_event.id)
 
         if domain_event.source_beat_id:
-            self._events_by_beat_id[domain_event.source_beat_id].add(domain_event.id)
+            self._writable_entry("_events_by_beat_id", domain_event.source_beat_id, set).add(domain_event.id)
         else:
-            self._beatless_event_ids.add(domain_event.id)
+            self._writable_index("_beatless_event_ids").add(domain_event.id)
 
-        for condition in domain_event.activation_conditions:
-            if isinstance(condition, CharacterInteractionOption):
-                self._interaction_options_by_character[condition.character_id].add(domain_event.id)
+        self._index_conditions(domain_event.id, event_model.activation_conditions)
         print("RETURNING DOMAIN EVENT")
         return domain_event
     
@@ -613,7 +896,7 @@ class GameEventsManager:
         (Core Logic) Adds new activation conditions to an existing event's data model
         and updates all relevant indexes.
         """
-        event = self._all_events[event_id] # Assumes event existence is pre-validated
+        event = self._writable_event(event_id) # Assumes event existence is pre-validated
 
         # Add the new conditions to the underlying Pydantic model
         event.get_model().activation_conditions.extend(conditions)
@@ -622,15 +905,13 @@ class GameEventsManager:
         event._build_condition_wrappers()
 
         # Update indexes with the new information
-        for condition in conditions:
-            if isinstance(condition, CharacterInteractionOptionModel):
-                self._interaction_options_by_character[condition.character_id].add(event_id)
+        self._index_conditions(event_id, conditions)
 
     def unlink_condition_from_event(self, event_id: str, condition_id: str) -> ActivationConditionModel:
         """Remove a specific activation condition from an event and update indexes."""
-        event = self._all_events.get(event_id)
-        if not event:
+        if event_id not in self._all_events:
             raise KeyError(f"Event with ID '{event_id}' not found.")
+        event = self._writable_event(event_id)
 
         conditions = event.get_model().activation_conditions
         idx_to_remove = next((i for i, cond in enumerate(conditions) if cond.id == condition_id), None)
@@ -645,12 +926,7 @@ class GameEventsManager:
         event.activation_conditions = []
         event._build_condition_wrappers()
 
-        if isinstance(removed_condition, CharacterInteractionOptionModel):
-            char_set = self._interaction_options_by_character.get(removed_condition.character_id)
-            if char_set:
-                char_set.discard(event_id)
-                if not char_set:
-                    self._interaction_options_by_character.pop(removed_condition.character_id, None)
+        self._unindex_conditions(event_id, [removed_condition], remaining=conditions)
 
         return removed_condition
 
@@ -674,48 +950,40 @@ class GameEventsManager:
         event = self._all_events.pop(event_id, None)
         if not event:
             raise KeyError(f"Event with ID '{event_id}' not found.")
+        self._shared_event_ids.discard(event_id)
+        self._changes.touch(event_id)
 
         # Remove from running stack if present
         self._running_event_stack = [eid for eid in self._running_event_stack if eid != event_id]
 
         # Clean status index
         if event.status in self._status_indexes:
-            self._status_indexes[event.status].discard(event_id)
+            self._writable_entry("_status_indexes", event.status, set).discard(event_id)
 
         # Clean beat indexes
         if event.source_beat_id:
-            beat_set = self._events_by_beat_id.get(event.source_beat_id)
-            if beat_set:
-                beat_set.discard(event_id)
-                if not beat_set:
-                    self._events_by_beat_id.pop(event.source_beat_id, None)
+            self._discard_from_entry("_events_by_beat_id", event.source_beat_id, event_id)
         else:
-            self._beatless_event_ids.discard(event_id)
+            self._writable_index("_beatless_event_ids").discard(event_id)
 
-        # Clean interaction indexes
-        for condition in event.activation_conditions:
-            if isinstance(condition, CharacterInteractionOption):
-                char_set = self._interaction_options_by_character.get(condition.character_id)
-                if char_set:
-                    char_set.discard(event_id)
-                    if not char_set:
-                        self._interaction_options_by_character.pop(condition.character_id, None)
+        # Clean trigger and interaction indexes
+        self._unindex_conditions(event_id, event.get_model().activation_conditions)
 
         return event
 
     def update_event_description(self, event_id: str, new_description: str) -> BaseGameEvent:
         """Update the description of an existing event."""
-        event = self._all_events.get(event_id)
-        if not event:
+        if event_id not in self._all_events:
             raise KeyError(f"Event with ID '{event_id}' not found.")
+        event = self._writable_event(event_id)
         event.get_model().description = new_description
         return event
 
     def update_event_title(self, event_id: str, new_title: str) -> BaseGameEvent:
         """Update the title of an existing event."""
-        event = self._all_events.get(event_id)
-        if not event:
+        if event_id not in self._all_events:
             raise KeyError(f"Event with ID '{event_id}' not found.")
+        event = self._writable_event(event_id)
         event.get_model().title = new_title
         return event
 
@@ -730,7 +998,7 @@ class GameEventsManager:
             )
 
         self.set_event_status(event_id, "DISABLED")
-        return event
+        return self._all_events[event_id]
 
     def enable_event(self, event_id: str) -> BaseGameEvent:
         """Set the event status back to AVAILABLE if currently DISABLED."""
@@ -743,7 +1011,7 @@ class GameEventsManager:
             )
 
         self.set_event_status(event_id, "AVAILABLE")
-        return event
+        return self._all_events[event_id]
 
     def get_all_events_grouped(self) -> Dict[str, Dict[str, List[BaseGameEvent]]]:
         """
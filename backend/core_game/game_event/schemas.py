@@ -2,22 +2,19 @@
 
 from typing import List, Optional, Literal, Union, Dict, Set
 from pydantic import BaseModel, Field
+from core_game.change_tracking import ContentHashedModel
 from core_game.game_event.activation_conditions.schemas import ActivationConditionModel
 from core_game.game_event.constants import EVENT_STATUS_LITERAL
-
-_event_id_counter = 0
+from core_game.game_state.sessions import current_session
 
 def generate_event_id() -> str:
     """Return a sequential id of the form 'event_001'."""
-    global _event_id_counter
-    _event_id_counter += 1
-    return f"event_{_event_id_counter:03d}"
+    return f"event_{current_session().next_id('event'):03d}"
 
 def rollback_event_id() -> None:
-    global _event_id_counter
-    _event_id_counter -= 1
+    current_session().rollback_id('event')
 
-class GameEventModel(BaseModel):
+class GameEventModel(ContentHashedModel):
     """Base class for all game events."""
     id: str = Field(default_factory=generate_event_id, description="Unique identifier of the game event.")
     title: str = Field(
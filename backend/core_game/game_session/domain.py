@@ -75,6 +75,17 @@ class GameSession:
     def scenarios_graphic_style(self) -> str:
         return self._scenarios_graphic_style
 
+    def to_model(self) -> GameSessionModel:
+        return GameSessionModel(
+            session_id=self._session_id,
+            user_prompt=self._user_prompt or "",
+            refined_prompt=self._refined_prompt or "",
+            narrative_time=self._time.to_model(),
+            global_flags=self._global_flags,
+            characters_graphic_style=self._characters_graphic_style,
+            scenarios_graphic_style=self._scenarios_graphic_style,
+        )
+
     # ------------------------------------------------------------------
     # Modification methods
     # ------------------------------------------------------------------
@@ -67,6 +67,17 @@ class GameState:
         self._narrative_state = NarrativeState(game_state_model.narrative_state)
         self._game_events = GameEventsManager(game_state_model.game_events)
 
+    def to_model(self) -> GameStateModel:
+        """Builds the :class:`GameStateModel` of the current state. Component models are not copied."""
+        return GameStateModel(
+            session=self._session.to_model(),
+            game_map=self._game_map.to_model(),
+            characters=self._characters.to_model(),
+            relationships=self._relationships.to_model(),
+            narrative_state=self._narrative_state.to_model(),
+            game_events=self._game_events.to_model(),
+        )
+
     def load_from_file(self, file_path: str = "game_state.json") -> None:
         """Load game state data from a JSON file."""
 
@@ -0,0 +1,378 @@
+"""
+Session-scoped registry of game states.
+
+Every session owns its own domain state, version manager, checkpoint manager, id counters
+and generation status. The session used by the singletons is the one bound to the current
+context (see `use_session`), or the default session when nothing is bound, so scripts and
+tools that never heard of sessions keep working unchanged.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core_game.game_state.domain import GameState
+    from simulated.game_state import SimulatedGameState
+    from versioning.layers.manager import GameStateVersionManager
+    from versioning.deltas.manager import StateCheckpointManager
+    from persistence.autosave import Autosaver
+
+DEFAULT_SESSION_ID = "default"
+
+_current_session_id: ContextVar[str] = ContextVar("game_session_id", default=DEFAULT_SESSION_ID)
+
+
+def _idle_generation_status() -> Dict[str, Any]:
+    return {
+        "status": "idle",
+        "progress": 0.0,
+        "message": "Waiting to start generation...",
+        "detail": "You can poll /generate/status to track progress"
+    }
+
+
+def _current_holder() -> Any:
+    """The asyncio task running the caller, or its thread when it isn't in one."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return task if task is not None else threading.get_ident()
+
+
+def _grant(granted: "asyncio.Future[None]") -> None:
+    if not granted.done():
+        granted.set_result(None)
+
+
+class SessionLock:
+    """
+    Reentrant lock held by a thread (the requests run in the threadpool) or by an asyncio task
+    (event runs detached from any request), so both kinds of holders exclude each other. Threads
+    block in `acquire`, tasks wait in `acquire_async` without blocking the event loop. The lock is
+    handed to the waiters in arrival order.
+    """
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._owner: Any = None
+        self._count = 0
+        # (holder, threading.Event or asyncio.Future set when the lock is handed to it)
+        self._waiters: Deque[Tuple[Any, Any]] = deque()
+
+    def _take(self, holder: Any) -> bool:
+        if self._owner is None and not self._waiters:
+            self._owner, self._count = holder, 1
+            return True
+        if self._owner == holder:
+            self._count += 1
+            return True
+        return False
+
+    def acquire(self, blocking: bool = True) -> bool:
+        holder = _current_holder()
+        with self._mutex:
+            if self._take(holder):
+                return True
+            if not blocking:
+                return False
+            granted = threading.Event()
+            self._waiters.append((holder, granted))
+        granted.wait()
+        return True
+
+    async def acquire_async(self) -> None:
+        holder = _current_holder()
+        with self._mutex:
+            if self._take(holder):
+                return
+            granted: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+            waiter = (holder, granted)
+            self._waiters.append(waiter)
+        try:
+            await granted
+        except asyncio.CancelledError:
+            with self._mutex:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # Handed over while being cancelled
+            self.release()
+            raise
+
+    def release(self) -> None:
+        holder = _current_holder()
+        with self._mutex:
+            if self._owner is None or self._owner != holder:
+                raise RuntimeError("cannot release un-acquired lock")
+            self._count -= 1
+            if self._count:
+                return
+            self._owner = None
+            if self._waiters:
+                self._owner, granted = self._waiters.popleft()
+                self._count = 1
+                if isinstance(granted, threading.Event):
+                    granted.set()
+                else:
+                    granted.get_loop().call_soon_threadsafe(_grant, granted)
+
+    def __enter__(self) -> "SessionLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+class SessionContext:
+    """Everything that used to be process global, for a single player."""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        # Serializes the requests that read or modify this session's state.
+        self.lock = SessionLock()
+        self.last_access = time.monotonic()
+
+        # Filled lazily by GameStateSingleton and SimulatedGameStateSingleton.
+        self.game_state: Optional[GameState] = None
+        self.version_manager: Optional[GameStateVersionManager] = None
+        self.simulated_state: Optional[SimulatedGameState] = None
+        self.checkpoint_manager: Optional[StateCheckpointManager] = None
+        # Set by persistence.autosave when GAME_SAVE_DIR is configured.
+        self.autosaver: Optional[Autosaver] = None
+
+        self.generation_status: Dict[str, Any] = _idle_generation_status()
+        self._id_counters: Dict[str, int] = defaultdict(int)
+        # Thread that got the last number of each kind, see rollback_id
+        self._last_id_owner: Dict[str, int] = {}
+        self._id_lock = threading.Lock()
+        # Called with "state" when the state changes (after commits, requests and event stream
+        # steps, see simulated.singleton.notify_state_changes) and "status" when the generation
+        # status changes (see add_change_listener). May run in any thread.
+        self._change_listeners: List[Callable[[str], None]] = []
+        # state_version of the last "state" notification
+        self.notified_state_version: Optional[tuple] = None
+        self._listeners_lock = threading.Lock()
+
+    def touch(self) -> None:
+        self.last_access = time.monotonic()
+
+    def next_id(self, kind: str) -> int:
+        """Returns the next sequential number for ids of the given kind (scenario, character...)."""
+        with self._id_lock:
+            self._id_counters[kind] += 1
+            self._last_id_owner[kind] = threading.get_ident()
+            return self._id_counters[kind]
+
+    def rollback_id(self, kind: str) -> None:
+        """
+        Gives back the last number handed out for the given kind. Ignored when another thread
+        took a number after it (generation steps can run concurrently), so ids never repeat.
+        """
+        with self._id_lock:
+            if self._last_id_owner.get(kind) == threading.get_ident():
+                self._id_counters[kind] -= 1
+
+    def export_id_counters(self) -> Dict[str, int]:
+        return dict(self._id_counters)
+
+    def restore_id_counters(self, counters: Dict[str, int]) -> None:
+        with self._id_lock:
+            self._id_counters = defaultdict(int, counters)
+            self._last_id_owner.clear()
+
+    def add_change_listener(self, listener: Callable[[str], None]) -> None:
+        with self._listeners_lock:
+            self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener: Callable[[str], None]) -> None:
+        with self._listeners_lock:
+            if listener in self._change_listeners:
+                self._change_listeners.remove(listener)
+
+    def notify_changed(self, kind: str) -> None:
+        """Tells the change listeners that the "state" or the generation "status" changed."""
+        with self._listeners_lock:
+            listeners = list(self._change_listeners)
+        for listener in listeners:
+            try:
+                listener(kind)
+            except Exception as e:
+                print(f"Change listener of session '{self.session_id}' failed: {e}")
+
+    def close(self) -> None:
+        """Called when the session leaves the registry. Saves the whole state if autosave is on."""
+        if self.autosaver is not None:
+            try:
+                self.autosaver.flush(everything=True)
+            except Exception as e:
+                print(f"Couldn't save session '{self.session_id}' on close: {e}")
+
+    def is_busy(self) -> bool:
+        """A session is busy while a generation runs or a request holds its lock."""
+        if self.generation_status["status"] == "running":
+            return True
+        if not self.lock.acquire(blocking=False):
+            return True
+        self.lock.release()
+        return False
+
+
+class SessionRegistry:
+    """
+    Keeps the live sessions, bounded in number. Sessions idle for longer than `idle_timeout`
+    seconds are evicted, and when the registry is full the least recently used idle session
+    makes room for a new one. The default session is never evicted.
+    """
+
+    def __init__(self, max_sessions: int = 32, idle_timeout: float = 30 * 60):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions: OrderedDict[str, SessionContext] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create_session(self, session_id: Optional[str] = None) -> SessionContext:
+        """Creates a new session, evicting others if needed. Raises RuntimeError when full."""
+        evicted: List[SessionContext] = []
+        try:
+            with self._lock:
+                evicted += self._evict_idle()
+                session_id = session_id or uuid.uuid4().hex
+                if session_id in self._sessions:
+                    raise ValueError(f"Session '{session_id}' already exists.")
+                if session_id != DEFAULT_SESSION_ID:
+                    evicted += self._make_room()
+                session = SessionContext(session_id)
+                self._sessions[session_id] = session
+                return session
+        finally:
+            self._close(evicted)
+
+    def get_session(self, session_id: str) -> SessionContext:
+        """Returns a live session and marks it as used. Raises KeyError if it does not exist (anymore)."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                if session_id != DEFAULT_SESSION_ID:
+                    raise KeyError(f"Session '{session_id}' not found or expired.")
+                session = SessionContext(DEFAULT_SESSION_ID)
+                self._sessions[DEFAULT_SESSION_ID] = session
+            self._sessions.move_to_end(session_id)
+            session.touch()
+            return session
+
+    def find_session(self, session_id: str) -> SessionContext:
+        """
+        Like get_session, but without marking the session as used: for the lookups done on every
+        singleton access. Requests mark their session once, when they resolve it.
+        """
+        session = self._sessions.get(session_id)  # a single dict read, no lock needed
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                if session_id != DEFAULT_SESSION_ID:
+                    raise KeyError(f"Session '{session_id}' not found or expired.")
+                session = self._sessions[DEFAULT_SESSION_ID] = SessionContext(DEFAULT_SESSION_ID)
+            return session
+
+    def delete_session(self, session_id: str) -> None:
+        """Removes a session. Raises KeyError if it does not exist and ValueError if it is busy."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise KeyError(f"Session '{session_id}' not found or expired.")
+            if session.is_busy():
+                raise ValueError(f"Session '{session_id}' is busy and cannot be deleted now.")
+            del self._sessions[session_id]
+        self._close([session])
+
+    def evict_idle(self) -> List[str]:
+        """Evicts the sessions idle for too long and returns their ids."""
+        with self._lock:
+            evicted = self._evict_idle()
+        self._close(evicted)
+        return [session.session_id for session in evicted]
+
+    def session_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._sessions)
+
+    def sessions(self) -> List[SessionContext]:
+        """The live sessions, without marking them as used."""
+        with self._lock:
+            return list(self._sessions.values())
+
+    def _evictable(self, session: SessionContext) -> bool:
+        return session.session_id != DEFAULT_SESSION_ID and not session.is_busy()
+
+    def _close(self, sessions: List[SessionContext]) -> None:
+        # Outside the registry lock: closing may write a save file
+        for session in sessions:
+            session.close()
+
+    def _evict_idle(self) -> List[SessionContext]:
+        deadline = time.monotonic() - self.idle_timeout
+        expired = [
+            session for session in self._sessions.values()
+            if session.last_access < deadline and self._evictable(session)
+        ]
+        for session in expired:
+            del self._sessions[session.session_id]
+        if expired:
+            print(f"Evicted idle sessions: {[session.session_id for session in expired]}")
+        return expired
+
+    def _make_room(self) -> List[SessionContext]:
+        non_default = [s for s in self._sessions.values() if s.session_id != DEFAULT_SESSION_ID]
+        excess = len(non_default) - self.max_sessions + 1
+        evicted: List[SessionContext] = []
+        for session in non_default:  # least recently used first
+            if excess <= 0:
+                break
+            if self._evictable(session):
+                del self._sessions[session.session_id]
+                print(f"Evicted session '{session.session_id}' to make room.")
+                evicted.append(session)
+                excess -= 1
+        if excess > 0:
+            # The sessions already removed are still closed by the caller
+            self._close(evicted)
+            evicted.clear()
+            raise RuntimeError("Too many active sessions, try again later.")
+        return evicted
+
+
+_registry = SessionRegistry(
+    max_sessions=int(os.getenv("MAX_GAME_SESSIONS", "32")),
+    idle_timeout=float(os.getenv("GAME_SESSION_IDLE_SECONDS", str(30 * 60))),
+)
+
+
+def get_session_registry() -> SessionRegistry:
+    return _registry
+
+
+def current_session() -> SessionContext:
+    """Returns the session bound to the current context, or the default one. Doesn't mark it as used."""
+    return _registry.find_session(_current_session_id.get())
+
+
+@contextmanager
+def use_session(session: SessionContext) -> Iterator[SessionContext]:
+    """Binds `session` to the current context, so the singletons resolve to its state."""
+    token = _current_session_id.set(session.session_id)
+    try:
+        yield session
+    finally:
+        _current_session_id.reset(token)
@@ -1,11 +1,13 @@
 from .domain import GameState
+from .sessions import current_session
 
 class GameStateSingleton:
-    _instance: GameState | None = None
+    """Access point to the game state of the session bound to the current context."""
 
     @classmethod
     def get_instance(cls) -> GameState:
-        if cls._instance is None:
-            cls._instance = GameState()
-            #cls._instance.load_from_file()
-        return cls._instance
+        session = current_session()
+        if session.game_state is None:
+            session.game_state = GameState()
+            #session.game_state.load_from_file()
+        return session.game_state
@@ -2,6 +2,7 @@ from core_game.map.schemas import ScenarioModel, ScenarioSnapshot, ConnectionMod
 from typing import Dict, Optional, List, Set, Literal
 from core_game.map.constants import Direction, OppositeDirections, IndoorOrOutdoor
 from core_game.character.domain import PlayerCharacter, BaseCharacter
+from core_game.change_tracking import ChangeLog
 
 class Scenario:
     def __init__(self, scenario_model: ScenarioModel):
@@ -116,6 +117,7 @@ class Scenario:
         )
         self._data.valid_from = current_time
         self._data.previous_versions.append(snapshot)
+        self._data.invalidate_content_hash()
 
     def get_scenario_model(self) -> ScenarioModel:
         """Return the underlying scenario model."""
@@ -220,48 +222,144 @@ class GameMap():
     def __init__(self, map_model: Optional[GameMapModel] = None):
         self._scenarios: Dict[str, Scenario]
         self._connections: Dict[str, Connection]
-        self._island_clusters: List[Set[str]]
+        # Connectivity clusters, kept incrementally. Connections merge the smaller cluster into
+        # the bigger one, deletions only recompute the cluster they touch.
+        self._cluster_of: Dict[str, int] = {}
+        self._cluster_members: Dict[int, Set[str]] = {}
+        self._next_cluster_id: int = 0
+        self._cluster_ranking: Optional[List[Set[str]]] = None
+        # Ids of entities still shared with the map this one was forked from.
+        # They are cloned the first time this map writes to them.
+        self._shared_scenario_ids: Set[str] = set()
+        self._shared_connection_ids: Set[str] = set()
+        self._scenario_changes = ChangeLog()
+        self._connection_changes = ChangeLog()
 
         if map_model:
             self._populate_from_model(map_model)
         else:
             self._scenarios = {}
             self._connections = {}
-            self._island_clusters = []
 
     def _populate_from_model(self, model: GameMapModel):
         self._scenarios = {scenario.id: Scenario(scenario) for scenario in model.scenarios.values()}
         self._connections = {connection.id: Connection(connection) for connection in model.connections.values()}
-        self._island_clusters = []
-        self._compute_island_clusters()
-
-    def _compute_island_clusters(self) -> None:
-        """Computes the clusters formed by scenarios in the map"""
-        visited = set()
-        clusters = []
+        self._cluster_of = {}
+        self._cluster_members = {}
         for scenario_id in self._scenarios:
-            if scenario_id not in visited:
-                cluster = set()
-                to_visit = [scenario_id]
-                while to_visit:
-                    current = to_visit.pop()
-                    if current not in visited:
-                        visited.add(current)
-                        cluster.add(current)
-                        conns = self._scenarios[current].connections
-                        connected_ids = []
-                        for conn_id in conns.values():
-                            if conn_id:
-                                conn = self._connections.get(conn_id)
-                                if not conn:
-                                    continue
-                                other_id = conn.get_other_scenario_id(current)
-                                if other_id in self._scenarios:
-                                    connected_ids.append(other_id)
-                        
-                        to_visit.extend([sid for sid in connected_ids if sid not in visited])
-                clusters.append(cluster)
-        self._island_clusters = clusters
+            if scenario_id not in self._cluster_of:
+                self._new_cluster(self._reachable_from(scenario_id))
+
+    def _neighbours(self, scenario_id: str) -> List[str]:
+        """Returns the ids of the existing scenarios directly connected to a scenario."""
+        neighbours = []
+        for conn_id in self._scenarios[scenario_id].connections.values():
+            if conn_id:
+                conn = self._connections.get(conn_id)
+                if not conn:
+                    continue
+                other_id = conn.get_other_scenario_id(scenario_id)
+                if other_id in self._scenarios:
+                    neighbours.append(other_id)
+        return neighbours
+
+    def _reachable_from(self, scenario_id: str) -> Set[str]:
+        """Returns the ids of all the scenarios reachable from a scenario, itself included."""
+        reached = {scenario_id}
+        to_visit = [scenario_id]
+        while to_visit:
+            current = to_visit.pop()
+            for other_id in self._neighbours(current):
+                if other_id not in reached:
+                    reached.add(other_id)
+                    to_visit.append(other_id)
+        return reached
+
+    def _new_cluster(self, members: Set[str]) -> None:
+        cluster_id = self._next_cluster_id
+        self._next_cluster_id += 1
+        self._cluster_members[cluster_id] = members
+        for scenario_id in members:
+            self._cluster_of[scenario_id] = cluster_id
+        self._cluster_ranking = None
+
+    def _merge_clusters(self, scenario_a_id: str, scenario_b_id: str) -> None:
+        """Joins the clusters of two scenarios, moving the smaller cluster into the bigger one."""
+        cluster_a = self._cluster_of[scenario_a_id]
+        cluster_b = self._cluster_of[scenario_b_id]
+        if cluster_a == cluster_b:
+            return
+        if len(self._cluster_members[cluster_a]) < len(self._cluster_members[cluster_b]):
+            cluster_a, cluster_b = cluster_b, cluster_a
+        moved = self._cluster_members.pop(cluster_b)
+        self._cluster_members[cluster_a] |= moved
+        for scenario_id in moved:
+            self._cluster_of[scenario_id] = cluster_a
+        self._cluster_ranking = None
+
+    def _split_cluster(self, cluster_id: int) -> None:
+        """Recomputes a single cluster after a deletion, splitting it if it is no longer connected."""
+        remaining = {sid for sid in self._cluster_members.pop(cluster_id) if sid in self._scenarios}
+        while remaining:
+            part = self._reachable_from(next(iter(remaining)))
+            remaining -= part
+            self._new_cluster(part)
+        self._cluster_ranking = None
+
+    def fork(self) -> "GameMap":
+        """
+        Returns a structurally shared copy of the map. Only the indexes are copied,
+        scenarios and connections are shared with this map until the fork writes them.
+        This map must not be modified while the fork is alive.
+        """
+        forked = GameMap()
+        forked._scenarios = dict(self._scenarios)
+        forked._connections = dict(self._connections)
+        forked._cluster_of = dict(self._cluster_of)
+        forked._cluster_members = {cid: set(members) for cid, members in self._cluster_members.items()}
+        forked._next_cluster_id = self._next_cluster_id
+        forked._shared_scenario_ids = set(self._scenarios)
+        forked._shared_connection_ids = set(self._connections)
+        forked._scenario_changes = self._scenario_changes.fork()
+        forked._connection_changes = self._connection_changes.fork()
+        return forked
+
+    def adopt_change_history(self, previous: "GameMap") -> None:
+        """Continues the change history of the map this fork replaces on commit."""
+        self._scenario_changes.adopt_timeline(previous._scenario_changes)
+        self._connection_changes.adopt_timeline(previous._connection_changes)
+
+    def get_scenario_change_log(self) -> ChangeLog:
+        return self._scenario_changes
+
+    def get_connection_change_log(self) -> ChangeLog:
+        return self._connection_changes
+
+    def _writable_scenario(self, scenario_id: str) -> Optional[Scenario]:
+        """Returns the scenario ready to be modified, cloning it first if it is still shared."""
+        scenario = self._scenarios.get(scenario_id)
+        if not scenario:
+            return None
+        if scenario_id in self._shared_scenario_ids:
+            scenario = Scenario(scenario.get_scenario_model().model_copy(deep=True))
+            self._scenarios[scenario_id] = scenario
+            self._shared_scenario_ids.discard(scenario_id)
+        self._scenario_changes.touch(scenario_id)
+        scenario.get_scenario_model().invalidate_content_hash()
+        return scenario
+
+    def _writable_connection(self, connection_id: str) -> Optional[Connection]:
+        """Returns the connection ready to be modified, cloning it first if it is still shared."""
+        connection = self._connections.get(connection_id)
+        if not connection:
+            return None
+        if connection_id in self._shared_connection_ids:
+            connection = Connection(connection.get_connection_model().model_copy(deep=True))
+            self._connections[connection_id] = connection
+            self._shared_connection_ids.discard(connection_id)
+        self._connection_changes.touch(connection_id)
+        connection.get_connection_model().invalidate_content_hash()
+        return connection
 
     def to_model(self) -> GameMapModel:
         """Converts the domain GameMap back into a Pydantic model."""
@@ -273,7 +371,9 @@ class GameMap():
     def add_scenario(self, scenario: Scenario) -> Scenario:
         """Adds Scenario to the map. Does not check anything"""
         self._scenarios[scenario.id] = scenario
-        self._island_clusters.append({scenario.id})
+        self._shared_scenario_ids.discard(scenario.id)
+        self._scenario_changes.touch(scenario.id)
+        self._new_cluster({scenario.id})
         return scenario
     
     def modify_scenario(self,
@@ -287,11 +387,10 @@ class GameMap():
     ) -> bool:
         """Modify an existing scenario. Returns True if modified, False if it does not exist."""
 
-        if scenario_id not in self._scenarios:
+        scenario_to_modify = self._writable_scenario(scenario_id)
+        if not scenario_to_modify:
             return False
 
-        scenario_to_modify = self._scenarios[scenario_id]
-
         if new_name is not None:
             scenario_to_modify.name = new_name
         if new_summary_description is not None:
@@ -319,27 +418,37 @@ class GameMap():
         if scenario_id not in self._scenarios:
             return False
 
-        for other_id, other_scenario in self._scenarios.items():
-            for direction, conn_id in other_scenario.connections.items():
-                if conn_id:
-                    conn = self._connections.get(conn_id)
-                    if conn and (conn.scenario_a_id == scenario_id or conn.scenario_b_id == scenario_id):
-                        other_scenario.connections[direction] = None
-                        self._connections.pop(conn_id, None)
+        for conn_id in self._scenarios[scenario_id].connections.values():
+            if not conn_id:
+                continue
+            conn = self._connections.pop(conn_id, None)
+            if not conn:
+                continue
+            self._shared_connection_ids.discard(conn_id)
+            self._connection_changes.touch(conn_id)
+            other_id = conn.get_other_scenario_id(scenario_id)
+            direction = conn.get_direction_from(other_id)
+            other_scenario = self._writable_scenario(other_id)
+            if other_scenario and other_scenario.connections.get(direction) == conn_id:
+                other_scenario.connections[direction] = None
 
         del self._scenarios[scenario_id]
-        self._compute_island_clusters()
+        self._shared_scenario_ids.discard(scenario_id)
+        self._scenario_changes.touch(scenario_id)
+        self._split_cluster(self._cluster_of.pop(scenario_id))
 
         return True
 
     def add_connection(self, connection: Connection) -> Optional[Connection]:
-        scenario_a = self.find_scenario(connection.scenario_a_id)
-        scenario_b = self.find_scenario(connection.scenario_b_id)
+        scenario_a = self._writable_scenario(connection.scenario_a_id)
+        scenario_b = self._writable_scenario(connection.scenario_b_id)
         if scenario_a and scenario_b:
             self._connections[connection.id] = connection
+            self._shared_connection_ids.discard(connection.id)
+            self._connection_changes.touch(connection.id)
             scenario_a.connections[connection.get_direction_from(scenario_a.id)] = connection.id
             scenario_b.connections[connection.get_direction_from(scenario_b.id)] = connection.id
-            self._compute_island_clusters()
+            self._merge_clusters(scenario_a.id, scenario_b.id)
             return connection
         return None
     
@@ -348,19 +457,22 @@ class GameMap():
         connection = self._connections.pop(connection_id, None)
         if not connection:
             return None
+        self._shared_connection_ids.discard(connection_id)
+        self._connection_changes.touch(connection_id)
         
         scenario_id_B = connection.scenario_b_id
         scenario_id_A = connection.scenario_a_id
 
-        scenario_B = self.find_scenario(scenario_id_B)
-        scenario_A = self.find_scenario(scenario_id_A)
+        scenario_B = self._writable_scenario(scenario_id_B)
+        scenario_A = self._writable_scenario(scenario_id_A)
 
         if scenario_A:
             scenario_A.connections[connection.direction_from_a] = None
 
         if scenario_B:
             scenario_B.connections[connection.direction_from_b] = None
-        self._compute_island_clusters()
+        if scenario_id_A in self._cluster_of:
+            self._split_cluster(self._cluster_of[scenario_id_A])
         return connection
     
     def modify_bidirectional_connection(self, 
@@ -372,7 +484,7 @@ class GameMap():
         """Modify an existing bidirectional connection."""
 
 
-        connection = self._connections.get(connection_id)
+        connection = self._writable_connection(connection_id)
         if not connection:
             return False
         
@@ -430,13 +542,14 @@ class GameMap():
         Lists all scenarios (ID and name) per cluster if list_all_scenarios is True.
         Otherwise, lists up to 'max_listed_per_cluster' scenarios per cluster.
         """
-        if not self._island_clusters:
+        clusters = self.get_all_clusters()
+        if not clusters:
             return "The simulated map currently has 0 scenarios."
         
         summary_lines = [
-            f"The simulated map has {len(self._scenarios)} scenarios and {len(self._island_clusters)} cluster(s) of scenarios:"
+            f"The simulated map has {len(self._scenarios)} scenarios and {len(clusters)} cluster(s) of scenarios:"
         ]
-        for i, cluster_set in enumerate(self._island_clusters, 1):
+        for i, cluster_set in enumerate(clusters, 1):
             cluster_list_sorted = sorted(list(cluster_set))
             num_to_display = len(cluster_list_sorted) if list_all_scenarios else (
                 max_listed_per_cluster or len(cluster_list_sorted)
@@ -468,29 +581,44 @@ class GameMap():
     
     def place_player(self, player: PlayerCharacter, scenario_id: str) -> Optional[Scenario]:
         """places player at scenario. doesnt check anything"""
-        scenario = self.find_scenario(scenario_id)
+        scenario = self._writable_scenario(scenario_id)
         if scenario:
             scenario.present_characters_ids.add(player.id)
         return scenario
     
     def place_character(self, character: BaseCharacter, scenario_id: str) -> Optional[Scenario]:
         """places player at scenario. doesnt check anything"""
-        scenario = self.find_scenario(scenario_id)
+        scenario = self._writable_scenario(scenario_id)
         if scenario:
             scenario.present_characters_ids.add(character.id)
         return scenario
 
     def remove_character_from_scenario(self, character: BaseCharacter, scenario_id: str) -> Optional[Scenario]:
-        scenario = self.find_scenario(scenario_id)
+        scenario = self._writable_scenario(scenario_id)
         if scenario:
             scenario.present_characters_ids.discard(character.id)
         return scenario
 
     def get_all_clusters(self) -> List[Set[str]]:
-        return self._island_clusters
+        return list(self._cluster_members.values())
+
+    def _get_cluster_ranking(self) -> List[Set[str]]:
+        """Returns the clusters sorted from bigger to smaller. Cached until the clusters change."""
+        if self._cluster_ranking is None:
+            self._cluster_ranking = sorted(self._cluster_members.values(), key=len, reverse=True)
+        return self._cluster_ranking
+
+    def get_main_cluster(self) -> Optional[Set[str]]:
+        """Returns the largest cluster, or None if the map has no scenarios."""
+        ranking = self._get_cluster_ranking()
+        return ranking[0] if ranking else None
+
+    def get_outside_clusters(self) -> List[Set[str]]:
+        """Returns every cluster except the main one, sorted from bigger to smaller."""
+        return self._get_cluster_ranking()[1:]
     
     def attach_new_image(self, scenario_id: str, image_path: str, image_generation_prompt: ScenarioImageGenerationTemplate) -> bool:
-        scenario = self.find_scenario(scenario_id)
+        scenario = self._writable_scenario(scenario_id)
         if scenario:
             scenario.image_path = image_path
             scenario.image_generation_prompt = image_generation_prompt
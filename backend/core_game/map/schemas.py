@@ -1,28 +1,21 @@
 from typing import Dict, List, Optional, Literal, Any, Tuple, Set
 from pydantic import BaseModel, Field
+from core_game.change_tracking import ContentHashedModel
 from core_game.map.constants import Direction, OppositeDirections, IndoorOrOutdoor
+from core_game.game_state.sessions import current_session
 
-# Internal counter to generate sequential scenario ids
-_scenario_id_counter = 0
-# Internal counter to generate sequential connection ids
-_connection_id_counter = 0
-
+# Scenario and connection ids are sequential within each game session
 
 def generate_scenario_id() -> str:
     """Return a sequential id of the form 'scenario_001'."""
-    global _scenario_id_counter
-    _scenario_id_counter += 1
-    return f"scenario_{_scenario_id_counter:03d}"
+    return f"scenario_{current_session().next_id('scenario'):03d}"
 
 def rollback_scenario_id():
-    global _scenario_id_counter
-    _scenario_id_counter -= 1
+    current_session().rollback_id('scenario')
 
 def generate_connection_id() -> str:
     """Return a sequential id of the form 'connection_001'."""
-    global _connection_id_counter
-    _connection_id_counter += 1
-    return f"connection_{_connection_id_counter:03d}"
+    return f"connection_{current_session().next_id('connection'):03d}"
 
 from core_game.map.field_descriptions import SCENARIO_FIELDS, EXIT_FIELDS
 
@@ -36,7 +29,7 @@ ConnectionType = Literal[
 connection_type: ConnectionType = Field(..., description=EXIT_FIELDS["connection_type"])"""
 
 
-class ConnectionModel(BaseModel):
+class ConnectionModel(ContentHashedModel):
     """Represents a bidirectional connection between two scenarios."""
 
     id: str = Field(default_factory=generate_connection_id, description="Unique identifier of this connection.")
@@ -74,7 +67,7 @@ class ScenarioSnapshot(BaseModel):
     image_generation_prompt: Optional[ScenarioImageGenerationTemplate] = Field(default=None, description="Prompt used for generating the current image.")
 
 
-class ScenarioModel(BaseModel):
+class ScenarioModel(ContentHashedModel):
     id: str = Field(default_factory=generate_scenario_id, description="Unique identifier for the scenario.")
     name: str = Field(..., description=SCENARIO_FIELDS["name"])
     visual_description: str = Field(..., description=SCENARIO_FIELDS["visual_description"])
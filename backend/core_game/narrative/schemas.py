@@ -1,30 +1,21 @@
 from typing import Dict, List, Optional, Literal, Any
 from pydantic import BaseModel, Field, model_validator
+from core_game.game_state.sessions import current_session
 
-# Internal counters to generate sequential ids for narrative elements
-_structure_id_counter = 0
-_beat_id_counter = 0
-_failure_condition_id_counter = 0
-
+# Narrative element ids are sequential within each game session
 def _generate_structure_id() -> str:
     """Return a sequential id of the form 'structure_001'."""
-    global _structure_id_counter
-    _structure_id_counter += 1
-    return f"structure_{_structure_id_counter:03d}"
+    return f"structure_{current_session().next_id('structure'):03d}"
 
 
 def generate_beat_id() -> str:
     """Return a sequential id of the form 'beat_001'."""
-    global _beat_id_counter
-    _beat_id_counter += 1
-    return f"beat_{_beat_id_counter:03d}"
+    return f"beat_{current_session().next_id('beat'):03d}"
 
 
 def generate_failure_condition_id() -> str:
     """Return a sequential id of the form 'failure_001'."""
-    global _failure_condition_id_counter
-    _failure_condition_id_counter += 1
-    return f"failure_{_failure_condition_id_counter:03d}"
+    return f"failure_{current_session().next_id('failure'):03d}"
 
 class GoalModel(BaseModel):
     """Defines a main goal for the player in the narrative. This will guide the narrative."""
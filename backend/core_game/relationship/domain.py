@@ -38,6 +38,8 @@ class Relationships:
     def __init__(self, relationships_model: Optional[RelationshipsModel] = None) -> None:
         self._relationship_types: Dict[str, RelationshipType]
         self._matrix: Dict[str, Dict[str, Dict[str, CharacterRelationship]]]
+        # Source ids whose matrix rows are still shared with the instance this one was forked from.
+        self._shared_rows: Set[str] = set()
 
         if relationships_model:
             self._populate_from_model(relationships_model)
@@ -78,6 +80,31 @@ class Relationships:
             },
         )
 
+    def fork(self) -> "Relationships":
+        """
+        Return a structurally shared copy. Matrix rows are shared with this instance
+        and copied the first time the fork writes to them.
+        This instance must not be modified while the fork is alive.
+        """
+        forked = Relationships()
+        forked._relationship_types = dict(self._relationship_types)
+        forked._matrix = dict(self._matrix)
+        forked._shared_rows = set(self._matrix)
+        return forked
+
+    def _writable_row(self, source_character_id: str) -> Dict[str, Dict[str, CharacterRelationship]]:
+        """Return the matrix row of a source character ready to be modified."""
+        if source_character_id in self._shared_rows:
+            self._matrix[source_character_id] = {
+                tgt: {
+                    rname: CharacterRelationship(rel.get_model().model_copy(deep=True))
+                    for rname, rel in rels.items()
+                }
+                for tgt, rels in self._matrix[source_character_id].items()
+            }
+            self._shared_rows.discard(source_character_id)
+        return self._matrix.setdefault(source_character_id, {})
+
     # ------------------------------------------------------------------
     # Modification methods
     # ------------------------------------------------------------------
@@ -104,7 +131,7 @@ class Relationships:
             intensity=intensity,
         )
         rel = CharacterRelationship(rel_model)
-        self._matrix.setdefault(source_character_id, {}).setdefault(target_character_id, {})[
+        self._writable_row(source_character_id).setdefault(target_character_id, {})[
             relationship_type
         ] = rel
         return rel
@@ -127,9 +154,10 @@ class Relationships:
         new_intensity: int,
     ) -> None:
         try:
-            rel = self._matrix[source_character_id][target_character_id][relationship_type]
+            self._matrix[source_character_id][target_character_id][relationship_type]
         except KeyError as exc:
             raise KeyError("Relationship not found") from exc
+        rel = self._writable_row(source_character_id)[target_character_id][relationship_type]
         rel._data.intensity = new_intensity
 
     # ------------------------------------------------------------------
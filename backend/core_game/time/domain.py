@@ -27,6 +27,14 @@ class GameTime:
         self._hour = model.hour
         self._minute = model.minute
 
+    def to_model(self) -> GameTimeModel:
+        return GameTimeModel(
+            total_minutes_elapsed=self._total_minutes_elapsed,
+            day=self._day,
+            hour=self._hour,
+            minute=self._minute,
+        )
+
     def advance(self, minutes: int):
         self._total_minutes_elapsed += minutes
         total_minutes = self._day * 1440 + self._hour * 60 + self._minute + minutes
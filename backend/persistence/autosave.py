@@ -0,0 +1,166 @@
+"""
+Autosave of game sessions to binary save files (see persistence.save_game).
+
+When GAME_SAVE_DIR is set, every session gets an Autosaver listening to the commits of its
+version manager and to its "state" notifications, which also follow the changes made outside
+transactions (player moves, started and completed events). Only the components committed to, or
+whose change logs moved since the last save, are written again, and at most once every
+GAME_AUTOSAVE_INTERVAL_SECONDS. The whole state is written when the session is evicted or
+deleted (conversation messages don't move any change log), so a parked session can be resumed
+later from its save.
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Set, Tuple
+
+from core_game.game_state.domain import GameState
+from persistence.save_game import SaveFile, save_game_state
+
+if TYPE_CHECKING:
+    from core_game.game_state.sessions import SessionContext, SessionRegistry
+
+SAVE_DIR_ENV = "GAME_SAVE_DIR"
+AUTOSAVE_INTERVAL = float(os.getenv("GAME_AUTOSAVE_INTERVAL_SECONDS", "30"))
+
+_SAFE_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def get_save_dir() -> Optional[str]:
+    return os.getenv(SAVE_DIR_ENV) or None
+
+
+def session_save_path(session_id: str, save_dir: Optional[str] = None) -> str:
+    """Path of the save file of a session. Raises ValueError for ids that are not safe file names."""
+    save_dir = save_dir or get_save_dir()
+    if save_dir is None:
+        raise ValueError(f"{SAVE_DIR_ENV} is not set.")
+    if not _SAFE_SESSION_ID.match(session_id):
+        raise ValueError(f"Invalid session id '{session_id}'.")
+    return os.path.join(save_dir, f"{session_id}.save")
+
+
+def section_versions(state: GameState) -> Dict[str, Tuple]:
+    """
+    Versions of the sections whose domain collections keep change logs: they move with every
+    change to a scenario, connection, character or event, inside a transaction or not.
+    """
+    game_map = state.game_map
+    logs = {
+        "game_map": (game_map.get_scenario_change_log(), game_map.get_connection_change_log()),
+        "characters": (state.characters.get_change_log(),),
+        "game_events": (state.game_events.get_change_log(),),
+    }
+    return {name: tuple((log.timeline, log.last_revision) for log in section_logs) for name, section_logs in logs.items()}
+
+
+class Autosaver:
+    """Incremental, throttled saves of one game state."""
+
+    def __init__(self, state: GameState, path: str, interval_seconds: float = AUTOSAVE_INTERVAL,
+                 metadata: Optional[Callable[[], dict]] = None):
+        self.state = state
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self._metadata = metadata
+        self._dirty: Set[str] = set()
+        self._full_save_needed = not os.path.exists(path)
+        # Versions of the sections in the save file, see section_versions
+        self._saved_versions = section_versions(state)
+        self._last_save = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> Set[str]:
+        with self._lock:
+            return self._pending(section_versions(self.state))
+
+    def _pending(self, versions: Dict[str, Tuple]) -> Set[str]:
+        return self._dirty | {name for name, version in versions.items() if version != self._saved_versions.get(name)}
+
+    def on_commit(self, components: Set[str]) -> None:
+        """Commit listener for GameStateVersionManager."""
+        with self._lock:
+            self._dirty |= components
+        self._flush_if_due()
+
+    def on_change(self, kind: str) -> None:
+        """Change listener for the session: the changes outside transactions are found by section_versions."""
+        if kind == "state":
+            self._flush_if_due()
+
+    def _flush_if_due(self) -> None:
+        if time.monotonic() - self._last_save >= self.interval_seconds:
+            self.flush()
+
+    def flush(self, everything: bool = False) -> bool:
+        """
+        Writes the pending changes now, or every section with `everything`. Returns False if
+        there was nothing to write.
+        """
+        with self._lock:
+            versions = section_versions(self.state)
+            pending = self._pending(versions)
+            if not pending and not self._full_save_needed and not everything:
+                return False
+            dirty = None if self._full_save_needed or everything else pending
+            metadata = self._metadata() if self._metadata else None
+            save_game_state(self.state, self.path, metadata=metadata, dirty=dirty)
+            self._dirty.clear()
+            self._saved_versions = versions
+            self._full_save_needed = False
+            self._last_save = time.monotonic()
+            return True
+
+
+def attach_autosaver(session: SessionContext) -> Optional[Autosaver]:
+    """Attaches an Autosaver to the session's version manager, if GAME_SAVE_DIR is set."""
+    if get_save_dir() is None or session.version_manager is None or session.game_state is None:
+        return None
+    try:
+        path = session_save_path(session.session_id)
+    except ValueError as e:
+        print(f"Autosave disabled for session '{session.session_id}': {e}")
+        return None
+    autosaver = Autosaver(
+        session.game_state,
+        path,
+        metadata=lambda: {"session_id": session.session_id, "id_counters": session.export_id_counters()},
+    )
+    session.version_manager.add_commit_listener(autosaver.on_commit)
+    session.add_change_listener(autosaver.on_change)
+    session.autosaver = autosaver
+    return autosaver
+
+
+def resume_saved_session(registry: SessionRegistry, session_id: str) -> Optional[SessionContext]:
+    """
+    Recreates a parked session from its save file. Returns None when there is no save for it.
+    Raises RuntimeError (from the registry) when there is no room for it.
+
+    Every section is decoded here: the GameState needs all its components. Loading a single
+    one (SaveFile.load_section) is for tools that only read part of a save.
+    """
+    if get_save_dir() is None:
+        return None
+    try:
+        path = session_save_path(session_id)
+    except ValueError:
+        return None
+    if not os.path.exists(path):
+        return None
+
+    save = SaveFile(path)
+    game_state = save.load_game_state()
+    try:
+        session = registry.create_session(session_id)
+    except ValueError:
+        # Resumed concurrently by another request
+        return registry.get_session(session_id)
+    session.game_state = game_state
+    session.restore_id_counters(save.metadata.get("id_counters", {}))
+    print(f"Resumed session '{session_id}' from '{path}'.")
+    return session
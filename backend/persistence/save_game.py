@@ -0,0 +1,193 @@
+"""
+Binary save files for the game state.
+
+A save file holds one section per GameStateModel component (session, game_map, characters...),
+each one serialized with orjson and compressed with zstd on its own:
+
+    MAGIC | header length (u32, big endian) | header (orjson) | section blobs...
+
+The header lists the offset and size of every section plus free-form metadata, so a reader can
+load a single component without touching the others, and a writer can copy the compressed
+bytes of unchanged components from the previous save instead of serializing them again.
+"""
+from __future__ import annotations
+
+import os
+import struct
+import time
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Set, Type
+
+import orjson
+import zstandard
+from pydantic import BaseModel
+
+from core_game.game_state.domain import GameState
+from core_game.game_state.schemas import GameStateModel
+from core_game.character.schemas import CharacterBaseModel
+from core_game.game_event.schemas import GameEventModel
+from core_game.game_event.activation_conditions.schemas import ActivationConditionModel
+
+MAGIC = b"TFGSAVE\x01"
+FORMAT_VERSION = 1
+ZSTD_LEVEL = 3
+
+_HEADER_LENGTH = struct.Struct(">I")
+
+# Section name -> model class, in GameStateModel field order
+SECTION_MODELS: Dict[str, Type[BaseModel]] = {
+    name: field.annotation  # type: ignore[misc]
+    for name, field in GameStateModel.model_fields.items()
+}
+
+
+class SaveFormatError(ValueError):
+    """Raised when a file is not a valid save or was written by an unknown format version."""
+
+
+def encode_section(model: BaseModel) -> bytes:
+    """Serializes and compresses one component model."""
+    # serialize_as_any keeps the fields of subclasses (e.g. NPCs inside CharactersModel.registry)
+    raw = orjson.dumps(model.model_dump(mode="json", serialize_as_any=True))
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+
+
+def decode_section(name: str, blob: bytes) -> BaseModel:
+    """Decompresses and validates one component model."""
+    raw = zstandard.ZstdDecompressor().decompress(blob)
+    data = orjson.loads(raw)
+    # Characters and events are stored in fields typed with their base model, so the concrete
+    # class has to be picked from the "type" field before validating
+    if name == "characters":
+        data["registry"] = {k: _validate_concrete(CharacterBaseModel, v) for k, v in data.get("registry", {}).items()}
+    elif name == "game_events":
+        for event in data.get("all_events", {}).values():
+            event["activation_conditions"] = [
+                _validate_concrete(ActivationConditionModel, c) for c in event.get("activation_conditions", [])
+            ]
+        data["all_events"] = {k: _validate_concrete(GameEventModel, v) for k, v in data.get("all_events", {}).items()}
+    return SECTION_MODELS[name].model_validate(data)
+
+
+@lru_cache(maxsize=None)
+def _subclasses_by_type(base: Type[BaseModel]) -> Dict[Any, Type[BaseModel]]:
+    found: Dict[Any, Type[BaseModel]] = {}
+    pending = list(base.__subclasses__())
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        default = cls.model_fields["type"].default
+        if isinstance(default, str):
+            found.setdefault(default, cls)
+    return found
+
+
+def _validate_concrete(base: Type[BaseModel], data: Dict[str, Any]) -> BaseModel:
+    cls = _subclasses_by_type(base).get(data.get("type"), base)
+    return cls.model_validate(data)
+
+
+class SaveFile:
+    """
+    Read access to a save file. Only the header is read on open; sections are read, decompressed
+    and validated on first access and then cached.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise SaveFormatError(f"'{path}' is not a game save file.")
+            (header_length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+            header = orjson.loads(f.read(header_length))
+        if header.get("format_version") != FORMAT_VERSION:
+            raise SaveFormatError(f"Unsupported save format version {header.get('format_version')} in '{path}'.")
+        self._data_start = len(MAGIC) + _HEADER_LENGTH.size + header_length
+        self._sections: Dict[str, Dict[str, int]] = header["sections"]
+        self.metadata: Dict[str, Any] = header.get("metadata", {})
+        self.saved_at: float = header.get("saved_at", 0.0)
+        self._loaded: Dict[str, BaseModel] = {}
+
+    @property
+    def section_names(self) -> Iterable[str]:
+        return self._sections.keys()
+
+    def read_raw_section(self, name: str) -> bytes:
+        """Returns the compressed bytes of a section."""
+        if name not in self._sections:
+            raise KeyError(f"Section '{name}' not found in save '{self.path}'.")
+        entry = self._sections[name]
+        with open(self.path, "rb") as f:
+            f.seek(self._data_start + entry["offset"])
+            return f.read(entry["length"])
+
+    def load_section(self, name: str) -> BaseModel:
+        """Loads a single component model."""
+        if name not in self._loaded:
+            self._loaded[name] = decode_section(name, self.read_raw_section(name))
+        return self._loaded[name]
+
+    def load_model(self) -> GameStateModel:
+        return GameStateModel(**{name: self.load_section(name) for name in SECTION_MODELS})
+
+    def load_game_state(self) -> GameState:
+        return GameState(self.load_model())
+
+
+def write_save_file(path: str, sections: Dict[str, bytes], metadata: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Writes already encoded sections to `path`. The file is written next to the target and
+    then renamed over it, so a crash never leaves a half written save behind.
+    """
+    entries: Dict[str, Dict[str, int]] = {}
+    offset = 0
+    for name, blob in sections.items():
+        entries[name] = {"offset": offset, "length": len(blob)}
+        offset += len(blob)
+    header = orjson.dumps({
+        "format_version": FORMAT_VERSION,
+        "saved_at": time.time(),
+        "sections": entries,
+        "metadata": metadata or {},
+    })
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        for blob in sections.values():
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def save_game_state(state: GameState, path: str, metadata: Optional[Dict[str, Any]] = None,
+                    dirty: Optional[Set[str]] = None) -> None:
+    """
+    Saves the game state to `path`. When `dirty` is given and a save already exists at `path`,
+    only the sections named in `dirty` are serialized again; the others are copied as they are.
+    """
+    previous: Optional[SaveFile] = None
+    if dirty is not None and os.path.exists(path):
+        try:
+            previous = SaveFile(path)
+        except SaveFormatError:
+            previous = None
+
+    sections: Dict[str, bytes] = {}
+    for name in SECTION_MODELS:
+        if previous is not None and dirty is not None and name not in dirty and name in previous.section_names:
+            sections[name] = previous.read_raw_section(name)
+        else:
+            # Section names are also the GameState component properties
+            sections[name] = encode_section(getattr(state, name).to_model())
+    write_save_file(path, sections, metadata)
+
+
+def load_game_state(path: str) -> GameState:
+    """Loads a whole game state from a save file."""
+    return SaveFile(path).load_game_state()
@@ -29,6 +29,10 @@ class SimulatedCharacters:
         )
         return new_copy
 
+    def fork(self) -> "SimulatedCharacters":
+        """Returns a copy that shares unmodified characters with this one."""
+        return SimulatedCharacters(characters=self._working_state.fork())
+
     def get_state(self) -> Characters:
         return self._working_state
 
@@ -265,9 +269,12 @@ class SimulatedCharacters:
         characters = self._working_state.get_characters_at_scenario(scenario_id)
         if any(isinstance(c, PlayerCharacter) for c in characters):
             raise PlayerDeletionError(f"Player is currently at {scenario_id} and player can not be removed from scenarios.")
+        removed: List[BaseCharacter] = []
         for c in characters:
-            c.present_in_scenario = None
-        return characters
+            _, character = self._working_state.remove_character_from_scenario(c.id)
+            if character:
+                removed.append(character)
+        return removed
         
     def get_character(self, cid: str) -> Optional[BaseCharacter]:
         return self._working_state.find_character(cid)
@@ -288,6 +295,9 @@ class SimulatedCharacters:
     def group_by_scenario(self) -> Dict[str,List[BaseCharacter]]:
         return self._working_state.group_by_scenario()
 
+    def get_characters_at_scenario(self, scenario_id: str) -> List[BaseCharacter]:
+        return self._working_state.get_characters_at_scenario(scenario_id)
+
     def get_initial_summary(self) -> str:
         characters = self.filter_characters(None, None)
         if not characters:
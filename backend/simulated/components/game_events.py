@@ -28,6 +28,10 @@ class SimulatedGameEvents:
         copied = GameEventsManager(model=deepcopy(self._working_state.to_model()))
         return SimulatedGameEvents(copied)
 
+    def fork(self) -> SimulatedGameEvents:
+        """Returns a copy that shares unmodified events with this one."""
+        return SimulatedGameEvents(self._working_state.fork())
+
     def get_state(self) -> GameEventsManager:
         return self._working_state
     
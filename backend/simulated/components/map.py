@@ -19,6 +19,10 @@ class SimulatedMap:
         )
         return new_copy
 
+    def fork(self) -> "SimulatedMap":
+        """Returns a copy that shares unmodified scenarios and connections with this one."""
+        return SimulatedMap(game_map=self._working_state.fork())
+
     def get_state(self) -> GameMap:
         return self._working_state
 
@@ -257,13 +261,7 @@ class SimulatedMap:
         The main cluster is defined as the largest one.
         This is a read-only operation.
         """
-        all_clusters = self._working_state.get_all_clusters()
-
-        if len(all_clusters) <= 1:
-            return []
-        sorted_clusters = sorted(all_clusters, key=len, reverse=True)
-        outside_clusters = sorted_clusters[1:]
-        return outside_clusters
+        return self._working_state.get_outside_clusters()
     
     def get_main_cluster(self) -> Optional[Set[str]]:
         """
@@ -271,13 +269,7 @@ class SimulatedMap:
         The main cluster is defined as the largest one.
         This is a read-only operation.
         """
-        all_clusters = self._working_state.get_all_clusters()
-
-        if not all_clusters: 
-            return None
-
-        sorted_clusters = sorted(all_clusters, key=len, reverse=True)
-        return sorted_clusters[0]
+        return self._working_state.get_main_cluster()
     
     def connect_largest_island_to_main_cluster(self) -> bool:
         """
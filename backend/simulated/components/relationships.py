@@ -19,6 +19,10 @@ class SimulatedRelationships:
         copied_relationships = Relationships(relationships_model=deepcopy(self._working_state.to_model()))
         return SimulatedRelationships(copied_relationships)
 
+    def fork(self) -> "SimulatedRelationships":
+        """Returns a copy that shares unmodified relationship rows with this one."""
+        return SimulatedRelationships(self._working_state.fork())
+
     def get_state(self) -> Relationships:
         return self._working_state
 
@@ -1,79 +1,129 @@
+from typing import List, Set
 from core_game.game_state.singleton import GameStateSingleton
+from core_game.game_state.sessions import SessionContext, current_session
 from versioning.layers.manager import GameStateVersionManager 
+from versioning.layers.journal import JournalEntry
 from simulated.game_state import SimulatedGameState
 from versioning.deltas.manager import StateCheckpointManager
-import typing 
 from versioning.deltas.factory import CheckpointManagerFactory
+from versioning.deltas.checkpoints.changeset import state_version
+from persistence.autosave import attach_autosaver
+
+def notify_state_changes(session: SessionContext) -> None:
+    """
+    Notifies "state" to the change listeners of the session if its state_version moved since the
+    last notification. Called after every commit and when requests and event streams finish
+    changing the state outside transactions (see api.services.sessions).
+    """
+    if session.simulated_state is None:
+        return
+    version = state_version(session.simulated_state)
+    if version == session.notified_state_version:
+        return
+    session.notified_state_version = version
+    session.notify_changed("state")
+
 
 class SimulatedGameStateSingleton:
     """
     Singleton that orchestrates the simulated state and its versioning.
     
-    - Provides global access to an instance of the facade (SimulatedGameState).
+    - Provides access to the facade (SimulatedGameState) of the session bound to the
+      current context (see core_game.game_state.sessions). Each session has its own.
     - Internally manages the transaction lifecycle (commit/rollback).
     """
-    _version_manager_instance: typing.Optional[GameStateVersionManager] = None
-    _facade_instance: typing.Optional[SimulatedGameState] = None
-    _checkpoint_manager: typing.Optional[StateCheckpointManager] = None
 
     @classmethod
-    def _initialize(cls):
-        """Initializes the internal instances if they don't exist yet."""
-        if cls._version_manager_instance is None:
+    def _initialize(cls) -> SessionContext:
+        """Initializes the internal instances of the current session if they don't exist yet."""
+        session = current_session()
+        if session.version_manager is None:
             game_state = GameStateSingleton.get_instance()
-            cls._version_manager_instance = GameStateVersionManager(game_state)
+            session.version_manager = GameStateVersionManager(game_state)
+            session.version_manager.add_commit_listener(lambda components: notify_state_changes(session))
+            attach_autosaver(session)
         
-        if cls._facade_instance is None:
-            cls._facade_instance = SimulatedGameState(cls._version_manager_instance)
+        if session.simulated_state is None:
+            session.simulated_state = SimulatedGameState(session.version_manager)
+        return session
 
     @classmethod
     def get_instance(cls) -> SimulatedGameState:
         """
-        Returns the unique instance of the SimulatedGameState facade.
+        Returns the instance of the SimulatedGameState facade of the current session.
         All state reads and modifications are performed through this object.
         """
-        cls._initialize()
-        assert cls._facade_instance is not None, "Initialization of facade failed."
-        return cls._facade_instance
+        session = cls._initialize()
+        assert session.simulated_state is not None, "Initialization of facade failed."
+        return session.simulated_state
 
     # --- DELEGATED TRANSACTION METHODS ---
 
+    @classmethod
+    def _get_version_manager(cls) -> GameStateVersionManager:
+        session = cls._initialize()
+        assert session.version_manager is not None, "Initialization of version manager failed."
+        return session.version_manager
+
     @classmethod
     def begin_transaction(cls):
         """Starts a new simulation layer (transaction)."""
-        cls._initialize()
-        assert cls._version_manager_instance is not None, "Initialization of version manager failed."
-        cls._version_manager_instance.begin_transaction()
+        cls._get_version_manager().begin_transaction()
 
     @classmethod
-    def commit(cls):
-        """Commits the changes from the current layer."""
-        cls._initialize()
-        assert cls._version_manager_instance is not None, "Initialization of version manager failed."
-        cls._version_manager_instance.commit()
+    def commit(cls) -> List[JournalEntry]:
+        """Commits the changes from the current layer. Returns its operation journal."""
+        return cls._get_version_manager().commit()
 
     @classmethod
-    def rollback(cls):
-        """Discards the changes from the current layer."""
-        cls._initialize()
-        assert cls._version_manager_instance is not None, "Initialization of version manager failed."
-        cls._version_manager_instance.rollback()
+    def rollback(cls) -> List[JournalEntry]:
+        """Discards the changes from the current layer. Returns the journal of what was discarded."""
+        return cls._get_version_manager().rollback()
+
+    @classmethod
+    def get_transaction_journal(cls) -> List[JournalEntry]:
+        """Operations (create/modify/delete per entity) done so far in the current transaction."""
+        return cls._get_version_manager().current_journal()
+
+    @classmethod
+    def begin_branch(cls, name: str):
+        """Opens a named transaction branch, for work that runs concurrently with other branches."""
+        cls._get_version_manager().begin_branch(name)
+
+    @classmethod
+    def use_branch(cls, name: str):
+        """Context manager routing the transactions of the current context through the branch."""
+        return cls._get_version_manager().use_branch(name)
+
+    @classmethod
+    def commit_branch(cls, name: str) -> Set[str]:
+        """Commits a branch. Raises TransactionConflictError if it conflicts with another one."""
+        return cls._get_version_manager().commit_branch(name)
+
+    @classmethod
+    def rollback_branch(cls, name: str):
+        """Discards a branch."""
+        cls._get_version_manager().rollback_branch(name)
         
     @classmethod
     def reset_instance(cls):
         """
-        Completely resets the simulated state to its original base state.
+        Completely resets the simulated state of the current session to its original base state.
         """
-        cls._version_manager_instance = None
-        cls._facade_instance = None
-        cls._checkpoint_manager = None
+        session = current_session()
+        session.version_manager = None
+        session.simulated_state = None
+        session.checkpoint_manager = None
         cls._initialize()
 
     @classmethod
     def get_checkpoint_manager(cls) -> StateCheckpointManager:
-        """Return the global StateCheckpointManager instance."""
-        cls._initialize()
-        if cls._checkpoint_manager is None:
+        """Return the StateCheckpointManager of the current session."""
+        session = cls._initialize()
+        if session.checkpoint_manager is None:
             factory = CheckpointManagerFactory()
-            cls._checkpoint_manager = factory.create_manager(cls.get_instance())
-        return cls._checkpoint_manager
\ No newline at end of file
+            manager = factory.create_manager(cls.get_instance())
+            assert session.version_manager is not None
+            session.version_manager.add_commit_listener(lambda components: manager.invalidate_full_state())
+            session.checkpoint_manager = manager
+        return session.checkpoint_manager
@@ -2,7 +2,7 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_openai import ChatOpenAI
+from utils.llm_models import get_chat_model
 from langgraph.prebuilt import ToolNode
 from typing import Sequence
 
@@ -42,7 +42,7 @@ def receive_objective_node(state: CharacterGraphState):
     }
 
 timeout_executor = httpx.Timeout(None)
-executor_llm = ChatOpenAI(model="gpt-4.1-mini", timeout=timeout_executor).bind_tools(EXECUTORTOOLS, tool_choice="any")
+executor_llm = get_chat_model("gpt-4.1-mini", timeout=timeout_executor).bind_tools(EXECUTORTOOLS, tool_choice="any")
 
 def character_executor_reason_node(state: CharacterGraphState):
     print("---ENTERING: REASON EXECUTION NODE---")
@@ -146,9 +146,9 @@ def character_validation_reason_node(state: CharacterGraphState):
     timeout_validation = httpx.Timeout(None)
     state.characters_current_validation_iteration += 1
     if state.characters_current_validation_iteration <= state.characters_max_validation_iterations:
-        validation_llm = ChatOpenAI(model="gpt-4.1-mini", timeout=timeout_validation).bind_tools(VALIDATIONTOOLS, tool_choice="any")
+        validation_llm = get_chat_model("gpt-4.1-mini", timeout=timeout_validation).bind_tools(VALIDATIONTOOLS, tool_choice="any")
     else:
-        validation_llm = ChatOpenAI(model="gpt-4.1-mini", timeout=timeout_validation).bind_tools([validate_simulated_characters], tool_choice="any")
+        validation_llm = get_chat_model("gpt-4.1-mini", timeout=timeout_validation).bind_tools([validate_simulated_characters], tool_choice="any")
 
     full_prompt = format_character_validation_prompt(
         state.characters_current_objective,
@@ -1,7 +1,7 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_openai import ChatOpenAI
+from utils.llm_models import get_chat_model
 from langgraph.prebuilt import ToolNode
 from typing import Sequence
 
@@ -39,7 +39,7 @@ def receive_objective_node(state: GameEventGraphState):
         "events_task_succeeded_final": False,
     }
 timeout_executor = httpx.Timeout(None)
-executor_llm = ChatOpenAI(model="gpt-4.1-mini", timeout=timeout_executor).bind_tools(EXECUTORTOOLS, tool_choice="any")
+executor_llm = get_chat_model("gpt-4.1-mini", timeout=timeout_executor).bind_tools(EXECUTORTOOLS, tool_choice="any")
 
 def game_event_executor_reason_node(state: GameEventGraphState):
     print("---ENTERING: REASON EXECUTION NODE---")
@@ -139,9 +139,9 @@ def game_event_validation_reason_node(state: GameEventGraphState):
     timeout_validation = httpx.Timeout(None)
     state.events_current_validation_iteration += 1
     if state.events_current_validation_iteration <= state.events_max_validation_iterations:
-        validation_llm = ChatOpenAI(model="gpt-4.1-mini", timeout=timeout_validation).bind_tools(VALIDATIONTOOLS, tool_choice="any")
+        validation_llm = get_chat_model("gpt-4.1-mini", timeout=timeout_validation).bind_tools(VALIDATIONTOOLS, tool_choice="any")
     else:
-        validation_llm = ChatOpenAI(model="gpt-4.1-mini", timeout=timeout_validation).bind_tools([validate_simulated_game_events], tool_choice="any")
+        validation_llm = get_chat_model("gpt-4.1-mini", timeout=timeout_validation).bind_tools([validate_simulated_game_events], tool_choice="any")
     full_prompt = format_game_event_validation_prompt(
         state.events_current_objective,
         state.events_executor_agent_relevant_logs,
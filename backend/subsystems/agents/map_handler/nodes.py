@@ -1,7 +1,7 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_openai import ChatOpenAI
+from utils.llm_models import get_chat_model
 
 from langgraph.prebuilt import ToolNode
 from typing import Sequence, Dict, Any, List
@@ -45,7 +45,7 @@ def receive_objective_node(state: MapGraphState):
     }
 
 timeout_executor = httpx.Timeout(None)
-executor_llm = ChatOpenAI(model="gpt-4.1-mini", timeout=timeout_executor).bind_tools(EXECUTORTOOLS, tool_choice="any")
+executor_llm = get_chat_model("gpt-4.1-mini", timeout=timeout_executor).bind_tools(EXECUTORTOOLS, tool_choice="any")
 
 def map_executor_reason_node(state: MapGraphState):
     """
@@ -143,9 +143,9 @@ def map_validation_reason_node(state: MapGraphState):
 
     state.map_current_validation_iteration+=1
     if state.map_current_validation_iteration <= state.map_max_validation_iterations:
-        map_validation_llm = ChatOpenAI(model="gpt-4.1-mini", timeout=timeout_validation).bind_tools(VALIDATIONTOOLS, tool_choice="any")
+        map_validation_llm = get_chat_model("gpt-4.1-mini", timeout=timeout_validation).bind_tools(VALIDATIONTOOLS, tool_choice="any")
     else:
-        map_validation_llm = ChatOpenAI(model="gpt-4.1-mini", timeout=timeout_validation).bind_tools([validate_simulated_map], tool_choice="any")
+        map_validation_llm = get_chat_model("gpt-4.1-mini", timeout=timeout_validation).bind_tools([validate_simulated_map], tool_choice="any")
     
     full_prompt=format_map_react_validation_prompt(
         state.map_current_objective,
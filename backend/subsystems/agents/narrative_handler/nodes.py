@@ -1,7 +1,7 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_openai import ChatOpenAI
+from utils.llm_models import get_chat_model
 from langgraph.prebuilt import ToolNode
 from typing import Sequence
 from .schemas.graph_state import NarrativeGraphState
@@ -41,7 +41,7 @@ def receive_objective_node(state: NarrativeGraphState):
     }
 
 timeout_executor = httpx.Timeout(None)
-executor_llm = ChatOpenAI(model="gpt-4.1-mini", timeout=timeout_executor).bind_tools(EXECUTORTOOLS, tool_choice="any")
+executor_llm = get_chat_model("gpt-4.1-mini", timeout=timeout_executor).bind_tools(EXECUTORTOOLS, tool_choice="any")
 
 def narrative_executor_reason_node(state: NarrativeGraphState):
     print("---ENTERING: REASON EXECUTION NODE---")
@@ -141,9 +141,9 @@ def narrative_validation_reason_node(state: NarrativeGraphState):
     state.narrative_current_validation_iteration += 1
 
     if state.narrative_current_validation_iteration <= state.narrative_max_validation_iterations:
-        validation_llm = ChatOpenAI(model="gpt-4.1-mini", timeout=timeout_validation).bind_tools(VALIDATIONTOOLS, tool_choice="any")
+        validation_llm = get_chat_model("gpt-4.1-mini", timeout=timeout_validation).bind_tools(VALIDATIONTOOLS, tool_choice="any")
     else:
-        validation_llm = ChatOpenAI(model="gpt-4.1-mini", timeout=timeout_validation).bind_tools([validate_simulated_narrative], tool_choice="any")
+        validation_llm = get_chat_model("gpt-4.1-mini", timeout=timeout_validation).bind_tools([validate_simulated_narrative], tool_choice="any")
         
     full_prompt = format_narrative_react_validation_prompt(
         state.narrative_current_objective,
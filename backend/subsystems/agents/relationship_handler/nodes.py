@@ -1,7 +1,7 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_openai import ChatOpenAI
+from utils.llm_models import get_chat_model
 from langgraph.prebuilt import ToolNode
 from typing import Sequence
 from subsystems.agents.relationship_handler.schemas.graph_state import RelationshipGraphState
@@ -44,7 +44,7 @@ def receive_objective_node(state: RelationshipGraphState):
     }
 
 timeout_executor = httpx.Timeout(None)
-executor_llm = ChatOpenAI(model="gpt-4.1-mini", timeout=timeout_executor).bind_tools(EXECUTORTOOLS, tool_choice="any")
+executor_llm = get_chat_model("gpt-4.1-mini", timeout=timeout_executor).bind_tools(EXECUTORTOOLS, tool_choice="any")
 
 def relationship_executor_reason_node(state: RelationshipGraphState):
     print("---ENTERING: REASON EXECUTION NODE---")
@@ -145,9 +145,9 @@ def relationship_validation_reason_node(state: RelationshipGraphState):
     timeout_validation = httpx.Timeout(None)
     state.relationships_current_validation_iteration += 1
     if state.relationships_current_validation_iteration <= state.relationships_max_validation_iterations:
-        validation_llm = ChatOpenAI(model="gpt-4.1-mini", timeout=timeout_validation).bind_tools(VALIDATIONTOOLS, tool_choice="any")
+        validation_llm = get_chat_model("gpt-4.1-mini", timeout=timeout_validation).bind_tools(VALIDATIONTOOLS, tool_choice="any")
     else:
-        validation_llm = ChatOpenAI(model="gpt-4.1-mini", timeout=timeout_validation).bind_tools([validate_simulated_relationships], tool_choice="any")
+        validation_llm = get_chat_model("gpt-4.1-mini", timeout=timeout_validation).bind_tools([validate_simulated_relationships], tool_choice="any")
 
     full_prompt = format_relationship_validation_prompt(
         state.relationships_current_objective,
@@ -0,0 +1,238 @@
+"""
+Content-addressed store for generated images.
+
+Images are stored once per content, as <images>/objects/<2 first hash chars>/<xxh3-128 hash>.png,
+and scenarios and characters keep that relative path as their image_path. Storing an image
+that already exists only returns its path. New files are written by a background pool
+(to a temporary file renamed into place), so `put` returns as soon as the hash is known;
+`wait` lets a reader block until a pending write is done.
+
+Files are never overwritten, so their URLs can be cached forever, and the object name is the
+same hash AssetStore uses for ETags and variants.
+
+References are counted from the scenarios (and their previous versions) and the characters of
+every live session and every save file in GAME_SAVE_DIR. `collect_garbage` deletes the objects
+(and their variants) nobody references anymore, except recent ones, which may belong to a
+transaction that hasn't been committed yet. Storing an image that already exists refreshes its
+mtime, so an old object reused by such a transaction counts as recent too.
+"""
+from __future__ import annotations
+
+import base64
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import xxhash
+
+from core_game.game_state.schemas import GameStateModel
+from core_game.character.schemas import CharactersModel
+from core_game.map.schemas import GameMapModel
+
+OBJECTS_DIRNAME = "objects"
+GC_GRACE_SECONDS = 60 * 60
+
+
+def object_path(content_hash: str, extension: str = "png") -> str:
+    """Relative path (from the images dir) of the object with the given hash."""
+    return f"{OBJECTS_DIRNAME}/{content_hash[:2]}/{content_hash}.{extension}"
+
+
+def object_hash(path: str) -> Optional[str]:
+    """The content hash of an object path, or None if the path is not a store object."""
+    if not path.startswith(OBJECTS_DIRNAME + "/"):
+        return None
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+class ImageStore:
+    def __init__(self, base_dir: str, workers: int = 2):
+        self.base_dir = base_dir
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-store")
+        self.deduplicated = 0
+
+    def full_path(self, path: str) -> str:
+        return os.path.join(self.base_dir, *path.split("/"))
+
+    # --- Writing ---
+
+    def put(self, data: bytes, extension: str = "png") -> str:
+        """Stores an image (if new) and returns its relative path. The write happens in the background."""
+        path = object_path(xxhash.xxh3_128_hexdigest(data), extension)
+        with self._lock:
+            if path in self._pending:
+                self.deduplicated += 1
+                return path
+            if os.path.exists(self.full_path(path)):
+                self.deduplicated += 1
+                self._refresh(path)
+                return path
+            self._pending[path] = self._executor.submit(self._write, path, data)
+        return path
+
+    def put_base64(self, image_base64: str, extension: str = "png") -> str:
+        return self.put(base64.b64decode(image_base64), extension)
+
+    def _refresh(self, path: str) -> None:
+        """
+        Marks a reused object as recent: the layer reusing it may not be committed yet, so the
+        object could still look unreferenced, and the GC grace period is counted from the mtime.
+        """
+        try:
+            os.utime(self.full_path(path))
+        except OSError as e:
+            print(f"[ImageStore] Couldn't refresh '{path}': {e}")
+
+    def _write(self, path: str, data: bytes) -> None:
+        full_path = self.full_path(path)
+        try:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            tmp_path = f"{full_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, full_path)
+        except OSError as e:
+            print(f"[ImageStore] ERROR writing '{full_path}': {e}")
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+
+    def wait(self, path: str, timeout: Optional[float] = None) -> bool:
+        """Waits for a pending write of `path`. Returns whether the file exists afterwards."""
+        with self._lock:
+            future = self._pending.get(path)
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                return False
+        return os.path.exists(self.full_path(path))
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Waits for every pending write."""
+        with self._lock:
+            futures = list(self._pending.values())
+        for future in futures:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+
+    # --- References and garbage collection ---
+
+    def stored_objects(self) -> List[str]:
+        objects_dir = os.path.join(self.base_dir, OBJECTS_DIRNAME)
+        paths = []
+        for prefix in sorted(os.listdir(objects_dir)) if os.path.isdir(objects_dir) else []:
+            prefix_dir = os.path.join(objects_dir, prefix)
+            for name in sorted(os.listdir(prefix_dir)):
+                if not name.endswith(".tmp"):
+                    paths.append(f"{OBJECTS_DIRNAME}/{prefix}/{name}")
+        return paths
+
+    def collect_garbage(self, reference_counts: Dict[str, int], grace_seconds: float = GC_GRACE_SECONDS,
+                        dry_run: bool = False) -> List[str]:
+        """
+        Deletes the objects with no references (and their variants), except those written in the
+        last `grace_seconds`. Returns the deleted paths.
+        """
+        from subsystems.assets.store import VARIANTS_DIRNAME
+
+        self.flush()
+        deadline = time.time() - grace_seconds
+        deleted = []
+        for path in self.stored_objects():
+            if reference_counts.get(path, 0) > 0:
+                continue
+            full_path = self.full_path(path)
+            try:
+                if os.path.getmtime(full_path) > deadline:
+                    continue
+                if not dry_run:
+                    os.remove(full_path)
+                    shutil.rmtree(os.path.join(self.base_dir, VARIANTS_DIRNAME, object_hash(path) or ""), ignore_errors=True)
+            except OSError as e:
+                print(f"[ImageStore] Couldn't delete '{full_path}': {e}")
+                continue
+            deleted.append(path)
+        if deleted:
+            print(f"[ImageStore] {'Would delete' if dry_run else 'Deleted'} {len(deleted)} unreferenced image(s).")
+        return deleted
+
+
+def count_image_references(models: Iterable[GameStateModel | GameMapModel | CharactersModel]) -> Dict[str, int]:
+    """How many scenarios (and scenario versions) and characters reference each image path."""
+    counts: Counter = Counter()
+    for model in models:
+        game_map = model.game_map if isinstance(model, GameStateModel) else model if isinstance(model, GameMapModel) else None
+        characters = model.characters if isinstance(model, GameStateModel) else model if isinstance(model, CharactersModel) else None
+        if game_map is not None:
+            for scenario in game_map.scenarios.values():
+                if scenario.image_path:
+                    counts[scenario.image_path] += 1
+                for snapshot in scenario.previous_versions:
+                    if snapshot.image_path:
+                        counts[snapshot.image_path] += 1
+        if characters is not None:
+            for character in characters.registry.values():
+                if character.image_path:
+                    counts[character.image_path] += 1
+    return dict(counts)
+
+
+def _referencing_models() -> Iterable[GameStateModel | GameMapModel | CharactersModel]:
+    from core_game.game_state.sessions import get_session_registry
+    from persistence.autosave import get_save_dir
+    from persistence.save_game import SaveFile, SaveFormatError
+
+    live_ids = set()
+    for session in get_session_registry().sessions():
+        # Under the session lock, so a request of that session isn't changing the state meanwhile
+        with session.lock:
+            model = session.game_state.to_model() if session.game_state is not None else None
+        if model is not None:
+            live_ids.add(session.session_id)
+            yield model
+
+    save_dir = get_save_dir()
+    if save_dir and os.path.isdir(save_dir):
+        for name in sorted(os.listdir(save_dir)):
+            if not name.endswith(".save") or name[:-len(".save")] in live_ids:
+                continue
+            try:
+                save = SaveFile(os.path.join(save_dir, name))
+                yield save.load_section("game_map")  # type: ignore[misc]
+                yield save.load_section("characters")  # type: ignore[misc]
+            except (OSError, SaveFormatError, KeyError) as e:
+                print(f"[ImageStore] Skipping save '{name}' when counting references: {e}")
+
+
+def image_reference_counts() -> Dict[str, int]:
+    """Reference counts of every image path over the live sessions and the save files."""
+    return count_image_references(_referencing_models())
+
+
+def collect_unreferenced_images(grace_seconds: float = GC_GRACE_SECONDS, dry_run: bool = False) -> List[str]:
+    """Garbage-collects the image store. See ImageStore.collect_garbage."""
+    return get_image_store().collect_garbage(image_reference_counts(), grace_seconds, dry_run)
+
+
+_store: Optional[ImageStore] = None
+_store_lock = threading.Lock()
+
+
+def get_image_store() -> ImageStore:
+    global _store
+    from subsystems.assets.store import IMAGE_BASE_DIR
+
+    with _store_lock:
+        if _store is None:
+            _store = ImageStore(IMAGE_BASE_DIR)
+        return _store
@@ -0,0 +1,219 @@
+"""
+Image assets served by /assets/image (api.routes.assets).
+
+- ETag: xxh3-128 hash of the file contents, cached per (path, mtime, size) so a request only
+  costs a stat once the file is known. Objects of the image store (subsystems.assets.images)
+  are already named after it.
+- Variants: a smaller width (VARIANT_WIDTHS) and/or WebP. They are rendered in a background
+  pool, never in the request; until a variant is ready the original is served (revalidated, not
+  cached as immutable). Variants live in <images>/_variants/<content hash>/, so a replaced image
+  never serves old variants. `precompute_variants` renders them right after an image is saved.
+- Hot cache: the bytes of the most requested files, keyed by path and ETag and bounded in
+  total size (ASSET_CACHE_MB).
+
+Responses carry `Cache-Control: immutable` only when the request names the content version
+(`v` equal to the ETag), otherwise clients revalidate with If-None-Match and get a 304.
+"""
+from __future__ import annotations
+
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Literal, Optional, Set, Tuple
+
+import xxhash
+from PIL import Image
+from pydantic import BaseModel
+
+from subsystems.assets.images import get_image_store, object_hash
+
+IMAGE_BASE_DIR = os.path.abspath("images")
+VARIANTS_DIRNAME = "_variants"
+
+VARIANT_WIDTHS = (256, 512, 1024)
+WEBP_QUALITY = 85
+ImageFormat = Literal["png", "webp"]
+MEDIA_TYPES: Dict[str, str] = {"png": "image/png", "webp": "image/webp"}
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+class Asset(BaseModel):
+    """A servable file: the original image or one of its variants."""
+    path: str
+    etag: str
+    media_type: str
+    size: int
+    is_variant: bool = False
+
+
+class AssetStore:
+    def __init__(self, base_dir: str = IMAGE_BASE_DIR, cache_bytes: int = 64 * 1024 * 1024, workers: int = 2):
+        self.base_dir = base_dir
+        self.cache_bytes = cache_bytes
+        self._lock = threading.Lock()
+        # (full path, mtime_ns, size) -> content hash
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        # (full path, etag) -> bytes, so a file rewritten in place is never served stale
+        self._hot: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._hot_size = 0
+        self._pending: Set[Tuple[str, Optional[int], str]] = set()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asset-variants")
+
+    # --- Paths ---
+
+    def full_path(self, path: str) -> str:
+        """Absolute path of an image given relative to the base dir. Raises ValueError on traversal."""
+        if not path or ".." in path or path.startswith("/") or "\\" in path or path.startswith(VARIANTS_DIRNAME):
+            raise ValueError("Invalid path")
+        return os.path.join(self.base_dir, path)
+
+    def _relative(self, full_path: str) -> str:
+        return os.path.relpath(full_path, self.base_dir).replace(os.sep, "/")
+
+    def _variant_path(self, content_hash: str, width: Optional[int], fmt: str) -> str:
+        name = f"{width or 'full'}.{fmt}"
+        return os.path.join(self.base_dir, VARIANTS_DIRNAME, content_hash, name)
+
+    # --- Lookup ---
+
+    def content_hash(self, full_path: str) -> str:
+        """Hash of the file contents. Raises FileNotFoundError (not for image store objects)."""
+        # Objects of the image store are named after this same hash
+        stored_hash = object_hash(self._relative(full_path))
+        if stored_hash is not None:
+            return stored_hash
+        stat = os.stat(full_path)
+        key = (full_path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._hashes.get(key)
+        if cached is not None:
+            return cached
+        with open(full_path, "rb") as f:
+            content_hash = xxhash.xxh3_128_hexdigest(f.read())
+        with self._lock:
+            self._hashes[key] = content_hash
+        return content_hash
+
+    def get(self, path: str, width: Optional[int] = None, fmt: ImageFormat = "png") -> Asset:
+        """
+        The asset to serve for an image and the requested variant. Falls back to the original
+        (and schedules the variant) while the variant isn't rendered yet.
+        Raises ValueError for an invalid path or variant and FileNotFoundError if the image doesn't exist.
+        """
+        if width is not None and width not in VARIANT_WIDTHS:
+            raise ValueError(f"Width must be one of {list(VARIANT_WIDTHS)}")
+        if fmt not in MEDIA_TYPES:
+            raise ValueError(f"Format must be one of {list(MEDIA_TYPES)}")
+
+        full_path = self.full_path(path)
+        content_hash = self.content_hash(full_path)
+        original = Asset(path=full_path, etag=content_hash, media_type="image/png", size=os.path.getsize(full_path))
+        if width is None and fmt == "png":
+            return original
+
+        variant_path = self._variant_path(content_hash, width, fmt)
+        if os.path.exists(variant_path):
+            return Asset(
+                path=variant_path,
+                etag=f"{content_hash}-{width or 'full'}-{fmt}",
+                media_type=MEDIA_TYPES[fmt],
+                size=os.path.getsize(variant_path),
+                is_variant=True,
+            )
+        self._schedule(full_path, content_hash, width, fmt)
+        return original
+
+    def read(self, asset: Asset) -> bytes:
+        """The bytes of an asset, from the hot cache when possible."""
+        key = (asset.path, asset.etag)
+        with self._lock:
+            data = self._hot.get(key)
+            if data is not None:
+                self._hot.move_to_end(key)
+                return data
+        with open(asset.path, "rb") as f:
+            data = f.read()
+        if len(data) <= self.cache_bytes // 8:
+            with self._lock:
+                if key not in self._hot:
+                    self._hot[key] = data
+                    self._hot_size += len(data)
+                while self._hot_size > self.cache_bytes:
+                    _, evicted = self._hot.popitem(last=False)
+                    self._hot_size -= len(evicted)
+        return data
+
+    # --- Variants ---
+
+    def precompute_variants(self, path: str) -> None:
+        """Schedules every variant of an image (called after saving a new one)."""
+        try:
+            full_path = self.full_path(path)
+            content_hash = self.content_hash(full_path)
+        except (ValueError, OSError) as e:
+            print(f"[Assets] Can't precompute variants of '{path}': {e}")
+            return
+        for fmt in MEDIA_TYPES:
+            for width in (None, *VARIANT_WIDTHS):
+                if width is None and fmt == "png":
+                    continue
+                if not os.path.exists(self._variant_path(content_hash, width, fmt)):
+                    self._schedule(full_path, content_hash, width, fmt)
+
+    def _schedule(self, full_path: str, content_hash: str, width: Optional[int], fmt: str) -> None:
+        key = (content_hash, width, fmt)
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self._executor.submit(self._render_variant, full_path, content_hash, width, fmt)
+
+    def _render_variant(self, full_path: str, content_hash: str, width: Optional[int], fmt: str) -> None:
+        try:
+            # A new image may still be being written by the image store
+            get_image_store().wait(self._relative(full_path))
+            with Image.open(full_path) as image:
+                image.load()
+                if width is not None and image.width > width:
+                    height = max(1, round(image.height * width / image.width))
+                    image = image.resize((width, height), Image.Resampling.LANCZOS)
+                buffer = io.BytesIO()
+                if fmt == "webp":
+                    image.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+                else:
+                    image.save(buffer, format="PNG", optimize=True)
+            variant_path = self._variant_path(content_hash, width, fmt)
+            os.makedirs(os.path.dirname(variant_path), exist_ok=True)
+            # Written aside and renamed, so a request never reads half a file
+            tmp_path = f"{variant_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_path, variant_path)
+        except Exception as e:
+            print(f"[Assets] Failed to render variant {width}/{fmt} of '{full_path}': {e}")
+        finally:
+            with self._lock:
+                self._pending.discard((content_hash, width, fmt))
+
+
+_store: Optional[AssetStore] = None
+_store_lock = threading.Lock()
+
+
+def get_asset_store() -> AssetStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AssetStore(cache_bytes=int(os.getenv("ASSET_CACHE_MB", "64")) * 1024 * 1024)
+        return _store
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/").strip('"') for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
@@ -9,11 +9,10 @@ if TYPE_CHECKING:
 from simulated.game_state import SimulatedGameState
 
 from core_game.character.domain import BaseCharacter, PlayerCharacter
-from subsystems.game_events.dialog_engine.prompts.context import get_formatted_context, character_to_dict, format_nested_dict
+from subsystems.game_events.dialog_engine.prompts.context import get_formatted_context, get_character_sheet
 
 # --- OpenAI Client Setup ---
-import openai
-client = openai.AsyncOpenAI()
+from subsystems.game_events.dialog_engine.llm_client import create_chat_completion
 
 
 async def generate_choice_driven_message_stream(
@@ -35,7 +34,7 @@ async def generate_choice_driven_message_stream(
     
     
     # 2. Create the specific system prompt for this task
-    formatted_character = "\n".join(format_nested_dict(character_to_dict(speaker)))
+    formatted_character = get_character_sheet(speaker)
             
     context_prompt = f"""
     #PLAYER HAS MADE A CHOICE, YOU MUST DEVELOP HIS CHOICE:
@@ -44,7 +43,7 @@ async def generate_choice_driven_message_stream(
     Now, generate the full intervention for {speaker.identity.full_name} as they carry out this choice.
     """
     
-    formatted_character = "\n".join(format_nested_dict(character_to_dict(speaker)))
+    formatted_character = get_character_sheet(speaker)
             
     system_prompt = f"""
     You are a role-playing game director. Your task is to expand a player's chosen action label into a full, in-character turn.
@@ -137,7 +136,7 @@ async def generate_choice_driven_message_stream(
 
     try:
         # Use 'await' for the async client's method
-        stream = await client.chat.completions.create(
+        stream = await create_chat_completion(
             model="gpt-4.1",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -14,8 +14,7 @@ from subsystems.game_events.dialog_engine.prompts.context import get_formatted_c
 # Es una buena práctica inicializar el cliente una sola vez.
 # La clave de la API se lee de la variable de entorno OPENAI_API_KEY.
 
-import openai
-client = openai.AsyncOpenAI()
+from subsystems.game_events.dialog_engine.llm_client import create_chat_completion
 
 
 
@@ -117,7 +116,7 @@ async def generate_narrator_message_stream(
 
     try:
         # Use 'await' for the async client's method
-        stream = await client.chat.completions.create(
+        stream = await create_chat_completion(
             model="gpt-4.1",
             messages=[
                 {"role": "system", "content": narrator_system_prompt},
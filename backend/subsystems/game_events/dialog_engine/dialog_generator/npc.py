@@ -7,7 +7,7 @@ from simulated.game_state import SimulatedGameState
 if TYPE_CHECKING:
     from core_game.game_event.domain import NarratorInterventionEvent, PlayerNPCConversationEvent, NPCConversationEvent
 # Importarías tus clases y funciones reales aquí
-from subsystems.game_events.dialog_engine.prompts.context import get_formatted_context, character_to_dict, format_nested_dict
+from subsystems.game_events.dialog_engine.prompts.context import get_formatted_context, get_character_sheet
 from core_game.character.domain import NPCCharacter
 
 
@@ -15,8 +15,7 @@ from core_game.character.domain import NPCCharacter
 # Es una buena práctica inicializar el cliente una sola vez.
 # La clave de la API se lee de la variable de entorno OPENAI_API_KEY.
 
-import openai
-client = openai.AsyncOpenAI()
+from subsystems.game_events.dialog_engine.llm_client import create_chat_completion
 
 
 
@@ -34,7 +33,7 @@ async def generate_npc_message_stream(
 
     MAX_TURNS = 15
     
-    formatted_character = format_nested_dict(character_to_dict(speaker))
+    formatted_character = get_character_sheet(speaker)
 
     npc_system_prompt = f"""
     You are a role-playing game director, responsible for generating the dialogue and actions for a specific character.
@@ -155,7 +154,7 @@ async def generate_npc_message_stream(
 
     try:
         # Use 'await' for the async client's method
-        stream = await client.chat.completions.create(
+        stream = await create_chat_completion(
             model="gpt-4.1",
             messages=[
                 {"role": "system", "content": npc_system_prompt},
@@ -7,7 +7,7 @@ from simulated.game_state import SimulatedGameState
 if TYPE_CHECKING:
     from core_game.game_event.domain import PlayerNPCConversationEvent
 # Importarías tus clases y funciones reales aquí
-from subsystems.game_events.dialog_engine.prompts.context import get_formatted_context, character_to_dict, format_nested_dict
+from subsystems.game_events.dialog_engine.prompts.context import get_formatted_context, get_character_sheet
 
 from core_game.character.domain import PlayerCharacter
 
@@ -16,8 +16,7 @@ from core_game.character.domain import PlayerCharacter
 # Es una buena práctica inicializar el cliente una sola vez.
 # La clave de la API se lee de la variable de entorno OPENAI_API_KEY.
 
-import openai
-client = openai.AsyncOpenAI()
+from subsystems.game_events.dialog_engine.llm_client import create_chat_completion
 
 
 
@@ -32,7 +31,7 @@ async def generate_player_message_stream(
     This function builds a detailed prompt, calls the LLM, and returns the raw
     text stream of the response, including special tags like [dialogue], [action], etc.
     """
-    formatted_character = format_nested_dict(character_to_dict(speaker))
+    formatted_character = get_character_sheet(speaker)
 
     # Add specific instructions for player choices only if the speaker is the player
     player_system_prompt = f"""
@@ -143,7 +142,7 @@ async def generate_player_message_stream(
 
     try:
         # Use 'await' for the async client's method
-        stream = await client.chat.completions.create(
+        stream = await create_chat_completion(
             model="gpt-4.1",
             messages=[
                 {"role": "system", "content": player_system_prompt},
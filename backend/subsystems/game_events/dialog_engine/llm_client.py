@@ -0,0 +1,37 @@
+"""Shared async OpenAI client for the dialog engine."""
+from __future__ import annotations
+
+import os
+from typing import Any
+
+import openai
+
+from utils.llm_models import get_async_openai_client
+from utils.llm_scheduler import Priority, estimate_tokens, get_llm_scheduler
+
+# Upper bound for a single non-streaming request (speaker decisions). Streams use the client default.
+DECISION_REQUEST_TIMEOUT = float(os.getenv("DIALOG_DECISION_TIMEOUT_SECONDS", "20"))
+
+
+def get_async_client() -> openai.AsyncOpenAI:
+    """
+    Returns the AsyncOpenAI client shared by every dialog generator and turn manager
+    (the one of the running event loop, see utils.llm_models), so concurrent narrative streams
+    reuse connections instead of opening new ones per module or per request.
+    The API key is read from the OPENAI_API_KEY environment variable.
+    """
+    return get_async_openai_client()
+
+
+async def create_chat_completion(priority: Priority = Priority.INTERACTIVE, **kwargs: Any) -> Any:
+    """
+    chat.completions.create on the shared client, admitted by the LLM scheduler. Dialog is
+    interactive by default, so it goes ahead of generation and background requests waiting
+    for the same model. Rate limits and transient errors are retried by the scheduler.
+    """
+    return await get_llm_scheduler().run_async(
+        kwargs["model"],
+        lambda: get_async_client().chat.completions.create(**kwargs),
+        priority=priority,
+        estimated_tokens=estimate_tokens(kwargs.get("messages")),
+    )
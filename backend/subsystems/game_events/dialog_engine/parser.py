@@ -1,6 +1,11 @@
 from enum import Enum
-from typing import AsyncGenerator
-import json
+from typing import AsyncGenerator, Callable, List, Optional
+import asyncio
+import os
+import time
+import uuid
+
+import orjson
 
 from core_game.game_event.schemas import (
     CharacterDialogueMessage,
@@ -15,132 +20,265 @@ class InvalidTagError(Exception):
     pass
 
 VALID_TAGS = {"dialogue", "action", "thought", "player_choice", "narrator"}
-message_counter = 0
+
+# Content fragments of a message received within this interval are sent as a single SSE event.
+# 0 sends every fragment as soon as it arrives.
+DEFAULT_FLUSH_INTERVAL = float(os.getenv("DIALOG_STREAM_FLUSH_MS", "40")) / 1000
+
+_END_TAG = "[end]"
+
+
+class _State(Enum):
+    TEXT = "text"        # fora de cap tag, o dins del contingut d'un missatge
+    TAG = "tag"          # després d'un '[' esperant el ']'
+    CHOICE = "choice"    # dins d'un [player_choice], esperant el [end]
+
+
+class DialogStreamParser:
+    """
+    Incremental tokenizer for the tagged LLM output of a dialog turn ("[dialogue] ... [action] ... [end]").
+
+    Every chunk is scanned once, so tags split across chunks cost O(n) over the whole turn. `feed`
+    returns the SSE events ready to be sent and adds the finished messages to the event (through
+    `add_message` when given, so the events manager tracks the change). Consecutive
+    content fragments of a message are coalesced until `flush_interval` seconds have passed since the
+    last event sent (see `flush_due_in`, the stream doesn't wait for the next chunk). All the state (including the message ids) belongs to the parser, so concurrent
+    conversations don't share anything.
+    """
+
+    def __init__(self, speaker, event, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 add_message: Optional[Callable] = None):
+        self.speaker = speaker
+        self.event = event
+        self._add_message = add_message or event.add_message
+        self.flush_interval = flush_interval
+        self.finished = False
+
+        self._state = _State.TEXT
+        self._stream_id = uuid.uuid4().hex[:8]
+        self._message_count = 0
+        self._current_type: Optional[str] = None
+        self._current_prefix = ""
+        self._content: List[str] = []
+        self._pending: List[str] = []
+        self._tag: List[str] = []
+        self._choice: List[str] = []
+        self._choice_tail = ""
+        self._choice_message_id = ""
+        self._last_flush = time.monotonic()
+        self._out: List[str] = []
+
+    # --- Public API ---
+
+    def feed(self, chunk: str) -> List[str]:
+        """Consumes a chunk of the LLM stream and returns the SSE events to send."""
+        pos = 0
+        while pos < len(chunk) and not self.finished:
+            if self._state is _State.TEXT:
+                pos = self._scan_text(chunk, pos)
+            elif self._state is _State.TAG:
+                pos = self._scan_tag(chunk, pos)
+            else:
+                pos = self._scan_choice(chunk, pos)
+        if self._pending and time.monotonic() - self._last_flush >= self.flush_interval:
+            self._flush()
+        return self.drain()
+
+    def flush_due_in(self) -> Optional[float]:
+        """Seconds left until the coalesced content must be sent, None when nothing is pending."""
+        if not self._pending:
+            return None
+        return max(0.0, self._last_flush + self.flush_interval - time.monotonic())
+
+    def flush(self) -> List[str]:
+        """Returns the SSE events with the coalesced content, without waiting for more."""
+        self._flush()
+        return self.drain()
+
+    def close(self) -> List[str]:
+        """Ends the stream: sends what is pending and stores the last message if it has content."""
+        self._flush()
+        if not self.finished:
+            self._close_message()
+            self.finished = True
+        return self.drain()
+
+    def drain(self) -> List[str]:
+        """Returns (and forgets) the SSE events produced so far, also those before an InvalidTagError."""
+        out, self._out = self._out, []
+        return out
+
+    # --- States ---
+
+    def _scan_text(self, chunk: str, pos: int) -> int:
+        open_idx = chunk.find("[", pos)
+        end = len(chunk) if open_idx == -1 else open_idx
+        # El text fora d'un missatge es descarta
+        if self._current_type and end > pos:
+            fragment = chunk[pos:end]
+            self._content.append(fragment)
+            self._pending.append(fragment)
+        if open_idx == -1:
+            return len(chunk)
+        self._state = _State.TAG
+        return open_idx + 1
+
+    def _scan_tag(self, chunk: str, pos: int) -> int:
+        close_idx = chunk.find("]", pos)
+        if close_idx == -1:
+            self._tag.append(chunk[pos:])
+            return len(chunk)
+        self._tag.append(chunk[pos:close_idx])
+        tag = "".join(self._tag).strip()
+        self._tag.clear()
+        self._state = _State.TEXT
+        self._open_tag(tag)
+        return close_idx + 1
+
+    def _scan_choice(self, chunk: str, pos: int) -> int:
+        # El [end] pot arribar partit entre chunks: es busca també sobre la cua del bloc
+        text = chunk[pos:]
+        tail = self._choice_tail
+        idx = (tail + text).find(_END_TAG)
+        if idx == -1:
+            self._choice.append(text)
+            self._choice_tail = (tail + text)[-(len(_END_TAG) - 1):]
+            return len(chunk)
+        cut = idx - len(tail)
+        block = "".join(self._choice)
+        block = block + text[:cut] if cut >= 0 else block[:len(block) + cut]
+        self._choice.clear()
+        self._choice_tail = ""
+        self._state = _State.TEXT
+        self._emit_choice(block.strip())
+        return pos + cut + len(_END_TAG)
+
+    # --- Messages ---
+
+    def _open_tag(self, tag: str) -> None:
+        self._flush()
+        self._close_message()
+
+        if tag == "end":
+            self.finished = True
+            return
+
+        if tag not in VALID_TAGS:
+            raise InvalidTagError(f"Etiqueta desconocida: [{tag}]")
+
+        message_id = self._next_message_id()
+        if tag == "player_choice":
+            # El player_choice s'envia sencer quan arriba el seu [end]
+            self._state = _State.CHOICE
+            self._current_type = None
+            self._choice_message_id = message_id
+            return
+
+        self._current_type = tag
+        self._current_prefix = (
+            'data: {"message_id":' + orjson.dumps(message_id).decode()
+            + ',"type":' + orjson.dumps(tag).decode()
+            + ',"speaker_id":' + orjson.dumps(self.speaker.id).decode()
+            + ',"content":'
+        )
+        self._out.append(self._current_prefix + '""}\n\n')
+        self._last_flush = time.monotonic()
+
+    def _close_message(self) -> None:
+        if self._current_type:
+            content = "".join(self._content).strip()
+            if content:
+                self._add_message(_build_message(self._current_type, self.speaker, content))
+        self._current_type = None
+        self._content.clear()
+
+    def _emit_choice(self, block: str) -> None:
+        lines = block.splitlines()
+        title = lines[0].strip() if lines else ""
+        options = []
+        for line in lines[1:]:
+            line = line.strip()
+            if line.startswith("(Dialogue)"):
+                options.append(PlayerChoiceOptionModel(
+                    type="Dialogue", label=line[len("(Dialogue)"):].strip()))
+            elif line.startswith("(Action)"):
+                options.append(PlayerChoiceOptionModel(
+                    type="Action", label=line[len("(Action)"):].strip()))
+
+        self._add_message(PlayerChoiceMessage(
+            actor_id=self.speaker.id, title=title, options=options))
+        self._out.append("data: " + orjson.dumps({
+            "message_id": self._choice_message_id,
+            "type": "player_choice",
+            "speaker_id": self.speaker.id,
+            "title": title,
+            "options": [o.model_dump() for o in options]
+        }).decode() + "\n\n")
+        self._last_flush = time.monotonic()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        fragment = "".join(self._pending)
+        self._pending.clear()
+        self._out.append(self._current_prefix + orjson.dumps(fragment).decode() + "}\n\n")
+        self._last_flush = time.monotonic()
+
+    def _next_message_id(self) -> str:
+        self._message_count += 1
+        return f"msg_{self.event.id}_{self._stream_id}_{self._message_count}"
+
 
 async def parse_and_stream_messages(
     raw_llm_stream: AsyncGenerator[str, None],
     speaker,
-    event
+    event,
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    add_message: Optional[Callable] = None,
 ) -> AsyncGenerator[str, None]:
-    global message_counter
-
-    buffer = ""
-    current_type = None
-    current_id = None
-    content_accum = ""
-
-    async for chunk in raw_llm_stream:
-        buffer += chunk
-
+    """
+    Parses the tagged LLM stream of a turn into SSE message events, see DialogStreamParser.
+    Coalesced content is sent once its interval is over even if the next chunk is slow to come.
+    """
+    parser = DialogStreamParser(speaker, event, flush_interval=flush_interval, add_message=add_message)
+    chunks = raw_llm_stream.__aiter__()
+    next_chunk: Optional[asyncio.Future] = None
+    try:
         while True:
-            # Si estamos en player_choice, esperamos hasta encontrar el cierre [end]
-            if current_type == "player_choice":
-                end_idx = buffer.find("[end]")
-                if end_idx == -1:
-                    break  # aún no llegó todo
-                choice_block = buffer[:end_idx].strip()
-                buffer = buffer[end_idx + len("[end]"):]
-                
-                # Procesamos y emitimos solo un mensaje con título + opciones
-                lines = choice_block.splitlines()
-                title = lines[0].strip()
-                options = []
-                for line in lines[1:]:
-                    line = line.strip()
-                    if line.startswith("(Dialogue)"):
-                        options.append(PlayerChoiceOptionModel(
-                            type="Dialogue", label=line[len("(Dialogue)"):].strip()))
-                    elif line.startswith("(Action)"):
-                        options.append(PlayerChoiceOptionModel(
-                            type="Action", label=line[len("(Action)"):].strip()))
-
-                message_counter += 1
-                current_id = f"msg_{event.id}_{message_counter}"
-                event.add_message(PlayerChoiceMessage(
-                    actor_id=speaker.id, title=title, options=options))
-
-                yield "data: " + json.dumps({
-                    "message_id": current_id,
-                    "type": "player_choice",
-                    "speaker_id": speaker.id,
-                    "title": title,
-                    "options": [o.model_dump() for o in options]
-                }) + "\n\n"
-
-                # Listo, volvemos a esperar el siguiente tag
-                current_type = None
-                content_accum = ""
-                continue
-
-            # Buscamos un tag completo "[...]" — solo si tenemos '[' y ']' en el buffer
-            open_idx = buffer.find("[")
-            close_idx = buffer.find("]", open_idx + 1) if open_idx != -1 else -1
-
-            if open_idx != -1 and close_idx != -1:
-                # 1) Emitimos cualquier texto ANTES del tag como fragmento de contenido
-                if current_type and open_idx > 0:
-                    fragment = buffer[:open_idx]
-                    content_accum += fragment
-                    yield "data: " + json.dumps({
-                        "message_id": current_id,
-                        "type": current_type,
-                        "speaker_id": speaker.id,
-                        "content": fragment
-                    }) + "\n\n"
-
-                # 2) Extraemos el nombre del tag
-                tag = buffer[open_idx+1:close_idx].strip()
-                buffer = buffer[close_idx+1:]
-
-                # 3) Cerramos el bloque anterior si había contenido acumulado
-                if current_type and content_accum.strip():
-                    event.add_message(_build_message(current_type, speaker, content_accum.strip()))
-                content_accum = ""
-
-                # 4) Si es [end], terminamos la función
-                if tag == "end":
-                    return
-
-                # 5) Validamos que sea un tag conocido
-                if tag not in VALID_TAGS:
-                    raise InvalidTagError(f"Etiqueta desconocida: [{tag}]")
-
-                # 6) Arrancamos un nuevo bloque
-                message_counter += 1
-                current_id = f"msg_{event.id}_{message_counter}"
-                current_type = tag
-
-                # ** Solo para player_choice NO emitimos aquí un mensaje vacío**
-                if tag != "player_choice":
-                    yield "data: " + json.dumps({
-                        "message_id": current_id,
-                        "type": current_type,
-                        "speaker_id": speaker.id,
-                        "content": ""
-                    }) + "\n\n"
-                continue
-
-            # 7) Si no hay un tag completo, volcamos texto hasta el próximo '[' (o todo)
-            if current_type and buffer:
-                next_open = buffer.find("[")
-                if next_open != -1:
-                    fragment = buffer[:next_open]
-                    buffer = buffer[next_open:]
+            due_in = parser.flush_due_in()
+            if due_in is not None:
+                # Solo se espera en una tarea aparte si hay contenido pendiente de enviar
+                if next_chunk is None:
+                    next_chunk = asyncio.ensure_future(chunks.__anext__())
+                done, _ = await asyncio.wait({next_chunk}, timeout=due_in)
+                if not done:
+                    for sse_event in parser.flush():
+                        yield sse_event
+                    continue
+            try:
+                if next_chunk is not None:
+                    chunk = await next_chunk
+                    next_chunk = None
                 else:
-                    fragment = buffer
-                    buffer = ""
-                content_accum += fragment
-                yield "data: " + json.dumps({
-                    "message_id": current_id,
-                    "type": current_type,
-                    "speaker_id": speaker.id,
-                    "content": fragment
-                }) + "\n\n"
-            break  # salimos del while y esperamos más chunks
-
-    # Al terminar el stream, añadimos el bloque final si queda contenido
-    if current_type and content_accum.strip():
-        event.add_message(_build_message(current_type, speaker, content_accum.strip()))
+                    chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                break
+            try:
+                sse_events = parser.feed(chunk)
+            except InvalidTagError:
+                # Lo ya parseado se envía igualmente antes de propagar el error
+                for sse_event in parser.drain():
+                    yield sse_event
+                raise
+            for sse_event in sse_events:
+                yield sse_event
+            if parser.finished:
+                break
+    finally:
+        if next_chunk is not None:
+            next_chunk.cancel()
+    for sse_event in parser.close():
+        yield sse_event
 
 def _build_message(msg_type, speaker, content):
     if msg_type == "dialogue":
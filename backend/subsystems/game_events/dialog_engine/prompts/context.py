@@ -3,7 +3,9 @@ from core_game.narrative.schemas import NarrativeBeatModel
 from core_game.map.domain import Scenario
 from core_game.character.domain import BaseCharacter, NPCCharacter
 from core_game.game_event.schemas import ConversationMessage, PlayerChoiceMessage, NarratorMessage, PlayerThoughtMessage, CharacterActionMessage, CharacterDialogueMessage
+from collections import OrderedDict
 import random
+import threading
 
 def format_nested_dict(data: Dict[str, Any], indent: int = 0) -> List[str]:
     """Pretty-prints a nested dictionary with clean indentation."""
@@ -92,68 +94,117 @@ def get_end_conversation_message(messages: Sequence[ConversationMessage]) -> str
     # Selección ponderada
     return random.choices(candidates, weights=weights, k=1)[0]
 
-def get_formatted_context(event_title: str, event_description: str, source_beat: Optional[NarrativeBeatModel], scenario: Optional[Scenario], characters: Set[BaseCharacter], relations: List[Dict[str, Any]], game_objective: str, refined_prompt: str, messages: Sequence[ConversationMessage]) -> str:
+class _FragmentCache:
+    """
+    Small LRU of rendered prompt fragments. Keys carry the version of what was rendered (a
+    fingerprint of the fields used), so a modified entity just misses and gets rendered again.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[Any, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key: Any, render) -> str:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        rendered = render()
+        with self._lock:
+            self._entries[key] = rendered
+            if len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return rendered
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_fragment_cache = _FragmentCache()
+
+
+def get_fragment_cache() -> _FragmentCache:
+    return _fragment_cache
+
 
-    source_beat_str = ""
-    if source_beat:
-        source_beat_str = source_beat_str = f"""
+def _character_version(character: BaseCharacter) -> int:
+    """
+    Content hash of the character model. It is cached on the model and invalidated when the
+    domain hands the character out to be modified, so a turn doesn't dump every character again.
+    """
+    return character.get_model().content_hash()
+
+
+def get_character_sheet(character: BaseCharacter, indent: int = 0) -> str:
+    """format_nested_dict(character_to_dict(character)) joined in lines, cached per character version."""
+    key = ("character", character.id, _character_version(character), indent)
+    return _fragment_cache.get_or_render(
+        key, lambda: "\n".join(format_nested_dict(character_to_dict(character), indent=indent))
+    )
+
+
+def _render_character_block(character: BaseCharacter) -> str:
+    header = f"\n### Character: Name: {character.identity.full_name} (ID: {character.id}) [Type of character: {character.type}]"
+    return f"{header}\n{get_character_sheet(character, indent=1)}"
+
+
+def _render_source_beat(source_beat: Optional[NarrativeBeatModel]) -> str:
+    if not source_beat:
+        return ""
+    key = ("beat", source_beat.id, source_beat.name, source_beat.description)
+    return _fragment_cache.get_or_render(key, lambda: f"""
         ## Broader Narrative Context:
         This dialogue is a key scene within a larger story unit called a "narrative beat".
 
         - **Beat Name:** "{source_beat.name}"
         - **Beat's description, goal, etc:** {source_beat.description}
-        """
+        """)
+
 
-    scenario_str = ""
-    if scenario:
-        scenario_str = f"""
+def _render_scenario(scenario: Optional[Scenario]) -> str:
+    if not scenario:
+        return ""
+    key = ("scenario", scenario.id, scenario.name, scenario.visual_description, scenario.narrative_context)
+    return _fragment_cache.get_or_render(key, lambda: f"""
         ## Setting:
         This dialogue is taking place in the following location:
 
         - **Scenario Name:** "{scenario.name}"
         - **Visual Description:** {scenario.visual_description}
         - **Narrative Context (Story significance):** {scenario.narrative_context}
-        """
+        """)
 
-    characters_str_list = ["## Characters info:"]
-    sorted_characters = sorted(list(characters), key=lambda c: c.id)
-    character_name_map = {char.id: char.identity.full_name for char in sorted_characters}
-    for char in sorted_characters:
-        char_type_str = char.type
-        characters_str_list.append(f"\n### Character: Name: {char.identity.full_name} (ID: {char.id}) [Type of character: {char_type_str}]")
-        char_data_dict = character_to_dict(char)
-        formatted_lines = format_nested_dict(char_data_dict, indent=1)
-        characters_str_list.extend(formatted_lines)
-    
-    characters_str = "\n".join(characters_str_list)
-
-    relations_str = ""
-    if relations:
-        relations_str_list = ["\n## Character Relationships:"]
-        for rel in relations:
-            line = (
-                f"- {rel['source_id']} -> {rel['type']}, "
-                f"Intensity: {rel['intensity']} -> {rel['target_id']}"
-            )
-            relations_str_list.append(line)
-        relations_str = "\n".join(relations_str_list)
-
-    general_game_context_str = f"""
-    ## General Game Context
-    - **Overall Narrative:** {refined_prompt}
-    - **Player's Main Goal in the game:** {game_objective}
-    """
+
+def _render_relations(relations: List[Dict[str, Any]]) -> str:
+    if not relations:
+        return ""
+    lines = ["\n## Character Relationships:"]
+    for rel in relations:
+        lines.append(
+            f"- {rel['source_id']} -> {rel['type']}, "
+            f"Intensity: {rel['intensity']} -> {rel['target_id']}"
+        )
+    return "\n".join(lines)
 
 
-     # --- Conversation History Formatting ---
+def _render_conversation_history(messages: Sequence[ConversationMessage], character_name_map: Dict[str, str]) -> str:
     conversation_history_str_list = ["\n## Conversation History"]
     if not messages:
         conversation_history_str_list.append("This is the first turn of the conversation.")
     else:
         conversation_history_str_list.append("The last few lines of the conversation were:")
         for msg in messages[-35:]:
-            speaker_name = f"{character_name_map.get(msg.actor_id, "")}  ({msg.actor_id})"
-            
+            speaker_name = f"{character_name_map.get(msg.actor_id, '')}  ({msg.actor_id})"
+
             # Use isinstance for robust type checking
             if isinstance(msg, PlayerChoiceMessage):
                 options_str = "\n".join([f"      - ({opt.type}) {opt.label}" for opt in msg.options])
@@ -168,33 +219,50 @@ def get_formatted_context(event_title: str, event_description: str, source_beat:
                 line = f'Narrator: "{msg.content}"'
             else: # Fallback for any other message types
                 line = f'{speaker_name} ({msg.type}): "{msg.content}"'
-            
+
             conversation_history_str_list.append(f"- {line}")
-    conversation_history_str = "\n".join(conversation_history_str_list)
+    return "\n".join(conversation_history_str_list)
 
 
-    end_conversation_message=get_end_conversation_message(messages)
+def get_formatted_context(event_title: str, event_description: str, source_beat: Optional[NarrativeBeatModel], scenario: Optional[Scenario], characters: Set[BaseCharacter], relations: List[Dict[str, Any]], game_objective: str, refined_prompt: str, messages: Sequence[ConversationMessage]) -> str:
+    """
+    Builds the user prompt of a dialog turn.
 
-    context_prompt = f"""
+    The text is split in a static prefix (game, dialog, setting, characters and relationships),
+    which doesn't change between the turns of a conversation, and a dynamic suffix with the
+    history and the indications to end it. Keeping the prefix byte-identical lets the provider
+    reuse its prompt cache, and the fragments of the prefix are cached per entity version, so
+    they are only rendered again when the entity changes.
+    """
+    sorted_characters = sorted(characters, key=lambda c: c.id)
+    character_name_map = {char.id: char.identity.full_name for char in sorted_characters}
+    characters_str = "\n".join(["## Characters info:"] + [_render_character_block(char) for char in sorted_characters])
+
+    static_prefix = f"""
     #Context available:
 
+    ## General Game Context
+    - **Overall Narrative:** {refined_prompt}
+    - **Player's Main Goal in the game:** {game_objective}
+
     ##Current interaction:
 
     Dialog Title: {event_title}
     Dialog Description: {event_description}
-    {source_beat_str}
-    {scenario_str}
+    {_render_source_beat(source_beat)}
+    {_render_scenario(scenario)}
     {characters_str}
-    {relations_str}
-    {general_game_context_str}
-    
+    {_render_relations(relations)}
+    """
+
+    dynamic_suffix = f"""
     This is the most important information:
-    {conversation_history_str}
+    {_render_conversation_history(messages, character_name_map)}
 
     ##Other rellevant info:
     Number of messages: {len(messages)}, 
-    {end_conversation_message}
+    {get_end_conversation_message(messages)}
     """
     print("Number of messages: ", len(messages))
 
-    return context_prompt
+    return static_prefix + dynamic_suffix
@@ -0,0 +1,98 @@
+"""Async next-speaker decision shared by the conversation turn managers."""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+from typing import List, Optional
+
+from pydantic import ValidationError
+
+from subsystems.game_events.dialog_engine.llm_client import create_chat_completion, DECISION_REQUEST_TIMEOUT
+from subsystems.game_events.dialog_engine.schemas.payloads import TurnDecision
+
+RETRY_BASE_DELAY = 0.5
+
+
+async def call_llm_with_structured_output(prompt: str, participants: List[str], max_retries: int = 2) -> Optional[str]:
+    """
+    Calls the OpenAI API to get a structured JSON response for deciding the next speaker.
+    Includes a retry mechanism for validation and API errors, with async exponential backoff.
+    Never blocks the event loop: if the awaiting task is cancelled (e.g. the SSE client
+    disconnected) the in-flight request is cancelled with it.
+
+    Args:
+        prompt: The fully formatted prompt for the LLM.
+        participants: A list of valid character IDs for the LLM to choose from.
+        max_retries: The number of times to retry if the call fails.
+
+    Returns:
+        The ID of the chosen next speaker, or None if the conversation should end or if all retries fail.
+    """
+
+    # System prompt to instruct the model on the desired output format
+    system_prompt = f"""
+    You are a narrative director for a role-playing game. Your task is to decide which character should speak next to create the most compelling and logical conversation.
+    Use the full context provided in the user prompt—especially to make your decision. For example, a character described as 'talkative' might speak more often, etc. Just make well informed decisions.
+    Based on this context, you must choose one of the following valid character IDs: {', '.join(participants)}.
+    Speakers typically alternate, but this is not mandatory — the same character may speak again if it feels natural in the flow of conversation or supports the narrative.
+
+    Occasionally, to make the drama more interesting, you can choose a less obvious character to speak next, creating an interruption or a surprising turn, as long as it remains coherent with the narrative.
+    
+    To end the conversation, set "next_speaker_id" to null. Only do this if the conversation has reached a logical conclusion, meaning the purpose of the event (as described in its description) has been fulfilled and the last message provides a sense of closure. Do not end the conversation prematurely. HOWEVER IN THE CONTEXT YOU MIGHT RECEIVE INDICATIONS ABOUT FINISHING THE CONVERSATION, YOU MUST OBEY THEM.
+
+    You MUST respond with a JSON object containing two keys:
+    1. "next_speaker_id": A string containing the exact ID of the character you choose, or null to end the conversation.
+    2. "reasoning": A brief explanation for your choice.
+    """
+
+    for attempt in range(max_retries):
+        try:
+            print(f"[LLM] Attempt {attempt + 1}/{max_retries} to decide the next speaker.")
+            
+            response = await create_chat_completion(
+                model="gpt-4.1-mini",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"},
+                timeout=DECISION_REQUEST_TIMEOUT,
+            )
+            
+            response_content = response.choices[0].message.content
+            if not response_content:
+                print(f"[LLM Validation Error] Attempt {attempt + 1}: The model returned an empty response.")
+                continue # Skip to the next retry attempt
+
+            # --- FIX ENDS HERE ---
+            # 1. Parse the JSON string from the response
+            decision_json = json.loads(response_content)
+            
+            # 2. Validate the JSON structure with Pydantic
+            decision = TurnDecision.model_validate(decision_json)
+            
+            # 3. Validate the decision
+            if decision.next_speaker_id is None:
+                print(f"[LLM] Decision successful: End conversation. Reason: {decision.reasoning}")
+                return None # The LLM decided to end the conversation
+            
+            if decision.next_speaker_id in participants:
+                print(f"[LLM] Decision successful: '{decision.next_speaker_id}'. Reason: {decision.reasoning}")
+                return decision.next_speaker_id
+            else:
+                print(f"[LLM Validation Error] Attempt {attempt + 1}: The model chose an invalid participant ('{decision.next_speaker_id}').")
+
+        except json.JSONDecodeError:
+            print(f"[LLM Validation Error] Attempt {attempt + 1}: The model did not return valid JSON.")
+        except ValidationError as e:
+            print(f"[LLM Validation Error] Attempt {attempt + 1}: The model's JSON did not match the required schema. Details: {e}")
+        except Exception as e:
+            print(f"[LLM API Error] Attempt {attempt + 1}: An unexpected error occurred: {e}")
+
+        # Wait a moment before retrying, without blocking other clients
+        if attempt < max_retries - 1:
+            await asyncio.sleep(RETRY_BASE_DELAY * (2 ** attempt) + random.uniform(0, RETRY_BASE_DELAY))
+
+    print("[LLM] All retry attempts failed. Could not decide on a next speaker.")
+    return None
@@ -1,5 +1,7 @@
 from subsystems.generation.schemas.graph_state import GenerationGraphState
 from simulated.singleton import SimulatedGameStateSingleton
+from subsystems.assets.store import get_asset_store
+from subsystems.assets.images import get_image_store
 from subsystems.image_generation.scenarios.create.orchestrator import get_created_scenario_images_generation_app
 from subsystems.image_generation.scenarios.create.schemas import GraphState as ScenarioCreatedImagesGenerationState
 from subsystems.image_generation.characters.create.schemas import GraphState as CharacterCreatedImagesGenerationState
@@ -11,7 +13,6 @@ from versioning.deltas.checkpoints.internal import InternalStateCheckpoint
 
 
 import os
-import base64
 import asyncio
 from dotenv import load_dotenv, find_dotenv
 dotenv_path = find_dotenv()
@@ -33,7 +34,8 @@ def start_generation(state: GenerationGraphState):
 
     checkpoint_id = manager.create_checkpoint(
         checkpoint_type=InternalStateCheckpoint,
-        checkpoint_id="initial_generation_state" # Es buena práctica darle un ID legible
+        checkpoint_id="initial_generation_state", # Es buena práctica darle un ID legible
+        pinned=True # se necesita fins al final de la generació, l'esborren els nodes finalize
     )
 
     if state.generation_progress_tracker is not None:
@@ -240,8 +242,12 @@ def _run_image_generation_subgraphs(
     return final_results
 
 def _save_images(result_data: Dict[str, Any]) -> bool:
-    """Saves the generated images from both scenarios and characters to disk."""
+    """
+    Stores the generated images from both scenarios and characters in the image store and attaches
+    them. Identical images are stored once and the files are written in the background.
+    """
     all_successful = True
+    image_store = get_image_store()
 
     if "scenario_results" in result_data:
         scenario_final_state = ScenarioCreatedImagesGenerationState(**result_data["scenario_results"])
@@ -249,73 +255,43 @@ def _save_images(result_data: Dict[str, Any]) -> bool:
             print(f"  - ERROR: Failed to generate {len(scenario_final_state.failed_scenarios)} scenario image(s).")
             all_successful = False
 
-        output_dir = os.path.join("images", "scenarios")
-        os.makedirs(output_dir, exist_ok=True)
-        print(f"  - Saving {len(scenario_final_state.successful_scenarios)} scenario images to '{output_dir}'...")
+        print(f"  - Storing {len(scenario_final_state.successful_scenarios)} scenario images...")
 
         for scenario_state in scenario_final_state.successful_scenarios:
             if scenario_state.image_base64 is None:
                 print(f"  - WARNING: Missing image data for {scenario_state.scenario.id}.")
                 continue
 
-            base_filename = scenario_state.scenario.id
-            extension = ".png"
-            
-            image_path = os.path.join(output_dir, f"{base_filename}{extension}")
-            counter = 1
-            unique_filename = f"{base_filename}{extension}"
-            # Loop to find unique name
-            while os.path.exists(image_path):
-                counter += 1
-                # Creates new name with suffix, eg: "scenario_001_2.png"
-                unique_filename = f"{base_filename}_{counter}{extension}"
-                image_path = os.path.join(output_dir, unique_filename)
-        
             try:
-                with open(image_path, "wb") as f:
-                    f.write(base64.b64decode(scenario_state.image_base64))
-                print(f"  - Image saved to {image_path}")
+                image_path = image_store.put_base64(scenario_state.image_base64)
+                print(f"  - Image of {scenario_state.scenario.id} stored as {image_path}")
                 assert scenario_state.generation_payload is not None
-                SimulatedGameStateSingleton.get_instance().map.attach_new_image(scenario_state.scenario.id, f"scenarios/{unique_filename}", scenario_state.generation_payload)
+                SimulatedGameStateSingleton.get_instance().map.attach_new_image(scenario_state.scenario.id, image_path, scenario_state.generation_payload)
+                get_asset_store().precompute_variants(image_path)
             except Exception as e:
-                print(f"  -  ERROR saving image to {image_path}: {e}")
+                print(f"  -  ERROR storing image of {scenario_state.scenario.id}: {e}")
 
     if "character_results" in result_data:
         char_final_state = CharacterCreatedImagesGenerationState(**result_data["character_results"])
         if char_final_state.failed_characters:
             print(f"  - ERROR: Failed to generate {len(char_final_state.failed_characters)} character image(s).")
             all_successful = False
-        
-        output_dir = os.path.join("images", "characters")
-        os.makedirs(output_dir, exist_ok=True)
-        print(f"  - Saving {len(char_final_state.successful_characters)} character images to '{output_dir}'...")
+
+        print(f"  - Storing {len(char_final_state.successful_characters)} character images...")
 
         for character_state in char_final_state.successful_characters:
             if character_state.image_base64 is None:
                 print(f"  - WARNING: Missing image data for {character_state.character.id}.")
                 continue
 
-            base_filename = character_state.character.id
-            extension = ".png"
-            
-            image_path = os.path.join(output_dir, f"{base_filename}{extension}")
-            counter = 1
-            unique_filename = base_filename
-            # Loop to find unique name
-            while os.path.exists(image_path):
-                counter += 1
-                # Creates new name with suffix, eg: "character_001_2.png"
-                unique_filename = f"{base_filename}_{counter}{extension}"
-                image_path = os.path.join(output_dir, unique_filename)
-        
             try:
-                with open(image_path, "wb") as f:
-                    f.write(base64.b64decode(character_state.image_base64))
-                print(f"  - Image saved to {image_path}")
+                image_path = image_store.put_base64(character_state.image_base64)
+                print(f"  - Image of {character_state.character.id} stored as {image_path}")
                 assert character_state.generated_image_prompt is not None
-                SimulatedGameStateSingleton.get_instance().characters.attach_new_image(character_state.character.id, f"characters/{unique_filename}", character_state.generated_image_prompt)
+                SimulatedGameStateSingleton.get_instance().characters.attach_new_image(character_state.character.id, image_path, character_state.generated_image_prompt)
+                get_asset_store().precompute_variants(image_path)
             except Exception as e:
-                print(f"  -  ERROR saving image to {image_path}: {e}")
+                print(f"  -  ERROR storing image of {character_state.character.id}: {e}")
 
     return all_successful
 
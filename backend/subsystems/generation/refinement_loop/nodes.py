@@ -1,7 +1,16 @@
-from subsystems.generation.refinement_loop.schemas.graph_state import RefinementLoopGraphState
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Type
+from pydantic import BaseModel
+from subsystems.generation.refinement_loop.schemas.graph_state import RefinementLoopGraphState, RefinementStepResult
+from subsystems.generation.refinement_loop.schemas.pipeline_config import PipelineStep
+from subsystems.generation.refinement_loop.constants import AgentName
 from subsystems.generation.refinement_loop.utils.format_refinement_logs import format_window
+from subsystems.summarize_agent_logs.orchestrator import get_summarize_graph_app
 from simulated.singleton import SimulatedGameStateSingleton
+from versioning.layers.manager import TransactionConflictError
 from subsystems.agents.utils.logs import ToolLog, ClearLogs
+from subsystems.agents.utils.schemas import AgentLog
+from utils.progress_tracker import ProgressTracker
 def start_refinement_loop(state: RefinementLoopGraphState):
     """
     First node of the graph.
@@ -16,45 +25,115 @@ def start_refinement_loop(state: RefinementLoopGraphState):
 
 def prepare_next_step(state: RefinementLoopGraphState):
     """
-    Node that prepares for the next step. This node is executed after every step
+    Node that picks the next batch of steps. This node is executed after every batch.
+    Every pending step whose dependencies are completed joins the batch, and each one gets
+    its own transaction branch so they can run concurrently. A step that conflicted with a
+    concurrent one is run again alone.
     """
     print("---ENTERING: PREPARE NEXT STEP---")
-    
-    if state.refinement_current_pass+1 < len(state.refinement_pipeline_config.steps):
-        agentName = state.refinement_pipeline_config.steps[state.refinement_current_pass+1].agent_name
-    else:
-        agentName = state.current_agent_name
+    config = state.refinement_pipeline_config
+
+    completed = {r.step_index for r in state.refinement_step_results if not r.conflicted}
+    conflicted = {r.step_index for r in state.refinement_step_results if r.conflicted} - completed
+    batch = config.ready_steps(completed)
+    rerun = [index for index in batch if index in conflicted]
+    if rerun:
+        batch = rerun[:1]
+
+    active_steps = {}
+    for index in batch:
+        agent_name = config.steps[index].agent_name
+        SimulatedGameStateSingleton.begin_branch(_branch_name(agent_name))
+        active_steps[agent_name] = index
+    if len(batch) > 1:
+        print(f"Running steps {batch} concurrently")
 
     return {
-        "refinement_current_pass": state.refinement_current_pass+1,
-        "current_agent_name": agentName,
+        "refinement_current_pass": len(completed),
+        "refinement_active_steps": active_steps,
     }
 
-def add_agent_log_to_changelog(state: RefinementLoopGraphState):
+
+def _branch_name(agent_name: AgentName) -> str:
+    return f"refinement:{agent_name.value}"
+
+
+def _prepare_step(state: RefinementLoopGraphState, agent_name: AgentName) -> Tuple[PipelineStep, str, Optional[ProgressTracker]]:
+    """Returns the step the agent runs in this batch, the recent operations log and its progress tracker."""
+    index = state.refinement_active_steps[agent_name]
+    current_step = state.refinement_pipeline_config.steps[index]
+    applied_operations_log = "Old operations summary: " + state.changelog_old_operations_summary + "Most recent operations:" + format_window(6, state.refinement_pass_changelog)
+
+    tracker = None
+    if state.refinement_progress_tracker is not None:
+        total_steps = len(state.refinement_pipeline_config.steps)
+        # Concurrent steps report on consecutive slices of the progress bar
+        slot = sorted(state.refinement_active_steps.values()).index(index)
+        state.refinement_progress_tracker.update(state.refinement_current_pass/total_steps, f"Step {index+1} of {total_steps}: {current_step.agent_name} agent")
+        tracker = state.refinement_progress_tracker.subtracker(1/total_steps, start=(state.refinement_current_pass+slot)/total_steps)
+    return current_step, applied_operations_log, tracker
+
+
+def agent_step_node(agent_name: AgentName, agent_app: Any, agent_state: Type[BaseModel], prefix: str) -> Callable:
     """
-    Adds the summarized log to the changelog
+    Wraps an agent graph so it runs inside the transaction branch of its step.
+    Only the agent's own fields (`prefix`) are returned, the shared ones would clash when
+    several agents finish in the same batch.
     """
+    fields = list(agent_state.model_fields)
+
+    def run_agent(state: RefinementLoopGraphState, config):
+        agent_input = {field: getattr(state, field) for field in fields}
+        try:
+            with SimulatedGameStateSingleton.use_branch(_branch_name(agent_name)):
+                result = agent_app.invoke(agent_input, config)
+        except Exception:
+            SimulatedGameStateSingleton.rollback_branch(_branch_name(agent_name))
+            raise
+        return {key: value for key, value in result.items() if key.startswith(prefix)}
+
+    return run_agent
+
+
+@lru_cache(maxsize=1)
+def _summarize_app():
+    return get_summarize_graph_app()
+
+
+def _finish_step(state: RefinementLoopGraphState, agent_name: AgentName, operations_log: Sequence[ToolLog], succeeded: bool) -> Dict[str, Any]:
+    """Commits (or discards) the branch of the step, and summarizes its operations for the changelog."""
+    index = state.refinement_active_steps[agent_name]
+    result = RefinementStepResult(step_index=index, agent_name=agent_name, operations_log=list(operations_log))
+
+    if not succeeded:
+        SimulatedGameStateSingleton.rollback_branch(_branch_name(agent_name))
+        return {"refinement_step_results": [result]}
+
+    try:
+        SimulatedGameStateSingleton.commit_branch(_branch_name(agent_name))
+    except TransactionConflictError as e:
+        print(f"Step {index} conflicted, it will run again: {e}")
+        result.conflicted = True
+        return {"refinement_step_results": [result]}
+
+    result.succeeded = True
+    summary = _summarize_app().invoke({
+        "operations_log_to_summarize": result.operations_log,
+        "current_agent_name": agent_name,
+    })["sumarized_operations_result"]
     #AQUI S'HAURIA DE FER EL RESUM DE LES OPERACIONS MES VELLES EN CAS QUE CALGUI
-
     return {
-        "refinement_pass_changelog": [state.sumarized_operations_result]
+        "refinement_step_results": [result],
+        "refinement_pass_changelog": [summary],
     }
 
 def map_step_start(state: RefinementLoopGraphState):
     """
     Sets up the state for the pass to refine the map
     """
-
-    applied_operations_log = "Old operations summary: " + state.changelog_old_operations_summary + "Most recent operations:" + format_window(6,state.refinement_pass_changelog)
+    current_step, applied_operations_log, map_tracker = _prepare_step(state, AgentName.MAP)
     relevant_entities_str = "" # AQUI S'HAURIA DE INJECTAR INFORMACIO D'ENTITATS QUE PUGUIN SER UTILS, FENT RAG A PARTIR DE LES ULTIMES OPERACIONS I TENINT EN COMPTE QUE LI POT INTERESSAR A AQUEST AGENT I DE QUI ERA CADA OPERACIO
     additional_info_str = ""
-    current_step=state.refinement_pipeline_config.steps[state.refinement_current_pass]
-    
-    if state.refinement_progress_tracker is not None:
-        state.refinement_progress_tracker.update(state.refinement_current_pass/len(state.refinement_pipeline_config.steps), f"Step {state.refinement_current_pass+1} of {len(state.refinement_pipeline_config.steps)}: {current_step.agent_name} agent")
-        map_tracker = state.refinement_progress_tracker.subtracker(1/len(state.refinement_pipeline_config.steps))
-    else:
-        map_tracker = None
 
     return {
         "map_foundational_lore_document": state.refinement_foundational_world_info,
@@ -76,25 +155,15 @@ def map_step_finish(state: RefinementLoopGraphState):
     """
     Postprocesses the finished map step.
     """
-    return {
-        "operations_log_to_summarize": state.map_executor_applied_operations_log,
-        "last_step_succeeded": state.map_task_succeeded_final,
-    }
+    return _finish_step(state, AgentName.MAP, state.map_executor_applied_operations_log, state.map_task_succeeded_final)
 
 def characters_step_start(state: RefinementLoopGraphState):
     """
     Sets up the state for the pass to refine the map
     """
-    applied_operations_log = "Old operations summary: " + state.changelog_old_operations_summary + "Most recent operations:" + format_window(6,state.refinement_pass_changelog)
+    current_step, applied_operations_log, characters_tracker = _prepare_step(state, AgentName.CHARACTERS)
     relevant_entities_str = ""
     additional_info_str = ""
-    current_step=state.refinement_pipeline_config.steps[state.refinement_current_pass]
-
-    if state.refinement_progress_tracker is not None:
-        state.refinement_progress_tracker.update(state.refinement_current_pass/len(state.refinement_pipeline_config.steps), f"Step {state.refinement_current_pass+1} of {len(state.refinement_pipeline_config.steps)}: {current_step.agent_name} agent")
-        characters_tracker = state.refinement_progress_tracker.subtracker(1/len(state.refinement_pipeline_config.steps))
-    else:
-        characters_tracker = None
 
     return {
         "characters_foundational_lore_document": state.refinement_foundational_world_info,
@@ -116,24 +185,13 @@ def characters_step_finish(state: RefinementLoopGraphState):
     """
     Postprocesses the finished map step.
     """
-    return {
-        "operations_log_to_summarize": state.characters_executor_applied_operations_log,
-        "last_step_succeeded": state.characters_task_succeeded_final
-    }
+    return _finish_step(state, AgentName.CHARACTERS, state.characters_executor_applied_operations_log, state.characters_task_succeeded_final)
 
 def relationship_step_start(state: RefinementLoopGraphState):
     """Sets up the state for the pass to refine the relationships"""
-
-    applied_operations_log = "Old operations summary: " + state.changelog_old_operations_summary + "Most recent operations:" + format_window(6, state.refinement_pass_changelog)
+    current_step, applied_operations_log, relationships_tracker = _prepare_step(state, AgentName.RELATIONSHIP)
     relevant_entities_str = ""
     additional_info_str = ""
-    current_step = state.refinement_pipeline_config.steps[state.refinement_current_pass]
-
-    if state.refinement_progress_tracker is not None:
-        state.refinement_progress_tracker.update(state.refinement_current_pass/len(state.refinement_pipeline_config.steps), f"Step {state.refinement_current_pass+1} of {len(state.refinement_pipeline_config.steps)}: {current_step.agent_name} agent")
-        relationships_tracker = state.refinement_progress_tracker.subtracker(1/len(state.refinement_pipeline_config.steps))
-    else:
-        relationships_tracker = None
 
     return {
         "relationships_foundational_lore_document": state.refinement_foundational_world_info,
@@ -153,24 +211,13 @@ def relationship_step_start(state: RefinementLoopGraphState):
 
 def relationship_step_finish(state: RefinementLoopGraphState):
     """Postprocesses the finished relationship step."""
-    return {
-        "operations_log_to_summarize": state.relationships_executor_applied_operations_log,
-        "last_step_succeeded": state.relationships_task_succeeded_final,
-    }
+    return _finish_step(state, AgentName.RELATIONSHIP, state.relationships_executor_applied_operations_log, state.relationships_task_succeeded_final)
 
 def narrative_step_start(state: RefinementLoopGraphState):
     """Sets up the state for the pass to refine the narrative"""
-
-    applied_operations_log = "Old operations summary: " + state.changelog_old_operations_summary + "Most recent operations:" + format_window(6, state.refinement_pass_changelog)
+    current_step, applied_operations_log, narrative_tracker = _prepare_step(state, AgentName.NARRATIVE)
     relevant_entities_str = ""
     additional_info_str = ""
-    current_step = state.refinement_pipeline_config.steps[state.refinement_current_pass]
-
-    if state.refinement_progress_tracker is not None:
-        state.refinement_progress_tracker.update(state.refinement_current_pass/len(state.refinement_pipeline_config.steps), f"Step {state.refinement_current_pass+1} of {len(state.refinement_pipeline_config.steps)}: {current_step.agent_name} agent")
-        narrative_tracker = state.refinement_progress_tracker.subtracker(1/len(state.refinement_pipeline_config.steps))
-    else:
-        narrative_tracker = None
 
     return {
         "narrative_foundational_lore_document": state.refinement_foundational_world_info,
@@ -190,24 +237,13 @@ def narrative_step_start(state: RefinementLoopGraphState):
 
 def narrative_step_finish(state: RefinementLoopGraphState):
     """Postprocesses the finished narrative step."""
-    return {
-        "operations_log_to_summarize": state.narrative_executor_applied_operations_log,
-        "last_step_succeeded": state.narrative_task_succeeded_final,
-    }
+    return _finish_step(state, AgentName.NARRATIVE, state.narrative_executor_applied_operations_log, state.narrative_task_succeeded_final)
 
 def events_step_start(state: RefinementLoopGraphState):
     """Sets up the state for the pass to refine the game events"""
-
-    applied_operations_log = "Old operations summary: " + state.changelog_old_operations_summary + "Most recent operations:" + format_window(6, state.refinement_pass_changelog)
+    current_step, applied_operations_log, events_tracker = _prepare_step(state, AgentName.EVENTS)
     relevant_entities_str = ""
     additional_info_str = ""
-    current_step = state.refinement_pipeline_config.steps[state.refinement_current_pass]
-
-    if state.refinement_progress_tracker is not None:
-        state.refinement_progress_tracker.update(state.refinement_current_pass/len(state.refinement_pipeline_config.steps), f"Step {state.refinement_current_pass+1} of {len(state.refinement_pipeline_config.steps)}: {current_step.agent_name} agent")
-        events_tracker = state.refinement_progress_tracker.subtracker(1/len(state.refinement_pipeline_config.steps))
-    else:
-        events_tracker = None
 
     return {
         "events_foundational_lore_document": state.refinement_foundational_world_info,
@@ -227,19 +263,7 @@ def events_step_start(state: RefinementLoopGraphState):
 
 def events_step_finish(state: RefinementLoopGraphState):
     """Postprocesses the finished events step."""
-    return {
-        "operations_log_to_summarize": state.events_executor_applied_operations_log,
-        "last_step_succeeded": state.events_task_succeeded_final,
-    }
-
-
-def finalize_step(state: RefinementLoopGraphState):
-    """
-    Aux node after any component finished
-    """
-    return {
-        
-    }
+    return _finish_step(state, AgentName.EVENTS, state.events_executor_applied_operations_log, state.events_task_succeeded_final)
 
 def finalize_refinement_loop(state: RefinementLoopGraphState):
     """
@@ -128,6 +128,7 @@ def slow_test_pipeline() -> PipelineConfig:
                 max_validation_iterations=1,
                 max_retries=1,
                 weight=0.25,
+                depends_on=[0, 1], # Doesn't need the relationships, runs next to them
             ),
             PipelineStep(
                 step_name="Map Generation",
@@ -139,6 +140,7 @@ def slow_test_pipeline() -> PipelineConfig:
                 max_validation_iterations=1,
                 max_retries=1,
                 weight=0.25,
+                depends_on=[0, 1], # Builds on the map and characters only and none of steps 2-3 writes the map, runs next to them
             ),
             PipelineStep(
                 step_name="Add Characters",
@@ -320,6 +322,7 @@ def map_characters_relationships_narrative_pipeline() -> PipelineConfig:
                 max_validation_iterations=1,
                 max_retries=1,
                 weight=0.25,
+                depends_on=[0, 1], # Doesn't need the relationships, runs next to them
             ),
         ],
     )
@@ -374,6 +377,7 @@ def map_characters_relationships_narrative_events_pipeline() -> PipelineConfig:
                 max_validation_iterations=1,
                 max_retries=1,
                 weight=0.2,
+                depends_on=[0, 1], # Doesn't need the relationships, runs next to them
             ),
             PipelineStep(
                 step_name="Create Game Events",
@@ -1,18 +1,28 @@
 import operator
-from typing import Sequence, List, Optional
+from typing import Dict, Sequence, List, Optional
 from typing_extensions import Annotated
 
-from pydantic import PrivateAttr, Field
+from pydantic import BaseModel, PrivateAttr, Field
 from subsystems.generation.refinement_loop.schemas.pipeline_config import PipelineConfig
 from subsystems.agents.character_handler.schemas.graph_state import CharacterGraphState
 from subsystems.agents.map_handler.schemas.graph_state import MapGraphState
 from subsystems.agents.relationship_handler.schemas.graph_state import RelationshipGraphState
 from subsystems.agents.narrative_handler.schemas.graph_state import NarrativeGraphState
 from subsystems.agents.game_event_handler.schemas.graph_state import GameEventGraphState
-from subsystems.summarize_agent_logs.schemas.graph_state import SummarizeLogsGraphState
-from subsystems.agents.utils.schemas import AgentLog
+from subsystems.agents.utils.schemas import AgentLog, ToolLog
+from subsystems.generation.refinement_loop.constants import AgentName
 from utils.progress_tracker import ProgressTracker
-class RefinementLoopGraphState(CharacterGraphState, MapGraphState, RelationshipGraphState, NarrativeGraphState, GameEventGraphState, SummarizeLogsGraphState):
+
+class RefinementStepResult(BaseModel):
+    """Outcome of one pipeline step."""
+    step_index: int = Field(..., description="Index of the step in the pipeline config")
+    agent_name: AgentName = Field(..., description="Agent that ran the step")
+    succeeded: bool = Field(default=False, description="Whether the agent succeeded and its changes were committed")
+    conflicted: bool = Field(default=False, description="Whether its changes were discarded because a concurrent step changed the same components. The step is run again.")
+    operations_log: Sequence[ToolLog] = Field(default_factory=list, description="Operations applied by the executor agent")
+
+
+class RefinementLoopGraphState(CharacterGraphState, MapGraphState, RelationshipGraphState, NarrativeGraphState, GameEventGraphState):
     """
     Manages the state of the iterative N-pass enrichment loop.
     """
@@ -24,12 +34,20 @@ class RefinementLoopGraphState(CharacterGraphState, MapGraphState, RelationshipG
 
     refinement_current_pass: int = Field(
         default=0,
-        description="A counter for the current enrichment pass. It starts at 0 and should be incremented by the graph's control logic before starting a new loop."
+        description="Number of pipeline steps already completed. Used for progress."
     )
 
-    changelog_old_operations_summary: str = Field(default="", description="Old operations that are out of the window summarized")
+    refinement_active_steps: Dict[AgentName, int] = Field(
+        default_factory=dict,
+        description="Steps running concurrently in the current batch, by agent. An agent runs one step at a time."
+    )
 
-    last_step_succeeded: bool = Field(default=False, description="Whether the las step succeeded")
+    refinement_step_results: Annotated[List[RefinementStepResult], operator.add] = Field(
+        default_factory=list,
+        description="Results of every step run so far, appended by each step (several can finish together)."
+    )
+
+    changelog_old_operations_summary: str = Field(default="", description="Old operations that are out of the window summarized")
 
     refinement_foundational_world_info: str = Field(default="", description="Foundational info about the world that will be passed to the agents")
 
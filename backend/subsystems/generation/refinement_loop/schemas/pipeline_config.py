@@ -1,5 +1,5 @@
-from typing import List
-from pydantic import BaseModel, Field
+from typing import Iterable, List, Optional
+from pydantic import BaseModel, Field, model_validator
 from subsystems.generation.refinement_loop.constants import AgentName
 class PipelineStep(BaseModel):
     """Represents a single step in the generation pipeline."""
@@ -13,10 +13,39 @@ class PipelineStep(BaseModel):
     max_validation_iterations: int = Field(..., description="Max iterations to validate the result")
     max_retries: int = Field(..., description="Max retries for the agent to achieve its task")
     weight: float = Field(..., description="Weight of the step in the overall pipeline, used for progress compute.")
+    depends_on: Optional[List[int]] = Field(default=None, description="Indexes of the earlier steps whose results this step needs. None means all the previous steps, so the step runs strictly after them. Steps whose dependencies are done run concurrently.")
 
 class PipelineConfig(BaseModel):
     """Defines a complete configuration for a generation pipeline."""
 
     name: str = Field(..., description="The unique name of the pipeline, e.g., 'FastPrototype_v1'.")
     description: str = Field(..., description="A brief explanation of what this pipeline does and its intended use.")
-    steps: List[PipelineStep] = Field(..., description="The ordered list of PipelineStep objects that define the sequence of operations for this pipeline.")
\ No newline at end of file
+    steps: List[PipelineStep] = Field(..., description="The ordered list of PipelineStep objects that define the sequence of operations for this pipeline.")
+
+    @model_validator(mode="after")
+    def _check_dependencies(self) -> "PipelineConfig":
+        for index, step in enumerate(self.steps):
+            for dependency in step.depends_on or []:
+                if not 0 <= dependency < index:
+                    raise ValueError(f"Step {index} ('{step.step_name}') can only depend on earlier steps, got {dependency}.")
+        return self
+
+    def dependencies_of(self, index: int) -> List[int]:
+        step = self.steps[index]
+        return list(range(index)) if step.depends_on is None else list(step.depends_on)
+
+    def ready_steps(self, completed: Iterable[int]) -> List[int]:
+        """
+        Indexes of the pending steps whose dependencies are all completed, in pipeline order.
+        Only the first pending step of each agent is returned: an agent works on one step at a time.
+        """
+        completed = set(completed)
+        ready: List[int] = []
+        agents_seen = set()
+        for index, step in enumerate(self.steps):
+            if index in completed:
+                continue
+            if step.agent_name not in agents_seen and all(d in completed for d in self.dependencies_of(index)):
+                ready.append(index)
+            agents_seen.add(step.agent_name)
+        return ready
@@ -2,7 +2,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from typing import cast
-from langchain_openai import ChatOpenAI
+from utils.llm_models import get_chat_model
 from langgraph.prebuilt import ToolNode
 from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
 from subsystems.generation.seed.prompts.refine_generation_prompt import format_refining_prompt
@@ -67,7 +67,7 @@ def refine_generation_prompt(state: SeedGenerationGraphState):
         Returns (is_valid, message)
         Now also checks that the refined prompt is a true refinement of the original prompt.
         """
-        validator_llm = ChatOpenAI(model="gpt-4.1-nano")
+        validator_llm = get_chat_model("gpt-4.1-nano")
         system = SystemMessagePromptTemplate.from_template(
             """
             You are a narrative design assistant. Your job is to validate a narrative seed for creativity, coherence, and richness, and to ensure it is a true refinement of the original user prompt. 
@@ -97,7 +97,7 @@ def refine_generation_prompt(state: SeedGenerationGraphState):
         except Exception as e:
             return False, f"Validator LLM failed to return structured output: {str(e)}"
 
-    refining_llm = ChatOpenAI(model="gpt-4.1")
+    refining_llm = get_chat_model("gpt-4.1")
 
     full_prompt = format_refining_prompt(
         initial_user_prompt=state.initial_prompt,
@@ -158,7 +158,7 @@ def generate_main_goal(state: SeedGenerationGraphState):
         reason: str = Field(..., description="If not valid, a short reason why.")
 
     def validate_main_goal_with_llm_structured(main_goal: str, refined_prompt: str) -> tuple[bool, str]:
-        validator_llm = ChatOpenAI(model="gpt-4.1-nano")
+        validator_llm = get_chat_model("gpt-4.1-nano")
         system = SystemMessagePromptTemplate.from_template(
             """
             You are a narrative design assistant. Validate the proposed main goal for a narrative game.
@@ -186,7 +186,7 @@ def generate_main_goal(state: SeedGenerationGraphState):
             return False, f"Validator LLM failed to return structured output: {str(e)}"
 
     try:
-        generate_main_goal_llm = ChatOpenAI(model="o4-mini")
+        generate_main_goal_llm = get_chat_model("o4-mini")
         generate_main_goal_llm_structured_output = generate_main_goal_llm.with_structured_output(MainGoal)
 
         full_prompt = format_main_goal_generation_prompt(
@@ -238,7 +238,7 @@ def narrative_structure_reason_node(state: SeedGenerationGraphState):
     else:
         tools_availale = [select_narrative_structure]
 
-    llm = ChatOpenAI(model="gpt-4.1-mini").bind_tools(tools_availale, tool_choice="any")
+    llm = get_chat_model("gpt-4.1-mini").bind_tools(tools_availale, tool_choice="any")
 
     names = ", ".join([f"id: {s.id} name: {s.name}\n" for s in AVAILABLE_NARRATIVE_STRUCTURES])
     prompt = format_structure_selection_prompt(
@@ -1,22 +1,31 @@
-from langchain_openai import ChatOpenAI
+from utils.llm_models import get_chat_model, get_async_openai_client
+from utils.llm_scheduler import Priority, get_llm_scheduler
 from subsystems.image_generation.characters.create.character_processor.schemas import CharacterProcessorState
 from subsystems.image_generation.characters.create.character_processor.prompts import format_prompt
 from subsystems.image_processing.character_facing_classifier.executor import FacingDirectionClassifier
-from openai import AsyncOpenAI, OpenAIError, RateLimitError
+from openai import OpenAIError, RateLimitError
 from langchain_core.messages import HumanMessage, SystemMessage
-import asyncio
 import base64
 from PIL import Image, ImageOps, ImageFilter
 import io
 from typing import cast
-image_gen_client = AsyncOpenAI()
+IMAGE_MODEL = "gpt-image-1"
+# Images are slow and rate limited per minute: retries wait on the scheduler, not here
+IMAGE_MAX_RETRIES = 6
 
-llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0.7)
+llm = get_chat_model("gpt-4.1-mini", priority=Priority.BACKGROUND, temperature=0.7)
 
 
-direction_classifier = FacingDirectionClassifier(
-    model_path="models/facing_direction_classifier_v1.keras"
-)
+_direction_classifier: FacingDirectionClassifier | None = None
+
+def get_direction_classifier() -> FacingDirectionClassifier:
+    """Creates the classifier on first use; the model itself loads on the first prediction."""
+    global _direction_classifier
+    if _direction_classifier is None:
+        _direction_classifier = FacingDirectionClassifier(
+            model_path="models/facing_direction_classifier_v1.keras"
+        )
+    return _direction_classifier
 
 async def generate_prompt_for_character(state: CharacterProcessorState) -> dict:
     """Generate the prompt using the LLM."""
@@ -98,15 +107,21 @@ async def _generate_with_reference(prompt: str) -> dict:
     """
     reference_image_path = "images/references/character_silhouette.png"
     with open(reference_image_path, "rb") as reference_image_file:
-        response = await image_gen_client.images.edit(
-            model="gpt-image-1",
-            image=reference_image_file,
+        reference_image = reference_image_file.read()
+    response = await get_llm_scheduler().run_async(
+        IMAGE_MODEL,
+        lambda: get_async_openai_client().images.edit(
+            model=IMAGE_MODEL,
+            image=("character_silhouette.png", reference_image, "image/png"),
             prompt=prompt,
             size="1024x1536",
             quality="low",
             n=1,
             background="transparent"
-        )
+        ),
+        priority=Priority.BACKGROUND,
+        max_retries=IMAGE_MAX_RETRIES,
+    )
     return _extract_image_response(response)
 
 
@@ -114,13 +129,18 @@ async def _generate_without_reference(prompt: str) -> dict:
     """
     Call the API using only text (no image).
     """
-    response = await image_gen_client.images.generate(
-        model="gpt-image-1",
-        prompt=prompt,
-        size="1024x1536",
-        quality="low",
-        n=1,
-        background="transparent"
+    response = await get_llm_scheduler().run_async(
+        IMAGE_MODEL,
+        lambda: get_async_openai_client().images.generate(
+            model=IMAGE_MODEL,
+            prompt=prompt,
+            size="1024x1536",
+            quality="low",
+            n=1,
+            background="transparent"
+        ),
+        priority=Priority.BACKGROUND,
+        max_retries=IMAGE_MAX_RETRIES,
     )
     return _extract_image_response(response)
 
@@ -139,45 +159,20 @@ def _extract_image_response(response) -> dict:
 
 async def generate_image_from_prompt(state: CharacterProcessorState) -> dict:
     """
-    A robust wrapper node that calls the image generation function
-    and implements a manual retry logic based on the API's feedback.
+    Node that calls the image generation function. Rate limits are retried by the shared
+    LLM scheduler (which pauses every image request while the API asks to wait).
     """
-    max_retries = 7
-    # Default wait time if the API doesn't specify one.
-    DEFAULT_RETRY_AFTER = 30  # seconds
-
-    for attempt in range(max_retries):
-        try:
-            # Call the internal function that makes the actual API request
-            result = await _generate_image_call(state)
-            
-            # If there was a non-API error (e.g., file not found), return it
-            if result.get("error"):
-                return result
-            
-            # If successful, return the result immediately
-            return result
-
-        except RateLimitError as e:
-            if attempt < max_retries - 1:
-                # Use the 'retry_after' value from the API if available, otherwise use our default.
-                # The 'body' attribute in the modern library holds details like this.
-                retry_time = e.body.get('retry_after', DEFAULT_RETRY_AFTER) if isinstance(e.body, dict) else DEFAULT_RETRY_AFTER
-                
-                print(f"  - ⚠️ Rate limit hit on attempt {attempt + 1}/{max_retries}. API suggests waiting {retry_time} seconds. Retrying...")
-                await asyncio.sleep(retry_time)
-            else:
-                # If all retries fail, return a final error
-                error_msg = f"Failed after {max_retries} attempts due to rate limiting."
-                print(f"  - ❌ {error_msg}")
-                return {"error": error_msg}
-        except OpenAIError as e:
-            # Handle other potential OpenAI API errors
-            error_msg = f"An OpenAI API error occurred: {e}"
-            print(f"  - ❌ {error_msg}")
-            return {"error": error_msg}
-
-    return {"error": "Exceeded maximum retry attempts."}
+    try:
+        return await _generate_image_call(state)
+    except RateLimitError:
+        error_msg = f"Failed after {IMAGE_MAX_RETRIES + 1} attempts due to rate limiting."
+        print(f"  - ❌ {error_msg}")
+        return {"error": error_msg}
+    except OpenAIError as e:
+        # Handle other potential OpenAI API errors
+        error_msg = f"An OpenAI API error occurred: {e}"
+        print(f"  - ❌ {error_msg}")
+        return {"error": error_msg}
     
 def _crop_to_alpha_bbox(base64_image_str:str, threshold: int = 10) -> str:
     """
@@ -251,12 +246,11 @@ async def posprocess_generated_image(state: CharacterProcessorState) -> dict:
     try:
         image_cropped_b64 = _crop_to_alpha_bbox(state.image_base64)
 
-        # Decodifica imagen base64 a PIL.Image
+        # The classifier decodes the image bytes itself, in its worker thread
         image_data = base64.b64decode(image_cropped_b64)
-        pil_image = Image.open(io.BytesIO(image_data)).convert("RGBA")
 
         print("  - Analyzing image to determine facing direction using local CNN...")
-        facing_direction = await direction_classifier.predict(pil_image)
+        facing_direction = await get_direction_classifier().predict(image_data)
         print(f"  - Character is facing: {facing_direction}")
 
         final_image_b64 = image_cropped_b64
@@ -1,4 +1,5 @@
-from langchain_openai import ChatOpenAI
+from utils.llm_models import get_chat_model
+from utils.llm_scheduler import Priority
 from subsystems.image_generation.scenarios.create.scenario_processor.schemas import LlmGeneratedPayload, ScenarioProcessorState
 from core_game.map.schemas import ScenarioImageGenerationTemplate
 from subsystems.image_generation.scenarios.create.scenario_processor.prompts import format_prompt
@@ -6,7 +7,7 @@ from typing import cast
 import httpx
 
 # --- LLM Setup ---
-llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0.7)
+llm = get_chat_model("gpt-4.1-mini", priority=Priority.BACKGROUND, temperature=0.7)
 structured_llm = llm.with_structured_output(LlmGeneratedPayload)
 
 # --- Graph Nodes ---
@@ -1,71 +1,137 @@
 import asyncio
+import io
 import os
-import shutil
-import uuid
+import threading
 from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Literal, Optional, Tuple, Union
 
-import keras
 import numpy as np
 from PIL import Image
 
+ImageInput = Union[Image.Image, bytes]
+Backend = Literal["auto", "keras", "onnx"]
+
+
+def _resize_bilinear(image: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    """
+    Bilinear resize with half pixel centers and no antialiasing, the same as the
+    tf.image.resize used by image_dataset_from_directory when the model was trained.
+    (PIL's bilinear filter antialiases when downscaling, so it would not match.)
+    """
+    out_h, out_w = size
+    in_h, in_w = image.shape[:2]
+
+    def _axis(out_len: int, in_len: int):
+        coords = (np.arange(out_len, dtype=np.float32) + 0.5) * (in_len / out_len) - 0.5
+        coords = np.clip(coords, 0, in_len - 1)
+        low = np.floor(coords).astype(np.int64)
+        high = np.minimum(low + 1, in_len - 1)
+        return low, high, coords - low
+
+    y0, y1, wy = _axis(out_h, in_h)
+    x0, x1, wx = _axis(out_w, in_w)
+    wy = wy[:, None, None]
+    wx = wx[None, :, None]
+
+    top = image[y0][:, x0] * (1 - wx) + image[y0][:, x1] * wx
+    bottom = image[y1][:, x0] * (1 - wx) + image[y1][:, x1] * wx
+    return top * (1 - wy) + bottom * wy
+
+
+def preprocess_image(image: ImageInput, img_size: Tuple[int, int]) -> np.ndarray:
+    """Decodes an image (PIL or encoded bytes) into a float32 RGBA tensor of shape (height, width, 4), values 0-255."""
+    if isinstance(image, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(image))
+    pixels = np.asarray(image.convert("RGBA"), dtype=np.float32)
+    return _resize_bilinear(pixels, img_size).astype(np.float32)
+
+
+def export_to_onnx(model_path: str, onnx_path: str) -> str:
+    """Exports the Keras model to ONNX (needs tf2onnx installed). Returns the ONNX path."""
+    import keras
+    model = keras.models.load_model(model_path)  # type: ignore
+    model.export(onnx_path, format="onnx")  # type: ignore
+    return onnx_path
+
+
 class FacingDirectionClassifier:
-    def __init__(self, model_path: str, img_size=(220, 300), max_batch_size=32, wait_time_ms=100):
-        # --- Configuración del Modelo y Rutas ---
-        self.model = keras.models.load_model(model_path) # type: ignore
-        self.img_size = img_size
-        
-        self.temp_dir = os.path.join("images", "temp_predict")
-        self.predict_dir = os.path.join(self.temp_dir, "predict_images")
+    """
+    Micro-batched facing direction classifier. Concurrent `predict` calls are grouped into
+    batches that are decoded, resized and run fully in memory on a single worker thread.
+
+    The model is loaded on the first prediction, not on construction. With backend "onnx",
+    or "auto" when `onnx_model_path` exists and onnxruntime is installed, inference runs on
+    ONNX Runtime instead of Keras (see `export_to_onnx`).
+    """
 
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
-        os.makedirs(self.predict_dir)
+    def __init__(self, model_path: str, img_size=(220, 300), max_batch_size=32, wait_time_ms=100,
+                 onnx_model_path: Optional[str] = None, backend: Backend = "auto"):
+        # --- Configuración del Modelo ---
+        self.model_path = model_path
+        self.onnx_model_path = onnx_model_path or os.path.splitext(model_path)[0] + ".onnx"
+        self.backend = backend
+        self.img_size = img_size
+        self._infer: Optional[Callable[[np.ndarray], np.ndarray]] = None
+        self._load_lock = threading.Lock()
 
         # --- Configuración de Concurrencia ---
         self.max_batch_size = max_batch_size
         self.wait_time = wait_time_ms / 1000.0
         self.executor = ThreadPoolExecutor(max_workers=1)
-        self.queue = []
+        self.queue: List[Tuple[ImageInput, asyncio.Future]] = []
         self.lock = asyncio.Lock()
         self.running = False
 
-    def _process_batch_from_disk_sync(self, batch_to_process: list) -> dict:
-        file_paths_in_batch = [info[0] for info in batch_to_process]
-        
+    def _select_backend(self) -> Literal["keras", "onnx"]:
+        if self.backend != "auto":
+            return self.backend
+        if not os.path.exists(self.onnx_model_path):
+            return "keras"
         try:
-            temp_ds = keras.utils.image_dataset_from_directory(
-                directory=self.temp_dir,
-                labels=None, # type: ignore
-                image_size=self.img_size,
-                batch_size=self.max_batch_size,
-                shuffle=False,
-                color_mode="rgba"
-            )
-            
-            raw_predictions = self.model.predict(temp_ds, verbose=0) # type: ignore
-            
-            predicted_labels = (raw_predictions > 0.5).astype(int).flatten()
-            labels = ["left" if p == 0 else "right" for p in predicted_labels]
-            
-            # ✅ Silenciamos el falso error de Pylance aquí
-            results_map = dict(zip(temp_ds.file_paths, labels)) # type: ignore
-            return results_map
-
-        finally:
-            for path in file_paths_in_batch:
-                if os.path.exists(path):
-                    os.remove(path)
-
-    async def predict(self, pil_image: Image.Image) -> str:
-        unique_filename = f"{uuid.uuid4()}.png"
-        file_path = os.path.join(self.predict_dir, unique_filename)
-        pil_image.save(file_path, "PNG")
-        
+            import onnxruntime  # noqa: F401
+        except ImportError:
+            return "keras"
+        return "onnx"
+
+    def _load(self) -> Callable[[np.ndarray], np.ndarray]:
+        with self._load_lock:
+            if self._infer is not None:
+                return self._infer
+
+            if self._select_backend() == "onnx":
+                import onnxruntime as ort
+                session = ort.InferenceSession(self.onnx_model_path, providers=["CPUExecutionProvider"])
+                input_name = session.get_inputs()[0].name
+                print(f"[FacingDirectionClassifier] Loaded ONNX model '{self.onnx_model_path}'.")
+
+                def _infer(batch: np.ndarray) -> np.ndarray:
+                    return session.run(None, {input_name: batch})[0]
+            else:
+                import keras
+                model: Any = keras.models.load_model(self.model_path)  # type: ignore
+                print(f"[FacingDirectionClassifier] Loaded Keras model '{self.model_path}'.")
+
+                def _infer(batch: np.ndarray) -> np.ndarray:
+                    return np.asarray(model.predict_on_batch(batch))
+
+            self._infer = _infer
+            return _infer
+
+    def _process_batch_sync(self, images: List[ImageInput]) -> List[str]:
+        infer = self._load()
+        batch = np.stack([preprocess_image(image, self.img_size) for image in images])
+        raw_predictions = infer(batch)
+
+        predicted_labels = (raw_predictions > 0.5).astype(int).flatten()
+        return ["left" if p == 0 else "right" for p in predicted_labels]
+
+    async def predict(self, image: ImageInput) -> str:
+        """Returns "left" or "right". Accepts a PIL image or the encoded image bytes."""
         loop = asyncio.get_running_loop()
         future = loop.create_future()
 
         async with self.lock:
-            self.queue.append((file_path, future))
+            self.queue.append((image, future))
             if not self.running:
                 self.running = True
                 asyncio.create_task(self._run_batch())
@@ -74,11 +140,11 @@ class FacingDirectionClassifier:
 
     async def _run_batch(self):
         await asyncio.sleep(self.wait_time)
-        
+
         async with self.lock:
             batch_to_process = self.queue[:self.max_batch_size]
             self.queue = self.queue[self.max_batch_size:]
-            
+
             if self.queue:
                 asyncio.create_task(self._run_batch())
             else:
@@ -87,17 +153,16 @@ class FacingDirectionClassifier:
         if not batch_to_process:
             return
 
-        futures_map = {path: future for path, future in batch_to_process}
-        
+        images = [image for image, _ in batch_to_process]
+        futures = [future for _, future in batch_to_process]
+
         loop = asyncio.get_running_loop()
         try:
-            results_map = await loop.run_in_executor(
-                self.executor, self._process_batch_from_disk_sync, batch_to_process
-            )
-            for path, result in results_map.items():
-                if path in futures_map:
-                    futures_map[path].set_result(result)
+            labels = await loop.run_in_executor(self.executor, self._process_batch_sync, images)
+            for future, label in zip(futures, labels):
+                if not future.done():
+                    future.set_result(label)
         except Exception as e:
-            for future in futures_map.values():
+            for future in futures:
                 if not future.done():
-                    future.set_exception(e)
\ No newline at end of file
+                    future.set_exception(e)
@@ -1,7 +1,8 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_openai import ChatOpenAI
+from utils.llm_models import get_chat_model
+from utils.llm_scheduler import Priority
 import json
 from langgraph.prebuilt import ToolNode
 from typing import Sequence, Dict, Any, List
@@ -55,7 +56,7 @@ def summarize_operations_node(state: SummarizeLogsGraphState):
 
     formatted_operations = format_operation_logs(state.operations_log_to_summarize)
 
-    summarizing_llm = ChatOpenAI(model="gpt-4.1-nano")
+    summarizing_llm = get_chat_model("gpt-4.1-nano", priority=Priority.BACKGROUND)
 
     prompt = format_summarize_log_operations_prompt(formatted_operations, 150)
 
@@ -0,0 +1,207 @@
+"""
+Pooled LLM clients for the whole process.
+
+Chat models are created once per model and settings and share one HTTP connection pool. They
+are wrapped so every call goes through the LLMScheduler (see utils.llm_scheduler); their own
+retries are disabled so only the scheduler retries.
+
+Async connections belong to the event loop that opened them, and the process runs several
+(uvicorn's, and one asyncio.run per generation), so the async HTTP client, the AsyncOpenAI
+client and the chat models used by ainvoke are kept per running loop.
+
+With LLM_REPLAY_MODE set, the shared clients record or replay the OpenAI traffic instead of
+(or besides) calling the API, see utils.llm_replay.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+import openai
+from langchain_openai import ChatOpenAI
+
+from utils.llm_replay import ReplayTransport, replay_transport_from_env
+from utils.llm_scheduler import LLMScheduler, Priority, estimate_tokens, get_llm_scheduler
+
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+_DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_openai_client: Optional[openai.OpenAI] = None
+_chat_models: Dict[Tuple[str, str], ChatOpenAI] = {}
+_replay_transport: Optional[ReplayTransport] = replay_transport_from_env(limits=_HTTP_LIMITS)
+
+
+class _LoopClients:
+    """The async clients of one event loop."""
+
+    def __init__(self) -> None:
+        if _replay_transport is not None:
+            self.http_client = httpx.AsyncClient(transport=_replay_transport, timeout=_DEFAULT_TIMEOUT)
+        else:
+            self.http_client = httpx.AsyncClient(limits=_HTTP_LIMITS, timeout=_DEFAULT_TIMEOUT)
+        self.openai_client: Optional[openai.AsyncOpenAI] = None
+        self.chat_models: Dict[Tuple[str, str], ChatOpenAI] = {}
+
+
+# Dropped with their loop
+_loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopClients]" = weakref.WeakKeyDictionary()
+
+
+def _http_client_sync() -> httpx.Client:
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            if _replay_transport is not None:
+                _http_client = httpx.Client(transport=_replay_transport, timeout=_DEFAULT_TIMEOUT)
+            else:
+                _http_client = httpx.Client(limits=_HTTP_LIMITS, timeout=_DEFAULT_TIMEOUT)
+        return _http_client
+
+
+def _running_loop_clients() -> _LoopClients:
+    """The clients of the running event loop. Raises RuntimeError outside of one."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _loop_clients.get(loop)
+        if clients is None:
+            clients = _loop_clients[loop] = _LoopClients()
+        return clients
+
+
+def get_replay_transport() -> Optional[ReplayTransport]:
+    """The record/replay transport of the shared clients, None unless LLM_REPLAY_MODE is set."""
+    return _replay_transport
+
+
+def _replay_credentials() -> Dict[str, str]:
+    # Replaying needs no real key, but the clients refuse to start without one
+    if _replay_transport is not None and _replay_transport.mode == "replay" and not os.getenv("OPENAI_API_KEY"):
+        return {"api_key": "replay"}
+    return {}
+
+
+def get_openai_client() -> openai.OpenAI:
+    """Shared synchronous OpenAI client. The API key is read from OPENAI_API_KEY."""
+    global _openai_client
+    http_client = _http_client_sync()
+    with _lock:
+        if _openai_client is None:
+            _openai_client = openai.OpenAI(http_client=http_client, max_retries=0, **_replay_credentials())
+        return _openai_client
+
+
+def get_async_openai_client() -> openai.AsyncOpenAI:
+    """
+    AsyncOpenAI client of the running event loop, shared by everything running on it. Must be
+    called from inside the loop. The API key is read from OPENAI_API_KEY.
+    """
+    clients = _running_loop_clients()
+    with _lock:
+        if clients.openai_client is None:
+            clients.openai_client = openai.AsyncOpenAI(http_client=clients.http_client, max_retries=0, **_replay_credentials())
+        return clients.openai_client
+
+
+Binding = Callable[[Any], Any]
+
+
+class ScheduledChatModel:
+    """
+    A chat model (or a binding of it, e.g. with tools or structured output) whose calls are
+    admitted by the LLMScheduler under the model's limits and the given priority.
+
+    `chat_model(for_async)` returns the ChatOpenAI to call: the shared one for invoke, the one of
+    the running loop for ainvoke. The bindings are applied to it once per loop.
+    """
+
+    def __init__(self, chat_model: Callable[[bool], ChatOpenAI], model: str, priority: Priority,
+                 scheduler: Optional[LLMScheduler] = None, bindings: Tuple[Binding, ...] = ()):
+        self._chat_model = chat_model
+        self._bindings = bindings
+        self.model = model
+        self.priority = priority
+        self._scheduler = scheduler or get_llm_scheduler()
+        self._sync_runnable: Optional[Any] = None
+        self._loop_runnables: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+    def _wrap(self, binding: Binding) -> "ScheduledChatModel":
+        return ScheduledChatModel(self._chat_model, self.model, self.priority, self._scheduler, self._bindings + (binding,))
+
+    def _build(self, for_async: bool) -> Any:
+        runnable: Any = self._chat_model(for_async)
+        for binding in self._bindings:
+            runnable = binding(runnable)
+        return runnable
+
+    def _runnable(self) -> Any:
+        if self._sync_runnable is None:
+            self._sync_runnable = self._build(False)
+        return self._sync_runnable
+
+    def _loop_runnable(self) -> Any:
+        loop = asyncio.get_running_loop()
+        runnable = self._loop_runnables.get(loop)
+        if runnable is None:
+            runnable = self._loop_runnables[loop] = self._build(True)
+        return runnable
+
+    def bind_tools(self, *args, **kwargs) -> "ScheduledChatModel":
+        return self._wrap(lambda runnable: runnable.bind_tools(*args, **kwargs))
+
+    def with_structured_output(self, *args, **kwargs) -> "ScheduledChatModel":
+        return self._wrap(lambda runnable: runnable.with_structured_output(*args, **kwargs))
+
+    def with_priority(self, priority: Priority) -> "ScheduledChatModel":
+        return ScheduledChatModel(self._chat_model, self.model, priority, self._scheduler, self._bindings)
+
+    def invoke(self, input: Any, config: Any = None, **kwargs) -> Any:
+        return self._scheduler.run(
+            self.model,
+            lambda: self._runnable().invoke(input, config, **kwargs),
+            priority=self.priority,
+            estimated_tokens=estimate_tokens(input),
+        )
+
+    async def ainvoke(self, input: Any, config: Any = None, **kwargs) -> Any:
+        return await self._scheduler.run_async(
+            self.model,
+            lambda: self._loop_runnable().ainvoke(input, config, **kwargs),
+            priority=self.priority,
+            estimated_tokens=estimate_tokens(input),
+        )
+
+
+def get_chat_model(model: str, priority: Priority = Priority.GENERATION, **kwargs) -> ScheduledChatModel:
+    """
+    Returns the shared chat model for `model` with the given ChatOpenAI settings (temperature,
+    timeout...), creating it on first use, wrapped for the scheduler with `priority`.
+    """
+    key = (model, repr(sorted(kwargs.items())))
+
+    def chat_model(for_async: bool) -> ChatOpenAI:
+        # Sync calls share one model; async ones use the model of the running loop
+        http_client = _http_client_sync()
+        models, http_async_client = _chat_models, None
+        if for_async:
+            clients = _running_loop_clients()
+            models, http_async_client = clients.chat_models, clients.http_client
+        with _lock:
+            found = models.get(key)
+            if found is None:
+                found = models[key] = ChatOpenAI(
+                    model=model,
+                    max_retries=0,
+                    http_client=http_client,
+                    http_async_client=http_async_client,
+                    **_replay_credentials(),
+                    **kwargs,
+                )
+            return found
+
+    return ScheduledChatModel(chat_model, model, priority)
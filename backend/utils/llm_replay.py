@@ -0,0 +1,309 @@
+"""
+Record and replay of OpenAI HTTP traffic, to run generations, agents and dialogs offline.
+
+The shared HTTP clients of utils.llm_models are built on a ReplayTransport when LLM_REPLAY_MODE
+is set, so both the LangChain ChatOpenAI path and the raw openai client path go through it
+(chat, structured outputs, tool calls, streams and image edits alike):
+
+    LLM_REPLAY_MODE=record  every request goes to OpenAI and the response is saved, replacing
+                            what was recorded for that request by earlier runs
+    LLM_REPLAY_MODE=replay  responses come from the recordings; a missing one is a 400 error
+    LLM_REPLAY_MODE=auto    replays what is recorded and records the rest
+
+Recordings are stored in LLM_REPLAY_DIR (default "llm_recordings"), one file per request hash.
+The hash covers the method, path and the request body with keys sorted, multipart boundaries
+fixed and every LLM_REPLAY_NORMALIZE regex (";;" separated) replaced, so volatile values in the
+prompts can be ignored. A request recorded several times replays its responses in order.
+
+Latency: replayed responses wait LLM_REPLAY_LATENCY_SCALE times the recorded latency (0 by
+default, 1 to reproduce the real API) plus LLM_REPLAY_LATENCY_MS. Streams spread it over their
+events, so time to first token is kept.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+import weakref
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Literal, Optional, Set, Tuple
+
+import httpx
+import orjson
+
+ReplayMode = Literal["record", "replay", "auto"]
+
+# Headers that no longer apply once the body is stored decoded
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+
+
+def _normalize_body(request: httpx.Request, patterns: List[re.Pattern]) -> bytes:
+    body = request.content
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("application/json"):
+        try:
+            body = orjson.dumps(orjson.loads(body), option=orjson.OPT_SORT_KEYS)
+        except orjson.JSONDecodeError:
+            pass
+    elif "boundary=" in content_type:
+        boundary = content_type.split("boundary=", 1)[1].split(";", 1)[0].strip('"')
+        body = body.replace(boundary.encode(), b"BOUNDARY")
+    if patterns:
+        text = body.decode("utf-8", errors="surrogateescape")
+        for pattern in patterns:
+            text = pattern.sub("<*>", text)
+        body = text.encode("utf-8", errors="surrogateescape")
+    return body
+
+
+def request_key(request: httpx.Request, patterns: Optional[List[re.Pattern]] = None) -> str:
+    """Hash identifying a request regardless of host, header and key order differences."""
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.url.path.encode())
+    digest.update(_normalize_body(request, patterns or []))
+    return digest.hexdigest()[:32]
+
+
+def _sse_events(body: bytes) -> List[bytes]:
+    """Splits a text/event-stream body into its events (keeping the separators)."""
+    events = [event + b"\n\n" for event in body.split(b"\n\n") if event.strip()]
+    return events or [body]
+
+
+class _ReplayStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    def __init__(self, chunks: List[bytes], delay: float):
+        self._chunks = chunks
+        self._delay = delay
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._chunks:
+            if self._delay:
+                time.sleep(self._delay)
+            yield chunk
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for chunk in self._chunks:
+            if self._delay:
+                await asyncio.sleep(self._delay)
+            yield chunk
+
+
+class ReplayMissError(LookupError):
+    """Raised (as a 400 response to the OpenAI client) when replaying a request never recorded."""
+
+
+class ReplayTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """
+    httpx transport that records responses of the wrapped transports to `directory` and
+    replays them. See the module docstring.
+
+    Async connections belong to the loop that opened them, so requests that reach the API go
+    through a transport made by `async_transport_factory` for each running loop.
+    """
+
+    def __init__(self, directory: str, mode: ReplayMode = "replay", latency_scale: float = 0.0,
+                 latency_ms: float = 0.0, normalize: Optional[List[str]] = None,
+                 transport: Optional[httpx.BaseTransport] = None,
+                 async_transport_factory: Optional[Callable[[], httpx.AsyncBaseTransport]] = None):
+        if mode not in ("record", "replay", "auto"):
+            raise ValueError(f"Unknown replay mode '{mode}'")
+        self.directory = directory
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.latency_ms = latency_ms
+        self._patterns = [re.compile(p) for p in normalize or []]
+        self._transport = transport
+        self._async_transport_factory = async_transport_factory or httpx.AsyncHTTPTransport
+        self._async_transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncBaseTransport]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self._cache: Dict[str, List[dict]] = {}
+        self._replayed: Dict[str, int] = {}
+        # Keys recorded by this process in record mode: their old recordings are replaced, not appended to
+        self._rerecorded: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+    # --- httpx transport API ---
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        key = request_key(request, self._patterns)
+        if self.mode != "record":
+            recorded = self._next_recording(key)
+            if recorded is not None:
+                latency, stream_delay = self._latency(recorded)
+                if latency:
+                    time.sleep(latency)
+                return self._build_response(recorded, stream_delay)
+            if self.mode == "replay":
+                return self._miss(request, key)
+
+        if self._transport is None:
+            self._transport = httpx.HTTPTransport()
+        started = time.perf_counter()
+        response = self._transport.handle_request(request)
+        first_byte = time.perf_counter() - started
+        try:
+            body = b"".join(response.stream)
+        finally:
+            response.close()
+        return self._record(key, request, response, body, first_byte, time.perf_counter() - started)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        key = request_key(request, self._patterns)
+        if self.mode != "record":
+            recorded = self._next_recording(key)
+            if recorded is not None:
+                latency, stream_delay = self._latency(recorded)
+                if latency:
+                    await asyncio.sleep(latency)
+                return self._build_response(recorded, stream_delay)
+            if self.mode == "replay":
+                return self._miss(request, key)
+
+        started = time.perf_counter()
+        response = await self._loop_transport().handle_async_request(request)
+        first_byte = time.perf_counter() - started
+        try:
+            body = b"".join([chunk async for chunk in response.stream])  # type: ignore[union-attr]
+        finally:
+            await response.aclose()
+        return self._record(key, request, response, body, first_byte, time.perf_counter() - started)
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+
+    async def aclose(self) -> None:
+        """Closes the transport of the running loop."""
+        with self._lock:
+            transport = self._async_transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+    def _loop_transport(self) -> httpx.AsyncBaseTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._async_transports.get(loop)
+            if transport is None:
+                transport = self._async_transports[loop] = self._async_transport_factory()
+            return transport
+
+    # --- Recordings ---
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load(self, key: str) -> List[dict]:
+        if key not in self._cache:
+            try:
+                with open(self._path(key), "rb") as f:
+                    self._cache[key] = orjson.loads(f.read())["responses"]
+            except FileNotFoundError:
+                self._cache[key] = []
+        return self._cache[key]
+
+    def _next_recording(self, key: str) -> Optional[dict]:
+        with self._lock:
+            responses = self._load(key)
+            if not responses:
+                self.misses += 1
+                return None
+            index = self._replayed.get(key, 0)
+            self._replayed[key] = index + 1
+            self.hits += 1
+            # Repeats past the end replay the last response recorded
+            return responses[min(index, len(responses) - 1)]
+
+    def _record(self, key: str, request: httpx.Request, response: httpx.Response, body: bytes,
+                first_byte: float, total: float) -> httpx.Response:
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS]
+        # Httpx hands the raw stream to the transport caller, so decode gzip bodies here
+        decoded = httpx.Response(response.status_code, headers=response.headers, content=body).content
+        entry = {
+            "status": response.status_code,
+            "headers": headers,
+            "body": decoded.decode("utf-8", errors="replace"),
+            "first_byte_seconds": round(first_byte, 4),
+            "total_seconds": round(total, 4),
+        }
+        # Only successful answers are worth replaying: errors (429...) are left to the scheduler
+        if response.status_code < 400:
+            with self._lock:
+                if self.mode == "record" and key not in self._rerecorded:
+                    # Re-recording (after a prompt change...) must not replay the stale responses first
+                    self._rerecorded.add(key)
+                    self._cache[key] = []
+                responses = self._load(key)
+                responses.append(entry)
+                data = {
+                    "request": {
+                        "method": request.method,
+                        "path": request.url.path,
+                        "body": _normalize_body(request, self._patterns).decode("utf-8", errors="replace")[:2000],
+                    },
+                    "responses": responses,
+                }
+                os.makedirs(self.directory, exist_ok=True)
+                tmp_path = self._path(key) + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+                os.replace(tmp_path, self._path(key))
+        return self._build_response(entry, 0.0)
+
+    def _latency(self, recorded: dict) -> Tuple[float, float]:
+        """(Seconds before the response, seconds between stream events) for a replayed response."""
+        extra = self.latency_ms / 1000
+        if not self._is_stream(recorded):
+            return recorded.get("total_seconds", 0.0) * self.latency_scale + extra, 0.0
+        first_byte = recorded.get("first_byte_seconds", 0.0) * self.latency_scale + extra
+        rest = max(0.0, recorded.get("total_seconds", 0.0) - recorded.get("first_byte_seconds", 0.0))
+        events = len(_sse_events(recorded["body"].encode()))
+        return first_byte, rest * self.latency_scale / events
+
+    @staticmethod
+    def _is_stream(recorded: dict) -> bool:
+        return any(k.lower() == "content-type" and v.startswith("text/event-stream") for k, v in recorded["headers"])
+
+    def _build_response(self, recorded: dict, stream_delay: float) -> httpx.Response:
+        body = recorded["body"].encode()
+        chunks = _sse_events(body) if self._is_stream(recorded) else [body]
+        return httpx.Response(
+            recorded["status"],
+            headers=recorded["headers"],
+            stream=_ReplayStream(chunks, stream_delay),
+        )
+
+    def _miss(self, request: httpx.Request, key: str) -> httpx.Response:
+        message = f"No recorded response for {request.method} {request.url.path} (key {key}) in '{self.directory}'"
+        print(f"[LLMReplay] {message}")
+        return httpx.Response(
+            400,
+            json={"error": {"message": message, "type": ReplayMissError.__name__, "code": "replay_miss"}},
+        )
+
+
+def replay_transport_from_env(limits: Optional[httpx.Limits] = None) -> Optional[ReplayTransport]:
+    """
+    The ReplayTransport configured by the LLM_REPLAY_* variables, or None when it is off.
+    Requests that reach the API use connection pools with the given `limits`.
+    """
+    mode = os.getenv("LLM_REPLAY_MODE", "").strip().lower()
+    if not mode or mode == "off":
+        return None
+    normalize = [p for p in os.getenv("LLM_REPLAY_NORMALIZE", "").split(";;") if p]
+    return ReplayTransport(
+        directory=os.getenv("LLM_REPLAY_DIR", "llm_recordings"),
+        mode=mode,  # type: ignore[arg-type]
+        latency_scale=float(os.getenv("LLM_REPLAY_LATENCY_SCALE", "0")),
+        latency_ms=float(os.getenv("LLM_REPLAY_LATENCY_MS", "0")),
+        normalize=normalize,
+        transport=httpx.HTTPTransport(limits=limits) if limits else None,
+        async_transport_factory=(lambda: httpx.AsyncHTTPTransport(limits=limits)) if limits else None,
+    )
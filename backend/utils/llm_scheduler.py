@@ -0,0 +1,341 @@
+"""
+Process wide scheduling of LLM requests.
+
+Every request to a model waits in that model's queue until its two token buckets (requests and
+tokens per minute) have room. Waiting requests are served by priority (interactive dialog first,
+then generation, then background work) and in arrival order within the same priority. A 429 from
+the provider pauses the whole model for the time it asks, instead of every caller retrying on its
+own, and all retries use the same exponential backoff with jitter.
+
+Limits are read from LLM_RATE_LIMITS as "model=requests:tokens" per minute, comma separated, e.g.
+"gpt-4.1-mini=500:200000,gpt-4.1-nano=500:200000". Other models use LLM_DEFAULT_RPM / LLM_DEFAULT_TPM.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, TypeVar
+
+import openai
+
+T = TypeVar("T")
+
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+# Longest a waiting request sleeps without checking again, in case a wake up is missed
+_MAX_WAIT_SECONDS = 1.0
+
+
+class Priority(IntEnum):
+    """Lower values are served first."""
+    INTERACTIVE = 0  # a player is waiting on it (dialog, narrative streaming)
+    GENERATION = 1   # world generation agents
+    BACKGROUND = 2   # summaries, image prompts and images
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter: ~1s, 2s, 4s... capped at BACKOFF_MAX_SECONDS."""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def estimate_tokens(value: Any) -> int:
+    """Rough token count of a prompt (about 4 characters per token)."""
+    return len(str(value)) // 4 + 1
+
+
+def usage_tokens(result: Any) -> Optional[int]:
+    """Total tokens reported by a langchain message or an OpenAI response, if any."""
+    usage_metadata = getattr(result, "usage_metadata", None)
+    if isinstance(usage_metadata, dict) and "total_tokens" in usage_metadata:
+        return usage_metadata["total_tokens"]
+    usage = getattr(result, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+
+class TokenBucket:
+    """Refills continuously up to `per_minute`. Can go below zero when usage exceeded the estimate."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be consumed (amounts above the capacity wait for a full bucket)."""
+        self._refill(now)
+        deficit = min(amount, self.capacity) - self.level
+        return max(0.0, deficit / self.rate) if self.rate > 0 else float("inf")
+
+    def consume(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+
+class _Ticket:
+    __slots__ = ("priority", "seq", "tokens")
+
+    def __init__(self, priority: Priority, seq: int, tokens: int):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+
+    def __lt__(self, other: "_Ticket") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _ModelQueue:
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.waiting: List[_Ticket] = []
+        self.paused_until = 0.0
+        self.in_flight = 0
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parses "model=requests:tokens,..." into {model: (requests_per_minute, tokens_per_minute)}."""
+    limits: Dict[str, Tuple[float, float]] = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        model, _, values = entry.partition("=")
+        requests, _, tokens = values.partition(":")
+        limits[model.strip()] = (float(requests), float(tokens))
+    return limits
+
+
+class LLMScheduler:
+    """
+    Admission control for LLM requests, shared by threads (generation graphs) and event loops
+    (dialog streaming). See the module docstring.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 default_limits: Tuple[float, float] = (500, 200_000)):
+        self._limits = limits or {}
+        self._default_limits = default_limits
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._async_waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._seq = itertools.count()
+
+    # --- Admission ---
+
+    def acquire(self, model: str, tokens: int = 0, priority: Priority = Priority.GENERATION) -> None:
+        """Blocks the calling thread until the request may be sent."""
+        with self._changed:
+            queue, ticket = self._enqueue(model, tokens, priority)
+            try:
+                while True:
+                    wait = self._try_grant(queue, ticket)
+                    if wait == 0:
+                        return
+                    self._changed.wait(timeout=wait)
+            except BaseException:
+                # Interrupted while waiting (KeyboardInterrupt...): leave the queue so the requests behind can go
+                self._leave_queue(queue, ticket)
+                raise
+
+    async def acquire_async(self, model: str, tokens: int = 0, priority: Priority = Priority.GENERATION) -> None:
+        """Waits, without blocking the event loop, until the request may be sent."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            queue, ticket = self._enqueue(model, tokens, priority)
+        try:
+            while True:
+                event = asyncio.Event()
+                waiter = (loop, event)
+                with self._lock:
+                    wait = self._try_grant(queue, ticket)
+                    if wait == 0:
+                        return
+                    self._async_waiters.add(waiter)
+                try:
+                    await asyncio.wait_for(event.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    with self._lock:
+                        self._async_waiters.discard(waiter)
+        except BaseException:
+            # Cancelled while waiting: leave the queue so the requests behind can go
+            with self._lock:
+                self._leave_queue(queue, ticket)
+            raise
+
+    def release(self, model: str, estimated_tokens: int = 0, used_tokens: Optional[int] = None) -> None:
+        """Marks a request as finished and corrects the token bucket with the real usage."""
+        with self._lock:
+            queue = self._queue(model)
+            queue.in_flight = max(0, queue.in_flight - 1)
+            if used_tokens is not None:
+                queue.tokens.level -= used_tokens - estimated_tokens
+            self._notify()
+
+    def pause(self, model: str, seconds: float) -> None:
+        """Stops granting requests for `model` for `seconds` (the provider asked us to slow down)."""
+        with self._lock:
+            queue = self._queue(model)
+            queue.paused_until = max(queue.paused_until, time.monotonic() + seconds)
+            self._notify()
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                model: {
+                    "waiting": len(queue.waiting),
+                    "in_flight": queue.in_flight,
+                    "paused_for": max(0.0, queue.paused_until - now),
+                    "requests_available": queue.requests.level,
+                    "tokens_available": queue.tokens.level,
+                }
+                for model, queue in self._queues.items()
+            }
+
+    # --- Calls with retries ---
+
+    def run(self, model: str, call: Callable[[], T], priority: Priority = Priority.GENERATION,
+            estimated_tokens: int = 0, max_retries: int = 3) -> T:
+        """Runs a blocking LLM call under the limits, retrying rate limits and transient errors."""
+        for attempt in range(max_retries + 1):
+            self.acquire(model, estimated_tokens, priority)
+            try:
+                result = call()
+            except Exception as e:
+                self.release(model, estimated_tokens)
+                delay = self._retry_delay(model, e, attempt)
+                if delay is None or attempt == max_retries:
+                    raise
+                print(f"[LLMScheduler] {model}: {type(e).__name__}, retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self.release(model, estimated_tokens)
+                raise
+            self.release(model, estimated_tokens, usage_tokens(result))
+            return result
+        raise AssertionError("unreachable")
+
+    async def run_async(self, model: str, call: Callable[[], Awaitable[T]], priority: Priority = Priority.GENERATION,
+                        estimated_tokens: int = 0, max_retries: int = 3) -> T:
+        """Async version of `run`. `call` must create a new awaitable each time it is called."""
+        for attempt in range(max_retries + 1):
+            await self.acquire_async(model, estimated_tokens, priority)
+            try:
+                result = await call()
+            except Exception as e:
+                self.release(model, estimated_tokens)
+                delay = self._retry_delay(model, e, attempt)
+                if delay is None or attempt == max_retries:
+                    raise
+                print(f"[LLMScheduler] {model}: {type(e).__name__}, retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.release(model, estimated_tokens)
+                raise
+            self.release(model, estimated_tokens, usage_tokens(result))
+            return result
+        raise AssertionError("unreachable")
+
+    def _retry_delay(self, model: str, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the error is not worth retrying."""
+        if isinstance(error, openai.RateLimitError):
+            if getattr(error, "code", None) == "insufficient_quota":
+                return None  # out of credit: retrying won't help, and the other callers don't need to wait
+            retry_after = _retry_after_seconds(error)
+            # Everyone using the model waits, not only this caller
+            self.pause(model, retry_after if retry_after is not None else backoff_delay(attempt))
+            return backoff_delay(0)
+        if isinstance(error, (openai.APIConnectionError, openai.InternalServerError)):
+            return backoff_delay(attempt)
+        return None
+
+    # --- Internals, called with the lock held ---
+
+    def _queue(self, model: str) -> _ModelQueue:
+        if model not in self._queues:
+            requests_per_minute, tokens_per_minute = self._limits.get(model, self._default_limits)
+            self._queues[model] = _ModelQueue(requests_per_minute, tokens_per_minute)
+        return self._queues[model]
+
+    def _enqueue(self, model: str, tokens: int, priority: Priority) -> Tuple[_ModelQueue, _Ticket]:
+        queue = self._queue(model)
+        ticket = _Ticket(priority, next(self._seq), tokens)
+        heapq.heappush(queue.waiting, ticket)
+        return queue, ticket
+
+    def _leave_queue(self, queue: _ModelQueue, ticket: _Ticket) -> None:
+        if ticket in queue.waiting:
+            queue.waiting.remove(ticket)
+            heapq.heapify(queue.waiting)
+            self._notify()
+
+    def _try_grant(self, queue: _ModelQueue, ticket: _Ticket) -> float:
+        """Grants the ticket and returns 0, or returns how long to wait before trying again."""
+        if queue.waiting[0] is not ticket:
+            return _MAX_WAIT_SECONDS  # someone more urgent (or earlier) goes first
+        now = time.monotonic()
+        wait = max(
+            queue.paused_until - now,
+            queue.requests.time_until(1, now),
+            queue.tokens.time_until(ticket.tokens, now),
+        )
+        if wait > 0:
+            return min(wait, _MAX_WAIT_SECONDS)
+        heapq.heappop(queue.waiting)
+        queue.requests.consume(1, now)
+        queue.tokens.consume(ticket.tokens, now)
+        queue.in_flight += 1
+        self._notify()  # the next one in line may go now
+        return 0
+
+    def _notify(self) -> None:
+        self._changed.notify_all()
+        for loop, event in list(self._async_waiters):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # loop already closed
+                self._async_waiters.discard((loop, event))
+
+
+def _retry_after_seconds(error: openai.RateLimitError) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for header in ("retry-after-ms", "retry-after"):
+        value = headers.get(header)
+        if value is None:
+            continue
+        try:
+            seconds = float(value)
+        except ValueError:
+            continue
+        return seconds / 1000 if header == "retry-after-ms" else seconds
+    if isinstance(error.body, dict) and "retry_after" in error.body:
+        return float(error.body["retry_after"])
+    return None
+
+
+_scheduler = LLMScheduler(
+    limits=parse_rate_limits(os.getenv("LLM_RATE_LIMITS", "")),
+    default_limits=(float(os.getenv("LLM_DEFAULT_RPM", "500")), float(os.getenv("LLM_DEFAULT_TPM", "200000"))),
+)
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    return _scheduler
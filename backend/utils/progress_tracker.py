@@ -37,14 +37,17 @@ class ProgressTracker:
         global_progress = self.offset + self.local_progress * self.weight
         self._report_progress(global_progress, message)
 
-    def subtracker(self, sub_weight: float) -> "ProgressTracker":
+    def subtracker(self, sub_weight: float, start: Optional[float] = None) -> "ProgressTracker":
         """
         Creates a sub-tracker for a sub-task.
+        By default it starts at the current progress; `start` (0.0 to 1.0 of this tracker) places
+        it elsewhere, for sub-tasks that run side by side.
         """
         if not (0.0 <= sub_weight <= 1.0):
             raise ValueError("Sub-tracker weight must be between 0.0 and 1.0")
 
-        current_global_offset = self.offset + self.local_progress * self.weight
+        local_start = self.local_progress if start is None else start
+        current_global_offset = self.offset + local_start * self.weight
         child_weight = self.weight * sub_weight
 
         return ProgressTracker(
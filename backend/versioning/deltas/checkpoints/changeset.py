@@ -1,25 +1,176 @@
 from __future__ import annotations
 
 from copy import deepcopy
+from typing import Dict, Optional, Set
 
+from pydantic import BaseModel, PrivateAttr
+
+from core_game.change_tracking import ChangeLog, current_revision
 from core_game.character.schemas import CharactersModel
 from core_game.map.schemas import GameMapModel
 from core_game.game_event.schemas import GameEventsManagerModel
 from simulated.game_state import SimulatedGameState
 from versioning.deltas.checkpoints.base import StateCheckpointBase
 
+TouchedIds = Dict[str, Set[str]]
+
+
+def _change_logs(state: SimulatedGameState) -> Dict[str, ChangeLog]:
+    game_map = state.read_only_map.get_state()
+    return {
+        "scenarios": game_map.get_scenario_change_log(),
+        "connections": game_map.get_connection_change_log(),
+        "characters": state.read_only_characters.get_state().get_change_log(),
+        "events": state.read_only_events.get_state().get_change_log(),
+    }
+
+
+def state_version(state: SimulatedGameState) -> tuple:
+    """
+    Identifies the content of the live state: it changes with every change to a scenario,
+    connection, character or event, and when the state is replaced (other timeline).
+    """
+    return tuple((name, log.timeline, log.last_revision) for name, log in _change_logs(state).items())
+
+
+def _live_models(state: SimulatedGameState, touched: TouchedIds) -> Dict[str, Dict[str, BaseModel]]:
+    """Returns the live models of the touched entities that still exist, without copying them."""
+    game_map = state.read_only_map.get_state()
+    characters = state.read_only_characters.get_state()
+    events = state.read_only_events.get_state()
+    live: Dict[str, Dict[str, BaseModel]] = {"scenarios": {}, "connections": {}, "characters": {}, "events": {}}
+    for sid in touched["scenarios"]:
+        scenario = game_map.find_scenario(sid)
+        if scenario:
+            live["scenarios"][sid] = scenario.get_scenario_model()
+    for cid in touched["connections"]:
+        connection = game_map.get_connection_by_id(cid)
+        if connection:
+            live["connections"][cid] = connection.get_connection_model()
+    for char_id in touched["characters"]:
+        character = characters.find_character(char_id)
+        if character:
+            live["characters"][char_id] = character.get_model()
+    for eid in touched["events"]:
+        event = events.find_event(eid)
+        if event:
+            live["events"][eid] = event.get_model()
+    return live
+
+
+def _player_id(state: SimulatedGameState) -> Optional[str]:
+    player = state.read_only_characters.get_player()
+    return player.id if player else None
+
+
+def _patched(items: Dict[str, BaseModel], changed: Dict[str, BaseModel], touched: Set[str]) -> Dict[str, BaseModel]:
+    """Copies an id index replacing the touched entries. Untouched models are shared, not copied."""
+    patched = dict(items)
+    for entity_id in touched:
+        if entity_id in changed:
+            patched[entity_id] = deepcopy(changed[entity_id])
+        else:
+            patched.pop(entity_id, None)
+    return patched
+
+
 class ChangesetCheckpoint(StateCheckpointBase):
     """
     Snapshot containing the necessary data to generate a changeset
     for an external consumer.
+
+    Checkpoints taken from a live state also remember the change revision and timelines of
+    the domain collections, so later changesets only need to visit the entities touched since.
+    Snapshot models may be shared between checkpoints and must be treated as read-only.
     """
     map_snapshot: GameMapModel
     characters_snapshot: CharactersModel
     game_events_snapshot: GameEventsManagerModel
-    
+
+    _revision: Optional[int] = PrivateAttr(default=None)
+    _timelines: Dict[str, int] = PrivateAttr(default_factory=dict)
+
+    @classmethod
+    def create(cls, state: SimulatedGameState, base: Optional[ChangesetCheckpoint] = None) -> ChangesetCheckpoint:
+        """
+        Creates a checkpoint of the live state. When `base` is given and still valid for the
+        state, only the entities touched since `base` are copied and the rest are shared with it.
+        """
+        revision = current_revision()
+        logs = _change_logs(state)
+        touched = base.touched_since(state) if base is not None else None
+
+        if base is None or touched is None:
+            map_model = deepcopy(state.read_only_map.get_state().to_model())
+            char_model = deepcopy(state.read_only_characters.get_state().to_model())
+            events_model = deepcopy(state.read_only_events.get_state().to_model())
+        else:
+            live = _live_models(state, touched)
+            map_model = GameMapModel(
+                scenarios=_patched(base.map_snapshot.scenarios, live["scenarios"], touched["scenarios"]),
+                connections=_patched(base.map_snapshot.connections, live["connections"], touched["connections"]),
+            )
+            char_model = CharactersModel(
+                registry=_patched(base.characters_snapshot.registry, live["characters"], touched["characters"]),
+                player_character_id=_player_id(state),
+            )
+            events_model = GameEventsManagerModel(
+                all_events=_patched(base.game_events_snapshot.all_events, live["events"], touched["events"]),
+                running_event_stack=deepcopy(state.read_only_events.get_state().get_running_event_stack()),
+            )
+
+        checkpoint = cls(map_snapshot=map_model, characters_snapshot=char_model, game_events_snapshot=events_model)
+        checkpoint._revision = revision
+        checkpoint._timelines = {name: log.timeline for name, log in logs.items()}
+        return checkpoint
+
     @classmethod
-    def create(cls, state: SimulatedGameState) -> ChangesetCheckpoint:
-        map_model = deepcopy(state.read_only_map.get_state().to_model())
-        char_model = deepcopy(state.read_only_characters.get_state().to_model())
-        events_model = deepcopy(state.read_only_events.get_state().to_model())
-        return cls(map_snapshot=map_model, characters_snapshot=char_model, game_events_snapshot=events_model)
\ No newline at end of file
+    def create_partial(cls, state: SimulatedGameState, touched: TouchedIds) -> ChangesetCheckpoint:
+        """
+        Builds a view of the live state restricted to the touched entities. The models are the
+        live ones, so the result is only meant to be compared right away.
+        """
+        live = _live_models(state, touched)
+        return cls.model_construct(
+            map_snapshot=GameMapModel.model_construct(scenarios=live["scenarios"], connections=live["connections"]),
+            characters_snapshot=CharactersModel.model_construct(
+                registry=live["characters"],
+                player_character_id=_player_id(state),
+            ),
+            game_events_snapshot=GameEventsManagerModel.model_construct(all_events=live["events"], running_event_stack=[]),
+        )
+
+    def touched_since(self, state: SimulatedGameState) -> Optional[TouchedIds]:
+        """
+        Returns the ids touched in the live state since this checkpoint, per collection.
+        Returns None when this checkpoint does not share history with the state
+        (empty checkpoints, discarded transactions, reloaded games) and a full comparison is needed.
+        """
+        if self._revision is None:
+            return None
+        touched: TouchedIds = {}
+        for name, log in _change_logs(state).items():
+            if self._timelines.get(name) != log.timeline:
+                return None
+            touched[name] = log.changed_since(self._revision)
+        return touched
+
+    def restricted_to(self, touched: TouchedIds) -> ChangesetCheckpoint:
+        """Returns a view of this checkpoint that only contains the touched entities."""
+        def pick(items: Dict[str, BaseModel], ids: Set[str]) -> Dict[str, BaseModel]:
+            return {entity_id: items[entity_id] for entity_id in ids if entity_id in items}
+
+        return ChangesetCheckpoint.model_construct(
+            map_snapshot=GameMapModel.model_construct(
+                scenarios=pick(self.map_snapshot.scenarios, touched["scenarios"]),
+                connections=pick(self.map_snapshot.connections, touched["connections"]),
+            ),
+            characters_snapshot=CharactersModel.model_construct(
+                registry=pick(self.characters_snapshot.registry, touched["characters"]),
+                player_character_id=self.characters_snapshot.player_character_id,
+            ),
+            game_events_snapshot=GameEventsManagerModel.model_construct(
+                all_events=pick(self.game_events_snapshot.all_events, touched["events"]),
+                running_event_stack=[],
+            ),
+        )
@@ -1,3 +1,4 @@
+from core_game.change_tracking import same_content
 from versioning.deltas.detectors.base import ChangeDetector
 from versioning.deltas.detectors.changeset.characters.entity import CharacterDetector
 from core_game.character.schemas import CharactersModel
@@ -22,18 +23,14 @@ class CharactersDetector(ChangeDetector[CharactersModel]):
         old_ids, new_ids = set(old_chars), set(new_chars)
         
         for id in sorted(new_ids - old_ids):
-            model = new_chars[id]
-            
-            public_fields = self.character_detector.get_public_fields_for(model)
-            
-            dumped_data = model.model_dump(include=public_fields)
-            
-            registry_ops.append({"op": "add", "id": id, **dumped_data})
+            registry_ops.append(self._added_op(id, new_chars[id]))
         
         for id in sorted(old_ids - new_ids):
             registry_ops.append({"op": "remove", "id": id})
             
         for id in sorted(old_ids & new_ids):
+            if same_content(old_chars[id], new_chars[id]):
+                continue
             char_changes = self.character_detector.detect(old_chars[id], new_chars[id])
             print("detecting in characters collection")
             if char_changes:
@@ -43,4 +40,17 @@ class CharactersDetector(ChangeDetector[CharactersModel]):
         if registry_ops:
             final_changes["registry"] = registry_ops
             
-        return final_changes if final_changes else None
\ No newline at end of file
+        return final_changes if final_changes else None
+
+    def serialize(self, characters: CharactersModel) -> Dict[str, Any] | None:
+        """All the characters as 'add' operations, the same as detecting them against an empty registry."""
+        final_changes: Dict[str, Any] = {}
+        if characters.player_character_id:
+            final_changes["player_character_id"] = characters.player_character_id
+        if characters.registry:
+            final_changes["registry"] = [self._added_op(id, characters.registry[id]) for id in sorted(characters.registry)]
+        return final_changes if final_changes else None
+
+    def _added_op(self, id: str, model: Any) -> Dict[str, Any]:
+        public_fields = self.character_detector.get_public_fields_for(model)
+        return {"op": "add", "id": id, **model.model_dump(include=public_fields)}
\ No newline at end of file
@@ -1,6 +1,7 @@
 # En versioning/deltas/detectors/changeset/events/collection.py
 
 from typing import Dict, Any, List, Set, Tuple
+from core_game.change_tracking import same_content
 from versioning.deltas.detectors.base import ChangeDetector
 # Import all necessary models
 from core_game.game_event.schemas import GameEventsManagerModel, GameEventModel
@@ -68,6 +69,19 @@ class GameEventsDetector(ChangeDetector[GameEventsManagerModel]):
         changes in character interaction options and generates deltas.
         """
         all_changes: Dict[str, Any] = {}
+
+        # Unchanged events offer the same options on both sides: only the changed ones are indexed
+        changed_ids = {
+            event_id for event_id in old.all_events.keys() | new.all_events.keys()
+            if event_id not in old.all_events or event_id not in new.all_events
+            or not same_content(old.all_events[event_id], new.all_events[event_id])
+        }
+        if not changed_ids:
+            return None
+        old = GameEventsManagerModel.model_construct(
+            all_events={eid: e for eid, e in old.all_events.items() if eid in changed_ids}, running_event_stack=[])
+        new = GameEventsManagerModel.model_construct(
+            all_events={eid: e for eid, e in new.all_events.items() if eid in changed_ids}, running_event_stack=[])
         
         # Extract and index options from both old and new states
         old_indexed_options = _extract_and_index_character_interaction_options_from_model(old)
@@ -122,4 +136,17 @@ class GameEventsDetector(ChangeDetector[GameEventsManagerModel]):
         if character_deltas:
             all_changes["character_interaction_options_delta"] = character_deltas
 
-        return all_changes if all_changes else None
\ No newline at end of file
+        return all_changes if all_changes else None
+
+    def serialize(self, events_manager: GameEventsManagerModel) -> Dict[str, Any] | None:
+        """All the available interaction options as 'add' operations."""
+        indexed_options = _extract_and_index_character_interaction_options_from_model(events_manager)
+        character_deltas = {
+            char_id: [
+                {"op": "add", "condition_id": cond_id, **indexed_options[char_id][cond_id]}
+                for cond_id in sorted(indexed_options[char_id])
+            ]
+            for char_id in sorted(indexed_options)
+            if indexed_options[char_id]
+        }
+        return {"character_interaction_options_delta": character_deltas} if character_deltas else None
\ No newline at end of file
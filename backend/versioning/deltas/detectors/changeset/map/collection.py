@@ -1,5 +1,6 @@
 from typing import Dict, Any, List
 
+from core_game.change_tracking import same_content
 from core_game.map.schemas import GameMapModel, ConnectionModel
 from versioning.deltas.detectors.base import ChangeDetector
 from versioning.deltas.detectors.changeset.map.entity import ScenarioDetector, ConnectionInfoDetector
@@ -8,6 +9,33 @@ from versioning.deltas.detectors.protocols import PublicFieldsDetector
 
 # --- Helper function to avoid duplicating code ---
 
+def _added_scenario_op(id: str, model: Any, entity_detector: PublicFieldsDetector) -> Dict[str, Any]:
+    """The 'add' operation of a scenario, with its public fields and its connections."""
+    # 1. Obtenemos la lista de campos públicos desde el detector
+    public_fields_to_include = set(entity_detector.public_field_names)
+
+    # 2. Hacemos el volcado incluyendo SOLO esos campos
+    dumped = model.model_dump(include=public_fields_to_include)
+
+    # 3. Manejamos las conexiones de forma especial, como ya hacías
+    #    (Este es un caso especial que podrías refactorizar más adelante)
+    connections_data = model.connections
+    if connections_data:
+        dumped["connections"] = [
+            {"op": "add", "direction": str(direction), "value": conn_id}
+            for direction, conn_id in connections_data.items()
+            if conn_id is not None
+        ]
+    else:
+        dumped["connections"] = []
+
+    return {"op": "add", "id": id, **dumped}
+
+def _added_connection_op(id: str, model: Any, entity_detector: PublicFieldsDetector) -> Dict[str, Any]:
+    """The 'add' operation of a connection, with its public fields."""
+    dumped = model.model_dump(include=set(entity_detector.public_field_names))
+    return {"op": "add", "id": id, **dumped}
+
 def _process_scenarios(
     old_items: Dict[str, Any], 
     new_items: Dict[str, Any], 
@@ -20,27 +48,7 @@ def _process_scenarios(
     ops = []
     old_ids, new_ids = set(old_items), set(new_items)
     for id in sorted(new_ids - old_ids):
-        model = new_items[id]
-        
-        # 1. Obtenemos la lista de campos públicos desde el detector
-        public_fields_to_include = set(entity_detector.public_field_names)
-        
-        # 2. Hacemos el volcado incluyendo SOLO esos campos
-        dumped = model.model_dump(include=public_fields_to_include)
-
-        # 3. Manejamos las conexiones de forma especial, como ya hacías
-        #    (Este es un caso especial que podrías refactorizar más adelante)
-        connections_data = model.connections
-        if connections_data:
-            dumped["connections"] = [
-                {"op": "add", "direction": str(direction), "value": conn_id}
-                for direction, conn_id in connections_data.items()
-                if conn_id is not None
-            ]
-        else:
-            dumped["connections"] = []
-
-        ops.append({"op": "add", "id": id, **dumped})
+        ops.append(_added_scenario_op(id, new_items[id], entity_detector))
     
     # Removed items
     for id in sorted(old_ids - new_ids):
@@ -48,7 +56,7 @@ def _process_scenarios(
         
     # Modified items
     for id in sorted(old_ids & new_ids):
-        if old_items[id].model_dump() == new_items[id].model_dump():
+        if same_content(old_items[id], new_items[id]):
             continue
         entity_changes = entity_detector.detect(old_items[id], new_items[id])
         if entity_changes:
@@ -69,15 +77,7 @@ def _process_connections(
     old_ids, new_ids = set(old_items), set(new_items)
     
     for id in sorted(new_ids - old_ids):
-        model = new_items[id]
-        
-        # 1. Obtenemos la lista de campos públicos desde el detector
-        public_fields_to_include = set(entity_detector.public_field_names)
-        
-        # 2. Hacemos el volcado incluyendo SOLO esos campos
-        dumped = model.model_dump(include=public_fields_to_include)
-
-        ops.append({"op": "add", "id": id, **dumped})
+        ops.append(_added_connection_op(id, new_items[id], entity_detector))
     
     # Removed items
     for id in sorted(old_ids - new_ids):
@@ -85,7 +85,7 @@ def _process_connections(
         
     # Modified items
     for id in sorted(old_ids & new_ids):
-        if old_items[id].model_dump() == new_items[id].model_dump():
+        if same_content(old_items[id], new_items[id]):
             continue
         entity_changes = entity_detector.detect(old_items[id], new_items[id])
         if entity_changes:
@@ -123,4 +123,17 @@ class MapDetector(ChangeDetector[GameMapModel]):
         if connection_ops:
             final_changes["connections"] = connection_ops
             
+        return final_changes if final_changes else None
+
+    def serialize(self, game_map: GameMapModel) -> Dict[str, Any] | None:
+        """The whole map as 'add' operations, the same as detecting it against an empty map."""
+        final_changes = {}
+        if game_map.scenarios:
+            final_changes["scenarios"] = [
+                _added_scenario_op(id, game_map.scenarios[id], self.scenario_detector) for id in sorted(game_map.scenarios)
+            ]
+        if game_map.connections:
+            final_changes["connections"] = [
+                _added_connection_op(id, game_map.connections[id], self.connection_detector) for id in sorted(game_map.connections)
+            ]
         return final_changes if final_changes else None
\ No newline at end of file
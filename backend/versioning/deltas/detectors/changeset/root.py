@@ -47,4 +47,21 @@ class ChangesetDetector(ChangeDetector[ChangesetCheckpoint]):
             changes["events"] = events_changes # La clave en el changeset será "events" o "interactions"
 
         # Devolvemos el diccionario de cambios solo si hay alguno
+        return {"changes": changes} if changes else None
+
+    def serialize(self, checkpoint: ChangesetCheckpoint) -> Dict[str, Any] | None:
+        """
+        The full state of a checkpoint in the changeset format, as if detected against an empty
+        checkpoint, but built straight from its models without comparing anything.
+        """
+        changes: Dict[str, Any] = {}
+        map_changes = self.map_detector.serialize(checkpoint.map_snapshot)
+        if map_changes:
+            changes["map"] = map_changes
+        char_changes = self.characters_detector.serialize(checkpoint.characters_snapshot)
+        if char_changes:
+            changes["characters"] = char_changes
+        events_changes = self.game_events_detector.serialize(checkpoint.game_events_snapshot)
+        if events_changes:
+            changes["events"] = events_changes
         return {"changes": changes} if changes else None
\ No newline at end of file
@@ -1,3 +1,4 @@
+from core_game.change_tracking import same_content
 from versioning.deltas.detectors.base import ChangeDetector
 from core_game.character.schemas import CharacterBaseModel, CharactersModel
 from versioning.deltas.schemas import CharacterDiffModel
@@ -34,7 +35,7 @@ class InternalCharactersCollectionDetector(ChangeDetector[CharactersModel]):
         }
 
         for id in sorted(old_ids & new_ids):
-            if old_chars[id].model_dump() == new_chars[id].model_dump():
+            if same_content(old_chars[id], new_chars[id]):
                 continue
             
             diff_dict["modified"].append(id)
@@ -1,4 +1,5 @@
 
+from core_game.change_tracking import same_content
 from versioning.deltas.detectors.base import ChangeDetector
 from core_game.map.schemas import GameMapModel
 from versioning.deltas.schemas import ScenarioDiffModel
@@ -21,7 +22,7 @@ class InternalMapDetector(ChangeDetector[GameMapModel]):
         }
 
         for id in sorted(old_ids & new_ids):
-            if old_scenarios[id].model_dump() == new_scenarios[id].model_dump():
+            if same_content(old_scenarios[id], new_scenarios[id]):
                 continue
 
             diff_dict["modified"].append(id)
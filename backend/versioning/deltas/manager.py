@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import threading
 from copy import deepcopy
 from simulated.components.characters import SimulatedCharacters
 from simulated.components.map import SimulatedMap
@@ -16,28 +17,57 @@ from simulated.game_state import SimulatedGameState
 from typing import Any
 from uuid import uuid4
 from versioning.deltas.checkpoints.base import StateCheckpointBase
-from typing import Dict, Optional, Type
+from typing import Callable, Dict, Optional, Tuple, Type
 from versioning.deltas.detectors.changeset.root import ChangesetDetector
 from versioning.deltas.detectors.internal.root_internal import InternalDiffDetector
-from versioning.deltas.checkpoints.changeset import ChangesetCheckpoint
+from versioning.deltas.checkpoints.changeset import ChangesetCheckpoint, state_version
 from versioning.deltas.checkpoints.internal import InternalStateCheckpoint
 from versioning.deltas.schemas import DiffResultModel
+from versioning.deltas.store import CheckpointStore
 from core_game.game_event.schemas import GameEventsManagerModel
 
+
+class FullStateSnapshot:
+    """The full state changeset of one version of the state, and the checkpoint it was built from."""
+    __slots__ = ("version", "checkpoint_id", "changes", "_encoded", "_lock")
+
+    def __init__(self, version: tuple, checkpoint_id: str, changes: Dict[str, Any]):
+        self.version = version
+        self.checkpoint_id = checkpoint_id
+        self.changes = changes
+        self._encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def encoded_changes(self, format_name: str, encode: Callable[[Dict[str, Any]], bytes]) -> bytes:
+        """The changes encoded with `encode`, once per format for every client that asks for this version."""
+        with self._lock:
+            encoded = self._encoded.get(format_name)
+            if encoded is None:
+                encoded = self._encoded[format_name] = encode(self.changes)
+            return encoded
+
+
 class StateCheckpointManager:
     """
     Manages the lifecycle of checkpoints, holding a reference 
     to the game state it operates on.
+
+    Checkpoints live in a bounded CheckpointStore: the ones not used for a while, or the least
+    recently used when over the memory budget, are evicted unless pinned. Asking for an evicted
+    one raises CheckpointExpiredError.
     """
     
     def __init__(
         self,
         state: SimulatedGameState,
         default_changeset_detector: ChangesetDetector,
-        default_internal_diff_detector: InternalDiffDetector
+        default_internal_diff_detector: InternalDiffDetector,
+        store: Optional[CheckpointStore] = None
     ):
         self._state = state
-        self._checkpoints: Dict[str, StateCheckpointBase] = {}
+        self._checkpoints = store if store is not None else CheckpointStore()
+        self._full_state: Optional[FullStateSnapshot] = None
+        self._full_state_lock = threading.RLock()
         
         self._default_changeset_detector = default_changeset_detector
         self._default_internal_diff_detector = default_internal_diff_detector
@@ -45,7 +75,9 @@ class StateCheckpointManager:
     def create_checkpoint(
         self,
         checkpoint_type: Type[StateCheckpointBase],
-        checkpoint_id: Optional[str] = None
+        checkpoint_id: Optional[str] = None,
+        based_on: Optional[str] = None,
+        pinned: bool = False
     ) -> str:
         """
         Creates a checkpoint of a specific type from the stored game state.
@@ -53,6 +85,9 @@ class StateCheckpointManager:
         Args:
             checkpoint_type: The class of the checkpoint to create.
             checkpoint_id: An optional ID for the checkpoint.
+            based_on: An optional ID of an existing 'ChangesetCheckpoint'. Entities untouched
+                since that checkpoint are shared with it instead of being copied again.
+            pinned: Pinned checkpoints are never evicted and must be deleted by the caller.
         
         Returns:
             The ID of the created checkpoint.
@@ -63,7 +98,14 @@ class StateCheckpointManager:
         if checkpoint_id in self._checkpoints:
             raise RuntimeError(f"Checkpoint '{checkpoint_id}' already exists")
         
-        self._checkpoints[checkpoint_id] = checkpoint_type.create(self._state)
+        if based_on is not None:
+            base = self.get_checkpoint(based_on)
+            if checkpoint_type is not ChangesetCheckpoint or not isinstance(base, ChangesetCheckpoint):
+                raise TypeError("Only a 'ChangesetCheckpoint' can be based on another 'ChangesetCheckpoint'.")
+            checkpoint = ChangesetCheckpoint.create(self._state, base=base)
+        else:
+            checkpoint = checkpoint_type.create(self._state)
+        self._checkpoints.add(checkpoint_id, checkpoint, pinned=pinned)
         return checkpoint_id
 
     def get_checkpoint(self, checkpoint_id: str) -> StateCheckpointBase:
@@ -72,17 +114,55 @@ class StateCheckpointManager:
         
         Returns the base type. You may need to check its instance type
         if you need to access specific subclass fields.
+        Raises CheckpointExpiredError if it was evicted and CheckpointNotFoundError
+        (both RuntimeError) if it never existed or was deleted.
         """
-        if checkpoint_id not in self._checkpoints:
-            raise RuntimeError(f"Checkpoint '{checkpoint_id}' not found")
-        return self._checkpoints[checkpoint_id]
+        return self._checkpoints.get(checkpoint_id)
 
     def delete_checkpoint(self, checkpoint_id: str) -> None:
         """Removes a stored checkpoint to free up memory."""
-        if checkpoint_id in self._checkpoints:
-            del self._checkpoints[checkpoint_id]
-        else:
-            raise RuntimeError(f"Checkpoint '{checkpoint_id}' not found")
+        self._checkpoints.delete(checkpoint_id)
+
+    def get_full_state(self) -> Tuple[str, FullStateSnapshot]:
+        """
+        The full state in the changeset format and a new checkpoint of it for the caller.
+
+        The changeset is built once per version of the state, straight from a checkpoint of it
+        (see ChangesetDetector.serialize). Later calls for the same version only create a
+        checkpoint based on that one, which shares all its models, so a burst of clients
+        (re)connecting costs a single copy and serialization of the world.
+        """
+        with self._full_state_lock:
+            version = state_version(self._state)
+            snapshot = self._full_state
+            if snapshot is not None and snapshot.version == version:
+                try:
+                    return self.create_checkpoint(ChangesetCheckpoint, based_on=snapshot.checkpoint_id), snapshot
+                except RuntimeError:
+                    pass  # its checkpoint was evicted, build it again
+
+            self.invalidate_full_state()
+            base_id = self.create_checkpoint(ChangesetCheckpoint)
+            base = self.get_checkpoint(base_id)
+            assert isinstance(base, ChangesetCheckpoint)
+            changeset = self._default_changeset_detector.serialize(base)
+            snapshot = FullStateSnapshot(version, base_id, changeset.get("changes") if changeset else {})
+            self._full_state = snapshot
+            return self.create_checkpoint(ChangesetCheckpoint, based_on=base_id), snapshot
+
+    def invalidate_full_state(self) -> None:
+        """Forgets the cached full state (called after every commit)."""
+        with self._full_state_lock:
+            snapshot, self._full_state = self._full_state, None
+            if snapshot is not None:
+                try:
+                    self.delete_checkpoint(snapshot.checkpoint_id)
+                except RuntimeError:
+                    pass
+
+    def checkpoint_stats(self) -> Dict[str, int]:
+        """Number of checkpoints, bytes used and evictions of the checkpoint store."""
+        return self._checkpoints.stats()
 
 
     def generate_changeset(
@@ -95,7 +175,8 @@ class StateCheckpointManager:
         Generates a client-facing changeset.
 
         Compares the 'from_id' checkpoint against the 'to_id' checkpoint.
-        If 'to_id' is None, it compares against the current live state.
+        If 'to_id' is None, it compares against the current live state. In that case only
+        the entities touched since 'from_id' are compared when their change history is known.
         """
         cp_from_base = self.get_checkpoint(from_id)
         if not isinstance(cp_from_base, ChangesetCheckpoint):
@@ -108,7 +189,12 @@ class StateCheckpointManager:
                 raise TypeError("When 'to_id' is provided, it must also be a 'ChangesetCheckpoint'.")
             cp_to = cp_to_base
         else:
-            cp_to = ChangesetCheckpoint.create(self._state)
+            touched = cp_from.touched_since(self._state)
+            if touched is not None:
+                cp_from = cp_from.restricted_to(touched)
+                cp_to = ChangesetCheckpoint.create_partial(self._state, touched)
+            else:
+                cp_to = ChangesetCheckpoint.create(self._state)
 
         detector_to_use = detector_override if detector_override is not None else self._default_changeset_detector
                 
@@ -170,5 +256,5 @@ class StateCheckpointManager:
                 characters_snapshot=CharactersModel(),
             )
 
-        self._checkpoints[checkpoint_id] = empty_cp
+        self._checkpoints.add(checkpoint_id, empty_cp)
         return checkpoint_id
\ No newline at end of file
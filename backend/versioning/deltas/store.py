@@ -0,0 +1,186 @@
+"""
+Bounded in-memory store of state checkpoints.
+
+Every checkpoint is charged for the entity models (scenarios, connections, characters,
+events) it holds, measured as their serialized size. Checkpoints created `based_on` another
+share the untouched models with it, so a shared model is charged only once, for as long as
+any checkpoint still holds it.
+
+Checkpoints not used for `ttl_seconds` are dropped, and while the store is over its memory
+budget (or `max_checkpoints`) the least recently used ones are dropped too. Pinned
+checkpoints are never evicted: whoever pins one must delete it. The ids of evicted
+checkpoints are remembered for a while, so asking for one raises CheckpointExpiredError
+(the client must resync with the full state) instead of a plain "not found".
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+
+from pydantic import BaseModel
+
+from versioning.deltas.checkpoints.base import StateCheckpointBase
+
+DEFAULT_BUDGET_BYTES = int(os.getenv("CHECKPOINT_BUDGET_MB", "128")) * 1024 * 1024
+DEFAULT_TTL_SECONDS = float(os.getenv("CHECKPOINT_TTL_SECONDS", str(30 * 60)))
+DEFAULT_MAX_CHECKPOINTS = int(os.getenv("CHECKPOINT_MAX_COUNT", "256"))
+# How many evicted ids are remembered to answer "expired" instead of "not found"
+EXPIRED_IDS_KEPT = 1024
+
+
+class CheckpointNotFoundError(RuntimeError):
+    """The checkpoint never existed or was deleted."""
+
+
+class CheckpointExpiredError(CheckpointNotFoundError):
+    """The checkpoint was evicted: the client has to resync with the full state."""
+
+
+def _entity_models(checkpoint: StateCheckpointBase) -> Iterator[BaseModel]:
+    """The entity models held by a checkpoint, whatever its type."""
+    game_map = getattr(checkpoint, "map_snapshot", None)
+    if game_map is not None:
+        yield from game_map.scenarios.values()
+        yield from game_map.connections.values()
+    characters = getattr(checkpoint, "characters_snapshot", None)
+    if characters is not None:
+        yield from characters.registry.values()
+    events = getattr(checkpoint, "game_events_snapshot", None)
+    if events is not None:
+        yield from events.all_events.values()
+
+
+class _Entry:
+    __slots__ = ("checkpoint", "model_ids", "pinned", "last_access")
+
+    def __init__(self, checkpoint: StateCheckpointBase, model_ids: List[int], pinned: bool):
+        self.checkpoint = checkpoint
+        self.model_ids = model_ids
+        self.pinned = pinned
+        self.last_access = time.monotonic()
+
+
+class CheckpointStore:
+    """LRU/TTL store of checkpoints with a memory budget. See the module docstring."""
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_checkpoints: int = DEFAULT_MAX_CHECKPOINTS):
+        self.budget_bytes = budget_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_checkpoints = max_checkpoints
+
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # id(model) -> [holders, bytes]. A model is alive while it has holders, so its id can't be reused.
+        self._models: Dict[int, List[int]] = {}
+        self._used_bytes = 0
+        self._expired: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.RLock()
+        self.evictions = 0
+
+    @property
+    def used_bytes(self) -> int:
+        return self._used_bytes
+
+    def __contains__(self, checkpoint_id: str) -> bool:
+        with self._lock:
+            return checkpoint_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, checkpoint_id: str, checkpoint: StateCheckpointBase, pinned: bool = False) -> None:
+        """Stores a checkpoint, evicting others if needed. Raises RuntimeError if the id is taken."""
+        with self._lock:
+            if checkpoint_id in self._entries:
+                raise RuntimeError(f"Checkpoint '{checkpoint_id}' already exists")
+            model_ids = []
+            for model in _entity_models(checkpoint):
+                counted = self._models.get(id(model))
+                if counted is None:
+                    size = len(model.model_dump_json())
+                    self._models[id(model)] = [1, size]
+                    self._used_bytes += size
+                else:
+                    counted[0] += 1
+                model_ids.append(id(model))
+            self._entries[checkpoint_id] = _Entry(checkpoint, model_ids, pinned)
+            self._expired.pop(checkpoint_id, None)
+            self._evict(keep=checkpoint_id)
+
+    def get(self, checkpoint_id: str) -> StateCheckpointBase:
+        """Returns a checkpoint and marks it as used. Raises CheckpointExpiredError or CheckpointNotFoundError."""
+        with self._lock:
+            self._evict()
+            entry = self._entries.get(checkpoint_id)
+            if entry is None:
+                if checkpoint_id in self._expired:
+                    raise CheckpointExpiredError(f"Checkpoint '{checkpoint_id}' expired, resync with the full state")
+                raise CheckpointNotFoundError(f"Checkpoint '{checkpoint_id}' not found")
+            entry.last_access = time.monotonic()
+            self._entries.move_to_end(checkpoint_id)
+            return entry.checkpoint
+
+    def delete(self, checkpoint_id: str) -> None:
+        """Removes a checkpoint. Raises CheckpointNotFoundError if it isn't stored."""
+        with self._lock:
+            if checkpoint_id not in self._entries:
+                raise CheckpointNotFoundError(f"Checkpoint '{checkpoint_id}' not found")
+            self._remove(checkpoint_id)
+
+    def evict_expired(self) -> List[str]:
+        """Drops the checkpoints over their TTL or the budget. Returns their ids."""
+        with self._lock:
+            return self._evict()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "checkpoints": len(self._entries),
+                "pinned": sum(1 for entry in self._entries.values() if entry.pinned),
+                "used_bytes": self._used_bytes,
+                "budget_bytes": self.budget_bytes,
+                "shared_models": len(self._models),
+                "evictions": self.evictions,
+            }
+
+    # --- Internals ---
+
+    def _remove(self, checkpoint_id: str) -> None:
+        entry = self._entries.pop(checkpoint_id)
+        for model_id in entry.model_ids:
+            counted = self._models[model_id]
+            counted[0] -= 1
+            if counted[0] == 0:
+                del self._models[model_id]
+                self._used_bytes -= counted[1]
+
+    def _evict(self, keep: Optional[str] = None) -> List[str]:
+        """Evicts by TTL, then the least recently used until the store fits. Never evicts `keep` or pinned ones."""
+        evicted = []
+        deadline = time.monotonic() - self.ttl_seconds
+        for checkpoint_id, entry in list(self._entries.items()):
+            if entry.last_access >= deadline:
+                break  # ordered by last access
+            if not entry.pinned and checkpoint_id != keep:
+                evicted.append(checkpoint_id)
+                self._remove(checkpoint_id)
+
+        for checkpoint_id, entry in list(self._entries.items()):
+            if self._used_bytes <= self.budget_bytes and len(self._entries) <= self.max_checkpoints:
+                break
+            if not entry.pinned and checkpoint_id != keep:
+                evicted.append(checkpoint_id)
+                self._remove(checkpoint_id)
+
+        for checkpoint_id in evicted:
+            self._expired[checkpoint_id] = None
+            if len(self._expired) > EXPIRED_IDS_KEPT:
+                self._expired.popitem(last=False)
+        if evicted:
+            self.evictions += len(evicted)
+            print(f"[CheckpointStore] Evicted {len(evicted)} checkpoint(s), "
+                  f"{self._used_bytes / 1024:.0f} KiB in {len(self._entries)} remaining.")
+        return evicted
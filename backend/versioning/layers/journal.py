@@ -0,0 +1,98 @@
+"""
+Operation journal of a transaction layer.
+
+A layer forks a component the first time it writes to it, and from then on the domain
+collections touch their change logs for every entity they create, modify or delete. The journal
+of the layer is read from those logs: the entries after the revision the component was forked
+at, classified against the state it was forked from. Nothing is recorded while the transaction
+runs and reading the journal costs O(changes), so a rollback still just drops the layer.
+
+Components without per-entity change logs (relationships, narrative, session) are journaled as
+a whole.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, List, Literal, Optional
+
+from pydantic import BaseModel
+
+from core_game.change_tracking import ChangeLog
+
+JournalOp = Literal["create", "modify", "delete"]
+
+
+class JournalEntry(BaseModel):
+    op: JournalOp
+    component: str  # as in GameStateModel
+    kind: str  # scenario, connection, character, event... or the component name for whole-component entries
+    entity_id: Optional[str] = None
+    revision: int = 0  # global revision of the change, 0 for whole-component entries
+
+
+class ForkRecord:
+    """Revision a layer forked a component at, and the domain state it was forked from."""
+
+    def __init__(self, revision: int, source: Any):
+        self.revision = revision
+        self.source = source
+
+
+def _entity_entries(component: str, kind: str, log: ChangeLog, since: int,
+                    in_layer: Callable[[str], bool], in_source: Callable[[str], bool]) -> List[JournalEntry]:
+    entries = []
+    for entity_id, revision in log.revisions_since(since):
+        exists, existed = in_layer(entity_id), in_source(entity_id)
+        if exists:
+            op: JournalOp = "modify" if existed else "create"
+        elif existed:
+            op = "delete"
+        else:
+            continue  # created and deleted in the same layer
+        entries.append(JournalEntry(op=op, component=component, kind=kind, entity_id=entity_id, revision=revision))
+    return entries
+
+
+def _change_logs(component: str, state: Any) -> List[ChangeLog]:
+    if component == "game_map":
+        return [state.get_scenario_change_log(), state.get_connection_change_log()]
+    if component in ("characters", "game_events"):
+        return [state.get_change_log()]
+    return []
+
+
+def component_changed(component: str, state: Any, record: ForkRecord) -> bool:
+    """Whether a forked component was written after the fork. O(1), doesn't build the journal."""
+    logs = _change_logs(component, state)
+    if not logs:
+        return True
+    if any(log.last_revision > record.revision for log in logs):
+        return True
+    if component == "game_events":
+        return state.get_running_event_stack() != record.source.get_running_event_stack()
+    return False
+
+
+def component_journal(component: str, state: Any, record: ForkRecord) -> List[JournalEntry]:
+    """Journal of a forked component, oldest change first. `state` is the domain object the layer holds."""
+    source = record.source
+    if component == "game_map":
+        entries = _entity_entries(component, "scenario", state.get_scenario_change_log(), record.revision,
+                                  lambda i: state.find_scenario(i) is not None,
+                                  lambda i: source.find_scenario(i) is not None)
+        entries += _entity_entries(component, "connection", state.get_connection_change_log(), record.revision,
+                                   lambda i: state.get_connection_by_id(i) is not None,
+                                   lambda i: source.get_connection_by_id(i) is not None)
+        entries.sort(key=lambda entry: entry.revision)
+        return entries
+    if component == "characters":
+        return _entity_entries(component, "character", state.get_change_log(), record.revision,
+                               lambda i: state.find_character(i) is not None,
+                               lambda i: source.find_character(i) is not None)
+    if component == "game_events":
+        entries = _entity_entries(component, "event", state.get_change_log(), record.revision,
+                                  lambda i: state.find_event(i) is not None,
+                                  lambda i: source.find_event(i) is not None)
+        if state.get_running_event_stack() != source.get_running_event_stack():
+            entries.append(JournalEntry(op="modify", component=component, kind="running_event_stack"))
+        return entries
+    return [JournalEntry(op="modify", component=component, kind=component)]
@@ -1,9 +1,11 @@
 from __future__ import annotations
-from typing import Set, List, TYPE_CHECKING
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional, Set, List, TYPE_CHECKING
 
 
 if TYPE_CHECKING:
-    from core_game.game_state.singleton import GameStateSingleton
     from core_game.game_state.domain import GameState
 
 from simulated.components.map import SimulatedMap
@@ -13,13 +15,50 @@ from simulated.components.relationships import SimulatedRelationships
 from simulated.components.narrative import SimulatedNarrative
 from simulated.components.game_events import SimulatedGameEvents
 from versioning.layers.state import SimulationLayer # Importamos la clase SimulationLayer
+from versioning.layers.journal import JournalEntry
+
+
+class TransactionConflictError(RuntimeError):
+    """Raised when a branch is committed over components another branch changed in the meantime."""
+
+    def __init__(self, branch_name: str, components: Set[str]):
+        self.branch_name = branch_name
+        self.components = components
+        super().__init__(f"Branch '{branch_name}' conflicts on {sorted(components)}, it was discarded.")
+
+
+class TransactionBranch:
+    """A transaction opened next to the layer stack, with its own stack of nested layers."""
+
+    def __init__(self, name: str, root: SimulationLayer, component_versions: Dict[str, int]):
+        self.name = name
+        self.root = root
+        self.layers: List[SimulationLayer] = [root]
+        # Versions of the components when the branch was opened, for conflict detection
+        self.component_versions = component_versions
+
+    @property
+    def parent(self) -> Optional[SimulationLayer]:
+        return self.root.parent
+
+
+# Branch the current thread/task is working on (see GameStateVersionManager.use_branch)
+_bound_branch: ContextVar[Optional[TransactionBranch]] = ContextVar("bound_transaction_branch", default=None)
 
 class GameStateVersionManager:
     """
     Manages the versioning of the game state through layers (transactions).
     Its sole responsibility is to handle begin, commit, and rollback operations.
+
+    Besides the main stack of layers, work that runs concurrently can use branches: each
+    branch is a separate transaction on top of the current layer, and branches that wrote
+    the same component conflict when committed. Only writes are checked; work that reads
+    what another branch writes has to wait for it instead of running next to it.
     """
     def __init__(self, game_state: GameState):
+        # The domain state of the session this manager belongs to: commits are synced to it,
+        # whatever session is bound to the context that commits
+        self._game_state = game_state
         self._base_map = SimulatedMap(game_state.game_map)
         self._base_characters = SimulatedCharacters(game_state.characters)
         self._base_relationships = SimulatedRelationships(game_state.relationships)
@@ -27,6 +66,12 @@ class GameStateVersionManager:
         self._base_narrative = SimulatedNarrative(game_state.narrative_state)
         self._base_game_events = SimulatedGameEvents(game_state.game_events)
         self._layers: List[SimulationLayer] = []
+        # Called with the names of the GameStateModel components changed by each commit to the base state.
+        self._commit_listeners: List[Callable[[Set[str]], None]] = []
+        self._branches: Dict[str, TransactionBranch] = {}
+        # How many branch commits changed each component, to detect write conflicts between branches
+        self._component_versions: Dict[str, int] = {}
+        self._branch_lock = threading.Lock()
 
     @property
     def base_map(self) -> SimulatedMap:
@@ -52,71 +97,210 @@ class GameStateVersionManager:
     def base_game_events(self) -> SimulatedGameEvents:
         return self._base_game_events
 
+    def add_commit_listener(self, listener: Callable[[Set[str]], None]) -> None:
+        """Registers a callback run after every commit that reaches the base (domain) state."""
+        self._commit_listeners.append(listener)
+
     def begin_transaction(self):
         """Starts a new transaction layer."""
-        parent = self._layers[-1] if self._layers else None
-        self._layers.append(SimulationLayer(parent=parent, version_manager=self))
-
-    def commit(self):
-        """Commits the changes from the current layer to its parent or the base state."""
-        if not self._layers:
+        layers = self._current_layers()
+        parent = layers[-1] if layers else self._branch_parent()
+        layers.append(SimulationLayer(parent=parent, version_manager=self))
+
+    def commit(self) -> List[JournalEntry]:
+        """Commits the changes from the current layer to its parent or the base state. Returns its journal."""
+        layers = self._current_layers()
+        if not layers:
             raise RuntimeError("No simulation layer to commit.")
-        
-        layer = self._layers.pop()
-        parent = self._layers[-1] if self._layers else None
-
-        if layer.has_modified_map():
+        branch = self._bound_branch()
+        if branch is not None and len(layers) == 1:
+            raise RuntimeError(f"The root layer of branch '{branch.name}' is committed with commit_branch.")
+
+        layer = layers.pop()
+        parent = layers[-1] if layers else None
+        journal = layer.journal()
+        self._merge(layer, parent)
+        return journal
+
+    def rollback(self) -> List[JournalEntry]:
+        """Discards all changes in the current transaction layer. Returns the journal of what was discarded."""
+        layers = self._current_layers()
+        if not layers:
+            raise RuntimeError("No active simulation layers to rollback.")
+        branch = self._bound_branch()
+        if branch is not None and len(layers) == 1:
+            raise RuntimeError(f"The root layer of branch '{branch.name}' is discarded with rollback_branch.")
+        return layers.pop().journal()
+
+    def current_journal(self) -> List[JournalEntry]:
+        """Journal of the current transaction layer (empty outside transactions)."""
+        layer = self._current_layer()
+        return layer.journal() if layer else []
+
+    # --- BRANCHES ---
+
+    def begin_branch(self, name: str) -> TransactionBranch:
+        """
+        Opens a transaction next to the layer stack instead of on top of it, so several
+        branches can be worked on concurrently. The branch sees the state of the current top
+        layer; bind it with `use_branch` to make transactions and reads go through it.
+        """
+        if self._bound_branch() is not None:
+            raise RuntimeError("Branches can't be opened from inside another branch.")
+        with self._branch_lock:
+            if name in self._branches:
+                raise ValueError(f"Branch '{name}' already exists.")
+            parent = self._layers[-1] if self._layers else None
+            root = SimulationLayer(parent=parent, version_manager=self)
+            branch = TransactionBranch(name, root, dict(self._component_versions))
+            self._branches[name] = branch
+            return branch
+
+    def get_branch(self, name: str) -> TransactionBranch:
+        if name not in self._branches:
+            raise KeyError(f"Branch '{name}' not found.")
+        return self._branches[name]
+
+    @contextmanager
+    def use_branch(self, name: str) -> Iterator[TransactionBranch]:
+        """Routes the transactions and reads of the current context through the branch."""
+        branch = self.get_branch(name)
+        token = _bound_branch.set(branch)
+        try:
+            yield branch
+        finally:
+            _bound_branch.reset(token)
+
+    def commit_branch(self, name: str) -> Set[str]:
+        """
+        Merges the branch into the layer it was opened on (or the base state) and returns the
+        components it changed. Raises TransactionConflictError, discarding the branch, when
+        another branch committed changes to one of those components after this one was opened.
+        """
+        with self._branch_lock:
+            branch = self.get_branch(name)
+            if len(branch.layers) != 1:
+                raise RuntimeError(f"Branch '{name}' still has {len(branch.layers) - 1} open transaction(s).")
+            if branch.parent is not (self._layers[-1] if self._layers else None):
+                raise RuntimeError(f"The layer branch '{name}' was opened on is no longer the current one.")
+            del self._branches[name]
+
+            changed = branch.root.changed_components()
+            conflicts = {
+                component for component in changed
+                if self._component_versions.get(component, 0) != branch.component_versions.get(component, 0)
+            }
+            if conflicts:
+                raise TransactionConflictError(name, conflicts)
+
+            self._merge(branch.root, branch.parent)
+            for component in changed:
+                self._component_versions[component] = self._component_versions.get(component, 0) + 1
+            return changed
+
+    def rollback_branch(self, name: str) -> None:
+        """Discards the branch and every change made in it."""
+        with self._branch_lock:
+            self.get_branch(name)
+            del self._branches[name]
+
+    def _bound_branch(self) -> Optional[TransactionBranch]:
+        branch = _bound_branch.get()
+        if branch is not None and self._branches.get(branch.name) is branch:
+            return branch
+        return None
+
+    def _current_layers(self) -> List[SimulationLayer]:
+        branch = self._bound_branch()
+        return branch.layers if branch is not None else self._layers
+
+    def _branch_parent(self) -> Optional[SimulationLayer]:
+        branch = self._bound_branch()
+        return branch.parent if branch is not None else None
+
+    def _merge(self, layer: SimulationLayer, parent: Optional[SimulationLayer]) -> None:
+        """
+        Moves the changes of `layer` into `parent`, or into the base (and domain) state if None.
+        Components the layer forked for writing but left untouched (per its journal) are skipped,
+        so they don't replace the parent's, reach the domain or notify the commit listeners.
+        """
+        committed: Set[str] = set()
+
+        if layer.has_modified_map() and layer.has_changes("game_map"):
+            previous_map = parent.map if parent else self._base_map
+            layer.get_modified_map().get_state().adopt_change_history(previous_map.get_state())
             if parent:
                 parent.set_modified_map(layer.get_modified_map())
+                parent.adopt_fork_record("game_map", layer)
             else:
                 self._base_map = layer.get_modified_map()
                 self._sync_map_to_domain()
+                committed.add("game_map")
 
-        if layer.has_modified_characters():
+        if layer.has_modified_characters() and layer.has_changes("characters"):
+            previous_characters = parent.characters if parent else self._base_characters
+            layer.get_modified_characters().get_state().adopt_change_history(previous_characters.get_state())
             if parent:
                 parent.set_modified_characters(layer.get_modified_characters())
+                parent.adopt_fork_record("characters", layer)
             else:
                 self._base_characters = layer.get_modified_characters()
                 self._sync_characters_to_domain()
+                committed.add("characters")
 
-        if layer.has_modified_relationships():
+        if layer.has_modified_relationships() and layer.has_changes("relationships"):
             if parent:
                 parent.set_modified_relationships(layer.get_modified_relationships())
+                parent.adopt_fork_record("relationships", layer)
             else:
                 self._base_relationships = layer.get_modified_relationships()
                 self._sync_relationships_to_domain()
+                committed.add("relationships")
 
-        if layer.has_modified_narrative():
+        if layer.has_modified_narrative() and layer.has_changes("narrative_state"):
             if parent:
                 parent.set_modified_narrative(layer.get_modified_narrative())
+                parent.adopt_fork_record("narrative_state", layer)
             else:
                 self._base_narrative = layer.get_modified_narrative()
                 self._sync_narrative_to_domain()
-
-        if layer.has_modified_game_events():
+                committed.add("narrative_state")
+
+        if layer.has_modified_game_events() and layer.has_changes("game_events"):
+            previous_game_events = parent.game_events if parent else self._base_game_events
+            events_state = layer.get_modified_game_events().get_state()
+            events_state.adopt_change_history(previous_game_events.get_state())
+            if parent is None or parent.has_modified_game_events():
+                # previous_game_events is replaced below
+                events_state.take_over_events(previous_game_events.get_state())
             if parent:
                 parent.set_modified_game_events(layer.get_modified_game_events())
+                parent.adopt_fork_record("game_events", layer)
             else:
                 self._base_game_events = layer.get_modified_game_events()
                 self._sync_game_events_to_domain()
+                committed.add("game_events")
 
-        if layer.has_modified_session():
+        if layer.has_modified_session() and layer.has_changes("session"):
             if parent:
                 parent.set_modified_session(layer.get_modified_session())
+                parent.adopt_fork_record("session", layer)
             else:
                 self._base_session = layer.get_modified_session()
                 self._sync_session_to_domain()
+                committed.add("session")
 
-    def rollback(self):
-        """Discards all changes in the current transaction layer."""
-        if not self._layers:
-            raise RuntimeError("No active simulation layers to rollback.")
-        self._layers.pop()
+        if committed:
+            for listener in self._commit_listeners:
+                listener(committed)
 
+    def _current_layer(self) -> Optional[SimulationLayer]:
+        layers = self._current_layers()
+        return layers[-1] if layers else None
 
     def get_current_map(self, for_writing: bool = False) -> SimulatedMap:
         """Gets the current map state. If for_writing, ensures it's a mutable copy."""
-        layer = self._layers[-1] if self._layers else None
+        layer = self._current_layer()
         if not layer:
             return self._base_map
         
@@ -124,7 +308,7 @@ class GameStateVersionManager:
 
     def get_current_characters(self, for_writing: bool = False) -> SimulatedCharacters:
         """Gets the current characters state. If for_writing, ensures it's a mutable copy."""
-        layer = self._layers[-1] if self._layers else None
+        layer = self._current_layer()
         if not layer:
             return self._base_characters
 
@@ -132,7 +316,7 @@ class GameStateVersionManager:
 
     def get_current_session(self, for_writing: bool = False) -> SimulatedGameSession:
         """Gets the current session state. If for_writing, ensures it's a mutable copy."""
-        layer = self._layers[-1] if self._layers else None
+        layer = self._current_layer()
         if not layer:
             return self._base_session
 
@@ -140,52 +324,40 @@ class GameStateVersionManager:
 
     def get_current_relationships(self, for_writing: bool = False) -> SimulatedRelationships:
         """Gets the current relationships state. If for_writing, ensures it's a mutable copy."""
-        layer = self._layers[-1] if self._layers else None
+        layer = self._current_layer()
         if not layer:
             return self._base_relationships
 
         return layer.modify_relationships() if for_writing else layer.relationships
 
     def get_current_narrative(self, for_writing: bool = False) -> SimulatedNarrative:
-        layer = self._layers[-1] if self._layers else None
+        layer = self._current_layer()
         if not layer:
             return self._base_narrative
 
         return layer.modify_narrative() if for_writing else layer.narrative
     
     def get_current_game_events(self, for_writing: bool = False) -> SimulatedGameEvents:
-        layer = self._layers[-1] if self._layers else None
+        layer = self._current_layer()
         if not layer:
             return self._base_game_events
 
         return layer.modify_game_events() if for_writing else layer.game_events
 
     def _sync_map_to_domain(self):
-        from core_game.game_state.singleton import GameStateSingleton
-        game_state = GameStateSingleton.get_instance()
-        game_state.update_map(self._base_map.get_state())
+        self._game_state.update_map(self._base_map.get_state())
 
     def _sync_characters_to_domain(self):
-        from core_game.game_state.singleton import GameStateSingleton
-        game_state = GameStateSingleton.get_instance()
-        game_state.update_characters(self._base_characters.get_state())
+        self._game_state.update_characters(self._base_characters.get_state())
 
     def _sync_session_to_domain(self):
-        from core_game.game_state.singleton import GameStateSingleton
-        game_state = GameStateSingleton.get_instance()
-        game_state.update_session(self._base_session.get_state())
+        self._game_state.update_session(self._base_session.get_state())
 
     def _sync_relationships_to_domain(self):
-        from core_game.game_state.singleton import GameStateSingleton
-        game_state = GameStateSingleton.get_instance()
-        game_state.update_relationships(self._base_relationships.get_state())
+        self._game_state.update_relationships(self._base_relationships.get_state())
 
     def _sync_narrative_to_domain(self):
-        from core_game.game_state.singleton import GameStateSingleton
-        game_state = GameStateSingleton.get_instance()
-        game_state.update_narrative_state(self._base_narrative.get_state())
+        self._game_state.update_narrative_state(self._base_narrative.get_state())
 
     def _sync_game_events_to_domain(self):
-        from core_game.game_state.singleton import GameStateSingleton
-        game_state = GameStateSingleton.get_instance()
-        game_state.update_game_events(self._base_game_events.get_state())
\ No newline at end of file
+        self._game_state.update_game_events(self._base_game_events.get_state())
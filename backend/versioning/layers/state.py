@@ -1,15 +1,20 @@
-from typing import Optional, TYPE_CHECKING
+from typing import Any, Dict, List, Optional, Set, TYPE_CHECKING
+from core_game.change_tracking import current_revision
 from simulated.components.map import SimulatedMap
 from simulated.components.characters import SimulatedCharacters
 from simulated.components.game_session import SimulatedGameSession
 from simulated.components.relationships import SimulatedRelationships
 from simulated.components.narrative import SimulatedNarrative
 from simulated.components.game_events import SimulatedGameEvents
+from versioning.layers.journal import ForkRecord, JournalEntry, component_changed, component_journal
 if TYPE_CHECKING:
     from versioning.layers.manager import GameStateVersionManager
     from simulated.game_state import SimulatedGameState
 from copy import deepcopy
 
+# Component names as in GameStateModel, in journal order
+COMPONENTS = ("game_map", "characters", "relationships", "narrative_state", "game_events", "session")
+
 class SimulationLayer:
     def __init__(
         self, 
@@ -24,6 +29,8 @@ class SimulationLayer:
         self._session: Optional[SimulatedGameSession] = None
         self._narrative: Optional[SimulatedNarrative] = None
         self._game_events: Optional[SimulatedGameEvents] = None
+        # component -> when and from what it was forked, to read the journal of the layer
+        self._fork_records: Dict[str, ForkRecord] = {}
 
     @property
     def map(self) -> SimulatedMap:
@@ -81,34 +88,87 @@ class SimulationLayer:
         
     def modify_map(self) -> SimulatedMap:
         if self._map is None:
-            self._map = deepcopy(self.map)
+            self._record_fork("game_map", self.map.get_state())
+            self._map = self.map.fork()
         return self._map
 
     def modify_characters(self) -> SimulatedCharacters:
         if self._characters is None:
-            self._characters = deepcopy(self.characters)
+            self._record_fork("characters", self.characters.get_state())
+            self._characters = self.characters.fork()
         return self._characters
 
     def modify_session(self) -> SimulatedGameSession:
         if self._session is None:
+            self._record_fork("session", self.session.get_state())
             self._session = deepcopy(self.session)
         return self._session
 
     def modify_relationships(self) -> SimulatedRelationships:
         if self._relationships is None:
-            self._relationships = deepcopy(self.relationships)
+            self._record_fork("relationships", self.relationships.get_state())
+            self._relationships = self.relationships.fork()
         return self._relationships
 
     def modify_narrative(self) -> SimulatedNarrative:
         if self._narrative is None:
+            self._record_fork("narrative_state", self.narrative.get_state())
             self._narrative = deepcopy(self.narrative)
         return self._narrative
     
     def modify_game_events(self) -> SimulatedGameEvents:
         if self._game_events is None:
-            self._game_events = deepcopy(self.game_events)
+            self._record_fork("game_events", self.game_events.get_state())
+            self._game_events = self.game_events.fork()
         return self._game_events
 
+    def _record_fork(self, component: str, source_state: Any) -> None:
+        self._fork_records[component] = ForkRecord(current_revision(), source_state)
+
+    def adopt_fork_record(self, component: str, child: 'SimulationLayer') -> None:
+        """Called when the changes of `child` to a component are merged into this layer."""
+        if component not in self._fork_records:
+            self._fork_records[component] = child._fork_records[component]
+
+    def _component_state(self, component: str) -> Any:
+        components = {
+            "game_map": self._map,
+            "characters": self._characters,
+            "relationships": self._relationships,
+            "narrative_state": self._narrative,
+            "game_events": self._game_events,
+            "session": self._session,
+        }
+        component_state = components[component]
+        assert component_state is not None, f"Component '{component}' was not modified in this layer."
+        return component_state.get_state()
+
+    def has_changes(self, component: str) -> bool:
+        """Whether the layer wrote the component, not just forked it for writing."""
+        return component in self._fork_records and component_changed(
+            component, self._component_state(component), self._fork_records[component]
+        )
+
+    def changed_components(self) -> Set[str]:
+        """Modified components that were actually written (see has_changes)."""
+        return {component for component in self.modified_components() if self.has_changes(component)}
+
+    def journal(self) -> List[JournalEntry]:
+        """
+        Operations of this layer (and of the layers committed into it) per entity, oldest first,
+        followed by the components journaled as a whole. See versioning.layers.journal.
+        """
+        entries: List[JournalEntry] = []
+        whole_components: List[JournalEntry] = []
+        for component in COMPONENTS:
+            record = self._fork_records.get(component)
+            if record is None:
+                continue
+            for entry in component_journal(component, self._component_state(component), record):
+                (entries if entry.entity_id is not None else whole_components).append(entry)
+        entries.sort(key=lambda entry: entry.revision)
+        return entries + whole_components
+
     def has_modified_map(self) -> bool:
         return self._map is not None
 
@@ -133,6 +193,18 @@ class SimulationLayer:
     def has_modified_game_events(self) -> bool:
         return self._game_events is not None
 
+    def modified_components(self) -> Set[str]:
+        """Names (as in GameStateModel) of the components modified in this layer."""
+        modified = {
+            "game_map": self.has_modified_map(),
+            "characters": self.has_modified_characters(),
+            "relationships": self.has_modified_relationships(),
+            "narrative_state": self.has_modified_narrative(),
+            "game_events": self.has_modified_game_events(),
+            "session": self.has_modified_session(),
+        }
+        return {name for name, is_modified in modified.items() if is_modified}
+
     def get_modified_characters(self) -> SimulatedCharacters:
         return self._characters or self.characters
 
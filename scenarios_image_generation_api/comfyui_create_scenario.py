@@ -1,72 +1,97 @@
+import asyncio
 import uuid
 import json
-import urllib.request
-import urllib.parse
 import base64
 import random
-from PIL import Image
+import copy
 import os
-import asyncio
+from functools import lru_cache
+import httpx
 import websockets  # Asegúrate de instalarlo: pip install websockets
 from schemas import GenerationRequest
 
-def queue_prompt(prompt, server_address, client_id):
-    data = json.dumps({"prompt": prompt, "client_id": client_id}).encode('utf-8')
-    req = urllib.request.Request(f"http://{server_address}/prompt", data=data)
-    return json.loads(urllib.request.urlopen(req).read())
+WORKFLOW_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "workflows", "api_create_scenario.json")
 
-def get_history(prompt_id, server_address):
-    with urllib.request.urlopen(f"http://{server_address}/history/{prompt_id}") as response:
-        return json.loads(response.read())
-
-def get_image(filename, subfolder, folder_type, server_address):
-    params = urllib.parse.urlencode({
-        "filename": filename,
-        "subfolder": subfolder,
-        "type": folder_type
-    })
-    with urllib.request.urlopen(f"http://{server_address}/view?{params}") as response:
-        return response.read()
-
-async def generate_image(req: GenerationRequest, server_address: str):
-    client_id = str(uuid.uuid4())
+@lru_cache(maxsize=1)
+def _workflow_template() -> dict:
+    # Parsed once per process, every request works on its own deep copy
+    with open(WORKFLOW_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
 
+def build_workflow(req: GenerationRequest) -> dict:
     # Prompts
     general_positive_prompt = f"{req.graphic_style}. The scene depicts a {req.scene_summary}. Viewed from a human eye-level perspective. The foreground, covering the bottom 20% of the image, is a clearly visible, walkable ground made of {req.ground_detail}. It is visually separated from the rest of the scene by a sharp horizontal transition. In the background, {req.scene_detail}."
     ground_positive_prompt = f"{req.graphic_style}. Walkable, flat, homogeneous ground made of {req.ground_summary}. No obstacles, clean and continuous"
 
-    # Load workflow
-    with open("workflows/api_create_scenario.json", "r", encoding="utf-8") as f:
-        workflow = json.load(f)
+    workflow = copy.deepcopy(_workflow_template())
 
     # Modify nodes
     workflow["16"]["inputs"]["text"] = general_positive_prompt
     workflow["61"]["inputs"]["text"] = ground_positive_prompt
     workflow["3"]["inputs"]["seed"] = random.randint(1, 1000000000)
+    return workflow
+
+async def queue_prompt(http: httpx.AsyncClient, prompt, server_address, client_id):
+    response = await http.post(f"http://{server_address}/prompt", json={"prompt": prompt, "client_id": client_id})
+    response.raise_for_status()
+    return response.json()
 
-    # Send prompt first
-    prompt_response = queue_prompt(workflow, server_address, client_id)
-    prompt_id = prompt_response['prompt_id']
+async def cancel_prompt(http: httpx.AsyncClient, prompt_id, server_address):
+    # Removes the prompt from the queue if it is still waiting, and interrupts it if it is running
+    await http.post(f"http://{server_address}/queue", json={"delete": [prompt_id]})
+    await http.post(f"http://{server_address}/interrupt", json={"prompt_id": prompt_id})
 
-    # Async WebSocket connection
+async def get_history(http: httpx.AsyncClient, prompt_id, server_address):
+    response = await http.get(f"http://{server_address}/history/{prompt_id}")
+    response.raise_for_status()
+    return response.json()
+
+async def get_image(http: httpx.AsyncClient, filename, subfolder, folder_type, server_address):
+    params = {
+        "filename": filename,
+        "subfolder": subfolder,
+        "type": folder_type
+    }
+    response = await http.get(f"http://{server_address}/view", params=params)
+    response.raise_for_status()
+    return response.content
+
+async def generate_image(req: GenerationRequest, server_address: str, http: httpx.AsyncClient):
+    client_id = str(uuid.uuid4())
+    workflow = build_workflow(req)
+
+    # Connect the websocket before queueing, so the completion message can't be missed
     async with websockets.connect(f"ws://{server_address}/ws?clientId={client_id}") as ws:
-        while True:
-            out = await ws.recv()
-            if isinstance(out, str):
-                message = json.loads(out)
-                if message['type'] == 'executing':
-                    if message['data']['node'] is None and message['data']['prompt_id'] == prompt_id:
-                        break
+        prompt_response = await queue_prompt(http, workflow, server_address, client_id)
+        prompt_id = prompt_response['prompt_id']
+
+        try:
+            while True:
+                out = await ws.recv()
+                if isinstance(out, str):
+                    message = json.loads(out)
+                    if message['type'] == 'executing':
+                        if message['data']['node'] is None and message['data']['prompt_id'] == prompt_id:
+                            break
+        except asyncio.CancelledError:
+            # Timed out (or the request was dropped): don't leave the prompt running on the server
+            try:
+                await cancel_prompt(http, prompt_id, server_address)
+            except (httpx.HTTPError, OSError) as e:
+                print(f"Couldn't cancel prompt {prompt_id} on {server_address}: {e!r}")
+            raise
 
     # Get result
-    history = get_history(prompt_id, server_address)[prompt_id]
+    history = (await get_history(http, prompt_id, server_address))[prompt_id]
     output_images = []
     for node in history["outputs"]:
         imgs = history["outputs"][node].get("images", [])
         for image in imgs:
-            img_data = get_image(image['filename'], image['subfolder'], image['type'], server_address)
+            img_data = await get_image(http, image['filename'], image['subfolder'], image['type'], server_address)
             output_images.append(img_data)
 
+    if not output_images:
+        raise RuntimeError(f"ComfyUI at {server_address} returned no images for prompt {prompt_id}")
     image_bytes = output_images[0]
 
     # Delete image from server
@@ -77,4 +102,4 @@ async def generate_image(req: GenerationRequest, server_address: str):
     except Exception as e:
         print(f"Couldn't delete the image: {image_path}. Error: {e}")
 
-    return base64.b64encode(image_bytes).decode("utf-8")
\ No newline at end of file
+    return base64.b64encode(image_bytes).decode("utf-8")
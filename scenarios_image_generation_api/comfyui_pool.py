@@ -0,0 +1,203 @@
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Sequence
+import httpx
+import websockets
+from schemas import GenerationRequest
+from comfyui_create_scenario import generate_image
+
+GenerateFn = Callable[[GenerationRequest, str, httpx.AsyncClient], Awaitable[str]]
+
+
+class NoBackendAvailableError(RuntimeError):
+    """No healthy backend had a free slot before the acquire timeout."""
+
+
+class ComfyUIBackend:
+    """One ComfyUI server and how many prompts it may run at once."""
+
+    def __init__(self, address: str, max_concurrency: int = 1):
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1 for {address}")
+        self.address = address
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.healthy = True  # optimistic until the first health check
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def load(self) -> float:
+        return self.in_flight / self.max_concurrency
+
+    @property
+    def has_capacity(self) -> bool:
+        return self.healthy and self.in_flight < self.max_concurrency
+
+    def status(self) -> dict:
+        return {
+            "address": self.address,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+def parse_backends(spec: str, default_concurrency: int = 1) -> List[ComfyUIBackend]:
+    """
+    Parses a comma separated list of ComfyUI servers. Each entry is "host:port", optionally
+    followed by "=N" to allow N concurrent prompts on it, e.g. "127.0.0.1:3020=2,10.0.0.5:3020".
+    """
+    backends = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        address, _, concurrency = entry.partition("=")
+        backends.append(ComfyUIBackend(address.strip(), int(concurrency) if concurrency else default_concurrency))
+    if not backends:
+        raise ValueError("At least one ComfyUI server is required")
+    return backends
+
+
+class ComfyUIWorkerPool:
+    """
+    Dispatches generation requests over several ComfyUI servers.
+
+    Every request goes to the healthy backend with the lowest load that still has a free slot,
+    and waits (first come, first served) while all of them are full. Backends are health checked
+    periodically; a backend failing at transport level is taken out until it answers again, and
+    its request is retried on another one. A request running longer than `request_timeout` is
+    cancelled on its backend (which is busy, not broken, so it stays in) and retried. Waiting for
+    a slot gives up with NoBackendAvailableError after `acquire_timeout`.
+    """
+
+    def __init__(self, backends: List[ComfyUIBackend], health_check_interval: float = 15.0,
+                 request_timeout: float = 600.0, max_attempts: int = 2,
+                 generate: GenerateFn = generate_image, acquire_timeout: float = 120.0):
+        self.backends = backends
+        self.health_check_interval = health_check_interval
+        self.request_timeout = request_timeout
+        self.acquire_timeout = acquire_timeout
+        self.max_attempts = max_attempts
+        self._generate = generate
+        self._capacity = asyncio.Condition()
+        self._http: Optional[httpx.AsyncClient] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._http = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=5.0))
+        await self.check_health()
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def stop(self):
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        if self._http:
+            await self._http.aclose()
+            self._http = None
+
+    async def submit(self, req: GenerationRequest) -> str:
+        """Generates the image on the least loaded backend and returns it base64 encoded."""
+        last_error: Optional[Exception] = None
+        tried: List[ComfyUIBackend] = []
+        for attempt in range(self.max_attempts):
+            backend = await self._acquire(avoid=tried)
+            tried.append(backend)
+            try:
+                assert self._http is not None, "Pool not started"
+                image_base64 = await asyncio.wait_for(
+                    self._generate(req, backend.address, self._http), self.request_timeout
+                )
+                backend.completed += 1
+                return image_base64
+            except asyncio.TimeoutError as e:
+                # generate_image cancels the prompt on the server when it is cancelled by the timeout
+                print(f"⚠️ ComfyUI {backend.address} timed out after {self.request_timeout}s "
+                      f"(attempt {attempt + 1}/{self.max_attempts}), prompt cancelled")
+                backend.failed += 1
+                last_error = e
+            except (httpx.TransportError, websockets.exceptions.WebSocketException, OSError) as e:
+                # The server itself is in trouble: stop sending it work until it is healthy again
+                print(f"⚠️ ComfyUI {backend.address} failed (attempt {attempt + 1}/{self.max_attempts}): {e!r}")
+                backend.failed += 1
+                backend.healthy = False
+                last_error = e
+            except Exception as e:
+                backend.failed += 1
+                last_error = e
+                break
+            finally:
+                await self._release(backend)
+        assert last_error is not None
+        raise last_error
+
+    async def preload(self, req: GenerationRequest):
+        """Runs one request on every backend so each loads its models before real traffic arrives."""
+        assert self._http is not None, "Pool not started"
+        http = self._http
+
+        async def _preload(backend: ComfyUIBackend):
+            try:
+                await self._generate(req, backend.address, http)
+                print(f"✅ Preload complete on {backend.address}.")
+            except Exception as e:
+                print(f"⚠️ Preload failed on {backend.address}: {e}")
+
+        await asyncio.gather(*(_preload(b) for b in self.backends))
+
+    async def check_health(self):
+        async def _check(backend: ComfyUIBackend) -> bool:
+            assert self._http is not None
+            try:
+                response = await self._http.get(f"http://{backend.address}/system_stats", timeout=5.0)
+                return response.status_code == 200
+            except (httpx.HTTPError, OSError):
+                return False
+
+        results = await asyncio.gather(*(_check(b) for b in self.backends))
+        async with self._capacity:
+            for backend, healthy in zip(self.backends, results):
+                if backend.healthy != healthy:
+                    print(f"ComfyUI {backend.address} is now {'healthy' if healthy else 'unhealthy'}")
+                backend.healthy = healthy
+            self._capacity.notify_all()
+
+    def status(self) -> List[dict]:
+        return [b.status() for b in self.backends]
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                print(f"⚠️ Health check failed: {e}")
+
+    async def _acquire(self, avoid: Sequence[ComfyUIBackend] = ()) -> ComfyUIBackend:
+        """Takes a slot on the least loaded backend, preferring those not in `avoid` (already tried)."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.acquire_timeout
+        async with self._capacity:
+            while True:
+                candidates = [b for b in self.backends if b.has_capacity]
+                if candidates:
+                    backend = min(candidates, key=lambda b: (b in avoid, b.load))
+                    backend.in_flight += 1
+                    return backend
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise NoBackendAvailableError(
+                        f"No ComfyUI backend available after {self.acquire_timeout}s: {self.status()}"
+                    )
+                try:
+                    await asyncio.wait_for(self._capacity.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass  # checked again at the top of the loop
+
+    async def _release(self, backend: ComfyUIBackend):
+        async with self._capacity:
+            backend.in_flight -= 1
+            self._capacity.notify()
@@ -0,0 +1,106 @@
+"""
+Minimal stand-in for a ComfyUI server, to exercise the worker pool without a GPU.
+
+It implements the endpoints the pool uses (/prompt, /ws, /history, /view, /system_stats,
+/queue and /interrupt) and
+"renders" every prompt by waiting FAKE_COMFYUI_DELAY seconds and returning a 1x1 PNG.
+Run several on different ports and point COMFYUI_SERVERS at them:
+
+    uvicorn fake_comfyui:app --port 3021
+    FAKE_COMFYUI_DELAY=5 uvicorn fake_comfyui:app --port 3022
+    COMFYUI_SERVERS=127.0.0.1:3021,127.0.0.1:3022=2 uvicorn main:app --port 5050
+"""
+import asyncio
+import base64
+import os
+import uuid
+from typing import Dict
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response
+
+FAKE_DELAY = float(os.getenv("FAKE_COMFYUI_DELAY", "1"))
+# Only one prompt runs at a time, like a real single-GPU ComfyUI
+FAKE_PARALLEL_PROMPTS = int(os.getenv("FAKE_COMFYUI_PARALLEL_PROMPTS", "1"))
+
+PNG_1X1 = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+
+app = FastAPI()
+
+_sockets: Dict[str, WebSocket] = {}
+_history: Dict[str, dict] = {}
+_running: Dict[str, asyncio.Task] = {}
+_gpu = asyncio.Semaphore(FAKE_PARALLEL_PROMPTS)
+
+
+async def _run_prompt(prompt_id: str, client_id: str):
+    try:
+        async with _gpu:
+            await asyncio.sleep(FAKE_DELAY)
+    except asyncio.CancelledError:
+        print(f"Prompt {prompt_id} cancelled")
+        return
+    finally:
+        _running.pop(prompt_id, None)
+    filename = f"{prompt_id}.png"
+    _history[prompt_id] = {"outputs": {"74": {"images": [{"filename": filename, "subfolder": "", "type": "output"}]}}}
+    ws = _sockets.get(client_id)
+    if ws:
+        await ws.send_json({"type": "executing", "data": {"node": None, "prompt_id": prompt_id}})
+
+
+@app.get("/system_stats")
+async def system_stats():
+    return {"system": {"fake": True}, "devices": []}
+
+
+@app.post("/prompt")
+async def queue_prompt(payload: dict):
+    prompt_id = str(uuid.uuid4())
+    _running[prompt_id] = asyncio.create_task(_run_prompt(prompt_id, payload.get("client_id", "")))
+    return {"prompt_id": prompt_id, "number": len(_history)}
+
+
+@app.post("/queue")
+async def manage_queue(payload: dict):
+    for prompt_id in payload.get("delete", []):
+        task = _running.get(prompt_id)
+        if task:
+            task.cancel()
+    return {}
+
+
+@app.post("/interrupt")
+async def interrupt(payload: dict):
+    task = _running.get(payload.get("prompt_id", ""))
+    if task:
+        task.cancel()
+    return {}
+
+
+@app.get("/history/{prompt_id}")
+async def history(prompt_id: str):
+    if prompt_id not in _history:
+        return {}
+    return {prompt_id: _history[prompt_id]}
+
+
+@app.get("/view")
+async def view(filename: str, subfolder: str = "", type: str = "output"):
+    if filename.removesuffix(".png") not in _history:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return Response(content=PNG_1X1, media_type="image/png")
+
+
+@app.websocket("/ws")
+async def websocket(ws: WebSocket, clientId: str):
+    await ws.accept()
+    _sockets[clientId] = ws
+    try:
+        while True:
+            await ws.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        _sockets.pop(clientId, None)
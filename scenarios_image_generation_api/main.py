@@ -1,34 +1,36 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from schemas import GenerationRequest
-import asyncio
-from comfyui_create_scenario import generate_image
+import os
+from comfyui_pool import ComfyUIWorkerPool, NoBackendAvailableError, parse_backends
 
 app = FastAPI()
 
-# Single ComfyUI server
-COMFYUI_SERVER = "127.0.0.1:3020"
+# ComfyUI servers, "host:port[=max_concurrent_prompts]" separated by commas
+COMFYUI_SERVERS = os.getenv("COMFYUI_SERVERS", "127.0.0.1:3020")
+COMFYUI_MAX_CONCURRENCY = int(os.getenv("COMFYUI_MAX_CONCURRENCY", "1"))
 
-generation_queue = asyncio.Queue()
+pool = ComfyUIWorkerPool(
+    parse_backends(COMFYUI_SERVERS, COMFYUI_MAX_CONCURRENCY),
+    health_check_interval=float(os.getenv("COMFYUI_HEALTH_CHECK_INTERVAL", "15")),
+    request_timeout=float(os.getenv("COMFYUI_REQUEST_TIMEOUT", "600")),
+    acquire_timeout=float(os.getenv("COMFYUI_ACQUIRE_TIMEOUT", "120")),
+)
 
 @app.post("/create-scenario-image")
 async def create_scenario_image(req: GenerationRequest):
     print("GOT REQUEST")
-    fut = asyncio.get_event_loop().create_future()
-    await generation_queue.put((req, fut))
-    return await fut
-
-async def worker():
-    while True:
-        req, fut = await generation_queue.get()
-        try:
-            image_base64 = await generate_image(req, COMFYUI_SERVER)
-            fut.set_result({"image_base64": image_base64})
-        except Exception as e:
-            fut.set_exception(e)
-        generation_queue.task_done()
+    try:
+        image_base64 = await pool.submit(req)
+    except NoBackendAvailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"image_base64": image_base64}
+
+@app.get("/backends")
+async def backends_status():
+    return pool.status()
 
 async def preload_models():
-    print("🚀 Preloading models on ComfyUI server...")
+    print("🚀 Preloading models on ComfyUI servers...")
     dummy_req = GenerationRequest(
         scene_summary="a simple scene",
         scene_detail="a basic background",
@@ -36,13 +38,13 @@ async def preload_models():
         ground_summary="ground",
         graphic_style="sketch"
     )
-    try:
-        await generate_image(dummy_req, COMFYUI_SERVER)
-        print("✅ Preload complete.")
-    except Exception as e:
-        print(f"⚠️ Preload failed: {e}")
+    await pool.preload(dummy_req)
 
 @app.on_event("startup")
 async def startup_event():
-    asyncio.create_task(worker())
+    await pool.start()
     await preload_models()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await pool.stop()
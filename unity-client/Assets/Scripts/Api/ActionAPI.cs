@@ -20,7 +20,8 @@ public static class ActionAPI
     /// <param name="fromCheckpointId">The last known checkpoint ID from the client.</param>
     /// <param name="onSuccess">Callback executed on a successful response, returning an ActionResponse.</param>
     /// <param name="onError">Callback executed if an error occurs.</param>
-    public static IEnumerator MovePlayer(string scenarioId, string fromCheckpointId, Action<ActionResponse> onSuccess = null, Action<string> onError = null)
+    /// <param name="onCheckpointExpired">Callback executed instead of onError when the server answers 410: the checkpoint expired, nothing was done and the client has to resync with the full state.</param>
+    public static IEnumerator MovePlayer(string scenarioId, string fromCheckpointId, Action<ActionResponse> onSuccess = null, Action<string> onError = null, Action onCheckpointExpired = null)
     {
         string url = $"{baseUrl}/action";
 
@@ -41,6 +42,7 @@ public static class ActionAPI
         Debug.Log($"[ActionAPI] Sending MOVE_PLAYER action to scenario: {scenarioId}");
 
         // 3. Use HttpUtils to send the POST request
+        bool checkpointExpired = false;
         yield return HttpUtils.Post<ActionResponse>(url, requestData,
             onSuccess: response =>
             {
@@ -49,14 +51,21 @@ public static class ActionAPI
             },
             onError: error =>
             {
+                if (checkpointExpired && onCheckpointExpired != null)
+                {
+                    Debug.LogWarning($"[ActionAPI] Checkpoint {fromCheckpointId} expired, MovePlayer needs a resync.");
+                    onCheckpointExpired();
+                    return;
+                }
                 Debug.LogError($"[ActionAPI] Error in MovePlayer action: {error}");
                 onError?.Invoke(error);
-            }
+            },
+            onErrorStatus: status => checkpointExpired = status == 410
         );
     }
 
 
-    public static IEnumerator TriggerEvent(string activationConditionId, string fromCheckpointId, Action<ActionResponse> onSuccess = null, Action<string> onError = null)
+    public static IEnumerator TriggerEvent(string activationConditionId, string fromCheckpointId, Action<ActionResponse> onSuccess = null, Action<string> onError = null, Action onCheckpointExpired = null)
     {
         string url = $"{baseUrl}/action";
 
@@ -77,6 +86,7 @@ public static class ActionAPI
         Debug.Log($"[ActionAPI] Sending TRIGGER_EVENT action for condition: {activationConditionId}");
 
         // 3. Use HttpUtils to send the POST request
+        bool checkpointExpired = false;
         yield return HttpUtils.Post<ActionResponse>(url, requestData,
             onSuccess: response =>
             {
@@ -85,9 +95,16 @@ public static class ActionAPI
             },
             onError: error =>
             {
+                if (checkpointExpired && onCheckpointExpired != null)
+                {
+                    Debug.LogWarning($"[ActionAPI] Checkpoint {fromCheckpointId} expired, TriggerEvent needs a resync.");
+                    onCheckpointExpired();
+                    return;
+                }
                 Debug.LogError($"[ActionAPI] Error in TriggerEvent action: {error}");
                 onError?.Invoke(error);
-            }
+            },
+            onErrorStatus: status => checkpointExpired = status == 410
         );
     }
 }
\ No newline at end of file
@@ -12,6 +12,13 @@ public class NarrativeStreamerAPI : MonoBehaviour
     private string _eventId;
     private string _baseUrl = "http://localhost:8000/game";
     private int _lastProcessedLength = 0;
+    // Id del último mensaje recibido, para reanudar el stream (cabecera Last-Event-ID)
+    private string _lastEventId = null;
+
+    // Reintentos del stream si se corta la conexión: se reanuda con Last-Event-ID
+    private const int MaxStreamRetries = 5;
+    private const float InitialRetryDelay = 0.5f;
+    private const float MaxRetryDelay = 8f;
 
     private void Awake()
     {
@@ -31,6 +38,7 @@ public class NarrativeStreamerAPI : MonoBehaviour
     {
         _eventId = eventId;
         _lastProcessedLength = 0;
+        _lastEventId = null;
         StartCoroutine(ConnectToEventStream());
     }
 
@@ -73,33 +81,77 @@ public class NarrativeStreamerAPI : MonoBehaviour
             NarrativeEventManager.Instance.PrepareForResumeAfterChoice()
         );
 
-        // 3) Volver a escuchar SSE desde la ruta principal
-        _lastProcessedLength = 0;
+        // 3) Volver a escuchar SSE desde la ruta principal (el servidor empieza una ejecución nueva)
         yield return StreamCoroutine($"{_baseUrl}/event/stream/{_eventId}");
     }
 
-    // Rutina común para leer cualquier SSE
+    // Rutina común para leer cualquier SSE. Si la conexión se corta, reintenta con backoff
+    // enviando el último id recibido, así el servidor solo reenvía lo que faltaba.
     private IEnumerator StreamCoroutine(string url)
+    {
+        float delay = InitialRetryDelay;
+        for (int attempt = 0; ; attempt++)
+        {
+            bool finished = false;
+            bool retryable = false;
+            yield return StreamRequestCoroutine(url, (ok, canRetry) => { finished = ok; retryable = canRetry; });
+
+            if (finished)
+            {
+                Debug.Log($"[NarrativeStreamerAPI] Stream finished successfully.");
+                // *** Aquí notificamos ***
+                SimpleMainThreadDispatcher.Instance.Enqueue(() =>
+                {
+                    NarrativeEventManager.Instance.OnStreamCompleted();
+                });
+                yield break;
+            }
+            if (!retryable || attempt >= MaxStreamRetries)
+            {
+                Debug.LogError($"[NarrativeStreamerAPI] Giving up on the stream after {attempt + 1} attempt(s).");
+                yield break;
+            }
+
+            Debug.LogWarning($"[NarrativeStreamerAPI] Reconnecting in {delay}s from id {_lastEventId ?? "-"}...");
+            yield return new WaitForSeconds(delay);
+            delay = Mathf.Min(delay * 2f, MaxRetryDelay);
+        }
+    }
+
+    // Una sola petición SSE. onDone(terminado bien, se puede reintentar)
+    private IEnumerator StreamRequestCoroutine(string url, Action<bool, bool> onDone)
     {
         Debug.Log($"[NarrativeStreamerAPI] Connecting to stream: {url}");
+        // Cada petición tiene su propio buffer: lo procesado se cuenta desde cero
+        _lastProcessedLength = 0;
         using (UnityWebRequest request = UnityWebRequest.Get(url))
         {
             request.downloadHandler = new DownloadHandlerBuffer();
             request.SetRequestHeader("Accept", "text/event-stream");
+            if (!string.IsNullOrEmpty(_lastEventId))
+                request.SetRequestHeader("Last-Event-ID", _lastEventId);
 
             var async = request.SendWebRequest();
 
-            while (!async.isDone)
+            while (true)
             {
+                bool done = async.isDone;
                 string fullText = request.downloadHandler.text;
                 if (!string.IsNullOrEmpty(fullText) && fullText.Length > _lastProcessedLength)
                 {
                     string newText = fullText.Substring(_lastProcessedLength);
                     _lastProcessedLength = fullText.Length;
 
-                    string[] lines = newText.Split(new[] { "\n\n" }, StringSplitOptions.RemoveEmptyEntries);
-                    foreach (string line in lines)
+                    string[] events = newText.Split(new[] { "\n\n" }, StringSplitOptions.RemoveEmptyEntries);
+                    foreach (string sseEvent in events)
                     {
+                        string line = sseEvent;
+                        if (line.StartsWith("id: "))
+                        {
+                            int newline = line.IndexOf('\n');
+                            _lastEventId = line.Substring(4, (newline == -1 ? line.Length : newline) - 4).Trim();
+                            line = newline == -1 ? "" : line.Substring(newline + 1);
+                        }
                         if (line.StartsWith("data: "))
                         {
                             string jsonPayload = line.Substring(6).Trim();
@@ -118,20 +170,20 @@ public class NarrativeStreamerAPI : MonoBehaviour
                         }
                     }
                 }
+                // Una última pasada tras terminar, para no perder lo que llegó con el final
+                if (done) break;
                 yield return null;
             }
 
             if (request.result != UnityWebRequest.Result.Success)
-                Debug.LogError($"[NarrativeStreamerAPI] Stream error: {request.error}");
-            else
             {
-                Debug.Log($"[NarrativeStreamerAPI] Stream finished successfully.");
-                // *** Aquí notificamos ***
-                SimpleMainThreadDispatcher.Instance.Enqueue(() =>
-                {
-                    NarrativeEventManager.Instance.OnStreamCompleted();
-                });
+                Debug.LogError($"[NarrativeStreamerAPI] Stream error: {request.error} ({request.responseCode})");
+                // Errores de red y del servidor; un 4xx no se arregla reintentando
+                bool canRetry = request.result == UnityWebRequest.Result.ConnectionError || request.responseCode >= 500;
+                onDone(false, canRetry);
             }
+            else
+                onDone(true, false);
         }
     }
 }
@@ -35,7 +35,8 @@ public static class HttpUtils
         }
     }
 
-    public static IEnumerator Post<T>(string url, object payload, Action<T> onSuccess, Action<string> onError = null)
+    /// <param name="onErrorStatus">Called with the HTTP status code before onError (0 if there was no response).</param>
+    public static IEnumerator Post<T>(string url, object payload, Action<T> onSuccess, Action<string> onError = null, Action<long> onErrorStatus = null)
     {
         string json = JsonConvert.SerializeObject(payload);
         byte[] bodyRaw = Encoding.UTF8.GetBytes(json);
@@ -52,6 +53,7 @@ public static class HttpUtils
         if (request.result != UnityWebRequest.Result.Success || request.responseCode >= 400)
         {
             Debug.LogError($"POST {url} failed: {request.error} ({request.responseCode})");
+            onErrorStatus?.Invoke(request.responseCode);
             onError?.Invoke(responseText ?? request.error);
             yield break;
         }
@@ -58,22 +58,37 @@ public class ActionHandler : MonoBehaviour
         ActionResponse finalResponse = null;
         string errorMessage = null;
         bool requestFinished = false;
+        bool checkpointExpired = false;
 
-        yield return ActionAPI.MovePlayer(
-            targetScenarioId,
-            GameManager.Instance.LastCheckpointId,
-            onSuccess: (response) => {
-                finalResponse = response;
-                requestFinished = true;
-            },
-            onError: (error) => {
-                errorMessage = error;
-                requestFinished = true;
-            }
-        );
-
-        // Wait until the callback has been executed
-        yield return new WaitUntil(() => requestFinished);
+        // At most twice: if our checkpoint expired the server did nothing, we resync and send it again
+        for (int attempt = 0; attempt < 2; attempt++)
+        {
+            requestFinished = false;
+            checkpointExpired = false;
+            yield return ActionAPI.MovePlayer(
+                targetScenarioId,
+                GameManager.Instance.LastCheckpointId,
+                onSuccess: (response) => {
+                    finalResponse = response;
+                    requestFinished = true;
+                },
+                onError: (error) => {
+                    errorMessage = error;
+                    requestFinished = true;
+                },
+                onCheckpointExpired: () => {
+                    checkpointExpired = true;
+                    requestFinished = true;
+                }
+            );
+
+            // Wait until the callback has been executed
+            yield return new WaitUntil(() => requestFinished);
+
+            if (!checkpointExpired) break;
+            errorMessage = "Checkpoint expired";
+            yield return ResyncFullState();
+        }
 
         // 3. Process the response
         if (finalResponse != null && string.IsNullOrEmpty(finalResponse.Error))
@@ -109,22 +124,37 @@ public class ActionHandler : MonoBehaviour
         ActionResponse finalResponse = null;
         string errorMessage = null;
         bool requestFinished = false;
+        bool checkpointExpired = false;
 
-        yield return ActionAPI.TriggerEvent(
-            activationConditionId,
-            GameManager.Instance.LastCheckpointId,
-            onSuccess: (response) => {
-                finalResponse = response;
-                requestFinished = true;
-            },
-            onError: (error) => {
-                errorMessage = error;
-                requestFinished = true;
-            }
-        );
-
-        // Wait until the callback has been executed
-        yield return new WaitUntil(() => requestFinished);
+        // Same as MovePlayerCoroutine: resync and retry once if our checkpoint expired
+        for (int attempt = 0; attempt < 2; attempt++)
+        {
+            requestFinished = false;
+            checkpointExpired = false;
+            yield return ActionAPI.TriggerEvent(
+                activationConditionId,
+                GameManager.Instance.LastCheckpointId,
+                onSuccess: (response) => {
+                    finalResponse = response;
+                    requestFinished = true;
+                },
+                onError: (error) => {
+                    errorMessage = error;
+                    requestFinished = true;
+                },
+                onCheckpointExpired: () => {
+                    checkpointExpired = true;
+                    requestFinished = true;
+                }
+            );
+
+            // Wait until the callback has been executed
+            yield return new WaitUntil(() => requestFinished);
+
+            if (!checkpointExpired) break;
+            errorMessage = "Checkpoint expired";
+            yield return ResyncFullState();
+        }
 
         // 3. Process the response
         if (finalResponse != null && string.IsNullOrEmpty(finalResponse.Error))
@@ -150,6 +180,19 @@ public class ActionHandler : MonoBehaviour
         }
     }
 
+    /// <summary>
+    /// Gets the full state again (and with it a new checkpoint) after the server told us our
+    /// checkpoint expired. Applying it over the current state is safe, everything comes as "add".
+    /// </summary>
+    private IEnumerator ResyncFullState()
+    {
+        Debug.Log("Checkpoint expired, resyncing with the full state...");
+        yield return StateAPI.GetFullState(
+            onSuccess: changeset => new ChangeSetApplier().Apply(changeset),
+            onError: error => Debug.LogError($"Resync failed: {error}")
+        );
+    }
+
     private void HandleActionError(string errorMessage)
     {
         Debug.LogError($"Action failed: {errorMessage}");